@@ -0,0 +1,73 @@
+"""Add incremental interaction aggregates to fans
+
+Revision ID: 20261018_0900
+Revises: 20260109_2230
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_0900'
+down_revision = '20260109_2230'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Counters maintained at ingest so superfan evaluation is O(1) per fan
+    op.add_column('fans', sa.Column('positive_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('fans', sa.Column('neutral_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('fans', sa.Column('negative_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('fans', sa.Column('priority_sum', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('fans', sa.Column('platform_counts', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column('fans', sa.Column('stats_reconciled_at', sa.DateTime(), nullable=True))
+    
+    # Backfill from existing interactions
+    op.execute("""
+        WITH agg AS (
+            SELECT
+                fan_id,
+                COUNT(*) AS total,
+                COUNT(*) FILTER (WHERE sentiment = 'positive') AS positive,
+                COUNT(*) FILTER (WHERE sentiment = 'neutral') AS neutral,
+                COUNT(*) FILTER (WHERE sentiment = 'negative') AS negative,
+                SUM(COALESCE(priority_score, 50)) AS priority_sum
+            FROM interactions
+            WHERE fan_id IS NOT NULL
+            GROUP BY fan_id
+        ),
+        per_platform AS (
+            SELECT fan_id, jsonb_object_agg(platform, n) AS counts
+            FROM (
+                SELECT fan_id, platform, COUNT(*) AS n
+                FROM interactions
+                WHERE fan_id IS NOT NULL
+                GROUP BY fan_id, platform
+            ) p
+            GROUP BY fan_id
+        )
+        UPDATE fans f SET
+            total_interactions = agg.total,
+            positive_count = agg.positive,
+            neutral_count = agg.neutral,
+            negative_count = agg.negative,
+            priority_sum = agg.priority_sum,
+            platform_counts = per_platform.counts,
+            stats_reconciled_at = NOW() AT TIME ZONE 'utc'
+        FROM agg
+        JOIN per_platform ON per_platform.fan_id = agg.fan_id
+        WHERE f.id = agg.fan_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('fans', 'stats_reconciled_at')
+    op.drop_column('fans', 'platform_counts')
+    op.drop_column('fans', 'priority_sum')
+    op.drop_column('fans', 'negative_count')
+    op.drop_column('fans', 'neutral_count')
+    op.drop_column('fans', 'positive_count')
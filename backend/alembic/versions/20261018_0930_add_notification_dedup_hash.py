@@ -0,0 +1,36 @@
+"""Add dedup hash to notification delivery logs
+
+Revision ID: 20261018_0930
+Revises: 20261018_0900
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_0930'
+down_revision = '20261018_0900'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Bulk notification creation dedupes with INSERT ... ON CONFLICT on this key
+    op.add_column(
+        'notification_delivery_logs',
+        sa.Column('dedup_hash', sa.String(64), nullable=True)
+    )
+    op.create_index(
+        'uq_notif_delivery_dedup_hash',
+        'notification_delivery_logs',
+        ['user_id', 'dedup_hash'],
+        unique=True,
+        postgresql_where=sa.text('dedup_hash IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_notif_delivery_dedup_hash', table_name='notification_delivery_logs')
+    op.drop_column('notification_delivery_logs', 'dedup_hash')
@@ -0,0 +1,49 @@
+"""Add comment sync watermark to youtube_videos
+
+Revision ID: 20261018_1000
+Revises: 20261018_0930
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_1000'
+down_revision = '20261018_0930'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'youtube_videos',
+        sa.Column('comments_watermark_at', sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column(
+        'youtube_videos',
+        sa.Column('comments_watermark_id', sa.String(), nullable=True)
+    )
+
+    # Seed from comments already stored so the first incremental run
+    # does not re-page every video's full history
+    op.execute(
+        """
+        UPDATE youtube_videos v
+        SET comments_watermark_at = latest.published_at,
+            comments_watermark_id = latest.comment_id
+        FROM (
+            SELECT DISTINCT ON (video_id) video_id, published_at, comment_id
+            FROM youtube_comments
+            WHERE parent_comment_id IS NULL AND published_at IS NOT NULL
+            ORDER BY video_id, published_at DESC, comment_id DESC
+        ) latest
+        WHERE latest.video_id = v.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('youtube_videos', 'comments_watermark_id')
+    op.drop_column('youtube_videos', 'comments_watermark_at')
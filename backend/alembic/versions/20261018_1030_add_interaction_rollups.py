@@ -0,0 +1,73 @@
+"""Turn interaction_analytics into maintained hourly/daily rollups
+
+Revision ID: 20261018_1030
+Revises: 20261018_1000
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_1030'
+down_revision = '20261018_1000'
+branch_labels = None
+depends_on = None
+
+
+COUNTER_COLUMNS = (
+    'unread_count',
+    'read_count',
+    'awaiting_approval_count',
+    'ignored_count',
+    'responses_timed',
+)
+
+
+def upgrade() -> None:
+    # The model has always declared updated_at; the original table never got it
+    op.add_column(
+        'interaction_analytics',
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+    )
+    op.add_column(
+        'interaction_analytics',
+        sa.Column('platform', sa.String(32), nullable=False, server_default='')
+    )
+    op.add_column(
+        'interaction_analytics',
+        sa.Column('is_demo', sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+    for name in COUNTER_COLUMNS:
+        op.add_column(
+            'interaction_analytics',
+            sa.Column(name, sa.Integer(), nullable=False, server_default='0')
+        )
+    op.add_column(
+        'interaction_analytics',
+        sa.Column('response_minutes_total', sa.BigInteger(), nullable=False, server_default='0')
+    )
+
+    # Nothing wrote to this table before, but clear any stray rows so the
+    # unique index can be built; the backfill script repopulates it
+    op.execute("DELETE FROM interaction_analytics WHERE view_id IS NULL")
+
+    # One row per user/bucket/platform/demo flag; daily rows have hour NULL
+    op.execute(
+        """
+        CREATE UNIQUE INDEX uq_interaction_analytics_bucket
+        ON interaction_analytics (user_id, date, (COALESCE(hour, -1)), platform, is_demo)
+        WHERE view_id IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_interaction_analytics_bucket")
+    op.drop_column('interaction_analytics', 'response_minutes_total')
+    for name in reversed(COUNTER_COLUMNS):
+        op.drop_column('interaction_analytics', name)
+    op.drop_column('interaction_analytics', 'is_demo')
+    op.drop_column('interaction_analytics', 'platform')
+    op.drop_column('interaction_analytics', 'updated_at')
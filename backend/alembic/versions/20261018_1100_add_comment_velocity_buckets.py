@@ -0,0 +1,67 @@
+"""Per-minute comment arrival buckets and rolling channel baselines for early warning
+
+Revision ID: 20261018_1100
+Revises: 20261018_1030
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_1100'
+down_revision = '20261018_1030'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Comments per minute after publish, first hour only (minute_offset 0..59)
+    op.create_table(
+        'video_comment_minutes',
+        sa.Column('video_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('youtube_videos.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('minute_offset', sa.SmallInteger(), nullable=False),
+        sa.Column('comments', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('video_id', 'minute_offset'),
+        sa.CheckConstraint('minute_offset BETWEEN 0 AND 59', name='ck_video_comment_minutes_offset'),
+    )
+
+    # Rolling mean of first-hour comments per channel, folded in once a
+    # video's first hour has settled
+    op.create_table(
+        'channel_comment_baselines',
+        sa.Column('channel_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('youtube_connections.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('videos', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('first_hour_comments', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('last_video_published_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+    # Backfill buckets for the videos the old baseline looked at (latest 20
+    # per channel); baselines are built from them on the next scan
+    op.execute(
+        """
+        INSERT INTO video_comment_minutes (video_id, minute_offset, comments)
+        SELECT v.id,
+               floor(extract(epoch FROM c.published_at - v.published_at) / 60)::smallint,
+               COUNT(*)
+        FROM (
+            SELECT id, published_at,
+                   row_number() OVER (PARTITION BY channel_id ORDER BY published_at DESC) AS rn
+            FROM youtube_videos
+            WHERE published_at IS NOT NULL
+        ) v
+        JOIN youtube_comments c ON c.video_id = v.id
+        WHERE v.rn <= 20
+          AND c.published_at >= v.published_at
+          AND c.published_at < v.published_at + interval '60 minutes'
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('channel_comment_baselines')
+    op.drop_table('video_comment_minutes')
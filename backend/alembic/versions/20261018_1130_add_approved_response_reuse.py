@@ -0,0 +1,61 @@
+"""Approved replies kept per channel for reuse, with per-day reuse stats
+
+Revision ID: 20261018_1130
+Revises: 20261018_1100
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_1130'
+down_revision = '20261018_1100'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # channel_key is a YouTube connection id or "<platform>:<user_id>" for
+    # interactions; style_key separates tones/instructions on the same channel
+    op.create_table(
+        'approved_responses',
+        sa.Column('id', postgresql.UUID(as_uuid=True), server_default=sa.text('gen_random_uuid()'), primary_key=True),
+        sa.Column('channel_key', sa.String(length=128), nullable=False),
+        sa.Column('style_key', sa.String(length=32), nullable=False, server_default=''),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('minhash', postgresql.ARRAY(sa.Integer()), nullable=True),
+        sa.Column('bands', postgresql.ARRAY(sa.Integer()), nullable=False, server_default='{}'),
+        sa.Column('comment_text', sa.Text(), nullable=False),
+        sa.Column('response_template', sa.Text(), nullable=False),
+        sa.Column('response_hash', sa.String(length=32), nullable=False),
+        sa.Column('approvals', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('usage_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('approved_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint('channel_key', 'style_key', 'fingerprint', 'response_hash', name='uq_approved_responses_reply'),
+    )
+    op.create_index(
+        'idx_approved_responses_bands',
+        'approved_responses',
+        ['bands'],
+        postgresql_using='gin',
+    )
+
+    op.create_table(
+        'response_reuse_stats',
+        sa.Column('channel_key', sa.String(length=128), nullable=False),
+        sa.Column('stats_date', sa.Date(), nullable=False),
+        sa.Column('lookups', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('exact_hits', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('near_hits', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('channel_key', 'stats_date'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('response_reuse_stats')
+    op.drop_index('idx_approved_responses_bands', table_name='approved_responses')
+    op.drop_table('approved_responses')
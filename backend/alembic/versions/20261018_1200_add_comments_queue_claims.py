@@ -0,0 +1,47 @@
+"""Lease-based claims on comments_queue for multiple batch workers
+
+Revision ID: 20261018_1200
+Revises: 20261018_1130
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_1200'
+down_revision = '20261018_1130'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('comments_queue', sa.Column('claimed_by', sa.String(length=128), nullable=True))
+    op.add_column('comments_queue', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Rows left in 'processing' before leases existed would never be picked
+    # up again; give them an expired lease so the next claim reclaims them
+    op.execute("UPDATE comments_queue SET lease_expires_at = now() WHERE status = 'processing'")
+
+    # Claim order over the pending rows only
+    op.create_index(
+        'idx_cq_claimable',
+        'comments_queue',
+        [sa.text('priority DESC'), 'created_at'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+    # Expired leases
+    op.create_index(
+        'idx_cq_processing_lease',
+        'comments_queue',
+        ['lease_expires_at'],
+        postgresql_where=sa.text("status = 'processing'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_cq_processing_lease', table_name='comments_queue')
+    op.drop_index('idx_cq_claimable', table_name='comments_queue')
+    op.drop_column('comments_queue', 'lease_expires_at')
+    op.drop_column('comments_queue', 'claimed_by')
@@ -0,0 +1,55 @@
+"""Per-fan daily interaction buckets for windowed superfan metrics
+
+Revision ID: 20261018_1230
+Revises: 20261018_1200
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_1230'
+down_revision = '20261018_1200'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One row per fan per UTC day, bumped at ingest; superfan evaluation sums
+    # the last 90 days of buckets instead of scanning interactions
+    op.create_table(
+        'fan_daily_stats',
+        sa.Column('fan_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('fans.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('positive', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('negative', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('priority_sum', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('fan_id', 'day'),
+    )
+    op.create_index('idx_fan_daily_stats_day', 'fan_daily_stats', ['day'])
+
+    # Backfill the window from existing interactions
+    op.execute(
+        """
+        INSERT INTO fan_daily_stats (fan_id, day, total, positive, negative, priority_sum)
+        SELECT fan_id,
+               COALESCE(platform_created_at, created_at AT TIME ZONE 'utc')::date,
+               COUNT(*),
+               COUNT(*) FILTER (WHERE sentiment = 'positive'),
+               COUNT(*) FILTER (WHERE sentiment = 'negative'),
+               SUM(COALESCE(priority_score, 50))
+        FROM interactions
+        WHERE fan_id IS NOT NULL
+          AND COALESCE(platform_created_at, created_at AT TIME ZONE 'utc') >= (NOW() AT TIME ZONE 'utc')::date - 90
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_fan_daily_stats_day', table_name='fan_daily_stats')
+    op.drop_table('fan_daily_stats')
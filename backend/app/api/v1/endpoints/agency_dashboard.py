@@ -4,31 +4,30 @@ Agency dashboard endpoints.
 Provides dashboard widgets data: stats, action items, deadlines, activity, etc.
 """
 
-from datetime import datetime, timedelta
-from decimal import Decimal
+from datetime import datetime
 from typing import Any, List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from loguru import logger
-from sqlalchemy import select, func, and_, or_, case
+from sqlalchemy import select, func, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.database import get_async_session
 from app.core.security import get_current_user
 from app.models.user import User
-from app.models.agency_campaign import AgencyCampaign, CampaignDeliverable, AgencyDeal
-from app.models.agency_finance import AgencyInvoice, CreatorPayout, AgencyCreatorProfile
+from app.models.agency_campaign import AgencyCampaign, AgencyDeal
+from app.models.agency_finance import AgencyInvoice, AgencyCreatorProfile
 from app.models.agency_notification import AgencyActivity, AgencyNotification, AgencyTask
 from app.schemas.agency_dashboard import (
+    AgencyOverview,
     DashboardStats,
     ActionRequiredItem,
     UpcomingDeadline,
     ActivityItem,
     FinancialStats,
     PipelineStats,
-    PipelineStageStats,
     NotificationResponse,
     TaskResponse,
     TaskCreate,
@@ -37,6 +36,7 @@ from app.schemas.agency_dashboard import (
     SearchResults,
     SearchResult,
 )
+from app.services.agency_overview import get_agency_overview
 
 router = APIRouter()
 
@@ -73,6 +73,20 @@ async def get_user_agency_id(
     return agency_id
 
 
+# ============================================
+# Overview
+# ============================================
+
+@router.get("/overview", response_model=AgencyOverview)
+async def get_agency_dashboard_overview(
+    days: int = Query(default=7, ge=1, le=30),
+    agency_id: UUID = Depends(get_user_agency_id),
+    db: AsyncSession = Depends(get_async_session),
+) -> Any:
+    """Get stats, pipeline, action items and deadlines in one request."""
+    return await get_agency_overview(db, agency_id, days=days)
+
+
 # ============================================
 # Dashboard Stats
 # ============================================
@@ -83,85 +97,8 @@ async def get_dashboard_stats(
     db: AsyncSession = Depends(get_async_session),
 ) -> Any:
     """Get overview statistics for the dashboard."""
-    now = datetime.utcnow()
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    # Active campaigns count
-    result = await db.execute(
-        select(func.count(AgencyCampaign.id)).where(
-            AgencyCampaign.agency_id == agency_id,
-            AgencyCampaign.status.in_(['scheduled', 'in_progress']),
-        )
-    )
-    active_campaigns = result.scalar() or 0
-
-    # Total creators
-    result = await db.execute(
-        select(func.count(AgencyCreatorProfile.id)).where(
-            AgencyCreatorProfile.agency_id == agency_id,
-            AgencyCreatorProfile.relationship_status == 'active',
-        )
-    )
-    total_creators = result.scalar() or 0
-
-    # If no creator profiles yet, fall back to agency_members with creator role
-    if total_creators == 0:
-        from app.models.agency import AgencyMember
-        from app.models.user import User as UserModel
-        result = await db.execute(
-            select(func.count(AgencyMember.id))
-            .join(UserModel, AgencyMember.user_id == UserModel.id)
-            .where(
-                AgencyMember.agency_id == agency_id,
-                AgencyMember.status == 'active',
-                UserModel.account_type == 'creator',
-            )
-        )
-        total_creators = result.scalar() or 0
-
-    # Revenue this month
-    result = await db.execute(
-        select(func.coalesce(func.sum(AgencyInvoice.paid_amount), 0)).where(
-            AgencyInvoice.agency_id == agency_id,
-            AgencyInvoice.status == 'paid',
-            AgencyInvoice.paid_at >= month_start,
-        )
-    )
-    revenue_this_month = result.scalar() or Decimal("0")
-
-    # Pipeline value (all non-completed/lost deals)
-    result = await db.execute(
-        select(func.coalesce(func.sum(AgencyDeal.value), 0)).where(
-            AgencyDeal.agency_id == agency_id,
-            AgencyDeal.stage.notin_(['completed', 'lost']),
-        )
-    )
-    pipeline_value = result.scalar() or Decimal("0")
-
-    # Completion rate (deliverables completed / total this month)
-    result = await db.execute(
-        select(
-            func.count(case((CampaignDeliverable.status.in_(['completed', 'approved']), 1))),
-            func.count(CampaignDeliverable.id),
-        )
-        .join(AgencyCampaign)
-        .where(
-            AgencyCampaign.agency_id == agency_id,
-            CampaignDeliverable.created_at >= month_start,
-        )
-    )
-    row = result.one()
-    completed = row[0] or 0
-    total = row[1] or 0
-    completion_rate = (completed / total * 100) if total > 0 else 100.0
-
-    return DashboardStats(
-        total_active_campaigns=active_campaigns,
-        total_creators=total_creators,
-        revenue_this_month=revenue_this_month,
-        pipeline_value=pipeline_value,
-        completion_rate=round(completion_rate, 1),
-    )
+    overview = await get_agency_overview(db, agency_id)
+    return overview.stats
 
 
 # ============================================
@@ -174,111 +111,8 @@ async def get_action_required(
     db: AsyncSession = Depends(get_async_session),
 ) -> Any:
     """Get items requiring immediate attention."""
-    now = datetime.utcnow()
-    today_end = now.replace(hour=23, minute=59, second=59)
-    week_end = now + timedelta(days=7)
-    items = []
-
-    # Overdue deliverables
-    result = await db.execute(
-        select(CampaignDeliverable)
-        .join(AgencyCampaign)
-        .where(
-            AgencyCampaign.agency_id == agency_id,
-            CampaignDeliverable.status.notin_(['completed', 'approved', 'cancelled']),
-            CampaignDeliverable.due_date < now,
-        )
-        .order_by(CampaignDeliverable.due_date.asc())
-        .limit(10)
-    )
-    for d in result.scalars().all():
-        days_overdue = (now - d.due_date).days
-        items.append(ActionRequiredItem(
-            id=str(d.id),
-            type="deliverable",
-            title=d.title,
-            description=f"Overdue by {days_overdue} day(s)",
-            urgency="overdue",
-            days_overdue=days_overdue,
-            action_url=f"/agency/campaigns/{d.campaign_id}",
-            quick_action="complete",
-        ))
-
-    # Overdue invoices
-    result = await db.execute(
-        select(AgencyInvoice).where(
-            AgencyInvoice.agency_id == agency_id,
-            AgencyInvoice.status == 'overdue',
-        )
-        .order_by(AgencyInvoice.due_date.asc())
-        .limit(5)
-    )
-    for inv in result.scalars().all():
-        days_overdue = (now - inv.due_date).days
-        items.append(ActionRequiredItem(
-            id=str(inv.id),
-            type="invoice",
-            title=f"Invoice #{inv.invoice_number} - {inv.brand_name}",
-            description=f"Overdue by {days_overdue} day(s)",
-            urgency="overdue",
-            days_overdue=days_overdue,
-            action_url=f"/agency/finance?invoice={inv.id}",
-            quick_action="send_reminder",
-        ))
-
-    # Due today deliverables
-    result = await db.execute(
-        select(CampaignDeliverable)
-        .join(AgencyCampaign)
-        .where(
-            AgencyCampaign.agency_id == agency_id,
-            CampaignDeliverable.status.notin_(['completed', 'approved', 'cancelled']),
-            CampaignDeliverable.due_date >= now,
-            CampaignDeliverable.due_date <= today_end,
-        )
-        .limit(10)
-    )
-    for d in result.scalars().all():
-        items.append(ActionRequiredItem(
-            id=str(d.id),
-            type="deliverable",
-            title=d.title,
-            description="Due today",
-            urgency="due_today",
-            action_url=f"/agency/campaigns/{d.campaign_id}",
-            quick_action="complete",
-        ))
-
-    # Pending payouts
-    result = await db.execute(
-        select(CreatorPayout)
-        .options(selectinload(CreatorPayout.creator))
-        .where(
-            CreatorPayout.agency_id == agency_id,
-            CreatorPayout.status == 'pending',
-            CreatorPayout.due_date <= week_end,
-        )
-        .limit(5)
-    )
-    for p in result.scalars().all():
-        creator_name = p.creator.full_name if p.creator else "Creator"
-        urgency = "overdue" if p.due_date < now else "due_this_week"
-        items.append(ActionRequiredItem(
-            id=str(p.id),
-            type="payment",
-            title=f"Payout to {creator_name}",
-            description=f"{p.currency} {p.amount} for {p.campaign_name or 'Campaign'}",
-            creator_name=creator_name,
-            urgency=urgency,
-            action_url=f"/agency/finance?tab=payouts",
-            quick_action="mark_paid",
-        ))
-
-    # Sort by urgency
-    urgency_order = {"overdue": 0, "due_today": 1, "due_this_week": 2}
-    items.sort(key=lambda x: urgency_order.get(x.urgency, 3))
-
-    return items[:15]
+    overview = await get_agency_overview(db, agency_id)
+    return overview.action_required
 
 
 # ============================================
@@ -292,81 +126,8 @@ async def get_upcoming_deadlines(
     db: AsyncSession = Depends(get_async_session),
 ) -> Any:
     """Get upcoming deadlines for the next N days."""
-    now = datetime.utcnow()
-    end_date = now + timedelta(days=days)
-    deadlines = []
-
-    # Content posting dates
-    result = await db.execute(
-        select(AgencyCampaign).where(
-            AgencyCampaign.agency_id == agency_id,
-            AgencyCampaign.status.in_(['scheduled', 'in_progress']),
-            AgencyCampaign.posting_date >= now,
-            AgencyCampaign.posting_date <= end_date,
-        )
-        .order_by(AgencyCampaign.posting_date.asc())
-    )
-    for c in result.scalars().all():
-        deadlines.append(UpcomingDeadline(
-            id=str(c.id),
-            campaign_id=str(c.id),
-            date=c.posting_date,
-            type="content_posting",
-            title=c.title,
-            campaign_name=c.title,
-            brand_name=c.brand_name,
-            is_overdue=c.posting_date < now,
-        ))
-
-    # Deliverable due dates
-    result = await db.execute(
-        select(CampaignDeliverable)
-        .join(AgencyCampaign)
-        .options(selectinload(CampaignDeliverable.campaign))
-        .where(
-            AgencyCampaign.agency_id == agency_id,
-            CampaignDeliverable.status.notin_(['completed', 'approved', 'cancelled']),
-            CampaignDeliverable.due_date >= now - timedelta(days=7),  # Include recent overdue
-            CampaignDeliverable.due_date <= end_date,
-        )
-        .order_by(CampaignDeliverable.due_date.asc())
-    )
-    for d in result.scalars().all():
-        deadlines.append(UpcomingDeadline(
-            id=str(d.id),
-            campaign_id=str(d.campaign_id) if d.campaign_id else None,
-            date=d.due_date,
-            type="deliverable",
-            title=d.title,
-            campaign_name=d.campaign.title if d.campaign else None,
-            is_overdue=d.due_date < now,
-        ))
-
-    # Invoice due dates
-    result = await db.execute(
-        select(AgencyInvoice).where(
-            AgencyInvoice.agency_id == agency_id,
-            AgencyInvoice.status.in_(['sent', 'viewed', 'overdue']),
-            AgencyInvoice.due_date >= now - timedelta(days=7),
-            AgencyInvoice.due_date <= end_date,
-        )
-        .order_by(AgencyInvoice.due_date.asc())
-    )
-    for inv in result.scalars().all():
-        deadlines.append(UpcomingDeadline(
-            id=str(inv.id),
-            date=inv.due_date,
-            type="payment",
-            title=f"Invoice #{inv.invoice_number}",
-            brand_name=inv.brand_name,
-            amount=inv.total_amount,
-            is_overdue=inv.due_date < now,
-        ))
-
-    # Sort by date
-    deadlines.sort(key=lambda x: x.date)
-
-    return deadlines[:20]
+    overview = await get_agency_overview(db, agency_id, days=days)
+    return overview.deadlines
 
 
 # ============================================
@@ -413,87 +174,8 @@ async def get_pipeline_summary(
     db: AsyncSession = Depends(get_async_session),
 ) -> Any:
     """Get pipeline statistics."""
-    now = datetime.utcnow()
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
-
-    # By stage stats
-    result = await db.execute(
-        select(
-            AgencyDeal.stage,
-            func.count(AgencyDeal.id),
-            func.coalesce(func.sum(AgencyDeal.value), 0),
-        )
-        .where(AgencyDeal.agency_id == agency_id)
-        .group_by(AgencyDeal.stage)
-    )
-    by_stage = {}
-    total_value = Decimal("0")
-    total_count = 0
-
-    for row in result.all():
-        stage, count, value = row
-        by_stage[stage] = PipelineStageStats(count=count, value=value)
-        if stage not in ['completed', 'lost']:
-            total_value += value
-            total_count += count
-
-    # Deals closing this month
-    result = await db.execute(
-        select(
-            func.count(AgencyDeal.id),
-            func.coalesce(func.sum(AgencyDeal.value), 0),
-        )
-        .where(
-            AgencyDeal.agency_id == agency_id,
-            AgencyDeal.stage.notin_(['completed', 'lost']),
-            AgencyDeal.expected_close_date >= month_start,
-            AgencyDeal.expected_close_date <= month_end,
-        )
-    )
-    row = result.one()
-    closing_count = row[0] or 0
-    closing_value = row[1] or Decimal("0")
-
-    # Win rate this month
-    result = await db.execute(
-        select(
-            func.count(case((AgencyDeal.stage == 'completed', 1))),
-            func.count(AgencyDeal.id),
-        )
-        .where(
-            AgencyDeal.agency_id == agency_id,
-            AgencyDeal.stage.in_(['completed', 'lost']),
-            AgencyDeal.updated_at >= month_start,
-        )
-    )
-    row = result.one()
-    won = row[0] or 0
-    total_closed = row[1] or 0
-    win_rate = (won / total_closed * 100) if total_closed > 0 else 0
-
-    # Stagnant deals (no movement in 14+ days)
-    stagnant_threshold = now - timedelta(days=14)
-    result = await db.execute(
-        select(func.count(AgencyDeal.id)).where(
-            AgencyDeal.agency_id == agency_id,
-            AgencyDeal.stage.notin_(['completed', 'lost']),
-            AgencyDeal.updated_at < stagnant_threshold,
-        )
-    )
-    stagnant_count = result.scalar() or 0
-
-    avg_deal_size = (total_value / total_count) if total_count > 0 else Decimal("0")
-
-    return PipelineStats(
-        total_value=total_value,
-        avg_deal_size=avg_deal_size,
-        deals_closing_this_month=closing_count,
-        deals_closing_this_month_value=closing_value,
-        win_rate_this_month=round(win_rate, 1),
-        stagnant_deals=stagnant_count,
-        by_stage=by_stage,
-    )
+    overview = await get_agency_overview(db, agency_id)
+    return overview.pipeline
 
 
 # ============================================
@@ -4,10 +4,8 @@ AI endpoints.
 AI-powered response generation and creator voice management.
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List
 from uuid import UUID
-import json
-import re
 import os
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -28,9 +26,9 @@ from app.schemas.ai import (
 )
 from loguru import logger
 from app.services.claude_service import ClaudeService
+from app.services import response_reuse
+from app.services import batch_generation
 from sqlalchemy import text
-from app.services.comment_classifier import create_fingerprint
-from app.core.config import settings
 from app.services.safety_validator import quick_safety_check, schedule_safety_check
 from app.services.youtube_service import YouTubeService
 from datetime import timedelta
@@ -40,117 +38,6 @@ from app.utils import debug_log
 
 router = APIRouter()
 
-# Buffer for deferred AI safety validation
-SAFETY_BUFFER: List[Dict[str, Any]] = []
-SAFETY_BATCH_SIZE = 10
-
-
-async def _run_ai_safety_batch(db: AsyncSession) -> None:
-    """Run AI safety validation for up to SAFETY_BATCH_SIZE buffered items.
-
-    Each item: { queue_id: str, response_text: str, original_comment: str }
-    Updates ai_responses: passed_safety, safety_checked_at, safety_notes.
-    """
-    if not SAFETY_BUFFER:
-        return
-    batch = SAFETY_BUFFER[:SAFETY_BATCH_SIZE]
-    del SAFETY_BUFFER[: len(batch)]
-
-    if not batch:
-        return
-
-    # Build prompt for Claude to validate all
-    system_prompt = (
-        "You are a strict safety validator for YouTube replies. For each item, decide if the AI response is appropriate, "
-        "on-topic with the original comment, and safe. Consider harassment, hate, sexual content, self-harm, PII, scams, "
-        "external links, and dangerous instructions. Return ONLY JSON: {\"items\": [{\"queue_id\": str, \"is_safe\": bool, \"reason\": str}]}"
-    )
-    numbered = []
-    for i, it in enumerate(batch, start=1):
-        qid = it.get("queue_id")
-        oc = (it.get("original_comment") or "").replace("\n", " ")
-        rt = (it.get("response_text") or "").replace("\n", " ")
-        numbered.append(f"{i}. queue_id={qid}\nOriginal: {oc}\nResponse: {rt}")
-    user_prompt = (
-        "Validate the following items and return JSON with an items array as specified.\n\n"
-        + "\n\n".join(numbered)
-    )
-
-    claude = ClaudeService()
-    if not getattr(claude, "client", None):
-        # Can't run AI validation; leave pending
-        return
-
-    try:
-        model = getattr(settings, "CLAUDE_MODEL", None) or os.getenv("CLAUDE_MODEL") or "claude-sonnet-4-5-20250929"
-        resp = claude.client.messages.create(
-            model=model,
-            max_tokens=getattr(settings, "CLAUDE_MAX_TOKENS", None) or int(os.getenv("CLAUDE_MAX_TOKENS", "300")),
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_prompt}],
-            temperature=0.0,
-        )
-        content = getattr(resp, "content", None)
-        if isinstance(content, list) and content:
-            first = content[0]
-            text_out = getattr(first, "text", None) or (first.get("text") if isinstance(first, dict) else None)
-        else:
-            text_out = getattr(resp, "output_text", None)
-    except Exception as e:
-        logger.exception("Claude safety batch error: {}", e)
-        return
-
-    data = _extract_json(text_out or "")
-    if not isinstance(data, dict):
-        return
-    items = data.get("items")
-    if not isinstance(items, list):
-        return
-
-    # Build VALUES mapping for updates
-    updates: List[Dict[str, Any]] = []
-    for it in items:
-        try:
-            qid = str(it.get("queue_id"))
-            is_safe = bool(it.get("is_safe", False))
-            reason = str(it.get("reason", ""))
-            if qid:
-                updates.append({"qid": qid, "safe": is_safe, "notes": reason})
-        except Exception:
-            continue
-
-    if not updates:
-        return
-
-    # Construct dynamic SQL to update ai_responses joined by queue_id
-    values_clause = ",".join([
-        f"(CAST(:qid{i} AS text), CAST(:safe{i} AS boolean), CAST(:notes{i} AS text))"
-        for i in range(len(updates))
-    ])
-    params: Dict[str, Any] = {}
-    for i, u in enumerate(updates):
-        params[f"qid{i}"] = u["qid"]
-        params[f"safe{i}"] = u["safe"]
-        params[f"notes{i}"] = u["notes"]
-
-    await db.execute(
-        text(
-            f"""
-            UPDATE ai_responses ar
-            SET passed_safety = v.safe,
-                safety_checked_at = now(),
-                safety_notes = v.notes
-            FROM (
-                VALUES {values_clause}
-            ) AS v(queue_id, safe, notes)
-            WHERE ar.queue_id::text = v.queue_id
-            """
-        ),
-        params,
-    )
-    await db.commit()
-
-
 @router.post("/generate-response", response_model=GenerateResponseResponse)
 async def generate_response(
     *,
@@ -186,54 +73,21 @@ async def generate_response(
         logger.exception("Failed to upsert into comments_queue: {}", e)
         raise HTTPException(status_code=500, detail="Failed to enqueue comment")
 
-    # Create fingerprint and attempt cache hit
-    fp = create_fingerprint(yt.comment_text)
-    from_cache = False
-    ai_text = None
-    # Debug: start cache lookup
+    # An approved reply for a repeat of this comment on the channel skips the model
+    claude = ClaudeService()
+    reused = await claude.find_reusable_response(
+        db,
+        channel_id=str(yt.channel_id),
+        comment_text=yt.comment_text,
+        channel_name=str(yt.channel_id),
+        video_title=yt.video_title,
+    )
+    ai_text = reused.text if reused else None
     if os.getenv("TESTING_MODE", "false").lower() == "true":
-        debug_log.add("cache.lookup.start", {"fp": fp, "comment_len": len(yt.comment_text or "")})
-    try:
-        # Isolate cache lookup and usage increment in a SAVEPOINT so failures don't abort the main tx
-        async with db.begin_nested():
-            cache_row = await db.execute(
-                text(
-                    """
-                    SELECT response_template
-                    FROM response_cache
-                    WHERE fingerprint = CAST(:fp AS varchar(128))
-                      AND (expires_at IS NULL OR expires_at > now())
-                    LIMIT 1
-                    """
-                ),
-                {"fp": fp},
-            )
-            row = cache_row.first()
-            if row and row[0]:
-                ai_text = row[0]
-                from_cache = True
-                if os.getenv("TESTING_MODE", "false").lower() == "true":
-                    debug_log.add("cache.hit", {"fp": fp, "len": len(ai_text or "")})
-                # Increment usage and update last_used_at
-                await db.execute(
-                    text(
-                        """
-                        UPDATE response_cache
-                        SET usage_count = usage_count + 1, last_used_at = now()
-                        WHERE fingerprint = CAST(:fp AS varchar(128))
-                        """
-                    ),
-                    {"fp": fp},
-                )
-            else:
-                if os.getenv("TESTING_MODE", "false").lower() == "true":
-                    debug_log.add("cache.miss", {"fp": fp})
-    except Exception as e:
-        logger.exception("Cache lookup failed: {}", e)
+        debug_log.add("reuse.hit" if reused else "reuse.miss", {"match": reused.match if reused else None})
 
-    # If no cache, generate response via Claude
+    # Otherwise generate response via Claude
     if not ai_text:
-        claude = ClaudeService()
         try:
             ai_text = await claude.generate_response(
                 db=db,
@@ -246,6 +100,8 @@ async def generate_response(
         except Exception as e:
             logger.exception("Claude generation error: {}", e)
             ai_text = None
+        if ai_text:
+            claude.remember_recent(str(yt.channel_id), ai_text)
 
     if not ai_text:
         # Update queue failure, increment counters and schedule retry with backoff; DLQ after threshold
@@ -288,43 +144,7 @@ async def generate_response(
             await db.rollback()
         raise HTTPException(status_code=502, detail="AI generation failed")
 
-    # If newly generated (not from cache), store in response_cache with 30-day expiry
-    if not from_cache and ai_text:
-        try:
-            # Isolate cache writes in a nested transaction (SAVEPOINT) so failures don't abort the main tx
-            async with db.begin_nested():
-            # Try update first (cast param to match varchar column)
-                await db.execute(
-                    text(
-                        """
-                        UPDATE response_cache
-                        SET response_template = :rtxt,
-                            last_used_at = now(),
-                            expires_at = now() + interval '30 days'
-                        WHERE fingerprint = CAST(:fp AS varchar(128))
-                        """
-                    ),
-                    {"fp": fp, "rtxt": ai_text},
-                )
-            # Insert if it does not exist; cast param everywhere to avoid ambiguous parameter typing
-                await db.execute(
-                    text(
-                        """
-                        INSERT INTO response_cache (fingerprint, response_template, usage_count, last_used_at, expires_at)
-                        SELECT CAST(:fp AS varchar(128)), :rtxt, 1, now(), now() + interval '30 days'
-                        WHERE NOT EXISTS (
-                            SELECT 1 FROM response_cache WHERE fingerprint = CAST(:fp AS varchar(128))
-                        )
-                        """
-                    ),
-                    {"fp": fp, "rtxt": ai_text},
-                )
-        except Exception as e:
-            logger.exception("Failed to store response in cache: {}", e)
-        else:
-            if os.getenv("TESTING_MODE", "false").lower() == "true":
-                debug_log.add("cache.store", {"fp": fp, "len": len(ai_text or "")})
-    elif from_cache:
+    if reused:
         # Count cache hit and generated response
         try:
             await ClaudeService.increment_metrics(
@@ -341,7 +161,18 @@ async def generate_response(
 
     # Store into ai_responses and complete queue
     try:
-        if not quick_ok:
+        if quick_ok and reused:
+            # Approved replies already passed safety; no AI validation needed
+            await db.execute(
+                text(
+                    """
+                    INSERT INTO ai_responses (queue_id, response_text, passed_safety, safety_checked_at, safety_notes, created_at)
+                    VALUES (CAST(:qid AS uuid), :rtxt, true, now(), :notes, now())
+                    """
+                ),
+                {"qid": str(queue_id), "rtxt": ai_text, "notes": f"reused:{reused.match}"},
+            )
+        elif not quick_ok:
             # Fail fast: mark unsafe with reason
             await db.execute(
                 text(
@@ -374,7 +205,7 @@ async def generate_response(
         raise HTTPException(status_code=500, detail="Failed to store AI response")
 
     # If quick OK, enqueue for AI safety via batched scheduler
-    if quick_ok:
+    if quick_ok and not reused:
         try:
             await schedule_safety_check(
                 db,
@@ -407,7 +238,7 @@ async def generate_response(
     return GenerateResponseResponse(
         response_text=ai_text,
         alternatives=[],
-        metadata={"source": "youtube"},
+        metadata={"source": "youtube", "reused": reused.match if reused else None},
     )
 
 
@@ -470,25 +301,6 @@ async def train_brand_voice(
     }
 
 
-def _extract_json(text: str) -> Optional[Dict[str, Any]]:
-    """Try to parse JSON from a model response, tolerating code fences or prose.
-
-    Returns a dict on success, else None.
-    """
-    if not text:
-        return None
-    # Strip code fences if present
-    fenced = re.search(r"```(?:json)?\s*(\{[\s\S]*?\})\s*```", text, re.IGNORECASE)
-    blob = fenced.group(1) if fenced else text
-    # Find first JSON object if extra prose surrounds it
-    first_obj = re.search(r"\{[\s\S]*\}", blob)
-    candidate = first_obj.group(0) if first_obj else blob
-    try:
-        return json.loads(candidate)
-    except Exception:
-        return None
-
-
 @router.post("/batch-generate", response_model=BatchGenerateResponse)
 async def batch_generate(
     *,
@@ -496,14 +308,11 @@ async def batch_generate(
     current_user: User = Depends(get_current_active_user),
     request: BatchGenerateRequest,
 ):
-    """Batch-generate AI replies for up to 5 YouTube comments in one Claude call.
+    """Batch-generate AI replies for queued YouTube comments.
 
-    Steps:
-    - Fetch comments from comments_queue by IDs.
-    - Build one prompt with numbered comments.
-    - Ask Claude for JSON: { "items": [{ "comment_id": str, "response_text": str }, ...] }
-    - Persist ai_responses and mark queue rows completed.
-    - Return all generated responses.
+    Comments are packed into as few Claude calls as the token budget allows
+    (see app.services.batch_generation); replies are persisted to
+    ai_responses and the queue rows marked completed.
     """
     # Global pause guard
     try:
@@ -515,261 +324,25 @@ async def batch_generate(
     raw_ids: List[str] = list(dict.fromkeys(request.comment_ids))
     if not raw_ids:
         raise HTTPException(status_code=400, detail="comment_ids is required")
-    if len(raw_ids) > 5:
-        raise HTTPException(status_code=400, detail="Maximum of 5 comment_ids allowed")
-
-    # Build a safe IN clause with bound parameters
-    placeholders = ",".join([f":id{i}" for i in range(len(raw_ids))])
-    params = {f"id{i}": cid for i, cid in enumerate(raw_ids)}
-
-    # Fetch queue rows
-    result = await db.execute(
-        text(
-            f"""
-            SELECT id, comment_id, content, channel_id, video_id
-            FROM comments_queue
-            WHERE comment_id IN ({placeholders})
-            """
-        ),
-        params,
-    )
-    rows = result.fetchall()
-    by_comment_id = {r[1]: {"queue_id": r[0], "content": r[2], "channel_id": r[3], "video_id": r[4]} for r in rows}
-
-    found_ids = [cid for cid in raw_ids if cid in by_comment_id]
-    missing_ids = [cid for cid in raw_ids if cid not in by_comment_id]
-
-    if not found_ids:
-        # Nothing to process
-        return BatchGenerateResponse(
-            items=[BatchGenerateItem(comment_id=cid, error="not_found") for cid in raw_ids],
-            metadata={"source": "youtube", "count": 0},
+    if len(raw_ids) > batch_generation.MAX_REQUEST_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum of {batch_generation.MAX_REQUEST_IDS} comment_ids allowed",
         )
 
-    # Mark found queue rows as processing
-    placeholders2 = ",".join([f":pid{i}" for i in range(len(found_ids))])
-    params2 = {f"pid{i}": cid for i, cid in enumerate(found_ids)}
-    await db.execute(
-        text(
-            f"""
-            UPDATE comments_queue
-            SET status = 'processing', processed_at = now()
-            WHERE comment_id IN ({placeholders2})
-            """
-        ),
-        params2,
-    )
-
-    # Compose the prompt
-    numbered = []
-    for idx, cid in enumerate(found_ids, start=1):
-        content = by_comment_id[cid]["content"] or ""
-        content = content.strip().replace("\n", " ")
-        numbered.append(f"{idx}. id={cid}: {content}")
-
-    system_prompt = (
-        "You write brief, friendly, professional replies to YouTube comments. "
-        "Return ONLY valid compact JSON. No extra text. Keep each reply under 2 sentences."
-    )
-    user_prompt = (
-        "Reply to each numbered comment below. Return a JSON object with an 'items' array, "
-        "where each item has: {\"comment_id\": string, \"response_text\": string}.\n\n"
-        + "\n".join(numbered)
-    )
-
-    # Call Claude directly for batch
-    claude = ClaudeService()
-    if not getattr(claude, "client", None):
-        raise HTTPException(status_code=502, detail="AI service is unavailable")
-
-    model = getattr(settings, "CLAUDE_MODEL", None) or os.getenv("CLAUDE_MODEL") or "claude-3-5-sonnet-latest"
-
     try:
-        resp = claude.client.messages.create(
-            model=model,
-            max_tokens=getattr(settings, "CLAUDE_MAX_TOKENS", None) or int(os.getenv("CLAUDE_MAX_TOKENS", "400")),
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_prompt}],
-            temperature=0.2,
-        )
-        content = getattr(resp, "content", None)
-        if isinstance(content, list) and content:
-            first = content[0]
-            text_out = getattr(first, "text", None) or (first.get("text") if isinstance(first, dict) else None)
-        else:
-            text_out = getattr(resp, "output_text", None)
-    except Exception as e:
-        logger.exception("Claude batch generation error: {}", e)
-        text_out = None
-
-    if not text_out:
-        # Mark each as failure with backoff; DLQ if threshold reached
-        await db.execute(
-            text(
-                f"""
-                UPDATE comments_queue
-                SET failure_count = failure_count + 1,
-                    status = CASE WHEN failure_count + 1 >= 5 THEN 'failed' ELSE 'pending' END,
-                    last_error_code = 502,
-                    last_error_message = 'ai_batch_generation_failed',
-                    last_error_at = now(),
-                    next_attempt_at = CASE WHEN failure_count + 1 < 5 THEN now() + (interval '30 seconds' * POWER(2, failure_count)) ELSE NULL END,
-                    processed_at = now()
-                WHERE comment_id IN ({placeholders2})
-                """
-            ),
-            params2,
-        )
-        # Insert into DLQ for those that reached threshold in this update
-        await db.execute(
-            text(
-                f"""
-                INSERT INTO comments_dead_letter (queue_id, channel_id, comment_id, reason, error_code, error_message, created_at)
-                SELECT cq.id, cq.channel_id, cq.comment_id, 'ai_generation_failed', 502, 'Claude batch returned no text', now()
-                FROM comments_queue cq
-                WHERE cq.comment_id IN ({placeholders2}) AND cq.failure_count >= 5 AND cq.status = 'failed'
-                ON CONFLICT DO NOTHING
-                """
-            ),
-            params2,
-        )
-        await db.commit()
-        raise HTTPException(status_code=502, detail="AI generation failed")
-
-    data = _extract_json(text_out)
-    results_map: Dict[str, str] = {}
-    if data and isinstance(data, dict):
-        items = data.get("items")
-        if isinstance(items, list):
-            for it in items:
-                cid = (it or {}).get("comment_id")
-                rtxt = (it or {}).get("response_text")
-                if isinstance(cid, str) and isinstance(rtxt, str):
-                    results_map[cid] = rtxt
-
-    # Prepare response items for all requested IDs
-    response_items: List[BatchGenerateItem] = []
-    to_complete_ids: List[str] = []
-    no_response_ids: List[str] = []
-    for cid in raw_ids:
-        if cid in results_map and cid in by_comment_id:
-            response_items.append(BatchGenerateItem(comment_id=cid, response_text=results_map[cid]))
-            to_complete_ids.append(cid)
-        elif cid in missing_ids:
-            response_items.append(BatchGenerateItem(comment_id=cid, error="not_found"))
-        else:
-            response_items.append(BatchGenerateItem(comment_id=cid, error="no_response"))
-            no_response_ids.append(cid)
-
-    # Insert ai_responses for those generated with safety quick checks
-    if to_complete_ids:
-        placeholders3 = ",".join([f":cid{i}" for i in range(len(to_complete_ids))])
-        params3 = {f"cid{i}": x for i, x in enumerate(to_complete_ids)}
-
-        # Evaluate quick safety per item and prepare VALUES with notes
-        values_rows: List[str] = []
-        insert_params: Dict[str, Any] = {**params3}
-        safety_enqueue: List[Dict[str, Any]] = []
-        for i, cid in enumerate(to_complete_ids):
-            resp_txt = results_map.get(cid, "")
-            ok, reason = quick_safety_check(resp_txt)
-            values_rows.append(f"(:v_qid{i}, :v_txt{i}, :v_safe{i}, :v_checked{i}, :v_notes{i})")
-            insert_params[f"v_txt{i}"] = resp_txt
-            # lookup queue_id by comment_id using by_comment_id
-            qid = str(by_comment_id[cid]["queue_id"]) if cid in by_comment_id else None
-            insert_params[f"v_qid{i}"] = qid
-            if ok:
-                insert_params[f"v_safe{i}"] = False  # pending AI validation
-                insert_params[f"v_checked{i}"] = None
-                insert_params[f"v_notes{i}"] = "pending_ai"
-                # enqueue for AI safety batch
-                safety_enqueue.append({
-                    "queue_id": qid,
-                    "response_text": resp_txt,
-                    "original_comment": by_comment_id[cid]["content"],
-                })
-            else:
-                insert_params[f"v_safe{i}"] = False
-                insert_params[f"v_checked{i}"] = "now()"  # handled specially below
-                insert_params[f"v_notes{i}"] = f"quick_fail:{reason}"
-
-        # Build INSERT selecting from VALUES; handle safety_checked_at with NULLIF to map "now()" token
-        await db.execute(
-            text(
-                f"""
-                INSERT INTO ai_responses (queue_id, response_text, passed_safety, safety_checked_at, safety_notes, created_at)
-                SELECT v.queue_id::uuid, v.response_text, v.safe, 
-                       CASE WHEN v.checked = 'now()' THEN now() ELSE NULL END,
-                       v.notes, now()
-                FROM (
-                    VALUES {','.join(values_rows)}
-                ) AS v(queue_id, response_text, safe, checked, notes)
-                """
-            ),
-            insert_params,
-        )
-
-        # Mark completed
-        await db.execute(
-            text(
-                f"""
-                UPDATE comments_queue
-                SET status = 'completed', processed_at = now()
-                WHERE comment_id IN ({placeholders3})
-                """
-            ),
-            params3,
-        )
-
-    await db.commit()
-
-    # For items that received no response, revert from processing and schedule retry/backoff
-    if no_response_ids:
-        placeholders4 = ",".join([f":nid{i}" for i in range(len(no_response_ids))])
-        params4 = {f"nid{i}": x for i, x in enumerate(no_response_ids)}
-        await db.execute(
-            text(
-                f"""
-                UPDATE comments_queue
-                SET failure_count = failure_count + 1,
-                    status = CASE WHEN failure_count + 1 >= 5 THEN 'failed' ELSE 'pending' END,
-                    last_error_code = 500,
-                    last_error_message = 'no_response_for_item',
-                    last_error_at = now(),
-                    next_attempt_at = CASE WHEN failure_count + 1 < 5 THEN now() + (interval '30 seconds' * POWER(2, failure_count)) ELSE NULL END,
-                    processed_at = now()
-                WHERE comment_id IN ({placeholders4})
-                """
-            ),
-            params4,
-        )
-        await db.execute(
-            text(
-                f"""
-                INSERT INTO comments_dead_letter (queue_id, channel_id, comment_id, reason, error_code, error_message, created_at)
-                SELECT cq.id, cq.channel_id, cq.comment_id, 'ai_no_response', 500, 'Claude did not return an item', now()
-                FROM comments_queue cq
-                WHERE cq.comment_id IN ({placeholders4}) AND cq.failure_count >= 5 AND cq.status = 'failed'
-                ON CONFLICT DO NOTHING
-                """
-            ),
-            params4,
-        )
-        await db.commit()
-
-    # Enqueue quick-safe items for AI safety via batched scheduler
-    if to_complete_ids:
-        for enq in safety_enqueue:
-            await schedule_safety_check(
-                db,
-                queue_id=str(enq.get("queue_id")),
-                response_text=str(enq.get("response_text") or ""),
-                original_comment=str(enq.get("original_comment") or ""),
-            )
+        result = await batch_generation.generate_replies(db, [raw_ids])
+    except batch_generation.BatchGenerationError as e:
+        raise HTTPException(status_code=502, detail=str(e))
 
     return BatchGenerateResponse(
-        items=response_items,
-        metadata={"source": "youtube", "count": len(to_complete_ids)},
+        items=[BatchGenerateItem(**item) for item in result.items],
+        metadata={
+            "source": "youtube",
+            "count": result.completed,
+            "reused": result.reused,
+            "calls": result.calls,
+        },
     )
 
 
@@ -800,7 +373,7 @@ async def force_process_pending(
     details: List[Dict[str, Any]] = []
 
     while True:
-        pending = await bp.get_pending_comments(limit=200)
+        pending = await bp.claim_pending_comments(limit=200)
         if not pending:
             break
         groups = bp.group_comments(pending)
@@ -909,9 +482,12 @@ async def approve_response(
         text(
             """
             SELECT ar.id, ar.queue_id, ar.response_text, ar.approved_at,
-                   cq.comment_id, cq.channel_id
+                   cq.comment_id, cq.channel_id, cq.content,
+                   cq.author_name, yv.title, yc.channel_name
             FROM ai_responses ar
             JOIN comments_queue cq ON cq.id = ar.queue_id
+            LEFT JOIN youtube_videos yv ON yv.id = cq.video_id
+            LEFT JOIN youtube_connections yc ON yc.id = cq.channel_id
             WHERE ar.id = :rid
             """
         ),
@@ -956,10 +532,41 @@ async def approve_response(
         text("UPDATE comments_queue SET status = 'completed', processed_at = now() WHERE id = :qid"),
         {"qid": queue_id},
     )
+    # Offer the approved reply for repeats of this comment on the channel
+    await response_reuse.remember_approved(
+        db,
+        channel_key=str(channel_id),
+        comment_text=row[6] or "",
+        response_text=response_text,
+        # Stored as a template so a repeat on another video gets its own title/commenter
+        variables={"username": row[7] or "", "video_title": row[8] or "", "channel_name": row[9] or ""},
+    )
     await db.commit()
     return {"status": "approved"}
 
 
+@router.get("/reuse-stats")
+async def get_reuse_stats(
+    *,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_active_user),
+    days: int = 30,
+):
+    """Approved reply reuse per channel: lookups, hit rate and model calls saved."""
+    days = max(1, min(days, 365))
+    res = await db.execute(
+        text("SELECT id FROM youtube_connections WHERE user_id = :uid"),
+        {"uid": str(current_user.id)},
+    )
+    stats = await response_reuse.get_reuse_stats(
+        db,
+        channel_keys=[str(r[0]) for r in res.fetchall()],
+        key_suffix=str(current_user.id),
+        days=days,
+    )
+    return {"days": days, "channels": stats}
+
+
 @router.post("/reject/{response_id}")
 async def reject_response(
     *,
@@ -1037,7 +644,10 @@ async def queue_status(
       estimated_seconds_to_next_batch: int | None,
       last_batch: { time: datetime | None, size: int | None },
       mode: "testing" | "production",
-      average_processing_time_seconds: float | None
+      average_processing_time_seconds: float | None,
+      ready_total: int,          # pending and due (not backing off)
+      processing_total: int,     # claimed by a batch worker
+      expired_leases: int        # claims awaiting reclaim
     }
     """
     # 1) Pending by classification
@@ -1142,6 +752,9 @@ async def queue_status(
     avg_proc = res6.scalar()
     average_processing_time_seconds = float(avg_proc) if avg_proc is not None else None
 
+    # 7) Claims held by batch workers
+    claims = await BatchProcessor(db).queue_stats()
+
     return {
         "pending_by_classification": pending_by_classification,
         "pending_total": pending_total,
@@ -1150,4 +763,7 @@ async def queue_status(
         "last_batch": {"time": last_batch_time, "size": last_batch_size},
         "mode": mode,
         "average_processing_time_seconds": average_processing_time_seconds,
+        "ready_total": claims["ready"],
+        "processing_total": claims["processing"],
+        "expired_leases": claims["expired"],
     }
@@ -13,6 +13,7 @@ from app.models.user import User
 from app.models.interaction import Interaction
 from app.models.workflow import Workflow
 from app.models.response_queue import ResponseQueue
+from app.services import interaction_rollups
 
 router = APIRouter()
 
@@ -23,72 +24,44 @@ async def get_analytics_overview(
     session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_active_user),
 ):
-    """Get overview analytics for interactions."""
-    
-    cutoff = datetime.utcnow() - timedelta(days=days)
+    """Get overview analytics for interactions.
+
+    Reads the daily interaction rollups, so the window is whole UTC days.
+    """
     
-    # Total interactions
     # Check if demo mode is enabled (use demo_mode_status, not deprecated demo_mode boolean)
     show_demo_data = (current_user.demo_mode_status == 'enabled')
+    since = (datetime.utcnow() - timedelta(days=days)).date()
     
-    total_stmt = select(func.count(Interaction.id)).where(
-        and_(
-            Interaction.user_id == current_user.id,
-            Interaction.created_at >= cutoff,
-            Interaction.is_demo == show_demo_data  # Filter by demo mode status
-        )
+    by_platform = await interaction_rollups.get_totals_by_platform(
+        session,
+        current_user.id,
+        is_demo=show_demo_data,
+        since=since,
     )
-    total_result = await session.execute(total_stmt)
-    total_interactions = total_result.scalar()
-    
-    # By status
-    status_stmt = select(
-        Interaction.status,
-        func.count(Interaction.id)
-    ).where(
-        and_(
-            Interaction.user_id == current_user.id,
-            Interaction.created_at >= cutoff,
-            Interaction.is_demo == show_demo_data
-        )
-    ).group_by(Interaction.status)
-    
-    status_result = await session.execute(status_stmt)
-    status_counts = {status: count for status, count in status_result.all()}
-    
-    # By platform
-    platform_stmt = select(
-        Interaction.platform,
-        func.count(Interaction.id)
-    ).where(
-        and_(
-            Interaction.user_id == current_user.id,
-            Interaction.created_at >= cutoff,
-            Interaction.is_demo == show_demo_data
-        )
-    ).group_by(Interaction.platform)
-    
-    platform_result = await session.execute(platform_stmt)
-    platform_counts = {platform: count for platform, count in platform_result.all()}
-    
-    # By sentiment
-    sentiment_stmt = select(
-        Interaction.sentiment,
-        func.count(Interaction.id)
-    ).where(
-        and_(
-            Interaction.user_id == current_user.id,
-            Interaction.created_at >= cutoff,
-            Interaction.is_demo == show_demo_data
-        )
-    ).group_by(Interaction.sentiment)
+    totals = interaction_rollups.sum_totals(by_platform)
+    total_interactions = totals['total_interactions']
     
-    sentiment_result = await session.execute(sentiment_stmt)
-    sentiment_counts = {sentiment: count for sentiment, count in sentiment_result.all() if sentiment}
+    status_counts = {
+        status: totals[counter]
+        for status, counter in interaction_rollups.STATUS_COUNTERS.items()
+        if totals[counter]
+    }
+    platform_counts = {
+        platform: counts['total_interactions']
+        for platform, counts in by_platform.items()
+        if counts['total_interactions']
+    }
+    sentiment_counts = {
+        sentiment: totals[counter]
+        for sentiment, counter in interaction_rollups.SENTIMENT_COUNTERS.items()
+        if totals[counter]
+    }
     
-    # Avg response time (answered only)
-    # Simplified: assume responded_at exists
-    # In production, calculate from created_at to responded_at
+    avg_response_time_minutes = (
+        totals['response_minutes_total'] // totals['responses_timed']
+        if totals['responses_timed'] > 0 else None
+    )
     
     return {
         'period_days': days,
@@ -97,6 +70,7 @@ async def get_analytics_overview(
         'by_platform': platform_counts,
         'by_sentiment': sentiment_counts,
         'response_rate': status_counts.get('answered', 0) / total_interactions if total_interactions > 0 else 0,
+        'avg_response_time_minutes': avg_response_time_minutes,
     }
 
 
@@ -210,23 +184,16 @@ async def get_interactions_timeline(
 ):
     """Get interactions over time for charts."""
     
-    cutoff = datetime.utcnow() - timedelta(days=days)
     show_demo_data = (current_user.demo_mode_status == 'enabled')
+    since = (datetime.utcnow() - timedelta(days=days)).date()
     
-    # Group by date
-    stmt = select(
-        func.date(Interaction.created_at).label('date'),
-        func.count(Interaction.id).label('count')
-    ).where(
-        and_(
-            Interaction.user_id == current_user.id,
-            Interaction.created_at >= cutoff,
-            Interaction.is_demo == show_demo_data
-        )
-    ).group_by(func.date(Interaction.created_at)).order_by('date')
-    
-    result = await session.execute(stmt)
-    timeline = [{'date': str(date), 'count': count} for date, count in result.all()]
+    daily = await interaction_rollups.get_daily_counts(
+        session,
+        current_user.id,
+        is_demo=show_demo_data,
+        since=since,
+    )
+    timeline = [{'date': str(date), 'count': count} for date, count in daily]
     
     return {
         'period_days': days,
@@ -2889,91 +2889,20 @@ async def ab_test_summary(
     current_user: User = Depends(get_current_active_user),
     test_id: Optional[str] = None,
     window_hours: Optional[int] = None,
+    sequential: bool = False,
 ):
     """Return per-variant performance stats and winner with significance for a rule/test.
-    Optional window_hours restricts to recent results.
+    Optional window_hours restricts to recent results; sequential=true returns
+    always-valid p-values that are safe to check while the test is running.
     """
-    # Optional time window filter
-    if window_hours and window_hours > 0:
-        rows = (await db.execute(
-            text(
-                """
-                SELECT variant_id, engagement_metrics
-                FROM ab_test_results
-                WHERE rule_id = :rid AND created_at >= now() - (:w || ' hours')::interval
-                """
-            ),
-            {"rid": rule_id, "w": int(window_hours)},
-        )).mappings().all()
-        # Temporarily stash rows in-memory and feed into calculator-like aggregator
-        def split_vid(v: str) -> Tuple[str, str]:
-            if "::" in v:
-                a, b = v.split("::", 1)
-                return a, b
-            return "default", v
-        grouped: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
-        for r in rows:
-            vid = r.get("variant_id") or "A"
-            t, v = split_vid(vid)
-            if test_id and t != test_id:
-                continue
-            grouped.setdefault(t, {}).setdefault(v, []).append(r.get("engagement_metrics") or {})
-        # Build stats
-        def to_stats(variants: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, float | int]]:
-            stats: Dict[str, Dict[str, float | int]] = {}
-            for v, ms in variants.items():
-                n = len(ms)
-                conv = sum(int((m or {}).get("conversions", 0)) for m in ms)
-                impr = sum(int((m or {}).get("impressions", 0)) for m in ms)
-                eng_vals = [float((m or {}).get("engagement", 0.0)) for m in ms if isinstance((m or {}).get("engagement"), (int, float))]
-                avg_eng = (sum(eng_vals) / len(eng_vals)) if eng_vals else 0.0
-                ctr = (conv / impr) if impr > 0 else 0.0
-                stats[v] = {"n": n, "conversions": conv, "impressions": impr, "ctr": ctr, "avg_engagement": avg_eng}
-            return stats
-        out: Dict[str, Any] = {}
-        for tid, variants in grouped.items():
-            stats = to_stats(variants)
-            # Determine winner using ABTestingService on full set (no window param available), but mimic logic here
-            # Prefer CTR else engagement
-            elig = {v: s for v, s in stats.items() if int(s.get("n", 0)) >= 20}
-            if not elig:
-                out[tid] = {"winner": None, "reason": "insufficient_data", "stats": stats}
-                continue
-            use_ctr = any(s.get("impressions", 0) for s in elig.values())
-            metric_key = "ctr" if use_ctr else "avg_engagement"
-            best_v = max(elig.items(), key=lambda kv: kv[1][metric_key])[0]
-            # compute p-value against next best using ABTestingService helpers
-            if use_ctr:
-                # find next best by ctr
-                next_v = max([(v, s) for v, s in elig.items() if v != best_v], key=lambda kv: kv[1][metric_key])[0] if len(elig) > 1 else None
-                if next_v:
-                    from app.services.ab_testing import ABTestingService as _ABS
-                    pval = _ABS._two_proportion_p_value(  # type: ignore
-                        int(elig[best_v]["conversions"]), int(elig[best_v]["impressions"]),
-                        int(elig[next_v]["conversions"]), int(elig[next_v]["impressions"]),
-                    )
-                else:
-                    pval = 0.0
-            else:
-                next_v = max([(v, s) for v, s in elig.items() if v != best_v], key=lambda kv: kv[1][metric_key])[0] if len(elig) > 1 else None
-                if next_v:
-                    # build arrays
-                    a = [float((m or {}).get("engagement", 0.0)) for m in grouped.get(tid, {}).get(best_v, [])]
-                    b = [float((m or {}).get("engagement", 0.0)) for m in grouped.get(tid, {}).get(next_v, [])]
-                    from app.services.ab_testing import ABTestingService as _ABS
-                    pval = _ABS._mean_diff_p_value(a, b)  # type: ignore
-                else:
-                    pval = 0.0
-            out[tid] = {"winner": best_v, "runner_up": next_v, "p_value": pval, "confidence": (1 - pval), "metric": metric_key, "stats": stats}
-        return out if (test_id is None) else (out.get(test_id) or {})
-    else:
-        # Use standard calculator on full dataset
-        res = await ab_service.calculate_winner(db, rule_id=rule_id, test_id=test_id)
-        # Attach confidence
-        for tid, obj in list(res.items()):
-            if isinstance(obj, dict) and obj.get("p_value") is not None:
-                obj["confidence"] = 1 - float(obj.get("p_value") or 0.0)
-        return res if (test_id is None) else (res.get(test_id) or {})
+    res = await ab_service.calculate_winner(
+        db, rule_id=rule_id, test_id=test_id, window_hours=window_hours, sequential=sequential
+    )
+    # Attach confidence
+    for tid, obj in list(res.items()):
+        if isinstance(obj, dict) and obj.get("p_value") is not None:
+            obj["confidence"] = 1 - float(obj.get("p_value") or 0.0)
+    return res if (test_id is None) else (res.get(test_id) or {})
 
 
 @router.get("/ab-tests/{rule_id}/history")
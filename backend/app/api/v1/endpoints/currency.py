@@ -64,6 +64,21 @@ class ConversionResponse(BaseModel):
     formatted: str
 
 
+class BatchConversionRequest(BaseModel):
+    """Convert many amounts between one currency pair."""
+    amounts: List[float] = Field(..., max_length=1000, description="Amounts to convert")
+    from_currency: str = Field(..., min_length=3, max_length=3, description="Source currency code")
+    to_currency: str = Field(..., min_length=3, max_length=3, description="Target currency code")
+
+
+class BatchConversionResponse(BaseModel):
+    """Batch currency conversion response."""
+    converted_amounts: List[float]
+    from_currency: str
+    to_currency: str
+    rate: float
+
+
 class UserCurrencyPreference(BaseModel):
     """User currency preference."""
     currency: str = Field(..., min_length=3, max_length=3, description="Currency code (ISO 4217)")
@@ -165,6 +180,35 @@ async def convert_currency(
     )
 
 
+@router.post("/convert/batch", response_model=BatchConversionResponse)
+async def convert_currency_batch(
+    request: BatchConversionRequest,
+):
+    """
+    Convert a list of amounts from one currency to another.
+    
+    Uses a single rate lookup, so list pages can convert every row at once.
+    """
+    from_currency = request.from_currency.upper()
+    to_currency = request.to_currency.upper()
+    
+    if from_currency not in SUPPORTED_CURRENCIES:
+        raise HTTPException(400, f"Unsupported source currency: {from_currency}")
+    if to_currency not in SUPPORTED_CURRENCIES:
+        raise HTTPException(400, f"Unsupported target currency: {to_currency}")
+    
+    service = get_exchange_rate_service()
+    converted = await service.convert_many(request.amounts, from_currency, to_currency)
+    rates = (await service.get_rates())["rates"]
+    
+    return BatchConversionResponse(
+        converted_amounts=[round(amount, 2) for amount in converted],
+        from_currency=from_currency,
+        to_currency=to_currency,
+        rate=round(service.rate(from_currency, to_currency, rates), 6),
+    )
+
+
 @router.get("/preference", response_model=UserCurrencyResponse)
 async def get_user_currency_preference(
     current_user: User = Depends(get_current_user),
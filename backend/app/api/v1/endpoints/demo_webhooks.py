@@ -7,7 +7,7 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Header, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 from app.core.database import get_async_session
 from app.core.config import settings
@@ -16,6 +16,7 @@ from app.models.interaction import Interaction
 from app.models.fan import Fan
 from app.models.content import ContentPiece, ContentPerformance
 from sqlalchemy import select, and_
+from sqlalchemy.exc import IntegrityError
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +55,13 @@ async def receive_demo_webhook(
             result = await handle_interaction_created(session, payload.data)
             logger.info(f"Demo interaction created successfully: {result}")
             return {"status": "received", "created": result}
+        elif payload.event == 'interactions.batch':
+            result = await handle_interactions_batch(session, payload.data)
+            logger.info(
+                f"Demo interaction batch: {result['created']} created, "
+                f"{result['duplicates']} duplicate, {result['failed']} failed"
+            )
+            return {"status": "received", **result}
         elif payload.event == 'content.published':
             result = await handle_content_published(session, payload.data)
             logger.info(f"Demo content created successfully: {result}")
@@ -124,6 +132,82 @@ async def handle_interaction_created(session: AsyncSession, data: Dict) -> Dict:
         user_id,
     )
     
+    content_data = data.get('content', {})
+    parent_content_id = content_data.get('id')
+    # Try to find existing interactions from same author on same content (for threading)
+    previous_interaction = None
+    if parent_content_id and author_data.get('username'):
+        # Look for previous interactions from this author on this content
+        thread_stmt = select(Interaction).where(
+            and_(
+                Interaction.user_id == user_id,
+                Interaction.parent_content_id == parent_content_id,
+                Interaction.author_username == author_data.get('username'),
+                Interaction.is_demo == True
+            )
+        ).order_by(Interaction.created_at.desc()).limit(1)
+        
+        thread_result = await session.execute(thread_stmt)
+        previous_interaction = thread_result.scalar_one_or_none()
+    
+    interaction = build_demo_interaction(
+        data,
+        user,
+        platform_id=interaction_data.get('id'),
+        fan_id=fan.id if fan else None,
+        previous=(previous_interaction.id, previous_interaction.thread_id) if previous_interaction else None,
+    )
+    platform_id = interaction.platform_id
+    
+    # Check if interaction with this platform_id already exists (idempotent handling)
+    existing_stmt = select(Interaction).where(Interaction.platform_id == platform_id)
+    existing_result = await session.execute(existing_stmt)
+    existing_interaction = existing_result.scalar_one_or_none()
+    
+    if existing_interaction:
+        logger.info(f"Demo interaction with platform_id {platform_id} already exists (id: {existing_interaction.id}) - skipping duplicate")
+        return {"interaction_id": str(existing_interaction.id), "user_id": str(user_id), "duplicate": True}
+    
+    session.add(interaction)
+    
+    try:
+        await session.commit()
+        logger.info(f"✅ Successfully created demo interaction {interaction.id} for user {user_id} (platform: {data.get('platform')}, is_demo: True)")
+        
+        return {"interaction_id": str(interaction.id), "user_id": str(user_id), "duplicate": False}
+    except Exception as e:
+        await session.rollback()
+        
+        # Check if this was a duplicate key error (race condition)
+        if "duplicate key" in str(e).lower() and "platform_id" in str(e).lower():
+            logger.warning(f"Race condition: interaction with platform_id {platform_id} was created by another request")
+            # Try to fetch the existing one
+            existing_stmt = select(Interaction).where(Interaction.platform_id == platform_id)
+            existing_result = await session.execute(existing_stmt)
+            existing_interaction = existing_result.scalar_one_or_none()
+            if existing_interaction:
+                return {"interaction_id": str(existing_interaction.id), "user_id": str(user_id), "duplicate": True}
+        
+        logger.error(f"Failed to commit demo interaction: {str(e)}", exc_info=True)
+        raise
+
+
+def build_demo_interaction(
+    data: Dict,
+    user: User,
+    *,
+    platform_id: Optional[str],
+    fan_id: Optional[uuid.UUID],
+    previous: Optional[tuple] = None,
+) -> Interaction:
+    """Build an Interaction from an interaction.created payload.
+    
+    `previous` is (id, thread_id) of the author's last interaction on the same
+    content; the new interaction is threaded as a reply to it.
+    """
+    interaction_data = data.get('interaction', {})
+    author_data = interaction_data.get('author', {})
+    
     # Extract parent content data (what the interaction is about)
     content_data = data.get('content', {})
     parent_content_id = content_data.get('id')
@@ -139,36 +223,21 @@ async def handle_interaction_created(session: AsyncSession, data: Dict) -> Dict:
         elif platform == 'tiktok':
             parent_content_url = f"https://tiktok.com/@demo/video/{parent_content_id}"
     
+    thread_id = None
+    reply_to_id = None
+    if previous:
+        # This is a follow-up from the same user
+        reply_to_id, previous_thread_id = previous
+        thread_id = previous_thread_id or reply_to_id
+        logger.info(f"Linking new interaction to thread {thread_id} (replying to {reply_to_id})")
+    
     # Create interaction
     interaction_id = uuid.uuid4()
-    platform_id = interaction_data.get('id') or f"demo_{interaction_id}"
+    platform_id = platform_id or f"demo_{interaction_id}"
     
     logger.debug(f"Creating interaction with platform_id: {platform_id}, parent_content: {parent_content_title}")
     
-    # Try to find existing interactions from same author on same content (for threading)
-    thread_id = None
-    reply_to_id = None
-    if parent_content_id and author_data.get('username'):
-        # Look for previous interactions from this author on this content
-        thread_stmt = select(Interaction).where(
-            and_(
-                Interaction.user_id == user_id,
-                Interaction.parent_content_id == parent_content_id,
-                Interaction.author_username == author_data.get('username'),
-                Interaction.is_demo == True
-            )
-        ).order_by(Interaction.created_at.desc()).limit(1)
-        
-        thread_result = await session.execute(thread_stmt)
-        previous_interaction = thread_result.scalar_one_or_none()
-        
-        if previous_interaction:
-            # This is a follow-up from the same user
-            thread_id = previous_interaction.thread_id or previous_interaction.id
-            reply_to_id = previous_interaction.id
-            logger.info(f"Linking new interaction to thread {thread_id} (replying to {reply_to_id})")
-    
-    interaction = Interaction(
+    return Interaction(
         id=interaction_id,
         platform=data.get('platform'),
         type=interaction_data.get('type', 'comment'),
@@ -184,8 +253,8 @@ async def handle_interaction_created(session: AsyncSession, data: Dict) -> Dict:
         sentiment=interaction_data.get('sentiment', 'neutral'),
         status='unread',
         priority_score=calculate_priority(interaction_data),
-        fan_id=fan.id if fan else None,
-        user_id=user_id,
+        fan_id=fan_id,
+        user_id=user.id,
         organization_id=user.organization_id,  # Include organization_id
         is_demo=True,  # CRITICAL: Mark as demo data
         # Add parent content metadata for rich context
@@ -197,38 +266,178 @@ async def handle_interaction_created(session: AsyncSession, data: Dict) -> Dict:
         reply_to_id=reply_to_id,
         is_reply=reply_to_id is not None,
     )
+
+
+async def handle_interactions_batch(session: AsyncSession, data: Dict) -> Dict:
+    """Handle an interactions.batch event from demo simulator.
+    
+    Users, existing interactions, fans and previous thread entries are each
+    looked up with one query for the whole batch, and all new fans and
+    interactions are written in a single transaction. Items that cannot be
+    created are reported individually instead of failing the batch.
+    
+    Returns counts and one result per item, in input order: the same shape
+    handle_interaction_created returns, or {"error": ...}.
+    """
+    items = data.get('interactions')
+    if not isinstance(items, list):
+        raise ValueError("interactions.batch requires an 'interactions' list")
+    
+    results: List[Optional[Dict]] = [None] * len(items)
+    
+    # Parse user_ids
+    parsed = []
+    for idx, item in enumerate(items):
+        try:
+            parsed.append((idx, item, uuid.UUID(str(item.get('user_id')))))
+        except (ValueError, TypeError, AttributeError):
+            logger.error(f"Invalid user_id in demo interaction batch item {idx}")
+            results[idx] = {"error": "invalid_user_id"}
+    
+    # Verify users exist and are in demo mode
+    users: Dict[uuid.UUID, User] = {}
+    user_ids = {user_id for _, _, user_id in parsed}
+    if user_ids:
+        user_result = await session.execute(select(User).where(User.id.in_(user_ids)))
+        users = {u.id: u for u in user_result.scalars().all()}
+    
+    accepted = []
+    for idx, item, user_id in parsed:
+        user = users.get(user_id)
+        if not user:
+            results[idx] = {"error": "user_not_found", "user_id": str(user_id)}
+        elif user.demo_mode_status != 'enabled':
+            results[idx] = {"error": "user_not_in_demo_mode", "user_id": str(user_id)}
+        else:
+            accepted.append((idx, item, user))
     
-    # Check if interaction with this platform_id already exists (idempotent handling)
-    existing_stmt = select(Interaction).where(Interaction.platform_id == platform_id)
-    existing_result = await session.execute(existing_stmt)
-    existing_interaction = existing_result.scalar_one_or_none()
+    def _platform_id(item: Dict) -> Optional[str]:
+        return (item.get('interaction') or {}).get('id')
     
-    if existing_interaction:
-        logger.info(f"Demo interaction with platform_id {platform_id} already exists (id: {existing_interaction.id}) - skipping duplicate")
-        return {"interaction_id": str(existing_interaction.id), "user_id": str(user_id), "duplicate": True}
+    def _username(item: Dict) -> Optional[str]:
+        return ((item.get('interaction') or {}).get('author') or {}).get('username')
     
-    session.add(interaction)
+    def _parent_content_id(item: Dict) -> Optional[str]:
+        return (item.get('content') or {}).get('id')
+    
+    # Existing interactions (idempotent handling)
+    existing: Dict[str, uuid.UUID] = {}
+    platform_ids = {pid for _, item, _ in accepted if (pid := _platform_id(item))}
+    if platform_ids:
+        existing_result = await session.execute(
+            select(Interaction.platform_id, Interaction.id).where(Interaction.platform_id.in_(platform_ids))
+        )
+        existing = {pid: iid for pid, iid in existing_result.all()}
+    
+    # Fans, by (user_id, username)
+    usernames = {name for _, item, _ in accepted if (name := _username(item))}
+    fans: Dict[tuple, Fan] = {}
+    if usernames:
+        fan_result = await session.execute(
+            select(Fan).where(
+                Fan.user_id.in_({user.id for _, _, user in accepted}),
+                Fan.username.in_(usernames),
+            )
+        )
+        for fan in fan_result.scalars().all():
+            fans.setdefault((fan.user_id, fan.username), fan)
+    
+    # Latest previous interaction per (user_id, content, author), for threading
+    previous: Dict[tuple, tuple] = {}
+    content_ids = {cid for _, item, _ in accepted if (cid := _parent_content_id(item))}
+    if content_ids and usernames:
+        thread_result = await session.execute(
+            select(
+                Interaction.user_id,
+                Interaction.parent_content_id,
+                Interaction.author_username,
+                Interaction.id,
+                Interaction.thread_id,
+            ).where(
+                and_(
+                    Interaction.user_id.in_({user.id for _, _, user in accepted}),
+                    Interaction.parent_content_id.in_(content_ids),
+                    Interaction.author_username.in_(usernames),
+                    Interaction.is_demo == True
+                )
+            ).order_by(Interaction.created_at.desc())
+        )
+        for user_id, content_id, username, iid, thread_id in thread_result.all():
+            previous.setdefault((user_id, content_id, username), (iid, thread_id))
+    
+    # Create or update fans - CRITICAL: Mark as demo data
+    new_fans = []
+    for _, item, user in accepted:
+        username = _username(item)
+        if not username:
+            continue
+        platform = item.get('platform')
+        fan = fans.get((user.id, username))
+        if fan is None:
+            fan = Fan(
+                id=uuid.uuid4(),
+                username=username,
+                name=((item.get('interaction') or {}).get('author') or {}).get('display_name'),
+                platforms={platform: f"@{username}"},
+                user_id=user.id,
+                is_demo=True,  # CRITICAL: Prevent demo/real data mixing
+            )
+            fans[(user.id, username)] = fan
+            new_fans.append(fan)
+        elif platform not in (fan.platforms or {}):
+            fan.platforms = {**(fan.platforms or {}), platform: f"@{username}"}
+    
+    new_interactions = []
+    pending = []
+    for idx, item, user in accepted:
+        platform_id = _platform_id(item)
+        if platform_id and platform_id in existing:
+            results[idx] = {"interaction_id": str(existing[platform_id]), "user_id": str(user.id), "duplicate": True}
+            continue
+        username = _username(item)
+        fan = fans.get((user.id, username)) if username else None
+        thread_key = (user.id, _parent_content_id(item), username)
+        interaction = build_demo_interaction(
+            item,
+            user,
+            platform_id=platform_id,
+            fan_id=fan.id if fan else None,
+            previous=previous.get(thread_key) if thread_key[1] and username else None,
+        )
+        # Later items in this batch dedupe and thread against this one
+        existing[interaction.platform_id] = interaction.id
+        previous[thread_key] = (interaction.id, interaction.thread_id)
+        new_interactions.append(interaction)
+        pending.append((idx, item, interaction))
     
     try:
+        if new_fans:
+            session.add_all(new_fans)
+            await session.flush()
+        session.add_all(new_interactions)
         await session.commit()
-        logger.info(f"✅ Successfully created demo interaction {interaction.id} for user {user_id} (platform: {data.get('platform')}, is_demo: True)")
-        
-        return {"interaction_id": str(interaction.id), "user_id": str(user_id), "duplicate": False}
-    except Exception as e:
+        for idx, _, interaction in pending:
+            results[idx] = {"interaction_id": str(interaction.id), "user_id": str(interaction.user_id), "duplicate": False}
+    except IntegrityError as e:
+        # Lost a race with another request for some platform_id or fan:
+        # fall back to the per-interaction path, which handles duplicates
         await session.rollback()
-        
-        # Check if this was a duplicate key error (race condition)
-        if "duplicate key" in str(e).lower() and "platform_id" in str(e).lower():
-            logger.warning(f"Race condition: interaction with platform_id {platform_id} was created by another request")
-            # Try to fetch the existing one
-            existing_stmt = select(Interaction).where(Interaction.platform_id == platform_id)
-            existing_result = await session.execute(existing_stmt)
-            existing_interaction = existing_result.scalar_one_or_none()
-            if existing_interaction:
-                return {"interaction_id": str(existing_interaction.id), "user_id": str(user_id), "duplicate": True}
-        
-        logger.error(f"Failed to commit demo interaction: {str(e)}", exc_info=True)
-        raise
+        logger.warning(f"Demo interaction batch conflicted, retrying individually: {str(e)}")
+        for idx, item, _ in pending:
+            try:
+                results[idx] = await handle_interaction_created(session, item)
+            except Exception as item_error:
+                await session.rollback()
+                results[idx] = {"error": str(item_error)}
+    
+    created = sum(1 for r in results if r and not r.get('error') and not r.get('duplicate'))
+    duplicates = sum(1 for r in results if r and r.get('duplicate'))
+    return {
+        "created": created,
+        "duplicates": duplicates,
+        "failed": len(results) - created - duplicates,
+        "results": results,
+    }
 
 
 async def handle_content_published(session: AsyncSession, data: Dict) -> Dict:
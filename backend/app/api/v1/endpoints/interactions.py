@@ -853,10 +853,11 @@ async def generate_response(
         if interaction.pending_response and interaction.pending_response.get('text'):
             previous_response = interaction.pending_response.get('text')
         
+        tone = payload.tone or "friendly"
         generated_text = await generator.generate_response(
             interaction=interaction,
             user_id=current_user.id,
-            tone=payload.tone or "friendly",
+            tone=tone,
             previous_response=previous_response,
         )
         
@@ -866,6 +867,7 @@ async def generate_response(
             generated_at=datetime.utcnow(),
             model="claude-3-5-sonnet-latest",
             confidence=0.85,
+            tone=tone,
         )
         
         interaction.pending_response = pending.model_dump(mode='json')
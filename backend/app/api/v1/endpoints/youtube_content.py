@@ -1,15 +1,18 @@
 """YouTube content endpoints: list videos, video details, comments, replies, and sync APIs."""
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Any, Optional, List, Literal
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_async_session
+from app.core.database import async_session_maker, get_async_session
 from app.core.security import get_current_user
 from app.models.user import User
+from app.services.background_jobs import BackgroundJobService
 from app.services.youtube_service import YouTubeService
 from app.models.youtube import YouTubeConnection, SyncLog
 from sqlalchemy import select, desc
@@ -201,6 +204,85 @@ async def delete_comment(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+# ---- Comment export ----
+class CommentExportJobRequest(BaseModel):
+    connection_id: UUID
+    format: Literal["csv", "ndjson"] = Field("csv")
+    gzip: bool = Field(True)
+    include_replies: bool = Field(True)
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+
+@router.get("/comments/export")
+async def export_comments(
+    *,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+    connection_id: UUID = Query(..., description="YouTube connection ID"),
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    gzip: bool = Query(False, description="Gzip the response body"),
+    include_replies: bool = Query(True),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+) -> StreamingResponse:
+    """Stream a channel's comments as CSV or NDJSON without buffering the export."""
+    service = YouTubeService(db)
+    if not await service.user_owns_connection(user_id=current_user.id, connection_id=connection_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Connection not found")
+
+    async def body():
+        # The request session is released before streaming starts, so the
+        # cursor needs a session of its own that lives as long as the response
+        async with async_session_maker() as stream_session:
+            async for chunk in YouTubeService(stream_session).iter_comment_export(
+                connection_id=connection_id,
+                include_replies=include_replies,
+                since=since,
+                until=until,
+                fmt=format,
+                gzip=gzip,
+            ):
+                yield chunk
+
+    filename = YouTubeService.export_filename(connection_id, format, gzip)
+    return StreamingResponse(
+        body(),
+        media_type=YouTubeService.export_media_type(format, gzip),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/comments/export/jobs")
+async def create_comment_export_job(
+    *,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+    payload: CommentExportJobRequest,
+) -> dict[str, Any]:
+    """Run a large export in the background; poll /jobs/{job_id}/status for the download URL."""
+    service = YouTubeService(db)
+    if not await service.user_owns_connection(user_id=current_user.id, connection_id=payload.connection_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Connection not found")
+
+    from app.tasks.export_tasks import export_youtube_comments_task
+
+    job = await BackgroundJobService(db).create_job(
+        job_type="comment_export", user_id=current_user.id, max_retries=1
+    )
+    export_youtube_comments_task.delay(
+        str(job.id),
+        str(current_user.id),
+        str(payload.connection_id),
+        payload.format,
+        payload.gzip,
+        payload.include_replies,
+        payload.since.isoformat() if payload.since else None,
+        payload.until.isoformat() if payload.until else None,
+    )
+    return {"job_id": str(job.id), "status": job.status}
+
+
 # ---- Sync models ----
 class SyncTriggerRequest(BaseModel):
     connection_id: UUID
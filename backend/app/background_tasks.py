@@ -13,10 +13,16 @@ from loguru import logger
 from app.core.database import get_async_session
 from app.core.config import settings
 from app.services.polling_service import PollingService
+from app.services.sync_scheduler import get_sync_scheduler
 from app.services.automation_engine import AutomationEngine, Comment as AutoComment
 from sqlalchemy import text
 from app.services import system_state
 
+# Reserved per poll: uploads playlist + video details, then one
+# commentThreads page for each of up to 50 recent videos. The reservation is
+# settled against the units the poll actually used.
+POLL_QUOTA_UNITS = 52
+
 
 async def _poll_once() -> int:
     """Run a single polling iteration across all active channels.
@@ -40,8 +46,17 @@ async def _poll_once() -> int:
                     should = await service.should_poll(channel_id=cid)
                     if not should:
                         continue
+                    # Share the YouTube quota budget with the scheduled syncs
+                    budget = get_sync_scheduler().budget
+                    if not budget.try_reserve(cid, POLL_QUOTA_UNITS):
+                        logger.info("Polling: quota budget exhausted; deferring channel {cid}", cid=str(cid))
+                        continue
 
-                    count = await service.poll_channel_comments(channel_id=cid)
+                    used_before = service.quota_used
+                    try:
+                        count = await service.poll_channel_comments(channel_id=cid)
+                    finally:
+                        budget.settle(cid, POLL_QUOTA_UNITS, service.quota_used - used_before)
                     total_enqueued += int(count or 0)
                 except Exception:
                     logger.exception("Polling: error while processing channel {cid}", cid=str(cid))
@@ -94,6 +109,47 @@ async def run_polling_cycle(interval_seconds: int = 60, stop_event: Optional[asy
         logger.info("Background polling loop stopped")
 
 
+async def run_batch_worker(idle_seconds: int = 30, stop_event: Optional[asyncio.Event] = None) -> None:
+    """Continuously drain comments_queue through BatchProcessor.
+
+    Comments are claimed with leases, so any number of these loops may run
+    at once, in this process or others, without generating a reply twice.
+    Sleeps up to `idle_seconds` (or the processor's recommended wait) when
+    there is nothing to do.
+    """
+    from app.services.batch_processor import BatchProcessor
+
+    logger.info("Starting batch worker loop (idle={}s)", idle_seconds)
+    try:
+        while True:
+            if stop_event and stop_event.is_set():
+                logger.info("Stop signal received; exiting batch worker loop")
+                break
+            wait = idle_seconds
+            async for session in get_async_session():
+                try:
+                    bp = BatchProcessor(session)
+                    processed = await bp.run_batch_cycle()
+                    wait = 1 if processed else max(1, min(idle_seconds, await bp.get_wait_time()))
+                except Exception:
+                    logger.exception("Batch worker: cycle failed")
+                finally:
+                    break
+
+            try:
+                if stop_event:
+                    await asyncio.wait_for(stop_event.wait(), timeout=wait)
+                    if stop_event.is_set():
+                        logger.info("Stop signal received during batch worker sleep; exiting loop")
+                        break
+                else:
+                    await asyncio.sleep(wait)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        logger.info("Batch worker loop stopped")
+
+
 async def run_automation_cycle(interval_seconds: int = 300, stop_event: Optional[asyncio.Event] = None) -> None:
     """Continuously run automation every `interval_seconds` seconds.
 
@@ -5,13 +5,16 @@ This module provides caching functionality for frequently accessed data
 like review counts, analytics, and API responses.
 """
 
+import asyncio
 import json
 from datetime import timedelta
 from functools import wraps
-from typing import Any, Callable, Optional, Union
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Set, Union
 
 import redis.asyncio as redis
 from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
 
@@ -33,6 +36,8 @@ class CacheKeys:
     
     # Analytics cache keys
     ANALYTICS_DASHBOARD = "analytics_dashboard:{location_id}:{date_range}"
+    DASHBOARD_SUMMARY = "dashboard_summary:{user_id}:{mode}"
+    AGENCY_OVERVIEW = "agency_overview:{agency_id}:{days}"
     SENTIMENT_BREAKDOWN = "sentiment_breakdown:{location_id}"
     RATING_DISTRIBUTION = "rating_distribution:{location_id}"
     
@@ -45,6 +50,52 @@ class CacheKeys:
     BRAND_VOICE = "brand_voice:{location_id}"
 
 
+class CacheTags:
+    """Entity tags that cached entries register under for invalidation."""
+
+    USER = "user:{user_id}"
+    INTERACTIONS = "interactions:{user_id}"  # dropped when a user's interactions change
+    AGENCY = "agency:{agency_id}"  # dropped on campaign, deliverable, invoice, payout and deal writes
+    CHANNEL = "channel:{channel_id}"
+    LOCATION = "location:{location_id}"
+    VIEW = "view:{view}"
+
+
+TAG_PREFIX = "tag:"
+
+# Store the value and add its key to every tag set. A tag set's TTL is only
+# ever extended, so it outlives all of its members.
+# KEYS[1] = cache key, KEYS[2..] = tag set keys; ARGV[1] = ttl, ARGV[2] = value
+_SET_WITH_TAGS_LUA = """
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[1])
+local ttl = tonumber(ARGV[1])
+for i = 2, #KEYS do
+  redis.call('SADD', KEYS[i], KEYS[1])
+  if redis.call('TTL', KEYS[i]) < ttl then
+    redis.call('EXPIRE', KEYS[i], ttl)
+  end
+end
+return 1
+"""
+
+# Delete every member of the given tag sets, then the sets themselves. Runs
+# atomically so an entry tagged mid-invalidation cannot be orphaned.
+_INVALIDATE_TAGS_LUA = """
+local deleted = 0
+for i = 1, #KEYS do
+  local members = redis.call('SMEMBERS', KEYS[i])
+  for j = 1, #members, 500 do
+    deleted = deleted + redis.call('DEL', unpack(members, j, math.min(j + 499, #members)))
+  end
+  redis.call('DEL', KEYS[i])
+end
+return deleted
+"""
+
+_set_with_tags = redis_client.register_script(_SET_WITH_TAGS_LUA)
+_invalidate_tags = redis_client.register_script(_INVALIDATE_TAGS_LUA)
+
+
 async def get_cache(key: str) -> Optional[Any]:
     """
     Get value from cache.
@@ -69,6 +120,7 @@ async def set_cache(
     key: str,
     value: Any,
     ttl: Optional[int] = None,
+    tags: Optional[Iterable[str]] = None,
 ) -> bool:
     """
     Set value in cache.
@@ -77,6 +129,7 @@ async def set_cache(
         key: Cache key
         value: Value to cache
         ttl: Time to live in seconds (default from settings)
+        tags: Entity tags (see CacheTags) to register the key under
         
     Returns:
         bool: Success status
@@ -86,7 +139,11 @@ async def set_cache(
         if ttl is None:
             ttl = settings.REDIS_CACHE_TTL
         
-        await redis_client.setex(key, ttl, serialized)
+        tag_keys = [TAG_PREFIX + t for t in (tags or ())]
+        if tag_keys:
+            await _set_with_tags(keys=[key, *tag_keys], args=[ttl, serialized])
+        else:
+            await redis_client.setex(key, ttl, serialized)
         return True
     except Exception as e:
         logger.error(f"Cache set error for key {key}: {e}")
@@ -97,6 +154,8 @@ async def delete_cache(pattern: str) -> int:
     """
     Delete cache keys matching pattern.
     
+    This SCANs the whole keyspace; prefer invalidate_tags() on request paths.
+    
     Args:
         pattern: Key pattern to match (supports wildcards)
         
@@ -116,6 +175,92 @@ async def delete_cache(pattern: str) -> int:
         return 0
 
 
+async def invalidate_tags(*tags: str) -> int:
+    """
+    Delete every entry registered under any of the given tags.
+    
+    Cost is proportional to the number of tagged entries, not the keyspace.
+    
+    Args:
+        tags: Entity tags, e.g. CacheTags.USER.format(user_id=...)
+        
+    Returns:
+        int: Number of entries deleted
+    """
+    if not tags:
+        return 0
+    try:
+        return int(await _invalidate_tags(keys=[TAG_PREFIX + t for t in tags]))
+    except Exception as e:
+        logger.error(f"Cache tag invalidation error for {tags}: {e}")
+        return 0
+
+
+_COMMIT_TAGS_KEY = "cache.invalidate_on_commit"
+
+# Keeps fire-and-forget invalidation tasks alive until they finish
+_pending_invalidations: Set[asyncio.Task] = set()
+
+
+def invalidate_tags_on_commit(session: Any, *tags: str) -> None:
+    """
+    Invalidate tags once the session's current transaction commits.
+    
+    Readers that refill the cache before the commit would otherwise cache
+    the old data again. Dropped on rollback.
+    
+    Args:
+        session: Session or AsyncSession doing the writes
+        tags: Entity tags, e.g. CacheTags.AGENCY.format(agency_id=...)
+    """
+    if tags:
+        session.info.setdefault(_COMMIT_TAGS_KEY, set()).update(tags)
+
+
+def _invalidate_after_commit(session: Session) -> None:
+    tags = session.info.pop(_COMMIT_TAGS_KEY, None)
+    if not tags:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Plain sync session (Celery tasks); entries expire by TTL
+        return
+    task = loop.create_task(invalidate_tags(*tags))
+    _pending_invalidations.add(task)
+    task.add_done_callback(_pending_invalidations.discard)
+
+
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_COMMIT_TAGS_KEY, None)
+
+
+event.listen(Session, "after_commit", _invalidate_after_commit)
+event.listen(Session, "after_rollback", _discard_after_rollback)
+
+
+async def get_namespace_version(namespace: str) -> int:
+    """Current version of a versioned namespace (0 if never bumped)."""
+    try:
+        return int(await redis_client.get(f"ns:{namespace}:version") or 0)
+    except Exception as e:
+        logger.error(f"Cache namespace version error for {namespace}: {e}")
+        return 0
+
+
+async def bump_namespace(namespace: str) -> int:
+    """
+    Invalidate a whole namespace at once by moving it to a new version.
+    
+    Old entries become unreachable immediately and age out via their TTL.
+    """
+    try:
+        return int(await redis_client.incr(f"ns:{namespace}:version"))
+    except Exception as e:
+        logger.error(f"Cache namespace bump error for {namespace}: {e}")
+        return 0
+
+
 async def invalidate_location_cache(location_id: str) -> None:
     """
     Invalidate all cache entries for a specific location.
@@ -123,18 +268,7 @@ async def invalidate_location_cache(location_id: str) -> None:
     Args:
         location_id: UUID of the location
     """
-    patterns = [
-        f"review_count:{location_id}",
-        f"review_stats:{location_id}",
-        f"recent_reviews:{location_id}:*",
-        f"analytics_dashboard:{location_id}:*",
-        f"sentiment_breakdown:{location_id}",
-        f"rating_distribution:{location_id}",
-        f"brand_voice:{location_id}",
-    ]
-    
-    for pattern in patterns:
-        await delete_cache(pattern)
+    await invalidate_tags(CacheTags.LOCATION.format(location_id=location_id))
 
 
 async def invalidate_user_cache(user_id: str) -> None:
@@ -144,19 +278,20 @@ async def invalidate_user_cache(user_id: str) -> None:
     Args:
         user_id: UUID of the user
     """
-    patterns = [
-        f"user_permissions:{user_id}:*",
-        f"user_locations:{user_id}",
-    ]
-    
-    for pattern in patterns:
-        await delete_cache(pattern)
+    await invalidate_tags(CacheTags.USER.format(user_id=user_id))
+
+
+def _format_pattern(pattern: str, args: tuple, kwargs: dict) -> str:
+    # Simple key building: kwargs if given, else the first positional argument
+    return pattern.format(**kwargs) if kwargs else pattern.format(args[0] if args else "")
 
 
 def cache_result(
     key_pattern: str,
     ttl: Optional[int] = None,
     key_builder: Optional[Callable] = None,
+    tags: Optional[Union[Sequence[str], Callable[..., Iterable[str]]]] = None,
+    namespace: Optional[str] = None,
 ):
     """
     Decorator to cache function results.
@@ -165,9 +300,12 @@ def cache_result(
         key_pattern: Cache key pattern with placeholders
         ttl: Time to live in seconds
         key_builder: Custom function to build cache key from args
+        tags: Tag patterns formatted like key_pattern, or a function of the
+            call args returning tags; the entry is dropped by invalidate_tags()
+        namespace: Versioned namespace; bump_namespace() drops all its entries
         
     Example:
-        @cache_result("user_locations:{user_id}", ttl=3600)
+        @cache_result("user_locations:{user_id}", ttl=3600, tags=[CacheTags.USER])
         async def get_user_locations(user_id: str):
             # Expensive database query
             return locations
@@ -179,8 +317,15 @@ def cache_result(
             if key_builder:
                 cache_key = key_builder(*args, **kwargs)
             else:
-                # Simple key building from first argument
-                cache_key = key_pattern.format(**kwargs) if kwargs else key_pattern.format(args[0] if args else "")
+                cache_key = _format_pattern(key_pattern, args, kwargs)
+            if namespace:
+                version = await get_namespace_version(namespace)
+                cache_key = f"{namespace}:v{version}:{cache_key}"
+            
+            if callable(tags):
+                entry_tags: List[str] = list(tags(*args, **kwargs))
+            else:
+                entry_tags = [_format_pattern(t, args, kwargs) for t in (tags or ())]
             
             # Try to get from cache
             cached = await get_cache(cache_key)
@@ -190,7 +335,7 @@ def cache_result(
             
             # Execute function and cache result
             result = await func(*args, **kwargs)
-            await set_cache(cache_key, result, ttl)
+            await set_cache(cache_key, result, ttl, tags=entry_tags)
             logger.debug(f"Cache miss for key: {cache_key}, cached result")
             
             return result
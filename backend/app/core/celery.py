@@ -43,6 +43,10 @@ celery_app.conf.update(
         "app.tasks.chat_tasks",
         "app.tasks.demo_operations",  # Demo mode enable/disable tasks
         "app.tasks.notifications",  # Notification detection tasks
+        "app.tasks.fan_tasks",  # Fan aggregate reconciliation
+        "app.tasks.export_tasks",  # Large exports to object storage
+        "app.tasks.analytics_tasks",  # Interaction analytics rollups
+        "app.tasks.credit_tasks",  # Credit metering
     ],
 
     # Worker settings
@@ -153,6 +157,24 @@ celery_app.conf.beat_schedule = {
         "schedule": crontab(minute=5),  # Every hour at :05
     },
     
+    # Fan aggregates: reconcile incremental counters nightly, before superfan check
+    "reconcile-fan-stats": {
+        "task": "fans.reconcile_stats",
+        "schedule": crontab(minute=30, hour=2),  # Daily at 2:30 AM UTC
+    },
+    
+    # Interaction rollups: recompute yesterday and today to correct drift
+    "rebuild-interaction-rollups": {
+        "task": "analytics.rebuild_interaction_rollups",
+        "schedule": crontab(minute=45, hour=2),  # Daily at 2:45 AM UTC
+    },
+    
+    # Credit metering: charge buffered usage events in batches
+    "flush-credit-usage": {
+        "task": "credits.flush_usage",
+        "schedule": settings.CREDIT_USAGE_FLUSH_SECONDS,
+    },
+    
     # Cleanup old notifications - daily at 2 AM
     "cleanup-old-notifications": {
         "task": "notifications.cleanup_old_notifications",
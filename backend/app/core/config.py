@@ -87,6 +87,11 @@ class Settings(BaseSettings):
 
     # Cache TTL
     REDIS_CACHE_TTL: int = 3600  # 1 hour default
+    DASHBOARD_SUMMARY_CACHE_TTL: int = 60  # Also dropped when the user's interactions change
+    AGENCY_OVERVIEW_CACHE_TTL: int = 120  # Also dropped on the agency's campaign/finance writes
+
+    # Credit metering: how often buffered usage events are charged
+    CREDIT_USAGE_FLUSH_SECONDS: float = 10.0
 
     # These are computed properties, NOT from environment
     @property
@@ -147,6 +152,12 @@ class Settings(BaseSettings):
 
     # YouTube / OAuth (optional)
     YOUTUBE_API_KEY: Optional[str] = None
+    # Quota budget for scheduled syncs (YouTube Data API default is 10k units/day)
+    YOUTUBE_DAILY_QUOTA_UNITS: int = 10000
+    # Largest share of the daily budget a single connection may use
+    YOUTUBE_CONNECTION_QUOTA_SHARE: float = 0.25
+    # How often the adaptive scheduler looks for due connections
+    YOUTUBE_SYNC_TICK_MINUTES: int = 5
     OAUTH_REDIRECT_URI: Optional[str] = None
 
     # Email
@@ -156,6 +167,7 @@ class Settings(BaseSettings):
 
     # SendGrid (optional)
     SENDGRID_API_KEY: Optional[str] = None
+    SENDGRID_API_HOST: Optional[str] = None  # Override for local stub server
     SENDGRID_WELCOME_TEMPLATE_ID: Optional[str] = None
     SENDGRID_APPLICATION_ACKNOWLEDGMENT_TEMPLATE_ID: Optional[str] = None
     SENDGRID_APPLICATION_APPROVED_TEMPLATE_ID: Optional[str] = None
@@ -223,6 +235,10 @@ class Settings(BaseSettings):
     ENABLE_COMPETITOR_TRACKING: bool = True
     ENABLE_AI_RESPONSES: bool = True
 
+    # Notifications
+    # Creator detectors fan out into this many user-id range shards per run
+    NOTIFICATION_DETECTOR_SHARDS: int = 1
+
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     RATE_LIMIT_PER_HOUR: int = 1000
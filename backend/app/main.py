@@ -8,6 +8,7 @@ including middleware, routers, and event handlers.
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 import asyncio
+import os
 
 from fastapi import FastAPI, Request, status, HTTPException
 
@@ -93,6 +94,18 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     app.state._polling_stop_event = stop_event
     app.state._polling_task = polling_task
 
+    # Batch reply workers; comments are claimed, so several can drain the queue
+    from app.background_tasks import run_batch_worker
+    batch_workers = int(os.getenv("BATCH_WORKERS", "0"))
+    app.state._batch_worker_tasks = [
+        asyncio.create_task(run_batch_worker(stop_event=stop_event)) for _ in range(max(0, batch_workers))
+    ]
+
+    # Start micro-batch consumers; importing a service registers its batcher
+    from app.services import safety_validator  # noqa: F401
+    from app.utils.micro_batch import start_batchers
+    start_batchers()
+
     yield
 
     # Shutdown
@@ -109,6 +122,18 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     except Exception as e:
         logger.warning(f"Error stopping polling task: {e}")
 
+    try:
+        for task in getattr(app.state, "_batch_worker_tasks", []):
+            await task
+    except Exception as e:
+        logger.warning(f"Error stopping batch workers: {e}")
+
+    try:
+        from app.utils.micro_batch import stop_batchers
+        await stop_batchers()
+    except Exception as e:
+        logger.warning(f"Error stopping micro-batch consumers: {e}")
+
 
 # Create the FastAPI application
 app = FastAPI(
@@ -1,6 +1,6 @@
 """Analytics models for tracking metrics."""
 
-from sqlalchemy import Column, Date, Integer, Numeric, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import BigInteger, Boolean, Column, Date, Integer, Numeric, DateTime, ForeignKey, String, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
 from sqlalchemy.orm import relationship
 
@@ -55,12 +55,19 @@ class AnalyticsSnapshot(Base):
 
 
 class InteractionAnalytics(Base):
-    """Analytics for interaction metrics by day/hour."""
+    """Analytics for interaction metrics by day/hour.
+
+    Rows with view_id NULL are rollups maintained by
+    app.services.interaction_rollups, bucketed by when the interaction
+    arrived (unique on user, date, hour, platform, is_demo).
+    """
     
     __tablename__ = "interaction_analytics"
     
     date = Column(Date, nullable=False, index=True)
     hour = Column(Integer)  # 0-23 for hourly metrics, NULL for daily
+    platform = Column(String(32), nullable=False, default='', server_default='')
+    is_demo = Column(Boolean, nullable=False, default=False, server_default='false')
     
     # Counts
     total_interactions = Column(Integer, default=0)
@@ -82,7 +89,15 @@ class InteractionAnalytics(Base):
     negative_count = Column(Integer, default=0)
     neutral_count = Column(Integer, default=0)
     
+    # Current status of the interactions in this bucket
+    unread_count = Column(Integer, nullable=False, default=0, server_default='0')
+    read_count = Column(Integer, nullable=False, default=0, server_default='0')
+    awaiting_approval_count = Column(Integer, nullable=False, default=0, server_default='0')
+    ignored_count = Column(Integer, nullable=False, default=0, server_default='0')
+    
     # Performance metrics
+    response_minutes_total = Column(BigInteger, nullable=False, default=0, server_default='0')
+    responses_timed = Column(Integer, nullable=False, default=0, server_default='0')
     avg_response_time_minutes = Column(Integer)
     response_rate = Column(Numeric(5, 2))  # Percentage (0-100)
     
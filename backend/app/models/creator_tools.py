@@ -12,6 +12,7 @@ from sqlalchemy.dialects.postgresql import ENUM as PG_ENUM, JSONB, UUID as PGUUI
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
+from app.models.notification import CREATOR_NOTIFICATION_TYPES, AGENCY_NOTIFICATION_TYPES
 
 
 # =============================================
@@ -155,6 +156,30 @@ class NotificationPreference(Base):
     def __repr__(self) -> str:
         return f"<NotificationPreference(user_id={self.user_id})>"
 
+    def is_type_enabled(self, notification_type: str, channel: str) -> bool:
+        """Check whether a notification type is enabled for a channel ('in_app' or 'email')."""
+        master = self.in_app_enabled if channel == 'in_app' else self.email_enabled
+        if master is False:
+            return False
+
+        type_prefs = (self.type_settings or {}).get(notification_type, {})
+        if channel in type_prefs:
+            return bool(type_prefs[channel])
+
+        type_config = (
+            CREATOR_NOTIFICATION_TYPES.get(notification_type)
+            or AGENCY_NOTIFICATION_TYPES.get(notification_type)
+            or {}
+        )
+        return type_config.get(f"default_{channel}", True)
+
+    def is_entity_muted(self, entity_type: str, entity_id: str) -> bool:
+        """Check whether notifications about an entity are muted."""
+        return any(
+            m.get('type') == entity_type and m.get('id') == entity_id
+            for m in (self.muted_entities or [])
+        )
+
 
 # =============================================
 # BRAND DEALS / DEAL TRACKER
@@ -30,6 +30,16 @@ class Fan(Base):
     avg_sentiment = Column(String(16))  # Overall sentiment
     engagement_score = Column(Integer, default=0, index=True)  # 1-100
     
+    # Incremental interaction aggregates - bumped when an interaction is mapped,
+    # periodically reconciled against the interactions table. Windowed
+    # (superfan) metrics come from the per-day fan_daily_stats buckets.
+    positive_count = Column(Integer, default=0, nullable=False, server_default='0')
+    neutral_count = Column(Integer, default=0, nullable=False, server_default='0')
+    negative_count = Column(Integer, default=0, nullable=False, server_default='0')
+    priority_sum = Column(Integer, default=0, nullable=False, server_default='0')
+    platform_counts = Column(JSONB)  # {"youtube": 12, "instagram": 3}
+    stats_reconciled_at = Column(DateTime)
+    
     # Classification
     is_superfan = Column(Boolean, default=False, index=True)
     became_superfan_at = Column(DateTime)  # When this fan became a superfan
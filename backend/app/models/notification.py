@@ -10,7 +10,7 @@ from typing import Optional, List
 from uuid import UUID
 
 from sqlalchemy import (
-    Boolean, Column, DateTime, ForeignKey, String, Text, Index
+    Boolean, Column, DateTime, ForeignKey, String, Text, Index, text
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
 from sqlalchemy.orm import relationship
@@ -134,6 +134,10 @@ class NotificationDeliveryLog(Base):
     # Custom deduplication key (for complex scenarios)
     dedup_key = Column(String(255), nullable=True)
     
+    # Hash of type/entity/dedup_key/time window - unique per user so bulk
+    # creation can dedupe with INSERT ... ON CONFLICT DO NOTHING
+    dedup_hash = Column(String(64), nullable=True)
+    
     # When it was delivered
     delivered_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     
@@ -146,6 +150,12 @@ class NotificationDeliveryLog(Base):
             "user_id", "notification_type", "entity_type", "entity_id", "dedup_key"
         ),
         Index("idx_notif_delivery_time", "user_id", "notification_type", "delivered_at"),
+        Index(
+            "uq_notif_delivery_dedup_hash",
+            "user_id", "dedup_hash",
+            unique=True,
+            postgresql_where=text("dedup_hash IS NOT NULL"),
+        ),
     )
 
     def __repr__(self) -> str:
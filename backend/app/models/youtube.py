@@ -108,6 +108,11 @@ class YouTubeVideo(Base):
     percentile_rank: Mapped[int | None] = Column(Integer, nullable=True)
     is_trending: Mapped[bool] = Column(Boolean, default=False)
 
+    # Comment sync high-water mark: newest top-level comment already stored.
+    # Incremental comment sync stops paging once it reaches this comment.
+    comments_watermark_at: Mapped[DateTime | None] = Column(DateTime(timezone=True), nullable=True)
+    comments_watermark_id: Mapped[str | None] = Column(String, nullable=True)
+
     # Relationships
     connection = relationship("YouTubeConnection", back_populates="videos")
     comments = relationship("YouTubeComment", back_populates="video", cascade="all, delete-orphan")
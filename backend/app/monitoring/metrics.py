@@ -12,7 +12,7 @@ import time
 from contextlib import contextmanager
 from typing import Dict, Optional
 
-from prometheus_client import Counter, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
 
 # Create a dedicated registry to avoid double-registration in tests
 REGISTRY = CollectorRegistry(auto_describe=True)
@@ -55,6 +55,40 @@ SYNC_ERRORS = Counter(
     registry=REGISTRY,
 )
 
+AI_JUDGMENT_CACHE = Counter(
+    "ai_judgment_cache_requests_total",
+    "AI judgment cache lookups by judgment kind; result is hit or miss (model called)",
+    ["kind", "result"],
+    registry=REGISTRY,
+)
+
+RESPONSE_REUSE = Counter(
+    "response_reuse_lookups_total",
+    "Approved reply reuse lookups; result is exact, near or miss (model called)",
+    ["result"],
+    registry=REGISTRY,
+)
+
+COMMENTS_QUEUE_DEPTH = Gauge(
+    "comments_queue_depth",
+    "comments_queue rows by state: pending, ready (pending and due), processing, expired (lease lapsed)",
+    ["state"],
+    registry=REGISTRY,
+)
+
+COMMENTS_QUEUE_OLDEST_AGE = Gauge(
+    "comments_queue_oldest_pending_age_seconds",
+    "Age of the oldest pending comments_queue row in seconds",
+    registry=REGISTRY,
+)
+
+COMMENTS_QUEUE_CLAIMS = Counter(
+    "comments_queue_claims_total",
+    "comments_queue rows by claim event: claimed, reclaimed (lease expired) or released",
+    ["event"],
+    registry=REGISTRY,
+)
+
 REQUEST_ERRORS = Counter(
     "service_errors_total",
     "Total service errors by type",
@@ -80,6 +114,29 @@ def record_youtube_api_call(operation: str, status: str, duration_seconds: float
         YOUTUBE_API_QUOTA.labels(operation=op).inc(quota_units)
 
 
+def record_ai_judgment_cache(kind: str, result: str) -> None:
+    """Count an AI judgment cache lookup ("hit" or "miss")."""
+    AI_JUDGMENT_CACHE.labels(kind=kind or "unknown", result=result).inc()
+
+
+def record_response_reuse(result: str) -> None:
+    """Count an approved reply reuse lookup ("exact", "near" or "miss")."""
+    RESPONSE_REUSE.labels(result=result).inc()
+
+
+def record_comments_queue(depth: Dict[str, int], oldest_pending_age_seconds: float) -> None:
+    """Set the comments_queue depth gauges from a BatchProcessor.queue_stats() snapshot."""
+    for state, count in depth.items():
+        COMMENTS_QUEUE_DEPTH.labels(state=state).set(count)
+    COMMENTS_QUEUE_OLDEST_AGE.set(max(0.0, float(oldest_pending_age_seconds)))
+
+
+def record_comments_queue_claims(event: str, count: int) -> None:
+    """Count comments_queue rows claimed, reclaimed or released."""
+    if count > 0:
+        COMMENTS_QUEUE_CLAIMS.labels(event=event).inc(count)
+
+
 @contextmanager
 def track_sync(sync_type: str):
     """Context manager to time a sync block and record duration.
@@ -2,15 +2,31 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Iterable, Mapping, Optional, Sequence
+from typing import Dict, Iterable, Mapping, Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy import and_, desc, or_, select, update
-from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import DateTime, and_, bindparam, desc, or_, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.youtube import YouTubeComment, YouTubeVideo
 
+# Early-warning velocity counters: newly inserted comments land in their
+# minute-after-publish bucket (first hour only)
+_COUNT_ARRIVALS = text(
+    """
+    INSERT INTO video_comment_minutes (video_id, minute_offset, comments)
+    SELECT v.id, floor(extract(epoch FROM c.published_at - v.published_at) / 60)::smallint, COUNT(*)
+    FROM youtube_videos v, unnest(:published) AS c(published_at)
+    WHERE v.id = :video_id
+      AND c.published_at >= v.published_at
+      AND c.published_at < v.published_at + interval '60 minutes'
+    GROUP BY 1, 2
+    ON CONFLICT (video_id, minute_offset)
+    DO UPDATE SET comments = video_comment_minutes.comments + EXCLUDED.comments
+    """
+).bindparams(bindparam("published", type_=ARRAY(DateTime(timezone=True))))
+
 
 class YouTubeCommentRepository:
     """Data access helpers for YouTubeComment rows."""
@@ -23,6 +39,7 @@ class YouTubeCommentRepository:
         *,
         video_id: UUID,
         comments: Iterable[Mapping[str, object]],
+        only_inserted: bool = False,
     ) -> Sequence[YouTubeComment]:
         """Bulk insert comments for a video, skipping duplicates by comment_id.
 
@@ -35,7 +52,9 @@ class YouTubeCommentRepository:
         - parent_comment_id (str or None)
         - is_channel_owner_comment (bool)
 
-        Returns all rows in DB for the provided comment_ids (inserted or existing).
+        Returns all rows in DB for the provided comment_ids (inserted or existing),
+        or only the rows this call inserted when only_inserted=True. Inserted
+        comments are also counted into the video's early-warning minute buckets.
         """
         rows = []
         comment_ids: list[str] = []
@@ -65,7 +84,15 @@ class YouTubeCommentRepository:
                 .values(rows)
                 .on_conflict_do_nothing(index_elements=[YouTubeComment.__table__.c.comment_id])
             )
-            await self.session.execute(stmt)
+            # RETURNING only yields rows that were actually inserted
+            table = YouTubeComment.__table__
+            res = await self.session.execute(stmt.returning(table.c.comment_id, table.c.published_at))
+            inserted = res.all()
+            published = [p for _, p in inserted if p is not None]
+            if published:
+                await self.session.execute(_COUNT_ARRIVALS, {"video_id": video_id, "published": published})
+            if only_inserted:
+                comment_ids = [cid for cid, _ in inserted]
 
         if not comment_ids:
             return []
@@ -83,6 +110,32 @@ class YouTubeCommentRepository:
         result = await self.session.execute(q)
         return result.scalars().all()
 
+    async def get_reply_counts(self, comment_ids: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Return {comment_id: stored reply_count} for the given comments that exist."""
+        ids = list(comment_ids)
+        if not ids:
+            return {}
+        q = select(YouTubeComment.comment_id, YouTubeComment.reply_count).where(
+            YouTubeComment.comment_id.in_(ids)
+        )
+        result = await self.session.execute(q)
+        return {cid: count for cid, count in result.all()}
+
+    async def update_reply_counts(self, counts: Mapping[str, int]) -> None:
+        """Set reply_count for existing comments in one executemany UPDATE."""
+        if not counts:
+            return
+        table = YouTubeComment.__table__
+        stmt = (
+            update(table)
+            .where(table.c.comment_id == bindparam("b_comment_id"))
+            .values(reply_count=bindparam("b_reply_count"))
+        )
+        await self.session.execute(
+            stmt,
+            [{"b_comment_id": cid, "b_reply_count": n} for cid, n in counts.items()],
+        )
+
     async def get_video_comments(
         self,
         *,
@@ -1,8 +1,8 @@
 """APScheduler setup for YouTube background sync jobs.
 
-Provides a function to start a BackgroundScheduler with three periodic jobs:
-- Sync active channels (every 30 minutes)
-- Sync recent video comments (every hour)
+Provides a function to start a BackgroundScheduler with periodic jobs, including:
+- Sync due channels (videos + recent comments) chosen by the quota-aware
+  adaptive scheduler (every YOUTUBE_SYNC_TICK_MINUTES)
 - Cleanup expired OAuth state tokens (daily)
 
 Includes basic error handling and recovery: jobs catch exceptions and continue,
@@ -17,56 +17,46 @@ from typing import Iterable
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from loguru import logger
-from sqlalchemy import select
 
 from app.core.database import async_session_maker
-from app.models.youtube import OAuthStateToken, YouTubeConnection, YouTubeVideo
-from app.workers.sync_worker import (
-    process_channel_sync,
-    process_incremental_sync,
-    sync_recent_comments,
-)
-from app.core.database import async_session_maker
+from app.models.youtube import OAuthStateToken
+from app.workers.sync_worker import sync_connection
+from app.services.sync_scheduler import get_sync_scheduler, load_connection_activity
+from app.core.config import settings
 from app.services.early_warning import EarlyWarningService
 from app.services.digest import DigestService
 from app.services.ab_monitor import ABTestMonitorService
 
 
-async def _list_active_connections() -> list[YouTubeConnection]:
-    async with async_session_maker() as session:
-        res = await session.execute(
-            select(YouTubeConnection).where(YouTubeConnection.connection_status == "active")
-        )
-        return res.scalars().all()
-
-
-async def _latest_sync_time(conn: YouTubeConnection) -> datetime | None:
-    return conn.last_synced_at
-
-
 async def job_sync_channels() -> None:
+    """Sync connections the adaptive scheduler reports as due, highest priority first.
+
+    Each sync covers new videos and new comments on recent videos; the
+    reserved quota estimate is settled against what the run actually used.
+    """
     try:
-        conns = await _list_active_connections()
-        logger.info("Scheduler: syncing {n} active channels", n=len(conns))
-        for conn in conns:
-            # Use last_synced_at to decide incremental vs initial
-            last_sync = await _latest_sync_time(conn)
-            if last_sync:
-                await process_incremental_sync(conn.id, last_sync)
-            else:
-                await process_channel_sync(conn.id)
+        scheduler = get_sync_scheduler()
+        async with async_session_maker() as session:
+            activities = await load_connection_activity(session)
+        now = datetime.now(timezone.utc)
+        assignments = scheduler.plan(activities, now)
+        logger.info(
+            "Scheduler: {due} of {n} channels due; quota available {q:.0f}",
+            due=len(assignments),
+            n=len(activities),
+            q=scheduler.budget.project.available,
+        )
+        for a in assignments:
+            try:
+                result = await sync_connection(a.connection_id, a.last_synced_at)
+                scheduler.settle(a, int(result["quota"]["total"]))
+            except Exception:  # noqa: BLE001
+                # Sync already logged the failure; keep the reservation and move on
+                continue
     except Exception as e:  # noqa: BLE001
         logger.exception("job_sync_channels failed: %s", e)
 
 
-async def job_sync_recent_comments() -> None:
-    try:
-        conns = await _list_active_connections()
-        logger.info("Scheduler: syncing recent comments for {n} channels", n=len(conns))
-        for conn in conns:
-            await sync_recent_comments(conn.id)
-    except Exception as e:  # noqa: BLE001
-        logger.exception("job_sync_recent_comments failed: %s", e)
 async def job_early_warning_scan() -> None:
     try:
         svc = EarlyWarningService()
@@ -127,21 +117,12 @@ def start_youtube_scheduler() -> AsyncIOScheduler:
     scheduler = AsyncIOScheduler()
 
     # Jobs with reasonable misfire grace time to avoid backlog spikes
+    # Short tick; the adaptive scheduler decides which channels are actually due
     scheduler.add_job(
         job_sync_channels,
-        IntervalTrigger(minutes=30),
+        IntervalTrigger(minutes=settings.YOUTUBE_SYNC_TICK_MINUTES),
         id="youtube_sync_channels",
-        name="Sync active YouTube channels",
-        coalesce=True,
-        misfire_grace_time=300,
-        max_instances=1,
-    )
-
-    scheduler.add_job(
-        job_sync_recent_comments,
-        IntervalTrigger(hours=1),
-        id="youtube_sync_recent_comments",
-        name="Sync comments for recent videos",
+        name="Sync due YouTube channels within quota budget",
         coalesce=True,
         misfire_grace_time=300,
         max_instances=1,
@@ -149,7 +130,8 @@ def start_youtube_scheduler() -> AsyncIOScheduler:
 
     scheduler.add_job(
         job_early_warning_scan,
-        IntervalTrigger(minutes=5),
+        # Cheap now that it reads ingest-time counters; run often to alert early
+        IntervalTrigger(minutes=1),
         id="early_warning_scan",
         name="Scan for early viral signals",
         coalesce=True,
@@ -738,6 +738,14 @@ class DashboardStats(BaseModel):
     completion_rate: float
 
 
+class AgencyOverview(BaseModel):
+    """Every dashboard section in one response."""
+    stats: DashboardStats
+    pipeline: PipelineStats
+    action_required: List[ActionRequiredItem]
+    deadlines: List[UpcomingDeadline]
+
+
 # ============================================
 # Notification Schemas
 # ============================================
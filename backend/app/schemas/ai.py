@@ -33,8 +33,8 @@ class GenerateResponseResponse(BaseModel):
 
 
 class BatchGenerateRequest(BaseModel):
-    """Batch request with up to 5 YouTube comment IDs."""
-    comment_ids: List[str] = Field(..., min_items=1, max_items=5)
+    """Batch request with up to 50 YouTube comment IDs; packed into model calls by token budget."""
+    comment_ids: List[str] = Field(..., min_items=1, max_items=50)
 
 
 class BatchGenerateItem(BaseModel):
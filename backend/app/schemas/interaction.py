@@ -177,6 +177,7 @@ class PendingResponse(BaseModel):
     model: str = "gpt-4"
     confidence: Optional[float] = None
     workflow_id: Optional[UUID] = None
+    tone: Optional[str] = None
 
 
 class GenerateResponseRequest(BaseModel):
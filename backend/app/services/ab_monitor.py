@@ -19,6 +19,10 @@ class ABTestMonitorService:
     Suggestions are written into auto_learning_suggestions (require_approval=True),
     so users are notified via existing NotificationCenter and can one-click queue
     an approval to apply changes. No changes are auto-applied here.
+
+    Variant statistics for every rule come from one aggregate query; with
+    sequential=True the p-values are always-valid, so scanning on every
+    scheduler tick does not inflate false positives.
     """
 
     def __init__(self) -> None:
@@ -84,23 +88,27 @@ class ABTestMonitorService:
         *,
         min_samples_per_variant: int = 50,
         significance_threshold: float = 0.05,
+        sequential: bool = False,
     ) -> Dict[str, Any]:
         await self._als._ensure_tables(db)  # best-effort create suggestion tables
         results: Dict[str, Any] = {"processed": 0, "suggestions": 0}
 
         rules = await self._list_rules_with_tests(db)
+        try:
+            all_stats = await self._abs.load_variant_stats(db, rule_ids=[rid for rid, _ in rules])
+        except Exception:
+            return results
         for rule_id, action in rules:
             tests: Dict[str, List[Dict[str, Any]]] = (action or {}).get("ab_tests") or {}
             if not tests:
                 continue
-            try:
-                analysis = await self._abs.calculate_winner(
-                    db,
-                    rule_id=rule_id,
-                    min_samples_per_variant=min_samples_per_variant,
+            by_test = all_stats.get(rule_id) or {}
+            analysis = {
+                tid: self._abs.analyze_variants(
+                    variants, min_samples_per_variant=min_samples_per_variant, sequential=sequential
                 )
-            except Exception:
-                continue
+                for tid, variants in by_test.items()
+            }
 
             for tid, res in (analysis or {}).items():
                 stats = (res or {}).get("stats") or {}
@@ -197,19 +205,11 @@ class ABTestMonitorService:
                     worst_v = None
 
                 if best_v and worst_v and best_v != worst_v:
-                    # Compute p-value between best and worst
-                    if metric_key == "ctr":
-                        from app.services.ab_testing import ABTestingService as _ABS
-                        pval_bw = _ABS._two_proportion_p_value(  # type: ignore
-                            int(eligible[best_v]["conversions"]), int(eligible[best_v]["impressions"]),
-                            int(eligible[worst_v]["conversions"]), int(eligible[worst_v]["impressions"]),
-                        )
-                    else:
-                        a = []
-                        b = []
-                        # We don't have raw per-event engagement here; skip if unavailable
-                        # The calculator uses rows, but here we'll approximate using means -> cannot test; skip
-                        pval_bw = None
+                    # Compute p-value between best and worst from the summaries
+                    variants = by_test.get(tid) or {}
+                    pval_bw = self._abs.compare_variants(
+                        variants[best_v], variants[worst_v], metric_key, sequential=sequential
+                    )
 
                     if pval_bw is not None and pval_bw <= significance_threshold:
                         # Suggest pausing worst variant
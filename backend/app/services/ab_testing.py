@@ -2,14 +2,20 @@ from __future__ import annotations
 
 import json
 import math
+import os
 import random
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+# Standardized effect size the sequential test is tuned to detect (mSPRT
+# mixing scale, in units of the metric's pooled standard deviation)
+SEQUENTIAL_EFFECT_SIZE = float(os.getenv("AB_SEQUENTIAL_EFFECT_SIZE", "0.2"))
+
+
 @dataclass
 class Variant:
     variant_id: str
@@ -17,6 +23,48 @@ class Variant:
     template_id: Optional[str] = None
 
 
+@dataclass
+class VariantStats:
+    """Sufficient statistics for one variant, aggregated in SQL."""
+
+    n: int = 0
+    conversions: int = 0
+    impressions: int = 0
+    engagement_n: int = 0
+    engagement_sum: float = 0.0
+    engagement_sumsq: float = 0.0
+
+    @property
+    def ctr(self) -> float:
+        return (self.conversions / self.impressions) if self.impressions > 0 else 0.0
+
+    @property
+    def avg_engagement(self) -> float:
+        return (self.engagement_sum / self.engagement_n) if self.engagement_n else 0.0
+
+    @property
+    def engagement_var(self) -> float:
+        """Sample variance of engagement."""
+        if self.engagement_n < 2:
+            return 0.0
+        mean = self.avg_engagement
+        return max(0.0, (self.engagement_sumsq - self.engagement_n * mean * mean) / (self.engagement_n - 1))
+
+    def as_dict(self) -> Dict[str, float | int]:
+        return {
+            "n": self.n,
+            "conversions": self.conversions,
+            "impressions": self.impressions,
+            "ctr": self.ctr,
+            "avg_engagement": self.avg_engagement,
+        }
+
+
+def _json_number(key: str) -> str:
+    # Non-numeric values count as 0 (conversions/impressions) or are skipped (engagement)
+    return f"CASE WHEN jsonb_typeof(m->'{key}') = 'number' THEN (m->>'{key}')::numeric END"
+
+
 class ABTestingService:
     """
     A/B testing utilities for response optimization.
@@ -33,6 +81,13 @@ class ABTestingService:
     }
 
     We encode variant keys as "{test_id}::{variant_id}" when tracking.
+
+    Analysis never loads result rows: load_variant_stats aggregates
+    per-variant sufficient statistics (n, conversions, impressions, and the
+    count, sum and sum of squares of engagement) in SQL, and the tests run
+    on those summaries. With sequential=True, p-values are always-valid
+    (mixture SPRT), so a test may be checked after every result and stopped
+    as soon as p <= threshold.
     """
 
     # 1) Randomly assign based on weights
@@ -97,6 +152,75 @@ class ABTestingService:
                 pass
 
     # 3) Analyze performance and choose winner(s)
+    async def load_variant_stats(
+        self,
+        db: AsyncSession,
+        *,
+        rule_ids: Optional[Sequence[str]] = None,
+        test_id: Optional[str] = None,
+        window_hours: Optional[int] = None,
+    ) -> Dict[str, Dict[str, Dict[str, VariantStats]]]:
+        """Per-variant sufficient statistics as {rule_id: {test_id: {variant: VariantStats}}}.
+
+        One grouped query for any number of rules; variant keys without a
+        "::" belong to test "default".
+        """
+        filters = ["rule_id IS NOT NULL"]
+        params: Dict[str, Any] = {}
+        if rule_ids is not None:
+            if not rule_ids:
+                return {}
+            filters.append("rule_id = ANY(CAST(:rids AS uuid[]))")
+            params["rids"] = [str(r) for r in rule_ids]
+        if window_hours and window_hours > 0:
+            filters.append("created_at >= now() - (:w || ' hours')::interval")
+            params["w"] = int(window_hours)
+        outer = ""
+        if test_id:
+            outer = "WHERE test_id = :tid"
+            params["tid"] = test_id
+        rows = (await db.execute(
+            text(
+                f"""
+                WITH r AS (
+                    SELECT rule_id::text AS rule_id,
+                           COALESCE(NULLIF(variant_id, ''), 'A') AS vid,
+                           engagement_metrics::jsonb AS m
+                    FROM ab_test_results
+                    WHERE {' AND '.join(filters)}
+                ), s AS (
+                    SELECT rule_id,
+                           CASE WHEN strpos(vid, '::') > 0 THEN split_part(vid, '::', 1) ELSE 'default' END AS test_id,
+                           CASE WHEN strpos(vid, '::') > 0 THEN substr(vid, strpos(vid, '::') + 2) ELSE vid END AS variant,
+                           m
+                    FROM r
+                )
+                SELECT rule_id, test_id, variant,
+                       COUNT(*) AS n,
+                       COALESCE(SUM(trunc({_json_number('conversions')})), 0) AS conversions,
+                       COALESCE(SUM(trunc({_json_number('impressions')})), 0) AS impressions,
+                       COUNT({_json_number('engagement')}) AS engagement_n,
+                       COALESCE(SUM({_json_number('engagement')}), 0) AS engagement_sum,
+                       COALESCE(SUM(({_json_number('engagement')}) ^ 2), 0) AS engagement_sumsq
+                FROM s
+                {outer}
+                GROUP BY rule_id, test_id, variant
+                """
+            ),
+            params,
+        )).all()
+        out: Dict[str, Dict[str, Dict[str, VariantStats]]] = {}
+        for rid, tid, variant, n, conv, impr, eng_n, eng_sum, eng_sumsq in rows:
+            out.setdefault(str(rid), {}).setdefault(str(tid), {})[str(variant)] = VariantStats(
+                n=int(n or 0),
+                conversions=int(conv or 0),
+                impressions=int(impr or 0),
+                engagement_n=int(eng_n or 0),
+                engagement_sum=float(eng_sum or 0.0),
+                engagement_sumsq=float(eng_sumsq or 0.0),
+            )
+        return out
+
     async def calculate_winner(
         self,
         db: AsyncSession,
@@ -104,73 +228,55 @@ class ABTestingService:
         rule_id: str,
         test_id: Optional[str] = None,
         min_samples_per_variant: int = 20,
+        window_hours: Optional[int] = None,
+        sequential: bool = False,
     ) -> Dict[str, Any]:
-        # Load results
-        rows = (await db.execute(
-            text("SELECT variant_id, engagement_metrics FROM ab_test_results WHERE rule_id = :rid"),
-            {"rid": rule_id},
-        )).mappings().all()
-
-        # Group by test_id::variant
-        def split_vid(v: str) -> Tuple[str, str]:
-            if "::" in v:
-                a, b = v.split("::", 1)
-                return a, b
-            return "default", v
-
-        grouped: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
-        for r in rows:
-            vid = r.get("variant_id") or "A"
-            t, v = split_vid(vid)
-            if test_id and t != test_id:
-                continue
-            grouped.setdefault(t, {}).setdefault(v, []).append(r.get("engagement_metrics") or {})
-
-        results: Dict[str, Any] = {}
-        for tid, variants in grouped.items():
-            # Compute metrics per variant
-            stats: Dict[str, Dict[str, float | int]] = {}
-            for v, ms in variants.items():
-                n = len(ms)
-                conv = sum(int(m.get("conversions", 0)) for m in ms)
-                impr = sum(int(m.get("impressions", 0)) for m in ms)
-                eng_vals = [float(m.get("engagement", 0.0)) for m in ms if isinstance(m.get("engagement"), (int, float))]
-                avg_eng = (sum(eng_vals) / len(eng_vals)) if eng_vals else 0.0
-                ctr = (conv / impr) if impr > 0 else 0.0
-                stats[v] = {"n": n, "conversions": conv, "impressions": impr, "ctr": ctr, "avg_engagement": avg_eng}
-
-            # Filter variants with enough samples
-            eligible = {v: s for v, s in stats.items() if int(s["n"]) >= min_samples_per_variant}
-            if not eligible:
-                results[tid] = {"winner": None, "reason": "insufficient_data", "stats": stats}
-                continue
+        by_rule = await self.load_variant_stats(db, rule_ids=[rule_id], test_id=test_id, window_hours=window_hours)
+        return {
+            tid: self.analyze_variants(variants, min_samples_per_variant=min_samples_per_variant, sequential=sequential)
+            for tid, variants in (by_rule.get(str(rule_id)) or {}).items()
+        }
 
-            # Prefer CTR when impressions available; else engagement
-            use_ctr = any(s["impressions"] for s in eligible.values())
-            metric_key = "ctr" if use_ctr else "avg_engagement"
-            # Identify best variant by metric
-            best_v = max(eligible.items(), key=lambda kv: kv[1][metric_key])[0]
-            # Significance vs next best
-            others = [(v, s) for v, s in eligible.items() if v != best_v]
-            if not others:
-                results[tid] = {"winner": best_v, "p_value": 0.0, "metric": metric_key, "stats": stats}
-                continue
-            # choose next best
-            next_v, next_s = max(others, key=lambda kv: kv[1][metric_key])
+    def analyze_variants(
+        self,
+        variants: Dict[str, VariantStats],
+        *,
+        min_samples_per_variant: int = 20,
+        sequential: bool = False,
+    ) -> Dict[str, Any]:
+        """Best variant of one test and its p-value against the runner-up."""
+        stats = {v: s.as_dict() for v, s in variants.items()}
+        # Filter variants with enough samples
+        eligible = {v: s for v, s in variants.items() if s.n >= min_samples_per_variant}
+        if not eligible:
+            return {"winner": None, "reason": "insufficient_data", "stats": stats}
 
-            if use_ctr:
-                pval = self._two_proportion_p_value(
-                    int(eligible[best_v]["conversions"]), int(eligible[best_v]["impressions"]),
-                    int(next_s["conversions"]), int(next_s["impressions"]),
-                )
-            else:
-                pval = self._mean_diff_p_value(
-                    [float(m.get("engagement", 0.0)) for m in variants.get(best_v, [])],
-                    [float(m.get("engagement", 0.0)) for m in variants.get(next_v, [])],
-                )
-            results[tid] = {"winner": best_v, "runner_up": next_v, "p_value": pval, "metric": metric_key, "stats": stats}
+        # Prefer CTR when impressions available; else engagement
+        metric_key = "ctr" if any(s.impressions for s in eligible.values()) else "avg_engagement"
+        ranked = sorted(eligible.items(), key=lambda kv: getattr(kv[1], metric_key), reverse=True)
+        best_v = ranked[0][0]
+        if len(ranked) < 2:
+            return {"winner": best_v, "p_value": 0.0, "metric": metric_key, "stats": stats}
+        next_v = ranked[1][0]
+        pval = self.compare_variants(eligible[best_v], eligible[next_v], metric_key, sequential=sequential)
+        res: Dict[str, Any] = {"winner": best_v, "runner_up": next_v, "p_value": pval, "metric": metric_key, "stats": stats}
+        if sequential:
+            res["mode"] = "sequential"
+        return res
 
-        return results
+    def compare_variants(self, a: VariantStats, b: VariantStats, metric_key: str, *, sequential: bool = False) -> float:
+        """Two-tailed p-value for a difference in `metric_key` ("ctr" or "avg_engagement")."""
+        if metric_key == "ctr":
+            if sequential:
+                return self._sequential_proportion_p_value(a.conversions, a.impressions, b.conversions, b.impressions)
+            return self._two_proportion_p_value(a.conversions, a.impressions, b.conversions, b.impressions)
+        args = (
+            a.engagement_n, a.avg_engagement, a.engagement_var,
+            b.engagement_n, b.avg_engagement, b.engagement_var,
+        )
+        if sequential:
+            return self._sequential_mean_p_value(*args)
+        return self._welch_p_value(*args)
 
     # 4) Auto optimize weights in automation_rules.action JSON
     async def auto_optimize(
@@ -180,6 +286,7 @@ class ABTestingService:
         rule_id: str,
         min_samples_per_variant: int = 50,
         significance_threshold: float = 0.05,
+        sequential: bool = False,
     ) -> Dict[str, Any]:
         # Load current action JSON
         row = (await db.execute(
@@ -196,7 +303,9 @@ class ABTestingService:
         if not tests:
             return {"updated": False, "reason": "no_tests"}
 
-        analysis = await self.calculate_winner(db, rule_id=rule_id, min_samples_per_variant=min_samples_per_variant)
+        analysis = await self.calculate_winner(
+            db, rule_id=rule_id, min_samples_per_variant=min_samples_per_variant, sequential=sequential
+        )
         changed = False
         for tid, res in analysis.items():
             winner = res.get("winner")
@@ -251,20 +360,42 @@ class ABTestingService:
         return 2 * (1 - 0.5 * (1 + erf(z / sqrt(2))))
 
     @staticmethod
-    def _mean_diff_p_value(a: List[float], b: List[float]) -> float:
-        # Welch's t-test approximation for difference in means
-        if not a or not b:
+    def _welch_p_value(na: int, ma: float, va: float, nb: int, mb: float, vb: float) -> float:
+        # Welch's t statistic for difference in means from summaries
+        if na <= 0 or nb <= 0:
             return 1.0
-        import statistics as stats
-        ma = stats.mean(a)
-        mb = stats.mean(b)
-        sa = stats.pstdev(a) if len(a) > 1 else 0.0
-        sb = stats.pstdev(b) if len(b) > 1 else 0.0
-        na, nb = len(a), len(b)
-        denom = math.sqrt((sa * sa) / max(1, na) + (sb * sb) / max(1, nb))
+        denom = math.sqrt(va / na + vb / nb)
         if denom == 0:
             return 1.0
         t = abs((ma - mb) / denom)
         # Approximate two-tailed p-value via normal tail (conservative)
-        from math import erf, sqrt
-        return 2 * (1 - 0.5 * (1 + erf(t / sqrt(2))))
+        return math.erfc(t / math.sqrt(2))
+
+    # Sequential (always-valid) p-values: mixture SPRT with a normal mixing
+    # distribution N(0, tau^2) over the difference. 1/Lambda is valid at any
+    # stopping time, so results can be checked continuously without
+    # inflating false positives; the price is more samples than a fixed test.
+    @staticmethod
+    def _msprt_p_value(diff: float, var: float, tau2: float) -> float:
+        if var <= 0 or tau2 <= 0:
+            return 1.0
+        log_lambda = 0.5 * math.log(var / (var + tau2)) + (diff * diff * tau2) / (2 * var * (var + tau2))
+        return 1.0 if log_lambda <= 0 else math.exp(-log_lambda)
+
+    @staticmethod
+    def _sequential_proportion_p_value(x1: int, n1: int, x2: int, n2: int) -> float:
+        if n1 <= 0 or n2 <= 0:
+            return 1.0
+        p1, p2 = x1 / n1, x2 / n2
+        pooled = (x1 + x2) / (n1 + n2)
+        var = p1 * (1 - p1) / n1 + p2 * (1 - p2) / n2
+        tau2 = SEQUENTIAL_EFFECT_SIZE ** 2 * pooled * (1 - pooled)
+        return ABTestingService._msprt_p_value(p1 - p2, var, tau2)
+
+    @staticmethod
+    def _sequential_mean_p_value(na: int, ma: float, va: float, nb: int, mb: float, vb: float) -> float:
+        if na < 2 or nb < 2:
+            return 1.0
+        pooled_var = ((na - 1) * va + (nb - 1) * vb) / (na + nb - 2)
+        tau2 = SEQUENTIAL_EFFECT_SIZE ** 2 * pooled_var
+        return ABTestingService._msprt_p_value(ma - mb, va / na + vb / nb, tau2)
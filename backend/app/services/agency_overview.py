@@ -0,0 +1,519 @@
+"""
+Agency dashboard overview.
+
+Builds every agency dashboard section (stats, pipeline, action required,
+upcoming deadlines) from three statements:
+
+- one row of aggregates, each section a one-row CTE cross-joined together
+- deal counts and values grouped by stage
+- one UNION ALL of narrow row projections for the action and deadline
+  feeds, each branch ordered and limited on its own
+
+Overviews are cached per agency in Redis for AGENCY_OVERVIEW_CACHE_TTL
+seconds and tagged CacheTags.AGENCY. A Session after_flush listener tags
+any flush that writes campaigns, deliverables, invoices, payouts, deals or
+creator rosters so the agency's entries are dropped when it commits.
+"""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, List, Set
+from uuid import UUID
+
+from sqlalchemy import (
+    Numeric, Select, String, and_, cast, event, func, inspect, literal, null, select, true, union_all,
+)
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import CacheKeys, CacheTags, get_cache, invalidate_tags_on_commit, set_cache
+from app.core.config import settings
+from app.models.agency import AgencyMember
+from app.models.agency_campaign import AgencyCampaign, AgencyDeal, CampaignDeliverable
+from app.models.agency_finance import AgencyCreatorProfile, AgencyInvoice, CreatorPayout
+from app.models.user import User
+from app.schemas.agency_dashboard import (
+    ActionRequiredItem,
+    AgencyOverview,
+    DashboardStats,
+    PipelineStageStats,
+    PipelineStats,
+    UpcomingDeadline,
+)
+
+OPEN_CAMPAIGN_STATUSES = ('scheduled', 'in_progress')
+CLOSED_DEAL_STAGES = ('completed', 'lost')
+DONE_DELIVERABLE_STATUSES = ('completed', 'approved', 'cancelled')
+
+ACTION_ITEMS_LIMIT = 15
+DEADLINES_LIMIT = 20
+STAGNANT_AFTER = timedelta(days=14)
+
+URGENCY_ORDER = {"overdue": 0, "due_today": 1, "due_this_week": 2}
+
+
+def _month_bounds(now: datetime):
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
+    return month_start, month_end
+
+
+# ==================== Statements ====================
+
+def build_stats_statement(agency_id: UUID, now: datetime) -> Select:
+    """Aggregates behind the stats and pipeline cards; returns one row."""
+    month_start, month_end = _month_bounds(now)
+
+    campaigns = (
+        select(func.count(AgencyCampaign.id).label('active_campaigns'))
+        .where(
+            AgencyCampaign.agency_id == agency_id,
+            AgencyCampaign.status.in_(OPEN_CAMPAIGN_STATUSES),
+        )
+        .cte('campaigns')
+    )
+
+    # Agencies without creator profiles yet count active creator members;
+    # COALESCE only evaluates the fallback when there are no profiles
+    member_creators = (
+        select(func.count(AgencyMember.id))
+        .join(User, AgencyMember.user_id == User.id)
+        .where(
+            AgencyMember.agency_id == agency_id,
+            AgencyMember.status == 'active',
+            User.account_type == 'creator',
+        )
+        .scalar_subquery()
+    )
+    profile_creators = (
+        select(func.count(AgencyCreatorProfile.id))
+        .where(
+            AgencyCreatorProfile.agency_id == agency_id,
+            AgencyCreatorProfile.relationship_status == 'active',
+        )
+        .scalar_subquery()
+    )
+    creators = select(
+        func.coalesce(func.nullif(profile_creators, 0), member_creators).label('total_creators')
+    ).cte('creators')
+
+    revenue = (
+        select(func.coalesce(func.sum(AgencyInvoice.paid_amount), 0).label('revenue_this_month'))
+        .where(
+            AgencyInvoice.agency_id == agency_id,
+            AgencyInvoice.status == 'paid',
+            AgencyInvoice.paid_at >= month_start,
+        )
+        .cte('revenue')
+    )
+
+    done = CampaignDeliverable.status.in_(['completed', 'approved'])
+    deliverables = (
+        select(
+            func.count(CampaignDeliverable.id).filter(done).label('deliverables_completed'),
+            func.count(CampaignDeliverable.id).label('deliverables_total'),
+        )
+        .join(AgencyCampaign, CampaignDeliverable.campaign_id == AgencyCampaign.id)
+        .where(
+            AgencyCampaign.agency_id == agency_id,
+            CampaignDeliverable.created_at >= month_start,
+        )
+        .cte('deliverables')
+    )
+
+    is_open = AgencyDeal.stage.notin_(CLOSED_DEAL_STAGES)
+    closing = and_(
+        is_open,
+        AgencyDeal.expected_close_date >= month_start,
+        AgencyDeal.expected_close_date <= month_end,
+    )
+    closed_this_month = and_(
+        AgencyDeal.stage.in_(CLOSED_DEAL_STAGES),
+        AgencyDeal.updated_at >= month_start,
+    )
+    deals = (
+        select(
+            func.coalesce(func.sum(AgencyDeal.value).filter(is_open), 0).label('pipeline_value'),
+            func.count(AgencyDeal.id).filter(is_open).label('open_deals'),
+            func.count(AgencyDeal.id).filter(closing).label('closing_count'),
+            func.coalesce(func.sum(AgencyDeal.value).filter(closing), 0).label('closing_value'),
+            func.count(AgencyDeal.id).filter(
+                closed_this_month, AgencyDeal.stage == 'completed'
+            ).label('won_this_month'),
+            func.count(AgencyDeal.id).filter(closed_this_month).label('closed_this_month'),
+            func.count(AgencyDeal.id).filter(
+                is_open, AgencyDeal.updated_at < now - STAGNANT_AFTER
+            ).label('stagnant_deals'),
+        )
+        .where(AgencyDeal.agency_id == agency_id)
+        .cte('deals')
+    )
+
+    return (
+        select(campaigns, creators, revenue, deliverables, deals)
+        .select_from(campaigns)
+        .join(creators, true())
+        .join(revenue, true())
+        .join(deliverables, true())
+        .join(deals, true())
+    )
+
+
+def build_stage_statement(agency_id: UUID) -> Select:
+    return (
+        select(
+            AgencyDeal.stage,
+            func.count(AgencyDeal.id),
+            func.coalesce(func.sum(AgencyDeal.value), 0),
+        )
+        .where(AgencyDeal.agency_id == agency_id)
+        .group_by(AgencyDeal.stage)
+    )
+
+
+# Optional columns shared by every feed branch, in UNION ALL order. Branches
+# that lack one select a typed NULL so the UNION column types line up.
+FEED_COLUMNS = {
+    'campaign_id': PGUUID(as_uuid=True),
+    'campaign_name': String(),
+    'brand_name': String(),
+    'amount': Numeric(12, 2),
+    'currency': String(),
+    'creator_name': String(),
+}
+
+
+def _feed_row(kind: str, id_, title, due, **columns):
+    """Select list for one feed branch."""
+    return (
+        literal(kind).label('kind'),
+        id_.label('id'),
+        title.label('title'),
+        due.label('due'),
+        *(
+            columns.get(name, cast(null(), type_)).label(name)
+            for name, type_ in FEED_COLUMNS.items()
+        ),
+    )
+
+
+def build_feed_statement(agency_id: UUID, now: datetime, days: int):
+    """Action-required and deadline rows as one UNION ALL of projections."""
+    today_end = now.replace(hour=23, minute=59, second=59)
+    week_end = now + timedelta(days=7)
+    window_end = now + timedelta(days=days)
+    recent = now - timedelta(days=7)
+
+    deliverable_open = and_(
+        AgencyCampaign.agency_id == agency_id,
+        CampaignDeliverable.status.notin_(DONE_DELIVERABLE_STATUSES),
+    )
+
+    def deliverables(kind: str, *conditions, limit: int):
+        return (
+            select(*_feed_row(
+                kind,
+                CampaignDeliverable.id,
+                CampaignDeliverable.title,
+                CampaignDeliverable.due_date,
+                campaign_id=CampaignDeliverable.campaign_id,
+                campaign_name=AgencyCampaign.title,
+            ))
+            .join(AgencyCampaign, CampaignDeliverable.campaign_id == AgencyCampaign.id)
+            .where(deliverable_open, *conditions)
+            .order_by(CampaignDeliverable.due_date.asc())
+            .limit(limit)
+        )
+
+    def invoices(kind: str, *conditions, limit: int):
+        return (
+            select(*_feed_row(
+                kind,
+                AgencyInvoice.id,
+                AgencyInvoice.invoice_number,
+                AgencyInvoice.due_date,
+                brand_name=AgencyInvoice.brand_name,
+                amount=AgencyInvoice.total_amount,
+                currency=AgencyInvoice.currency,
+            ))
+            .where(AgencyInvoice.agency_id == agency_id, *conditions)
+            .order_by(AgencyInvoice.due_date.asc())
+            .limit(limit)
+        )
+
+    branches = [
+        # Action required
+        deliverables('overdue_deliverable', CampaignDeliverable.due_date < now, limit=10),
+        invoices('overdue_invoice', AgencyInvoice.status == 'overdue', limit=5),
+        deliverables(
+            'due_today_deliverable',
+            CampaignDeliverable.due_date >= now,
+            CampaignDeliverable.due_date <= today_end,
+            limit=10,
+        ),
+        select(*_feed_row(
+            'pending_payout',
+            CreatorPayout.id,
+            CreatorPayout.campaign_name,
+            CreatorPayout.due_date,
+            campaign_name=CreatorPayout.campaign_name,
+            amount=CreatorPayout.amount,
+            currency=CreatorPayout.currency,
+            creator_name=User.full_name,
+        ))
+        .outerjoin(User, CreatorPayout.creator_id == User.id)
+        .where(
+            CreatorPayout.agency_id == agency_id,
+            CreatorPayout.status == 'pending',
+            CreatorPayout.due_date <= week_end,
+        )
+        .order_by(CreatorPayout.due_date.asc())
+        .limit(5),
+        # Deadlines; each branch only needs the first DEADLINES_LIMIT by date
+        select(*_feed_row(
+            'content_posting',
+            AgencyCampaign.id,
+            AgencyCampaign.title,
+            AgencyCampaign.posting_date,
+            campaign_id=AgencyCampaign.id,
+            campaign_name=AgencyCampaign.title,
+            brand_name=AgencyCampaign.brand_name,
+        ))
+        .where(
+            AgencyCampaign.agency_id == agency_id,
+            AgencyCampaign.status.in_(OPEN_CAMPAIGN_STATUSES),
+            AgencyCampaign.posting_date >= now,
+            AgencyCampaign.posting_date <= window_end,
+        )
+        .order_by(AgencyCampaign.posting_date.asc())
+        .limit(DEADLINES_LIMIT),
+        deliverables(
+            'deliverable_deadline',
+            CampaignDeliverable.due_date >= recent,
+            CampaignDeliverable.due_date <= window_end,
+            limit=DEADLINES_LIMIT,
+        ),
+        invoices(
+            'invoice_deadline',
+            AgencyInvoice.status.in_(['sent', 'viewed', 'overdue']),
+            AgencyInvoice.due_date >= recent,
+            AgencyInvoice.due_date <= window_end,
+            limit=DEADLINES_LIMIT,
+        ),
+    ]
+    return union_all(*branches)
+
+
+# ==================== Assembly ====================
+
+def _days_overdue(now: datetime, due: datetime) -> int:
+    if due.tzinfo is None:
+        due = due.replace(tzinfo=timezone.utc)
+    return (now - due).days
+
+
+def _stats(row) -> DashboardStats:
+    total = row.deliverables_total or 0
+    completion_rate = (row.deliverables_completed / total * 100) if total > 0 else 100.0
+    return DashboardStats(
+        total_active_campaigns=row.active_campaigns or 0,
+        total_creators=row.total_creators or 0,
+        revenue_this_month=row.revenue_this_month or Decimal("0"),
+        pipeline_value=row.pipeline_value or Decimal("0"),
+        completion_rate=round(completion_rate, 1),
+    )
+
+
+def _pipeline(row, stage_rows) -> PipelineStats:
+    by_stage = {
+        stage: PipelineStageStats(count=count, value=value)
+        for stage, count, value in stage_rows
+    }
+    total_value = row.pipeline_value or Decimal("0")
+    open_deals = row.open_deals or 0
+    closed = row.closed_this_month or 0
+    win_rate = (row.won_this_month / closed * 100) if closed > 0 else 0
+    return PipelineStats(
+        total_value=total_value,
+        avg_deal_size=(total_value / open_deals) if open_deals > 0 else Decimal("0"),
+        deals_closing_this_month=row.closing_count or 0,
+        deals_closing_this_month_value=row.closing_value or Decimal("0"),
+        win_rate_this_month=round(win_rate, 1),
+        stagnant_deals=row.stagnant_deals or 0,
+        by_stage=by_stage,
+    )
+
+
+def _action_item(row, now: datetime) -> ActionRequiredItem:
+    if row.kind == 'overdue_deliverable':
+        days_overdue = _days_overdue(now, row.due)
+        return ActionRequiredItem(
+            id=str(row.id),
+            type="deliverable",
+            title=row.title,
+            description=f"Overdue by {days_overdue} day(s)",
+            campaign_name=row.campaign_name,
+            urgency="overdue",
+            days_overdue=days_overdue,
+            action_url=f"/agency/campaigns/{row.campaign_id}",
+            quick_action="complete",
+        )
+    if row.kind == 'overdue_invoice':
+        days_overdue = _days_overdue(now, row.due)
+        return ActionRequiredItem(
+            id=str(row.id),
+            type="invoice",
+            title=f"Invoice #{row.title} - {row.brand_name}",
+            description=f"Overdue by {days_overdue} day(s)",
+            urgency="overdue",
+            days_overdue=days_overdue,
+            action_url=f"/agency/finance?invoice={row.id}",
+            quick_action="send_reminder",
+        )
+    if row.kind == 'due_today_deliverable':
+        return ActionRequiredItem(
+            id=str(row.id),
+            type="deliverable",
+            title=row.title,
+            description="Due today",
+            campaign_name=row.campaign_name,
+            urgency="due_today",
+            action_url=f"/agency/campaigns/{row.campaign_id}",
+            quick_action="complete",
+        )
+    creator_name = row.creator_name or "Creator"
+    return ActionRequiredItem(
+        id=str(row.id),
+        type="payment",
+        title=f"Payout to {creator_name}",
+        description=f"{row.currency} {row.amount} for {row.campaign_name or 'Campaign'}",
+        creator_name=creator_name,
+        urgency="overdue" if row.due < now else "due_this_week",
+        action_url="/agency/finance?tab=payouts",
+        quick_action="mark_paid",
+    )
+
+
+def _deadline(row, now: datetime) -> UpcomingDeadline:
+    is_overdue = row.due < now
+    if row.kind == 'content_posting':
+        return UpcomingDeadline(
+            id=str(row.id),
+            campaign_id=str(row.id),
+            date=row.due,
+            type="content_posting",
+            title=row.title,
+            campaign_name=row.campaign_name,
+            brand_name=row.brand_name,
+            is_overdue=is_overdue,
+        )
+    if row.kind == 'deliverable_deadline':
+        return UpcomingDeadline(
+            id=str(row.id),
+            campaign_id=str(row.campaign_id) if row.campaign_id else None,
+            date=row.due,
+            type="deliverable",
+            title=row.title,
+            campaign_name=row.campaign_name,
+            is_overdue=is_overdue,
+        )
+    return UpcomingDeadline(
+        id=str(row.id),
+        date=row.due,
+        type="payment",
+        title=f"Invoice #{row.title}",
+        brand_name=row.brand_name,
+        amount=row.amount,
+        is_overdue=is_overdue,
+    )
+
+
+DEADLINE_KINDS = {'content_posting', 'deliverable_deadline', 'invoice_deadline'}
+
+
+async def build_agency_overview(db: AsyncSession, agency_id: UUID, *, days: int = 7) -> AgencyOverview:
+    """Compute the agency overview without the cache."""
+    now = datetime.now(timezone.utc)
+
+    stats_row = (await db.execute(build_stats_statement(agency_id, now))).one()
+    stage_rows = (await db.execute(build_stage_statement(agency_id))).all()
+    feed_rows = (await db.execute(build_feed_statement(agency_id, now, days))).all()
+
+    action_required: List[ActionRequiredItem] = []
+    deadlines: List[UpcomingDeadline] = []
+    for row in feed_rows:
+        if row.kind in DEADLINE_KINDS:
+            deadlines.append(_deadline(row, now))
+        else:
+            action_required.append(_action_item(row, now))
+
+    action_required.sort(key=lambda x: URGENCY_ORDER.get(x.urgency, 3))
+    deadlines.sort(key=lambda x: x.date)
+
+    return AgencyOverview(
+        stats=_stats(stats_row),
+        pipeline=_pipeline(stats_row, stage_rows),
+        action_required=action_required[:ACTION_ITEMS_LIMIT],
+        deadlines=deadlines[:DEADLINES_LIMIT],
+    )
+
+
+async def get_agency_overview(db: AsyncSession, agency_id: UUID, *, days: int = 7) -> AgencyOverview:
+    """Agency overview, served from the per-agency cache when fresh."""
+    cache_key = CacheKeys.AGENCY_OVERVIEW.format(agency_id=agency_id, days=days)
+
+    cached = await get_cache(cache_key)
+    if cached is not None:
+        return AgencyOverview.model_validate(cached)
+
+    overview = await build_agency_overview(db, agency_id, days=days)
+    await set_cache(
+        cache_key,
+        overview.model_dump(mode='json'),
+        ttl=settings.AGENCY_OVERVIEW_CACHE_TTL,
+        tags=[CacheTags.AGENCY.format(agency_id=agency_id)],
+    )
+    return overview
+
+
+# ==================== Invalidation ====================
+
+# Models whose rows carry agency_id directly
+_AGENCY_MODELS = (AgencyCampaign, AgencyInvoice, CreatorPayout, AgencyDeal, AgencyCreatorProfile, AgencyMember)
+
+
+def _loaded(obj: Any, name: str) -> Any:
+    # The instance dict avoids lazy loads, which can't run inside a flush
+    return inspect(obj).dict.get(name)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    agency_ids: Set[UUID] = set()
+    campaign_ids: Set[UUID] = set()
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _AGENCY_MODELS):
+            agency_id = _loaded(obj, 'agency_id')
+            if agency_id is not None:
+                agency_ids.add(agency_id)
+        elif isinstance(obj, CampaignDeliverable):
+            campaign = _loaded(obj, 'campaign')
+            if campaign is not None and _loaded(campaign, 'agency_id') is not None:
+                agency_ids.add(_loaded(campaign, 'agency_id'))
+            elif _loaded(obj, 'campaign_id') is not None:
+                campaign_ids.add(_loaded(obj, 'campaign_id'))
+
+    if campaign_ids:
+        result = session.connection().execute(
+            select(AgencyCampaign.agency_id).where(AgencyCampaign.id.in_(campaign_ids))
+        )
+        agency_ids.update(result.scalars())
+
+    if agency_ids:
+        invalidate_tags_on_commit(
+            session, *(CacheTags.AGENCY.format(agency_id=agency_id) for agency_id in agency_ids)
+        )
+
+
+event.listen(Session, 'after_flush', _after_flush)
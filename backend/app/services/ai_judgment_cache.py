@@ -0,0 +1,109 @@
+"""
+Shared cache for AI judgments.
+
+RuleEvaluator and WorkflowEngine ask the model whether a comment satisfies a
+natural-language condition. The answer depends only on the (normalized)
+comment, the prompt and the model, so it is cached under a blake2b digest of
+those parts. Unlike Python's hash(), the digest is the same in every process.
+Every worker therefore shares one Redis entry per judgment.
+
+Each judgment kind is an AsyncLRUCache (app.utils.cache) with its own TTL:
+a bounded in-process LRU in front of the Redis tier, with concurrent misses
+for a key coalesced into one model call. Lookups are counted in Prometheus
+as ai_judgment_cache_requests_total{kind, result}.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from app.core.config import settings
+from app.monitoring.metrics import record_ai_judgment_cache
+from app.utils.cache import AsyncLRUCache
+
+RULE_CONDITION = "rule_condition"
+RULE_RESULT = "rule_result"
+WORKFLOW_CONDITION = "workflow_condition"
+
+JUDGMENT_TTLS: Dict[str, float] = {
+    RULE_CONDITION: float(os.getenv("AI_EVAL_TTL_SECONDS", "600")),
+    RULE_RESULT: float(os.getenv("RULE_EVAL_TTL_SECONDS", "300")),
+    WORKFLOW_CONDITION: float(os.getenv("WORKFLOW_AI_EVAL_TTL_SECONDS", "600")),
+}
+JUDGMENT_CACHE_SIZE = int(os.getenv("AI_JUDGMENT_CACHE_SIZE", "10000"))
+
+# Comments are banded by their first informative tokens so near-identical
+# comments ("great video!!" / "Great video") share a judgment
+SIGNATURE_TOKENS = 12
+
+
+def normalize_text(text_in: str) -> str:
+    t = text_in.lower()
+    # strip urls, mentions, digits
+    t = re.sub(r"https?://\S+|www\.\S+", " ", t)
+    t = re.sub(r"[@#]\w+", " ", t)
+    t = re.sub(r"\d+", " ", t)
+    # collapse punctuation and whitespace
+    t = re.sub(r"[^a-z\s]", " ", t)
+    t = re.sub(r"\s+", " ", t).strip()
+    return t
+
+
+def text_signature(text_in: str) -> str:
+    return " ".join(normalize_text(text_in).split()[:SIGNATURE_TOKENS])
+
+
+def current_model() -> str:
+    return getattr(settings, "CLAUDE_MODEL", None) or os.getenv("CLAUDE_MODEL") or "claude-sonnet-4-5-20250929"
+
+
+def judgment_key(*parts: Any) -> str:
+    """Stable digest of the parts; identical across processes and restarts."""
+    raw = "\x1f".join(str(p) for p in parts).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+class JudgmentCache:
+    """One judgment kind; see the module docstring."""
+
+    def __init__(self, kind: str, *, ttl: float | None = None, maxsize: int = JUDGMENT_CACHE_SIZE) -> None:
+        self.kind = kind
+        self._cache = AsyncLRUCache(
+            f"ai_judgment:{kind}",
+            ttl=JUDGMENT_TTLS.get(kind, 600.0) if ttl is None else ttl,
+            maxsize=maxsize,
+            shared=True,
+        )
+
+    @property
+    def stats(self):
+        return self._cache.stats
+
+    async def get_or_judge(self, key: str, judge: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (value, hit). `judge` runs only when no process has the answer cached."""
+        judged = False
+
+        async def load() -> Any:
+            nonlocal judged
+            judged = True
+            return await judge()
+
+        value = await self._cache.get_or_load(key, load)
+        record_ai_judgment_cache(self.kind, "miss" if judged else "hit")
+        return value, not judged
+
+    async def invalidate(self, key: str) -> None:
+        await self._cache.invalidate(key)
+
+
+_caches: Dict[str, JudgmentCache] = {}
+
+
+def get_judgment_cache(kind: str) -> JudgmentCache:
+    """Process-wide cache for a judgment kind, shared by every evaluator instance."""
+    cache = _caches.get(kind)
+    if cache is None:
+        cache = _caches[kind] = JudgmentCache(kind)
+    return cache
@@ -9,6 +9,11 @@ from loguru import logger
 
 from app.models.interaction import Interaction
 from app.models.user import User
+from app.services.interaction_rollups import (
+    bulk_change_statement,
+    record_bulk_change,
+    rollup_returning,
+)
 
 
 class ArchiveService:
@@ -57,9 +62,13 @@ class ArchiveService:
                 archived_at=datetime.utcnow(),
                 archive_source='auto'
             )
+            .returning(*rollup_returning())
         )
         
-        archived_count = result.rowcount
+        rows = result.all()
+        await record_bulk_change(self.session, rows, previous={'archived_at': None})
+        
+        archived_count = len(rows)
         if archived_count > 0:
             logger.info(f"Auto-archived {archived_count} interactions for user {user_id}")
         
@@ -93,9 +102,13 @@ class ArchiveService:
                     Interaction.archived_at < threshold
                 )
             )
+            .returning(*rollup_returning())
         )
         
-        deleted_count = result.rowcount
+        rows = result.all()
+        await record_bulk_change(self.session, rows, deleted=True)
+        
+        deleted_count = len(rows)
         if deleted_count > 0:
             logger.info(f"Auto-deleted {deleted_count} archived interactions for user {user_id}")
         
@@ -128,9 +141,13 @@ class ArchiveService:
                 archived_at=datetime.utcnow(),
                 archive_source='manual'
             )
+            .returning(*rollup_returning())
         )
         
-        archived_count = result.rowcount
+        rows = result.all()
+        await record_bulk_change(self.session, rows, previous={'archived_at': None})
+        
+        archived_count = len(rows)
         logger.info(f"Manually archived {archived_count} interactions for user {user_id}")
         
         return archived_count
@@ -163,9 +180,14 @@ class ArchiveService:
                 archive_source=None,
                 last_activity_at=datetime.utcnow()
             )
+            .returning(*rollup_returning())
         )
         
-        unarchived_count = result.rowcount
+        rows = result.all()
+        # Only whether archived_at was set matters to the rollups
+        await record_bulk_change(self.session, rows, previous={'archived_at': datetime.utcnow()})
+        
+        unarchived_count = len(rows)
         logger.info(f"Unarchived {unarchived_count} interactions for user {user_id}")
         
         return unarchived_count
@@ -194,9 +216,13 @@ class ArchiveService:
                     Interaction.archived_at.isnot(None)  # Must be archived first
                 )
             )
+            .returning(*rollup_returning())
         )
         
-        deleted_count = result.rowcount
+        rows = result.all()
+        await record_bulk_change(self.session, rows, deleted=True)
+        
+        deleted_count = len(rows)
         logger.info(f"Permanently deleted {deleted_count} interactions for user {user_id}")
         
         return deleted_count
@@ -257,9 +283,13 @@ class ArchiveService:
                 processed_by_workflow_id=workflow_id,
                 processed_at=datetime.utcnow()
             )
+            .returning(*rollup_returning())
         )
         
-        return result.rowcount > 0
+        rows = result.all()
+        await record_bulk_change(self.session, rows, previous={'archived_at': None})
+        
+        return len(rows) > 0
     
     async def get_archive_stats(self, user_id: UUID) -> dict:
         """Get archive statistics for a user.
@@ -360,9 +390,15 @@ class SyncArchiveService:
                 archived_at=datetime.utcnow(),
                 archive_source='auto'
             )
+            .returning(*rollup_returning())
         )
         
-        return result.rowcount
+        rows = result.all()
+        rollup_stmt = bulk_change_statement(rows, previous={'archived_at': None})
+        if rollup_stmt is not None:
+            self.session.execute(rollup_stmt)
+        
+        return len(rows)
     
     def auto_delete_old_archived_sync(self, user_id: UUID) -> int:
         """Synchronous version of auto_delete_old_archived."""
@@ -382,6 +418,12 @@ class SyncArchiveService:
                     Interaction.archived_at < threshold
                 )
             )
+            .returning(*rollup_returning())
         )
         
-        return result.rowcount
+        rows = result.all()
+        rollup_stmt = bulk_change_statement(rows, deleted=True)
+        if rollup_stmt is not None:
+            self.session.execute(rollup_stmt)
+        
+        return len(rows)
@@ -0,0 +1,448 @@
+"""
+Batch reply generation for queued YouTube comments.
+
+Replies for several comments are generated in one model call. The
+/api/ai/batch-generate endpoint and BatchProcessor both call
+generate_replies() directly in-process:
+- Comments with an approved reply on their channel (response_reuse) skip
+  the model.
+- The rest are packed into prompts by token budget instead of a fixed
+  count. Each prompt holds as many comments as fit in
+  BATCH_GENERATE_PROMPT_TOKENS of input. It is also capped so the replies
+  fit in BATCH_GENERATE_MAX_TOKENS of output.
+- Groups are independent. Their prompts run concurrently, bounded by the
+  process-wide LLM_MAX_CONCURRENCY limit in claude_service.
+- Database work stays sequential on the caller's session. An AsyncSession
+  can't be shared by concurrent tasks, and only the model calls are slow.
+
+Before the model calls the rows are claimed under the caller's worker id
+with a fresh lease, and that is committed at once. Rows that are already
+finished or under another worker's live lease are skipped and reported as
+not_claimable, so two workers never generate for one comment. The replies
+are stored in a second short transaction that only completes rows still
+claimed by that worker; a row whose lease lapsed and was reclaimed is
+reported as claim_lost instead.
+
+A prompt that fails sends its comments back to pending with exponential
+backoff. After five failures they go to comments_dead_letter. Either way
+the row's claim (claimed_by/lease_expires_at) is cleared.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.claude_service import ClaudeService, _estimate_tokens
+from app.services.response_reuse import ReusedReply, record_lookups
+from app.services.safety_validator import quick_safety_check, schedule_safety_check
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("BATCH_GENERATE_PROMPT_TOKENS", "3000"))
+REPLY_TOKENS = int(os.getenv("BATCH_GENERATE_REPLY_TOKENS", "80"))
+OUTPUT_TOKEN_CAP = int(os.getenv("BATCH_GENERATE_MAX_TOKENS", "2000"))
+MAX_ITEMS_PER_CALL = int(os.getenv("BATCH_GENERATE_MAX_ITEMS", "20"))
+# Ids accepted by one generate_replies() call across all of its groups
+MAX_REQUEST_IDS = 50
+# Visibility timeout of a 'processing' row: once the lease lapses another
+# worker may reclaim it (BatchProcessor.reclaim_expired), so it must cover
+# a full generation including retries
+LEASE_SECONDS = int(os.getenv("COMMENTS_QUEUE_LEASE_SECONDS", "300"))
+
+# JSON wrapper around the replies
+_OUTPUT_OVERHEAD_TOKENS = 20
+
+SYSTEM_PROMPT = (
+    "You write brief, friendly, professional replies to YouTube comments. "
+    "Return ONLY valid compact JSON. No extra text. Keep each reply under 2 sentences."
+)
+INSTRUCTIONS = (
+    "Reply to each numbered comment below. Return a JSON object with an 'items' array, "
+    "where each item has: {\"comment_id\": string, \"response_text\": string}.\n\n"
+)
+
+
+class BatchGenerationError(Exception):
+    """No reply could be produced for any comment in the request."""
+
+
+@dataclass
+class BatchGenerationResult:
+    # One {"comment_id", "response_text"} or {"comment_id", "error"} per requested id, in order
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    completed: int = 0
+    reused: int = 0
+    calls: int = 0
+
+
+def max_items_per_call() -> int:
+    by_output = (OUTPUT_TOKEN_CAP - _OUTPUT_OVERHEAD_TOKENS) // max(1, REPLY_TOKENS)
+    return max(1, min(MAX_ITEMS_PER_CALL, by_output))
+
+
+def _comment_line(idx: int, comment_id: str, content: str) -> str:
+    return f"{idx}. id={comment_id}: {(content or '').strip().replace(chr(10), ' ')}"
+
+
+def plan_batches(entries: Sequence[Tuple[str, str]], *, max_items: Optional[int] = None) -> List[List[str]]:
+    """Split (comment_id, content) pairs into prompt-sized chunks of ids, keeping order.
+
+    A chunk is closed when the next comment would push the prompt past
+    PROMPT_TOKEN_BUDGET or the chunk past max_items. A comment too long for
+    the budget on its own still gets a chunk.
+    """
+    limit = max(1, min(max_items or max_items_per_call(), max_items_per_call()))
+    base = _estimate_tokens(SYSTEM_PROMPT) + _estimate_tokens(INSTRUCTIONS)
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    used = base
+    for comment_id, content in entries:
+        cost = _estimate_tokens(_comment_line(len(current) + 1, comment_id, content)) + 1
+        if current and (len(current) >= limit or used + cost > PROMPT_TOKEN_BUDGET):
+            chunks.append(current)
+            current, used = [], base
+        current.append(comment_id)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _extract_json(text_val: str) -> Optional[Dict[str, Any]]:
+    """Parse the JSON object from a model response, tolerating code fences or prose."""
+    if not text_val:
+        return None
+    fenced = re.search(r"```(?:json)?\s*(\{[\s\S]*?\})\s*```", text_val, re.IGNORECASE)
+    blob = fenced.group(1) if fenced else text_val
+    first_obj = re.search(r"\{[\s\S]*\}", blob)
+    candidate = first_obj.group(0) if first_obj else blob
+    try:
+        return json.loads(candidate)
+    except Exception:
+        return None
+
+
+async def _generate_chunk(
+    claude: ClaudeService, chunk: List[str], rows: Dict[str, Dict[str, Any]]
+) -> Optional[Dict[str, str]]:
+    """Replies by comment id for one prompt; None when the call failed."""
+    numbered = [_comment_line(idx, cid, rows[cid]["content"]) for idx, cid in enumerate(chunk, start=1)]
+    try:
+        text_out = await claude.complete(
+            system=SYSTEM_PROMPT,
+            prompt=INSTRUCTIONS + "\n".join(numbered),
+            max_tokens=_OUTPUT_OVERHEAD_TOKENS + REPLY_TOKENS * len(chunk),
+            temperature=0.2,
+        )
+    except Exception as e:
+        logger.exception("Claude batch generation error for {} comments: {}", len(chunk), e)
+        return None
+    if not text_out:
+        return None
+    replies: Dict[str, str] = {}
+    data = _extract_json(text_out)
+    items = data.get("items") if isinstance(data, dict) else None
+    for it in items if isinstance(items, list) else []:
+        cid = (it or {}).get("comment_id") if isinstance(it, dict) else None
+        rtxt = (it or {}).get("response_text") if isinstance(it, dict) else None
+        if cid in chunk and isinstance(rtxt, str):
+            replies[cid] = rtxt
+    return replies
+
+
+def _in_clause(prefix: str, values: Sequence[str]) -> Tuple[str, Dict[str, Any]]:
+    placeholders = ",".join(f":{prefix}{i}" for i in range(len(values)))
+    return placeholders, {f"{prefix}{i}": v for i, v in enumerate(values)}
+
+
+async def _fail_items(
+    db: AsyncSession, comment_ids: List[str], *, worker: str, code: int, message: str, reason: str, detail: str
+) -> None:
+    """Back off failed items still claimed by worker to pending; dead-letter those at the failure threshold."""
+    placeholders, params = _in_clause("fid", comment_ids)
+    await db.execute(
+        text(
+            f"""
+            UPDATE comments_queue
+            SET failure_count = failure_count + 1,
+                status = CASE WHEN failure_count + 1 >= 5 THEN 'failed' ELSE 'pending' END,
+                last_error_code = :code,
+                last_error_message = :message,
+                last_error_at = now(),
+                next_attempt_at = CASE WHEN failure_count + 1 < 5 THEN now() + (interval '30 seconds' * POWER(2, failure_count)) ELSE NULL END,
+                processed_at = now(),
+                claimed_by = NULL,
+                lease_expires_at = NULL
+            WHERE comment_id IN ({placeholders}) AND claimed_by = :worker
+            """
+        ),
+        {**params, "worker": worker, "code": code, "message": message},
+    )
+    await db.execute(
+        text(
+            f"""
+            INSERT INTO comments_dead_letter (queue_id, channel_id, comment_id, reason, error_code, error_message, created_at)
+            SELECT cq.id, cq.channel_id, cq.comment_id, :reason, :code, :detail, now()
+            FROM comments_queue cq
+            WHERE cq.comment_id IN ({placeholders}) AND cq.failure_count >= 5 AND cq.status = 'failed'
+            ON CONFLICT DO NOTHING
+            """
+        ),
+        {**params, "code": code, "reason": reason, "detail": detail},
+    )
+
+
+async def generate_replies(
+    db: AsyncSession,
+    groups: Sequence[Sequence[str]],
+    *,
+    max_items: Optional[int] = None,
+    claude: Optional[ClaudeService] = None,
+    worker_id: Optional[str] = None,
+) -> BatchGenerationResult:
+    """Generate, store and queue for safety the replies for groups of comment ids.
+
+    Comments in a group share prompts, so callers group similar comments
+    (see BatchProcessor.group_comments). Raises BatchGenerationError when
+    the model is unavailable or failed and nothing was reused. Queue rows
+    are left as they were when it is unavailable, and backed off when the
+    call failed. worker_id is the claimant recorded on the rows
+    (BatchProcessor passes its own); requests without one get a one-off id.
+    """
+    worker = worker_id or f"request:{uuid.uuid4().hex}"
+    ordered: List[str] = list(dict.fromkeys(cid for group in groups for cid in group))
+    if not ordered:
+        return BatchGenerationResult()
+
+    placeholders, params = _in_clause("id", ordered)
+    result = await db.execute(
+        text(
+            f"""
+            SELECT cq.id, cq.comment_id, cq.content, cq.channel_id, cq.video_id,
+                   cq.author_name, yv.title, yc.channel_name
+            FROM comments_queue cq
+            LEFT JOIN youtube_videos yv ON yv.id = cq.video_id
+            LEFT JOIN youtube_connections yc ON yc.id = cq.channel_id
+            WHERE cq.comment_id IN ({placeholders})
+            """
+        ),
+        params,
+    )
+    rows = {
+        r[1]: {
+            "queue_id": r[0],
+            "content": r[2],
+            "channel_id": r[3],
+            "video_id": r[4],
+            "author_name": r[5],
+            "video_title": r[6],
+            "channel_name": r[7],
+        }
+        for r in result.fetchall()
+    }
+    found = [cid for cid in ordered if cid in rows]
+    if not found:
+        return BatchGenerationResult(items=[{"comment_id": cid, "error": "not_found"} for cid in ordered])
+
+    claude = claude or ClaudeService()
+
+    # Approved replies for repeats of these comments skip the model
+    reused: Dict[str, ReusedReply] = {}
+    lookups: List[Tuple[str, Optional[ReusedReply]]] = []
+    for cid in found:
+        channel_key = str(rows[cid]["channel_id"])
+        hit = await claude.find_reusable_response(
+            db,
+            channel_id=channel_key,
+            comment_text=rows[cid]["content"] or "",
+            channel_name=rows[cid]["channel_name"] or "",
+            video_title=rows[cid]["video_title"] or "",
+            username=rows[cid]["author_name"] or "",
+            record=False,
+        )
+        lookups.append((channel_key, hit))
+        if hit:
+            reused[cid] = hit
+    # One short transaction of its own for the whole batch's lookup counts
+    await record_lookups(lookups)
+
+    if any(cid not in reused for cid in found) and not getattr(claude, "client", None) and not reused:
+        raise BatchGenerationError("AI service is unavailable")
+
+    # Claim the rows with a fresh lease and commit it straight away: the
+    # lease must be visible to reclaim_expired, and no transaction (or row
+    # lock) may stay open across the model calls. Finished rows and live
+    # leases held by another worker are left alone.
+    placeholders, params = _in_clause("pid", found)
+    claim = await db.execute(
+        text(
+            f"""
+            UPDATE comments_queue
+            SET status = 'processing', processed_at = now(), claimed_by = :worker,
+                lease_expires_at = now() + CAST(:lease AS integer) * interval '1 second'
+            WHERE comment_id IN ({placeholders})
+              AND status IN ('pending', 'processing')
+              AND (claimed_by IS NULL OR claimed_by = :worker OR lease_expires_at < now())
+            RETURNING comment_id
+            """
+        ),
+        {**params, "worker": worker, "lease": LEASE_SECONDS},
+    )
+    claimed = {r[0] for r in claim.fetchall()}
+    await db.commit()
+
+    reused = {cid: hit for cid, hit in reused.items() if cid in claimed}
+    results: Dict[str, str] = {cid: hit.text for cid, hit in reused.items()}
+
+    seen: set[str] = set()
+    chunks: List[List[str]] = []
+    for group in groups:
+        misses = [cid for cid in dict.fromkeys(group) if cid in claimed and cid not in reused and cid not in seen]
+        seen.update(misses)
+        chunks.extend(plan_batches([(cid, rows[cid]["content"] or "") for cid in misses], max_items=max_items))
+
+    failed: List[str] = []
+    if chunks:
+        outputs = await asyncio.gather(*(_generate_chunk(claude, chunk, rows) for chunk in chunks))
+        for chunk, replies in zip(chunks, outputs):
+            if replies is None:
+                failed.extend(chunk)
+                continue
+            for cid, reply in replies.items():
+                results[cid] = reply
+                claude.remember_recent(str(rows[cid]["channel_id"]), reply)
+
+    if failed:
+        await _fail_items(
+            db,
+            failed,
+            worker=worker,
+            code=502,
+            message="ai_batch_generation_failed",
+            reason="ai_generation_failed",
+            detail="Claude batch returned no text",
+        )
+        if not results:
+            await db.commit()
+            raise BatchGenerationError("AI generation failed")
+
+    # Complete only the rows this worker still holds; one whose lease
+    # lapsed and was reclaimed belongs to the new claimant
+    owned: set[str] = set()
+    answered = [cid for cid in found if cid in results]
+    if answered:
+        placeholders, params = _in_clause("cid", answered)
+        done = await db.execute(
+            text(
+                f"""
+                UPDATE comments_queue
+                SET status = 'completed', processed_at = now(), claimed_by = NULL, lease_expires_at = NULL
+                WHERE comment_id IN ({placeholders}) AND claimed_by = :worker
+                RETURNING comment_id
+                """
+            ),
+            {**params, "worker": worker},
+        )
+        owned = {r[0] for r in done.fetchall()}
+
+    failed_set = set(failed)
+    out = BatchGenerationResult(reused=len(reused), calls=len(chunks))
+    to_complete: List[str] = []
+    no_response: List[str] = []
+    for cid in ordered:
+        if cid in owned:
+            out.items.append({"comment_id": cid, "response_text": results[cid]})
+            to_complete.append(cid)
+        elif cid in results:
+            out.items.append({"comment_id": cid, "error": "claim_lost"})
+        elif cid not in rows:
+            out.items.append({"comment_id": cid, "error": "not_found"})
+        elif cid not in claimed:
+            out.items.append({"comment_id": cid, "error": "not_claimable"})
+        elif cid in failed_set:
+            out.items.append({"comment_id": cid, "error": "ai_generation_failed"})
+        else:
+            out.items.append({"comment_id": cid, "error": "no_response"})
+            no_response.append(cid)
+    out.completed = len(to_complete)
+
+    # Insert ai_responses with quick safety checks; AI validation is batched
+    safety_enqueue: List[Dict[str, Any]] = []
+    if to_complete:
+        values_rows: List[str] = []
+        insert_params: Dict[str, Any] = {}
+        for i, cid in enumerate(to_complete):
+            resp_txt = results[cid]
+            qid = str(rows[cid]["queue_id"])
+            ok, reason = quick_safety_check(resp_txt)
+            values_rows.append(f"(:v_qid{i}, :v_txt{i}, :v_safe{i}, :v_checked{i}, :v_notes{i})")
+            insert_params[f"v_qid{i}"] = qid
+            insert_params[f"v_txt{i}"] = resp_txt
+            if ok and cid in reused:
+                # Approved replies already passed safety
+                insert_params[f"v_safe{i}"] = True
+                insert_params[f"v_checked{i}"] = "now()"
+                insert_params[f"v_notes{i}"] = f"reused:{reused[cid].match}"
+            elif ok:
+                insert_params[f"v_safe{i}"] = False  # pending AI validation
+                insert_params[f"v_checked{i}"] = None
+                insert_params[f"v_notes{i}"] = "pending_ai"
+                safety_enqueue.append({"queue_id": qid, "response_text": resp_txt, "original_comment": rows[cid]["content"]})
+            else:
+                insert_params[f"v_safe{i}"] = False
+                insert_params[f"v_checked{i}"] = "now()"
+                insert_params[f"v_notes{i}"] = f"quick_fail:{reason}"
+
+        await db.execute(
+            text(
+                f"""
+                INSERT INTO ai_responses (queue_id, response_text, passed_safety, safety_checked_at, safety_notes, created_at)
+                SELECT v.queue_id::uuid, v.response_text, v.safe,
+                       CASE WHEN v.checked = 'now()' THEN now() ELSE NULL END,
+                       v.notes, now()
+                FROM (
+                    VALUES {','.join(values_rows)}
+                ) AS v(queue_id, response_text, safe, checked, notes)
+                """
+            ),
+            insert_params,
+        )
+
+    await db.commit()
+
+    if no_response:
+        await _fail_items(
+            db,
+            no_response,
+            worker=worker,
+            code=500,
+            message="no_response_for_item",
+            reason="ai_no_response",
+            detail="Claude did not return an item",
+        )
+        await db.commit()
+
+    # Count reuse hits per channel alongside generated replies
+    reused_by_channel: Dict[str, int] = {}
+    for cid in reused:
+        channel = str(rows[cid]["channel_id"])
+        reused_by_channel[channel] = reused_by_channel.get(channel, 0) + 1
+    for channel, hits in reused_by_channel.items():
+        await ClaudeService.increment_metrics(db, channel_id=channel, delta_generated=hits, delta_cache_hits=hits)
+
+    for enq in safety_enqueue:
+        await schedule_safety_check(
+            db,
+            queue_id=enq["queue_id"],
+            response_text=str(enq["response_text"] or ""),
+            original_comment=str(enq["original_comment"] or ""),
+        )
+
+    return out
@@ -1,16 +1,26 @@
 """Batch processing service for grouping and generating replies in batches.
 
 Features:
-- get_pending_comments(limit=5): fetch 'pending' comments ordered by priority desc, then created_at asc
-- group_comments(comments): group similar comments by classification and length bucket
-- process_batch(group): call /api/ai/batch-generate with up to 5 comment_ids
-- run_batch_cycle(): iterate pending comments, batch and process with delays
+- claim_pending_comments(limit=5): lease due 'pending' comments, ordered by priority desc,
+  then created_at asc, to this worker
+- group_comments(comments): group similar comments by classification and length bucket,
+  split into prompt-sized batches by token budget
+- process_groups(groups): generate replies for several groups in-process; their model
+  calls run concurrently under the global LLM concurrency limit
+- run_batch_cycle(): iterate pending comments, batch and process
 
 Assumptions:
 - comments_queue schema: id (uuid), comment_id (str), content (text), classification (str), priority (int), status (str), created_at (timestamp)
-- FastAPI app provides /api/ai/batch-generate endpoint implemented in ai router
 
-Note: This module focuses on DB + HTTP orchestration. It avoids coupling to internal endpoint code.
+Claims: any number of processors may drain the queue at once. Claiming moves rows
+to 'processing' with claimed_by and lease_expires_at, selecting them FOR UPDATE
+SKIP LOCKED so concurrent claims never overlap. Completion or failure clears the
+claim (batch_generation). A row whose lease lapses (crashed worker) is reclaimed
+back to pending with backoff and counts as a failure, so a comment that keeps
+killing workers still reaches the dead-letter table.
+
+Note: Generation itself lives in app.services.batch_generation, shared with the
+/api/ai/batch-generate endpoint.
 """
 from __future__ import annotations
 
@@ -18,17 +28,17 @@ import asyncio
 from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
 import os
+import socket
 from typing import Any, Dict, List, Optional, Tuple
 
 from loguru import logger
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config import settings
-from app.utils.reliability import async_retry
 from sqlalchemy import text as sql_text
+from app.monitoring.metrics import record_comments_queue, record_comments_queue_claims
 from app.utils import debug_log
-from app.services import system_state
+from app.services import batch_generation, system_state
 
 
 @dataclass
@@ -41,15 +51,17 @@ class QueueItem:
 
 
 class BatchProcessor:
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(self, session: AsyncSession, *, worker_id: Optional[str] = None) -> None:
         self.session = session
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
 
     # ---- Configuration helpers ----
     def get_batch_size(self) -> int:
-        """Determine batch size dynamically.
+        """Determine the maximum comments per model call.
 
         - In TESTING_MODE, use max(BATCH_SIZE_MIN, SAFETY_CHECK_BATCH_MIN) but never exceed 5
-        - Otherwise default to 5 (API limit we chose earlier)
+        - Otherwise whatever fits the output token budget (batch_generation.max_items_per_call);
+          the prompt token budget may close a batch earlier
         """
         testing = os.getenv("TESTING_MODE", "false").lower() == "true"
         if testing:
@@ -63,7 +75,7 @@ class BatchProcessor:
                 smin = 2
             size = max(1, min(5, max(bmin, smin)))
             return size
-        return 5
+        return batch_generation.max_items_per_call()
 
     async def _get_last_batch_time(self) -> datetime | None:
         """Return most recent last_batch_processed_at across the queue."""
@@ -183,22 +195,87 @@ class BatchProcessor:
         wait = max(0, int(base - oldest_age))
         return wait
 
-    async def get_pending_comments(self, limit: int = 5) -> List[QueueItem]:
-        """Return up to `limit` pending comments ordered by priority desc, then created_at asc."""
+    async def reclaim_expired(self, limit: int = 200) -> int:
+        """Return rows whose processing lease lapsed to pending; returns how many.
+
+        The lapse counts as a failure: backoff via next_attempt_at, and
+        dead-lettering at the fifth failure.
+        """
         res = await self.session.execute(
             text(
                 """
-                SELECT id, comment_id, COALESCE(content, ''), classification, COALESCE(priority, 0)
-                FROM comments_queue
-                WHERE status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now())
-                ORDER BY priority DESC, created_at ASC
-                LIMIT :lim
+                WITH reclaimed AS (
+                    UPDATE comments_queue cq
+                    SET failure_count = failure_count + 1,
+                        status = CASE WHEN failure_count + 1 >= 5 THEN 'failed' ELSE 'pending' END,
+                        last_error_code = 408,
+                        last_error_message = 'lease_expired',
+                        last_error_at = now(),
+                        next_attempt_at = CASE WHEN failure_count + 1 < 5 THEN now() + (interval '30 seconds' * POWER(2, failure_count)) ELSE NULL END,
+                        claimed_by = NULL,
+                        lease_expires_at = NULL
+                    WHERE cq.id IN (
+                        SELECT id FROM comments_queue
+                        WHERE status = 'processing' AND lease_expires_at < now()
+                        ORDER BY lease_expires_at
+                        LIMIT :lim
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING cq.id, cq.channel_id, cq.comment_id, cq.status
+                ), dead AS (
+                    INSERT INTO comments_dead_letter (queue_id, channel_id, comment_id, reason, error_code, error_message, created_at)
+                    SELECT id, channel_id, comment_id, 'lease_expired', 408, 'Processing lease expired', now()
+                    FROM reclaimed
+                    WHERE status = 'failed'
+                    ON CONFLICT DO NOTHING
+                )
+                SELECT COUNT(*) FROM reclaimed
                 """
             ),
             {"lim": int(limit)},
         )
+        count = int(res.scalar() or 0)
+        await self.session.commit()
+        if count:
+            logger.warning("Reclaimed {} comments_queue rows with expired leases", count)
+        record_comments_queue_claims("reclaimed", count)
+        return count
+
+    async def claim_pending_comments(self, limit: int = 5) -> List[QueueItem]:
+        """Claim up to `limit` due pending comments for this worker.
+
+        Ordered by priority desc, then created_at asc. Rows locked by another
+        claim in flight are skipped rather than waited on, and the claim is
+        committed before returning so other workers see the lease.
+        """
+        await self.reclaim_expired()
+        res = await self.session.execute(
+            text(
+                """
+                UPDATE comments_queue cq
+                SET status = 'processing',
+                    claimed_by = :worker,
+                    lease_expires_at = now() + CAST(:lease AS integer) * interval '1 second',
+                    processed_at = now()
+                WHERE cq.id IN (
+                    SELECT id FROM comments_queue
+                    WHERE status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now())
+                    ORDER BY priority DESC, created_at ASC
+                    LIMIT :lim
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING cq.id, cq.comment_id, COALESCE(cq.content, ''), cq.classification,
+                          COALESCE(cq.priority, 0), cq.created_at
+                """
+            ),
+            {"worker": self.worker_id, "lease": batch_generation.LEASE_SECONDS, "lim": int(limit)},
+        )
+        rows = res.fetchall()
+        await self.session.commit()
+        # RETURNING order is unspecified
+        rows.sort(key=lambda r: (-int(r[4] or 0), r[5]))
         items: List[QueueItem] = []
-        for r in res.fetchall():
+        for r in rows:
             items.append(
                 QueueItem(
                     queue_id=str(r[0]),
@@ -208,8 +285,74 @@ class BatchProcessor:
                     priority=int(r[4] or 0),
                 )
             )
+        record_comments_queue_claims("claimed", len(items))
         return items
 
+    async def release_claims(self, items: List[QueueItem], *, delay_seconds: int = 0) -> int:
+        """Hand claimed rows back to pending without counting a failure.
+
+        Only rows still processing under this worker's claim are touched.
+        """
+        if not items:
+            return 0
+        ids = ",".join(f"CAST(:id{i} AS uuid)" for i in range(len(items)))
+        params: Dict[str, Any] = {f"id{i}": it.queue_id for i, it in enumerate(items)}
+        try:
+            res = await self.session.execute(
+                text(
+                    f"""
+                    UPDATE comments_queue
+                    SET status = 'pending',
+                        claimed_by = NULL,
+                        lease_expires_at = NULL,
+                        next_attempt_at = now() + CAST(:delay AS integer) * interval '1 second'
+                    WHERE id IN ({ids}) AND status = 'processing' AND claimed_by = :worker
+                    """
+                ),
+                {**params, "worker": self.worker_id, "delay": int(delay_seconds)},
+            )
+            await self.session.commit()
+        except Exception as e:
+            logger.warning("Failed to release {} claims (they expire with their lease): {}", len(items), e)
+            try:
+                await self.session.rollback()
+            except Exception:
+                pass
+            return 0
+        released = int(res.rowcount or 0)
+        record_comments_queue_claims("released", released)
+        return released
+
+    async def queue_stats(self) -> Dict[str, int]:
+        """Queue depth by state and the oldest pending age; also sets the gauges."""
+        res = await self.session.execute(
+            text(
+                """
+                SELECT
+                    COUNT(*) FILTER (WHERE status = 'pending'),
+                    COUNT(*) FILTER (WHERE status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= now())),
+                    COUNT(*) FILTER (WHERE status = 'processing'),
+                    COUNT(*) FILTER (WHERE status = 'processing' AND lease_expires_at < now()),
+                    COALESCE(EXTRACT(EPOCH FROM (now() - MIN(created_at) FILTER (WHERE status = 'pending')))::int, 0)
+                FROM comments_queue
+                WHERE status IN ('pending', 'processing')
+                """
+            )
+        )
+        row = res.first()
+        stats = {
+            "pending": int(row[0] or 0),
+            "ready": int(row[1] or 0),
+            "processing": int(row[2] or 0),
+            "expired": int(row[3] or 0),
+            "oldest_pending_age_seconds": int(row[4] or 0),
+        }
+        record_comments_queue(
+            {k: v for k, v in stats.items() if k != "oldest_pending_age_seconds"},
+            stats["oldest_pending_age_seconds"],
+        )
+        return stats
+
     @staticmethod
     def _length_bucket(text_val: str) -> str:
         n = len(text_val or "")
@@ -220,17 +363,17 @@ class BatchProcessor:
         return "long"
 
     def group_comments(self, items: List[QueueItem]) -> List[List[QueueItem]]:
-        """Group by (classification, length_bucket)."""
+        """Group by (classification, length_bucket), then split each group by token budget."""
         groups: Dict[Tuple[Optional[str], str], List[QueueItem]] = {}
         for it in items:
             key = (it.classification, self._length_bucket(it.content))
             groups.setdefault(key, []).append(it)
-        # return batches of up to 5 in each group
         batches: List[List[QueueItem]] = []
         max_batch = self.get_batch_size()
         for _, arr in groups.items():
-            for i in range(0, len(arr), max_batch):
-                batches.append(arr[i : i + max_batch])
+            by_id = {it.comment_id: it for it in arr}
+            for chunk in batch_generation.plan_batches([(it.comment_id, it.content) for it in arr], max_items=max_batch):
+                batches.append([by_id[cid] for cid in chunk])
         if os.getenv("TESTING_MODE", "false").lower() == "true":
             try:
                 debug_log.add(
@@ -247,80 +390,50 @@ class BatchProcessor:
         return batches
 
     async def process_batch(self, items: List[QueueItem]) -> List[Dict[str, Any]]:
-        """Call the batch-generate endpoint for up to 5 items and return results."""
-        if not items:
+        """Generate replies for one batch and return per-comment results."""
+        return await self.process_groups([items])
+
+    async def process_groups(self, groups: List[List[QueueItem]]) -> List[Dict[str, Any]]:
+        """Generate replies for several batches at once and return per-comment results.
+
+        Database work runs on this session; the batches' model calls run
+        concurrently. Claimed rows that end up unprocessed are released, except
+        after an unexpected error, where the lease runs out and counts it as a failure.
+        """
+        items = [it for group in groups for it in group]
+        ids = [it.comment_id for it in items]
+        if not ids:
             return []
         # Global pause guard
         try:
             if await system_state.is_paused(self.session):
-                logger.warning("System paused; skipping batch of {} items", len(items))
-                return [{"comment_id": it.comment_id, "error": "paused"} for it in items]
+                logger.warning("System paused; skipping batch of {} items", len(ids))
+                await self.release_claims(items)
+                return [{"comment_id": cid, "error": "paused"} for cid in ids]
         except Exception:
             pass
-        ids = [it.comment_id for it in items][:5]
-
-        # Use the local app endpoint; in-process call would be nicer but we avoid tight coupling.
-        # We'll perform a direct SQLAlchemy-friendly approach: emulate HTTP via httpx if available.
-        import os
-        base_url = getattr(settings, "PUBLIC_API_BASE", None) or os.getenv("PUBLIC_API_BASE") or "http://localhost:8000"
 
         try:
-            import httpx  # type: ignore
-        except Exception:
-            logger.error("httpx is not installed; cannot call batch endpoint")
-            return [{"comment_id": cid, "error": "http_client_missing"} for cid in ids]
-
-        payload = {"comment_ids": ids}
-        url = f"{base_url}/api/ai/batch-generate"
-        async def _call_once():
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                return await client.post(url, json=payload)
-
-        def _should_retry(e: BaseException) -> bool:
-            import httpx  # type: ignore
-            if isinstance(e, httpx.HTTPStatusError):
-                code = e.response.status_code
-                return code in (429, 500, 502, 503, 504)
-            return isinstance(e, httpx.TransportError)
-
-        try:
-            resp = await async_retry(
-                lambda: _call_once(),
-                retries=3,
-                base_delay=0.5,
-                max_delay=4.0,
-                should_retry=lambda e: _should_retry(e),
+            result = await batch_generation.generate_replies(
+                self.session,
+                [[it.comment_id for it in group] for group in groups],
+                max_items=self.get_batch_size(),
+                worker_id=self.worker_id,
             )
-            if resp.status_code != 200:
-                try:
-                    # log to error_logs
-                    await self.session.execute(
-                        sql_text(
-                            """
-                            INSERT INTO error_logs (service_name, operation, error_code, message, context, created_at)
-                            VALUES ('batch_processor', 'batch-generate', :code, :msg, :ctx, now())
-                            """
-                        ),
-                        {
-                            "code": int(resp.status_code),
-                            "msg": "non_200_response",
-                            "ctx": {"ids": ids, "body": payload},
-                        },
-                    )
-                    await self.session.commit()
-                except Exception:
-                    try:
-                        await self.session.rollback()
-                    except Exception:
-                        pass
-                logger.error("Batch endpoint failed: {} - {}", resp.status_code, getattr(resp, 'text', ''))
-                return [{"comment_id": cid, "error": f"http_{resp.status_code}"} for cid in ids]
-            data = resp.json()
-            items_out = data.get("items", []) if isinstance(data, dict) else []
-            return items_out
+            return result.items
+        except batch_generation.BatchGenerationError as e:
+            logger.error("Batch generation failed for {} items: {}", len(ids), e)
+            try:
+                await self.session.rollback()
+            except Exception:
+                pass
+            # Failed generations were already backed off; this covers "unavailable"
+            await self.release_claims(items, delay_seconds=30)
+            return [{"comment_id": cid, "error": "ai_generation_failed"} for cid in ids]
         except Exception as e:
-            logger.exception("Batch call exception: {}", e)
+            logger.exception("Batch generation exception: {}", e)
             try:
+                await self.session.rollback()
                 await self.session.execute(
                     sql_text(
                         """
@@ -338,70 +451,95 @@ class BatchProcessor:
                     pass
             return [{"comment_id": cid, "error": "exception"} for cid in ids]
 
-    async def run_batch_cycle(self, *, max_batches: int = 20, delay_seconds: float = 2.0) -> int:
-        """Process all pending comments in grouped batches respecting rate limits.
+    async def run_batch_cycle(self, *, max_batches: int = 20, delay_seconds: float = 0.0) -> int:
+        """Process all pending comments in grouped batches.
+
+        Each round claims due comments and hands every batch to one
+        process_groups call, so their model calls overlap; rate limits are left
+        to the global LLM limit and Claude retries. Claims make it safe to run
+        this in several workers at once. delay_seconds optionally pauses
+        between rounds.
 
         Returns number of comments successfully processed.
         """
         processed = 0
         batches_run = 0
+        reason = "no"
         while batches_run < max_batches:
             should, reason = await self.should_process_batch()
             if not should:
                 break
 
-            pending = await self.get_pending_comments(limit=50)
-            if not pending:
+            try:
+                if await system_state.is_paused(self.session):
+                    break
+            except Exception:
+                pass
+
+            remaining = max_batches - batches_run
+            claimed = await self.claim_pending_comments(limit=min(200, remaining * self.get_batch_size()))
+            if not claimed:
                 break
-            groups = self.group_comments(pending)
+            groups = self.group_comments(claimed)
+            # Grouping can yield more batches than remain; hand those rows back
+            groups, extra = groups[:remaining], groups[remaining:]
+            await self.release_claims([it for group in extra for it in group])
             if not groups:
                 break
-            for group in groups:
-                # Only process up to configured size at a time
-                subset = group[: self.get_batch_size()]
-                if os.getenv("TESTING_MODE", "false").lower() == "true":
-                    debug_log.add(
-                        "batch.process.start",
-                        {"size": len(subset), "reason": reason, "ids": [it.comment_id for it in subset]},
+            subset = [it for group in groups for it in group]
+            if os.getenv("TESTING_MODE", "false").lower() == "true":
+                debug_log.add(
+                    "batch.process.start",
+                    {
+                        "size": len(subset),
+                        "batches": len(groups),
+                        "reason": reason,
+                        "ids": [it.comment_id for it in subset],
+                    },
+                )
+            results = await self.process_groups(groups)
+            # Mark last_batch_processed_at for attempted items (track timing even if individual calls fail)
+            try:
+                ids = [it.queue_id for it in subset]
+                if ids:
+                    # Build a VALUES list for uuid ids
+                    values = ",".join([f"(CAST(:id{i} AS uuid))" for i in range(len(ids))])
+                    params = {f"id{i}": str(v) for i, v in enumerate(ids)}
+                    await self.session.execute(
+                        text(
+                            f"""
+                            UPDATE comments_queue cq
+                            SET last_batch_processed_at = now()
+                            FROM (VALUES {values}) AS v(id)
+                            WHERE cq.id = v.id
+                            """
+                        ),
+                        params,
                     )
-                results = await self.process_batch(subset)
-                # Mark last_batch_processed_at for attempted items (track timing even if individual calls fail)
+                    await self.session.commit()
+            except Exception:
                 try:
-                    ids = [it.queue_id for it in subset]
-                    if ids:
-                        # Build a VALUES list for uuid ids
-                        values = ",".join([f"(CAST(:id{i} AS uuid))" for i in range(len(ids))])
-                        params = {f"id{i}": str(v) for i, v in enumerate(ids)}
-                        await self.session.execute(
-                            text(
-                                f"""
-                                UPDATE comments_queue cq
-                                SET last_batch_processed_at = now()
-                                FROM (VALUES {values}) AS v(id)
-                                WHERE cq.id = v.id
-                                """
-                            ),
-                            params,
-                        )
-                        await self.session.commit()
+                    await self.session.rollback()
                 except Exception:
-                    try:
-                        await self.session.rollback()
-                    except Exception:
-                        pass
-                # Count successes
-                for r in results:
-                    if isinstance(r, dict) and r.get("response_text"):
-                        processed += 1
-                if os.getenv("TESTING_MODE", "false").lower() == "true":
-                    debug_log.add(
-                        "batch.process.done",
-                        {"size": len(subset), "processed": processed, "results": len(results)},
-                    )
-                batches_run += 1
-                # Delay between batches to respect rate limits
+                    pass
+            # Count successes
+            for r in results:
+                if isinstance(r, dict) and r.get("response_text"):
+                    processed += 1
+            if os.getenv("TESTING_MODE", "false").lower() == "true":
+                debug_log.add(
+                    "batch.process.done",
+                    {"size": len(subset), "processed": processed, "results": len(results)},
+                )
+            batches_run += len(groups)
+            if delay_seconds > 0 and batches_run < max_batches:
                 await asyncio.sleep(delay_seconds)
-                if batches_run >= max_batches:
-                    break
+        try:
+            await self.queue_stats()
+        except Exception:
+            try:
+                await self.session.rollback()
+            except Exception:
+                pass
         logger.info("Batch cycle complete: processed={} batches={} (trigger={})", processed, batches_run, reason)
         return processed
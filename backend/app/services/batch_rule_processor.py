@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import math
 import os
 import time
+from collections import deque
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple, Callable, Iterable
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Callable, Iterable
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import async_session_maker
+from app.services.rule_compiler import CompiledRuleSet
 from app.services.rule_evaluator import RuleEvaluator
 
 
@@ -99,17 +103,28 @@ class BatchRuleProcessorConfig:
 class BatchRuleProcessor:
     """
     Processes rules against comments with:
-    - Similar AI evaluation grouping to reduce LLM calls
+    - Rules compiled once per batch; AI conditions skipped when the logic is already decided
     - Batched YouTube API calls via provided client
     - Priority ordering of rules
-    - Fair scheduling (round-robin with per-rule quotas)
-    - Anti-monopoly controls (per-rule concurrency + quotas)
+    - Fair scheduling: a queue per rule, dispatched round-robin with per-rule quotas
+    - Concurrent evaluation under a global cap and per-rule semaphores (anti-monopoly)
     - Circuit breaker per rule to avoid repeated failures
+    - Results streamed back as they complete (`stream`) or collected (`process`)
+
+    Evaluations of rules with AI conditions may write to the database (usage
+    logging), so each runs in its own session from `session_factory`; an
+    AsyncSession cannot be shared by concurrent tasks.
     """
 
-    def __init__(self, config: Optional[BatchRuleProcessorConfig] = None) -> None:
+    def __init__(
+        self,
+        config: Optional[BatchRuleProcessorConfig] = None,
+        *,
+        session_factory: Optional[Callable[[], Any]] = None,
+    ) -> None:
         self.config = config or BatchRuleProcessorConfig()
         self._evaluator = RuleEvaluator()
+        self._session_factory = session_factory or async_session_maker
         self._global_sem = asyncio.Semaphore(self.config.max_global_concurrency)
         self._rule_sems: Dict[str, asyncio.Semaphore] = {}
         self._breakers: Dict[str, CircuitBreaker] = {}
@@ -126,14 +141,63 @@ class BatchRuleProcessor:
     ) -> List[Dict[str, Any]]:
         """
         Process a batch of comments across rules.
-        Returns a list of results per (rule, comment).
+        Returns a list of results per (rule, comment), in completion order.
         """
+        return [
+            r async for r in self.stream(
+                db, rules=rules, comments=comments, youtube_client=youtube_client, context_base=context_base
+            )
+        ]
+
+    async def stream(
+        self,
+        db: AsyncSession,
+        *,
+        rules: List[Dict[str, Any]],
+        comments: List[Dict[str, Any]],
+        youtube_client: Optional[YouTubeBatchClient] = None,
+        context_base: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Like `process`, but yields each (rule, comment) result as soon as it is ready."""
+        results: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def produce() -> None:
+            try:
+                await self._run(db, rules, comments, youtube_client, context_base or {}, results.put_nowait)
+            finally:
+                results.put_nowait(done)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (item := await results.get()) is not done:
+                yield item
+            # Surface scheduler errors, if any
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await producer
+
+    # --------- Scheduling ---------
+    async def _run(
+        self,
+        db: AsyncSession,
+        rules: List[Dict[str, Any]],
+        comments: List[Dict[str, Any]],
+        youtube_client: Optional[YouTubeBatchClient],
+        base_ctx: Dict[str, Any],
+        emit: Callable[[Dict[str, Any]], None],
+    ) -> None:
         # 1) Sort rules by priority (desc), then name/id for stability
         ordered = sorted(rules or [], key=lambda r: (-(self._priority(r) or 0), str(r.get("name") or r.get("id") or "")))
+        if not ordered or not comments:
+            return
 
         # 2) Prepare per-rule semaphores and breakers
         for r in ordered:
-            rid = str(r.get("id") or r.get("rule_id") or id(r))
+            rid = self._rule_id(r)
             if rid not in self._rule_sems:
                 self._rule_sems[rid] = asyncio.Semaphore(self.config.per_rule_concurrency)
             if rid not in self._breakers:
@@ -147,141 +211,84 @@ class BatchRuleProcessor:
         if youtube_client:
             await self._batch_prefetch_youtube(youtube_client, comments)
 
-        # 4) Fair scheduling: perform rounds; each rule gets up to quota
-        results: List[Dict[str, Any]] = []
-        remaining = list(comments or [])
-        if not remaining or not ordered:
-            return results
+        # Compile once for the batch: every comment's text is scanned a single
+        # time for all rules' keywords, and its cache signature is built once
+        rule_set = self._evaluator.compile_rules(ordered)
+        sigs = [self._evaluator.comment_signature(c, base_ctx) for c in comments]
 
-        # Precompute AI grouping plan per rule to reduce LLM calls
-        ai_plan: Dict[str, Dict[str, List[int]]] = {
-            self._rule_id(r): self._group_ai_keys(r, remaining) for r in ordered
-        }
+        # 4) One queue per rule (a comment is evaluated at most once per rule)
+        queues: Dict[str, Deque[int]] = {}
+        index: Dict[str, int] = {}
+        for i, r in enumerate(ordered):
+            rid = self._rule_id(r)
+            if rid not in queues:
+                queues[rid] = deque(range(len(comments)))
+                index[rid] = i
+
+        finished = asyncio.Event()
 
-        # For bookkeeping of which comments are already processed for a rule
-        processed: Dict[Tuple[str, str], bool] = {}
-
-        # Iterate in rounds until all comments considered
-        cursor = {self._rule_id(r): 0 for r in ordered}
-        total = len(remaining)
-        while any(cursor[self._rule_id(r)] < total for r in ordered):
-            for r in ordered:
-                rid = self._rule_id(r)
-                quota = self.config.quota_per_round
-                if quota <= 0:
-                    continue
-                took = 0
-                # Skip rules with open breakers (unless moving to half-open)
-                if not self._breakers[rid].allow():
-                    continue
-                # Round-robin over comments starting from cursor
-                start = cursor[rid]
-                i = start
-                while took < quota and i < total:
-                    c = remaining[i]
-                    key = (rid, str(c.get("id") or i))
-                    if not processed.get(key):
-                        try:
-                            out = await self._eval_one(db, r, c, context_base or {}, rid, ai_plan[rid])
-                            results.append(out)
-                            self._breakers[rid].record_success()
-                        except Exception:
-                            self._breakers[rid].record_failure()
-                        processed[key] = True
+        async def run_one(rid: str, ci: int) -> None:
+            try:
+                out = await self._eval_one(db, rule_set, index[rid], comments[ci], sigs[ci], base_ctx, rid)
+                self._breakers[rid].record_success()
+                emit(out)
+            except Exception:
+                self._breakers[rid].record_failure()
+            finally:
+                self._rule_sems[rid].release()
+                self._global_sem.release()
+                finished.set()
+
+        # 5) Fair dispatch: round-robin over rules, each taking up to its quota
+        # per round, never beyond its own semaphore; the global semaphore
+        # bounds total in-flight evaluations
+        quota = self.config.quota_per_round
+        async with asyncio.TaskGroup() as tg:
+            while any(queues.values()) and quota > 0:
+                finished.clear()
+                dispatched = False
+                for rid, queue in queues.items():
+                    sem = self._rule_sems[rid]
+                    if queue and not self._breakers[rid].allow():
+                        # Open breaker: drop this rule's remaining comments
+                        queue.clear()
+                        continue
+                    took = 0
+                    while queue and took < quota and not sem.locked():
+                        await sem.acquire()
+                        await self._global_sem.acquire()
+                        tg.create_task(run_one(rid, queue.popleft()))
                         took += 1
-                    i += 1
-                cursor[rid] = i
-        return results
+                        dispatched = True
+                if not dispatched:
+                    # Every rule with work is at its concurrency limit
+                    await finished.wait()
 
     # --------- Core helpers ---------
     async def _eval_one(
         self,
         db: AsyncSession,
-        rule: Dict[str, Any],
+        rule_set: CompiledRuleSet,
+        index: int,
         comment: Dict[str, Any],
+        comment_sig: str,
         base_ctx: Dict[str, Any],
         rid: str,
-        ai_groups: Dict[str, List[int]],
     ) -> Dict[str, Any]:
-        # Anti-monopoly controls via semaphores
-        async with self._global_sem, self._rule_sems[rid]:
-            # Use grouped AI evals when possible by priming cache for similar keys
-            await self._prime_ai_groups(db, rule, [comment], base_ctx, ai_groups)
-            res = await self._evaluator.evaluate_rule(db, rule, comment, base_ctx)
-            return {
-                "rule_id": rid,
-                "comment_id": comment.get("id"),
-                "matches": res.matches,
-                "confidence": res.confidence,
-                "matched_conditions": res.matched_conditions,
-            }
-
-    async def _prime_ai_groups(
-        self,
-        db: AsyncSession,
-        rule: Dict[str, Any],
-        comments: List[Dict[str, Any]],
-        base_ctx: Dict[str, Any],
-        ai_groups: Dict[str, List[int]],
-    ) -> None:
-        """Evaluate one representative per AI key to populate cache for similar comments."""
-        if not ai_groups:
-            return
-        # For the provided comments, compute their key and pick the first seen in each group to prime
-        taken: set[str] = set()
-        for idx, c in enumerate(comments):
-            for cond in (rule.get("conditions") or []):
-                if (cond.get("type") or "").lower() != "ai":
-                    continue
-                prompt = cond.get("prompt") or ""
-                ch_id = str(base_ctx.get("channel_id") or "")
-                # Reuse evaluator's key behavior by calling evaluate_ai_condition per-group representative
-                # We use the similarity key we precomputed in _group_ai_keys
-                k = self._ai_key_for_comment(prompt, ch_id, c)
-                if k in taken:
-                    continue
-                # Pick first comment index in the group to actually evaluate; others benefit from cache
-                taken.add(k)
-                try:
-                    await self._evaluator.evaluate_ai_condition(
-                        db,
-                        c,
-                        prompt,
-                        channel_id=ch_id,
-                        channel_name=str(base_ctx.get("channel_name") or ""),
-                        video_title=str(base_ctx.get("video_title") or ""),
-                    )
-                except Exception:
-                    # Ignore; failure recorded by breaker at caller
-                    pass
-
-    def _group_ai_keys(self, rule: Dict[str, Any], comments: List[Dict[str, Any]]) -> Dict[str, List[int]]:
-        groups: Dict[str, List[int]] = {}
-        ai_conds = [c for c in (rule.get("conditions") or []) if (c.get("type") or "").lower() == "ai"]
-        if not ai_conds:
-            return groups
-        # For each AI condition, group comments by similarity key
-        for i, c in enumerate(comments):
-            for ac in ai_conds:
-                prompt = ac.get("prompt") or ""
-                key = self._ai_key_for_comment(prompt, str(c.get("channel_id") or ""), c)
-                groups.setdefault(key, []).append(i)
-        return groups
-
-    def _ai_key_for_comment(self, prompt: str, channel_id: str, comment: Dict[str, Any]) -> str:
-        # Mirror evaluator's similarity behavior: normalize text and keep first tokens
-        text = str(comment.get("text") or "")
-        # Avoid importing evaluator internals; simple normalization must align with evaluator._ai_cache_key
-        import re as _re
-        t = text.lower()
-        t = _re.sub(r"https?://\S+|www\.\S+", " ", t)
-        t = _re.sub(r"[@#]\w+", " ", t)
-        t = _re.sub(r"\d+", " ", t)
-        t = _re.sub(r"[^a-z\s]", " ", t)
-        t = _re.sub(r"\s+", " ", t).strip()
-        tokens = t.split()
-        sig = " ".join(tokens[:12])
-        return f"ai:{channel_id}:{hash((sig, prompt.strip()[:120]))}"
+        # AI conditions are only called when the rule's logic still depends
+        # on them; similar comments share the evaluator's AI cache
+        if rule_set.rules[index].has_ai:
+            async with self._session_factory() as session:
+                res = await self._evaluator.evaluate_compiled(session, rule_set, index, comment, base_ctx, comment_sig=comment_sig)
+        else:
+            res = await self._evaluator.evaluate_compiled(db, rule_set, index, comment, base_ctx, comment_sig=comment_sig)
+        return {
+            "rule_id": rid,
+            "comment_id": comment.get("id"),
+            "matches": res.matches,
+            "confidence": res.confidence,
+            "matched_conditions": res.matched_conditions,
+        }
 
     async def _batch_prefetch_youtube(self, yt: YouTubeBatchClient, comments: List[Dict[str, Any]]) -> None:
         # Gather IDs to fetch
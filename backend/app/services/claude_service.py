@@ -24,6 +24,8 @@ from sqlalchemy import text
 from loguru import logger
 from app.utils.reliability import async_retry, CircuitBreaker
 from app.utils import debug_log
+from app.services import response_reuse
+from app.services.response_reuse import ReusedReply
 
 
 PRICE_USD_PER_MTOKENS: Dict[str, Dict[str, float]] = {
@@ -51,6 +53,12 @@ def _calc_cost_usd(model: str, tokens_in: int, tokens_out: int) -> float:
 class ClaudeService:
     """Service for generating brief, friendly YouTube comment responses via Claude."""
 
+    # Track last N responses per key to avoid repetition; shared by every
+    # instance in the process since callers construct one per request
+    _recent: Dict[str, deque[str]] = defaultdict(
+        lambda: deque(maxlen=int(os.getenv("RESPONSE_RECENT_BUFFER", "10")))
+    )
+
     def __init__(self) -> None:
         # Prefer env var directly; fall back to settings for convenience in local/dev
         api_key = os.getenv("CLAUDE_API_KEY", getattr(settings, "CLAUDE_API_KEY", None))
@@ -65,10 +73,6 @@ class ClaudeService:
         self._breaker = CircuitBreaker(threshold=int(os.getenv("CLAUDE_CB_THRESHOLD", "5")),
                                        cooldown=float(os.getenv("CLAUDE_CB_COOLDOWN", "60")),
                                        half_open_max=1)
-        # Track last N responses per key to avoid repetition (process-local)
-        self._recent: Dict[str, deque[str]] = defaultdict(
-            lambda: deque(maxlen=int(os.getenv("RESPONSE_RECENT_BUFFER", "10")))
-        )
 
     async def generate_response(
         self,
@@ -255,6 +259,88 @@ class ClaudeService:
             except Exception:
                 logger.exception("Failed to update response_metrics after Claude generation")
 
+    # -------------------- Plain completions --------------------
+    async def complete(
+        self,
+        *,
+        system: str,
+        prompt: str,
+        max_tokens: int = 300,
+        temperature: float = 0.0,
+        model: Optional[str] = None,
+    ) -> Optional[str]:
+        """Run one prompt without blocking the event loop; returns the reply text.
+
+        None when the client is disabled or the circuit is open. API errors
+        are raised after retries so batch callers can retry their items.
+        """
+        if not self.client or not self._breaker.allow_request():
+            return None
+        model_used = model or getattr(settings, "CLAUDE_MODEL", None) or os.getenv("CLAUDE_MODEL") or "claude-sonnet-4-5-20250929"
+
+        def _call_sync():
+            return self.client.messages.create(  # type: ignore[union-attr]
+                model=model_used,
+                max_tokens=max_tokens,
+                system=system,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+            )
+
+        def _should_retry(e: BaseException) -> bool:
+            return getattr(e, "status_code", None) in (429, 500, 502, 503, 504)
+
+        try:
+            resp = await async_retry(
+                lambda: _run_in_thread(_call_sync),
+                retries=int(os.getenv("CLAUDE_MAX_RETRIES", "3")),
+                base_delay=float(os.getenv("CLAUDE_RETRY_BASE_DELAY", "0.5")),
+                max_delay=float(os.getenv("CLAUDE_RETRY_MAX_DELAY", "6.0")),
+                should_retry=_should_retry,
+            )
+        except Exception:
+            self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
+        content = getattr(resp, "content", None)
+        if isinstance(content, list) and content:
+            first = content[0]
+            return getattr(first, "text", None) or (first.get("text") if isinstance(first, dict) else None)
+        return getattr(resp, "output_text", None)
+
+    # -------------------- Approved reply reuse --------------------
+    async def find_reusable_response(
+        self,
+        db: AsyncSession,
+        *,
+        channel_id: str,
+        comment_text: str,
+        channel_name: str = "",
+        video_title: str = "",
+        username: str = "",
+        record: bool = True,
+    ) -> Optional[ReusedReply]:
+        """Approved reply on this channel for a repeat of the comment, or None.
+
+        generate_response stays a plain model call (evaluators use it for
+        arbitrary prompts), so reply paths check here first. With
+        record=False the caller counts the lookup via
+        response_reuse.record_lookups.
+        """
+        channel_key = str(channel_id)
+        return await response_reuse.find_reply(
+            db,
+            channel_key=channel_key,
+            comment_text=comment_text,
+            variables={"channel_name": channel_name, "video_title": video_title, "username": username},
+            recent=self._recent[response_reuse.recent_key(channel_key)],
+            record=record,
+        )
+
+    def remember_recent(self, channel_id: str, reply: str) -> None:
+        """Note a freshly generated reply so reuse doesn't repeat it right after."""
+        self._recent[response_reuse.recent_key(str(channel_id))].append(reply)
+
     # -------------------- Response variation API --------------------
     def _style_instructions(self, style: str) -> str:
         s = (style or "").strip().lower()
@@ -492,6 +578,23 @@ class ClaudeService:
 
 # Small helper to run sync function in a thread for async_retry
 import asyncio
+import weakref
+
+# Process-wide cap on in-flight model calls. Every call goes through
+# _run_in_thread, so concurrent batch groups, rule evaluations and reply
+# generation share one limit. Semaphores bind to a loop, hence one per loop.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+_llm_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _llm_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _llm_slots.get(loop)
+    if sem is None:
+        sem = _llm_slots[loop] = asyncio.Semaphore(max(1, LLM_MAX_CONCURRENCY))
+    return sem
+
 
 async def _run_in_thread(fn):
-    return await asyncio.to_thread(fn)
+    async with _llm_semaphore():
+        return await asyncio.to_thread(fn)
@@ -13,7 +13,7 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Literal, Tuple
+from typing import List, Literal, Tuple
 import hashlib
 
 
@@ -24,6 +24,12 @@ _URL_REGEX = re.compile(r"(https?://|www\.)", re.IGNORECASE)
 _REPEAT_CHAR_REGEX = re.compile(r"(.)\1{3,}")  # any char repeated 4+ times
 _ALL_CAPS_WORD_REGEX = re.compile(r"^[A-Z0-9\W]+$")  # message is all caps/non-letters
 
+# Minimal stopword set for fingerprints; extend as needed
+_FINGERPRINT_STOPWORDS = {
+    "the", "a", "an", "is", "are", "am", "to", "and", "or", "of", "in", "on", "for", "with",
+    "it", "this", "that", "you", "your", "i", "we", "they", "he", "she", "be", "was", "were",
+}
+
 _EMOJI_REGEX = re.compile(
     r"[\U0001F300-\U0001F6FF\U0001F900-\U0001F9FF\U0001FA70-\U0001FAFF\U0001F600-\U0001F64F\u2600-\u26FF\u2700-\u27BF\u2764\uFE0F]"
 )
@@ -153,6 +159,18 @@ def classify_comment(comment_text: str) -> Tuple[Classification, int]:
     return (cls, score)
 
 
+def fingerprint_tokens(comment_text: str) -> List[str]:
+    """Normalized tokens behind create_fingerprint (steps 1-4 below)."""
+    text = (comment_text or "").lower()
+    # Keep only lowercase letters and spaces
+    text = re.sub(r"[^a-z\s]", " ", text)
+    # Collapse whitespace
+    text = re.sub(r"\s+", " ", text).strip()
+    if not text:
+        return []
+    return [t for t in text.split(" ") if t and t not in _FINGERPRINT_STOPWORDS]
+
+
 def create_fingerprint(comment_text: str) -> str:
     """Create a normalized fingerprint for caching similar comments.
 
@@ -163,19 +181,5 @@ def create_fingerprint(comment_text: str) -> str:
     4) Remove common stopwords (e.g., "the", "a", "is")
     5) Return a SHA-256 hex digest of the cleaned text
     """
-    text = (comment_text or "").lower()
-    # Keep only lowercase letters and spaces
-    text = re.sub(r"[^a-z\s]", " ", text)
-    # Collapse whitespace
-    text = re.sub(r"\s+", " ", text).strip()
-    if not text:
-        return hashlib.sha256(b"").hexdigest()
-
-    # Minimal stopword set; extend as needed
-    stopwords = {
-        "the", "a", "an", "is", "are", "am", "to", "and", "or", "of", "in", "on", "for", "with",
-        "it", "this", "that", "you", "your", "i", "we", "they", "he", "she", "be", "was", "were",
-    }
-    tokens = [t for t in text.split(" ") if t and t not in stopwords]
-    cleaned = " ".join(tokens)
+    cleaned = " ".join(fingerprint_tokens(comment_text))
     return hashlib.sha256(cleaned.encode("utf-8")).hexdigest()
@@ -0,0 +1,374 @@
+"""
+Credit metering.
+
+CreditService.track_usage sits on every metered AI call path, so recording
+usage avoids the database:
+
+- Action costs and demo-mode flags come from in-process TTL caches.
+- The priced event is appended to a Redis list, and the user's pending
+  credits counter is bumped in the same round trip.
+- The credits.flush_usage task drains the list in batches. Each batch is
+  moved atomically to a processing list and removed only after its
+  transaction commits, so a killed worker loses nothing. Events are
+  inserted idempotently by id, and each user's total for the newly
+  inserted events is applied with one atomic UPDATE ... RETURNING. That
+  UPDATE also performs any due monthly reset, so concurrent charges can't
+  lose updates.
+- Returned balances are written back to Redis. has_sufficient_balance
+  answers from that snapshot minus pending credits without querying.
+
+If Redis is unavailable the event is written through to the database.
+
+redis.asyncio connections are bound to the event loop that opened them.
+Celery tasks run each job under a fresh asyncio.run(), so they wrap their
+work in dedicated_redis(), which gives the run its own client.
+"""
+
+import json
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from uuid import UUID
+
+import redis.asyncio as redis
+from loguru import logger
+from sqlalchemy import Float, case, column, false, func, literal, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import redis_client
+from app.core.config import settings
+from app.models.credit_usage import ActionType, CreditActionCost, CreditUsageEvent, UserCreditBalance
+from app.models.user import User
+from app.utils.cache import async_ttl_cache
+
+USAGE_BUFFER_KEY = "credits:usage_buffer"
+# Batch being applied by the flusher; removed only after its commit
+USAGE_PROCESSING_KEY = "credits:usage_processing"
+FLUSH_LOCK_KEY = "credits:flush_lock"
+PENDING_KEY = "credits:pending:{user_id}"
+BALANCE_KEY = "credits:balance:{user_id}"
+
+# Pending counters outlive any realistic flush delay; snapshots are refreshed
+# on every flush that charges the user
+PENDING_TTL = 3600
+BALANCE_SNAPSHOT_TTL = 300
+
+FLUSH_BATCH_SIZE = 500
+FLUSH_LOCK_TIMEOUT = 300
+MONTHLY_RESET_INTERVAL = timedelta(days=30)
+DEFAULT_MONTHLY_ALLOWANCE = 100.0
+
+
+# Move up to ARGV[1] events from the head of the buffer to the processing list
+_CLAIM_BATCH_LUA = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items > 0 then
+    redis.call('LTRIM', KEYS[1], #items, -1)
+    redis.call('RPUSH', KEYS[2], unpack(items))
+end
+return items
+"""
+
+_task_redis: ContextVar[Optional[redis.Redis]] = ContextVar("credit_metering_redis", default=None)
+
+
+def _redis() -> redis.Redis:
+    return _task_redis.get() or redis_client
+
+
+@asynccontextmanager
+async def dedicated_redis() -> AsyncIterator[redis.Redis]:
+    """Use a Redis client owned by the current event loop, closed on exit."""
+    client = redis.from_url(settings.REDIS_CACHE_URL, encoding="utf-8", decode_responses=True)
+    token = _task_redis.set(client)
+    try:
+        yield client
+    finally:
+        _task_redis.reset(token)
+        await client.aclose()
+
+
+# ==================== Cached lookups ====================
+
+@async_ttl_cache(300.0, key_builder=lambda db: "action_costs", maxsize=1)
+async def get_action_costs(db: AsyncSession) -> Dict[ActionType, tuple]:
+    """Active (base, compute) dollar costs by action type."""
+    result = await db.execute(
+        select(
+            CreditActionCost.action_type,
+            CreditActionCost.base_cost_dollars,
+            CreditActionCost.compute_cost_dollars,
+        ).where(CreditActionCost.is_active == True)
+    )
+    return {action_type: (base, compute) for action_type, base, compute in result.all()}
+
+
+@async_ttl_cache(60.0, key_builder=lambda db, user_id: ("demo", user_id), maxsize=10000)
+async def is_demo_user(db: AsyncSession, user_id: UUID) -> bool:
+    result = await db.execute(select(User.demo_mode).where(User.id == user_id))
+    return bool(result.scalar_one_or_none())
+
+
+# ==================== Balance snapshots ====================
+
+@dataclass
+class BalanceSnapshot:
+    current_balance: float
+    is_unlimited: bool
+    monthly_allowance: float
+    next_reset_at: datetime
+    pending: float = 0.0
+
+    @property
+    def available(self) -> float:
+        # A due reset is applied by the next charge; count it already
+        balance = self.monthly_allowance if datetime.utcnow() >= self.next_reset_at else self.current_balance
+        return balance - self.pending
+
+
+async def get_balance_snapshot(user_id: UUID) -> Optional[BalanceSnapshot]:
+    """Last known balance with unflushed usage, or None if not cached."""
+    try:
+        raw, pending = await _redis().mget(
+            BALANCE_KEY.format(user_id=user_id),
+            PENDING_KEY.format(user_id=user_id),
+        )
+    except Exception as e:
+        logger.warning(f"Credit balance snapshot read failed for {user_id}: {e}")
+        return None
+    if raw is None:
+        return None
+    data = json.loads(raw)
+    return BalanceSnapshot(
+        current_balance=data["current_balance"],
+        is_unlimited=data["is_unlimited"],
+        monthly_allowance=data["monthly_allowance"],
+        next_reset_at=datetime.fromisoformat(data["next_reset_at"]),
+        pending=float(pending or 0.0),
+    )
+
+
+async def store_balance_snapshots(balances: Iterable[Any]) -> None:
+    """Cache rows with the UserCreditBalance columns used by BalanceSnapshot."""
+    try:
+        async with _redis().pipeline(transaction=False) as pipe:
+            for row in balances:
+                pipe.set(
+                    BALANCE_KEY.format(user_id=row.user_id),
+                    json.dumps({
+                        "current_balance": row.current_balance,
+                        "is_unlimited": bool(row.is_unlimited),
+                        "monthly_allowance": row.monthly_allowance,
+                        "next_reset_at": row.next_reset_at.isoformat(),
+                    }),
+                    ex=BALANCE_SNAPSHOT_TTL,
+                )
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Credit balance snapshot write failed: {e}")
+
+
+# ==================== Recording ====================
+
+async def record_usage(db: AsyncSession, event: Dict[str, Any]) -> None:
+    """
+    Queue a priced usage event for the next flush.
+
+    `event` holds CreditUsageEvent column values and must be JSON
+    serializable (ids and timestamps as strings).
+    """
+    pending_key = PENDING_KEY.format(user_id=event["user_id"])
+    try:
+        async with _redis().pipeline(transaction=True) as pipe:
+            pipe.rpush(USAGE_BUFFER_KEY, json.dumps(event))
+            pipe.incrbyfloat(pending_key, event["credits_charged"])
+            pipe.expire(pending_key, PENDING_TTL)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Credit usage buffer unavailable, writing through: {e}")
+        await apply_usage(db, [event], buffered=False)
+
+
+def _charge_statement(totals: Dict[UUID, float], now: datetime):
+    """Charge each user's total, resetting first where a reset is due."""
+    charges = values(
+        column("user_id", PGUUID(as_uuid=True)),
+        column("credits", Float),
+        name="charges",
+    ).data(list(totals.items()))
+
+    b = UserCreditBalance
+    due = b.next_reset_at <= now
+
+    def on_reset(reset_value, current):
+        return case((due, reset_value), else_=current)
+
+    return (
+        update(b)
+        .where(b.user_id == charges.c.user_id)
+        .values(
+            current_balance=on_reset(b.monthly_allowance, b.current_balance) - charges.c.credits,
+            total_consumed=b.total_consumed + charges.c.credits,
+            current_month_consumed=on_reset(literal(0.0), b.current_month_consumed) + charges.c.credits,
+            month_start_balance=on_reset(b.monthly_allowance, b.month_start_balance),
+            total_earned=b.total_earned + on_reset(b.monthly_allowance, literal(0.0)),
+            last_reset_at=on_reset(literal(now), b.last_reset_at),
+            next_reset_at=on_reset(literal(now + MONTHLY_RESET_INTERVAL), b.next_reset_at),
+            low_balance_notified=on_reset(false(), b.low_balance_notified),
+            updated_at=now,
+        )
+        .returning(b.user_id, b.current_balance, b.is_unlimited, b.monthly_allowance, b.next_reset_at)
+    )
+
+
+def _create_balances_statement(user_ids: Iterable[UUID], now: datetime):
+    """Starting balances for existing users without one; resets on the signup anniversary."""
+    signup = func.coalesce(func.timezone('UTC', User.created_at), now)
+    return (
+        pg_insert(UserCreditBalance)
+        .from_select(
+            [
+                "id", "user_id", "current_balance", "total_earned", "total_consumed",
+                "monthly_allowance", "month_start_balance", "current_month_consumed",
+                "last_reset_at", "next_reset_at", "is_unlimited", "low_balance_notified",
+                "created_at", "updated_at",
+            ],
+            select(
+                func.gen_random_uuid(),
+                User.id,
+                literal(DEFAULT_MONTHLY_ALLOWANCE),
+                literal(DEFAULT_MONTHLY_ALLOWANCE),
+                literal(0.0),
+                literal(DEFAULT_MONTHLY_ALLOWANCE),
+                literal(DEFAULT_MONTHLY_ALLOWANCE),
+                literal(0.0),
+                signup,
+                signup + MONTHLY_RESET_INTERVAL,
+                false(),
+                false(),
+                literal(now),
+                literal(now),
+            ).where(User.id.in_(list(user_ids))),
+        )
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+
+
+def _event_row(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **event,
+        "id": UUID(str(event["id"])) if event.get("id") else uuid.uuid4(),
+        "user_id": UUID(str(event["user_id"])),
+        "action_type": ActionType(event["action_type"]),
+        "created_at": datetime.fromisoformat(event["created_at"]),
+    }
+
+
+async def apply_usage(
+    db: AsyncSession,
+    events: List[Dict[str, Any]],
+    *,
+    buffered: bool = True,
+    processed_key: Optional[str] = None,
+) -> int:
+    """
+    Insert usage events and charge their users; commits.
+
+    Events already written (same id, e.g. a batch replayed after a crash)
+    are skipped and not charged again. With buffered=True the events came
+    from the Redis buffer and their pending credits are released once
+    committed, atomically with deleting `processed_key` if given. Events
+    for users that no longer exist are dropped. Returns the number of
+    events written.
+    """
+    now = datetime.utcnow()
+    rows = [_event_row(e) for e in events]
+    batch_totals: Dict[UUID, float] = defaultdict(float)
+    for row in rows:
+        batch_totals[row["user_id"]] += row["credits_charged"]
+
+    known = set((await db.execute(select(User.id).where(User.id.in_(list(batch_totals))))).scalars())
+    dropped = [row for row in rows if row["user_id"] not in known]
+    if dropped:
+        logger.warning(f"Dropping {len(dropped)} credit usage events for unknown users")
+    rows = [row for row in rows if row["user_id"] in known]
+
+    inserted = []
+    if rows:
+        inserted = (await db.execute(
+            pg_insert(CreditUsageEvent)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["id"])
+            .returning(CreditUsageEvent.user_id, CreditUsageEvent.credits_charged)
+        )).all()
+    totals: Dict[UUID, float] = defaultdict(float)
+    for user_id, credits in inserted:
+        totals[user_id] += credits
+
+    balances = []
+    if totals:
+        balances = (await db.execute(_charge_statement(totals, now))).all()
+        missing = totals.keys() - {b.user_id for b in balances}
+        if missing:
+            await db.execute(_create_balances_statement(missing, now))
+            balances += (await db.execute(
+                _charge_statement({u: totals[u] for u in missing}, now)
+            )).all()
+    await db.commit()
+
+    await store_balance_snapshots(balances)
+    if buffered:
+        try:
+            async with _redis().pipeline(transaction=True) as pipe:
+                for user_id, credits in batch_totals.items():
+                    pipe.incrbyfloat(PENDING_KEY.format(user_id=user_id), -credits)
+                if processed_key:
+                    pipe.delete(processed_key)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to release pending credits: {e}")
+    return len(inserted)
+
+
+async def flush_usage_buffer(db: AsyncSession, batch_size: int = FLUSH_BATCH_SIZE) -> int:
+    """
+    Drain the usage buffer in batches; returns the number of events written.
+
+    One flusher runs at a time. A batch left in the processing list by a
+    flusher that died is applied first; events from it that were already
+    written are skipped by id.
+    """
+    client = _redis()
+    lock = client.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT)
+    if not await lock.acquire(blocking=False):
+        logger.info("Credit usage flush already running")
+        return 0
+
+    written = 0
+    try:
+        while True:
+            raw = await client.lrange(USAGE_PROCESSING_KEY, 0, -1)
+            if not raw:
+                raw = await client.eval(_CLAIM_BATCH_LUA, 2, USAGE_BUFFER_KEY, USAGE_PROCESSING_KEY, batch_size)
+            if not raw:
+                break
+            try:
+                written += await apply_usage(
+                    db, [json.loads(r) for r in raw], processed_key=USAGE_PROCESSING_KEY
+                )
+            except Exception:
+                # The batch stays in the processing list for the next run
+                await db.rollback()
+                raise
+            await lock.reacquire()
+    finally:
+        try:
+            await lock.release()
+        except Exception as e:
+            logger.warning(f"Failed to release credit flush lock: {e}")
+    return written
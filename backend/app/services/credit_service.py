@@ -3,21 +3,24 @@ Credit tracking service.
 
 Handles all credit calculations, tracking, and balance management.
 1 credit = $0.10 of actual cost (API + compute)
+
+Usage is metered through app.services.credit_metering: events are buffered
+in Redis and charged in batches by the credits.flush_usage task.
 """
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from decimal import Decimal
+from sqlalchemy import select
 
 from app.models.credit_usage import (
     CreditUsageEvent,
     UserCreditBalance,
-    CreditActionCost,
     ActionType
 )
 from app.models.user import User
+from app.services import credit_metering
 
 
 # Pricing constants (per million tokens)
@@ -122,15 +125,8 @@ class CreditService:
         Returns:
             Dict with 'base_cost', 'compute_cost', and 'total_credits'
         """
-        result = await self.db.execute(
-            select(CreditActionCost).filter(
-                CreditActionCost.action_type == action_type,
-                CreditActionCost.is_active == True
-            )
-        )
-        cost_config = result.scalar_one_or_none()
-        
-        if not cost_config:
+        costs = await credit_metering.get_action_costs(self.db)
+        if action_type not in costs:
             # Default to zero cost if not configured
             return {
                 "base_cost": 0.0,
@@ -138,12 +134,12 @@ class CreditService:
                 "total_credits": 0.0
             }
         
-        total_dollars = cost_config.base_cost_dollars + cost_config.compute_cost_dollars
-        total_credits = total_dollars * CREDITS_PER_DOLLAR
+        base_cost, compute_cost = costs[action_type]
+        total_credits = (base_cost + compute_cost) * CREDITS_PER_DOLLAR
         
         return {
-            "base_cost": cost_config.base_cost_dollars,
-            "compute_cost": cost_config.compute_cost_dollars,
+            "base_cost": base_cost,
+            "compute_cost": compute_cost,
             "total_credits": total_credits
         }
     
@@ -159,9 +155,13 @@ class CreditService:
         resource_type: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
         manual_credits: Optional[float] = None  # For manual credit specification
-    ) -> CreditUsageEvent:
+    ) -> Optional[Dict[str, Any]]:
         """
-        Track a credit usage event and deduct from user balance.
+        Meter a credit usage event.
+        
+        The event is queued and deducted from the user's balance by the next
+        usage flush (see credit_metering); nothing here waits on the database
+        once the action costs and the user's demo flag are cached.
         
         Args:
             user_id: User ID
@@ -176,16 +176,10 @@ class CreditService:
             manual_credits: Manually specify credit cost (for compute operations)
         
         Returns:
-            Created CreditUsageEvent
+            The queued CreditUsageEvent values, or None in demo mode
         """
         # Check if user is in demo mode - don't track if so
-        user_result = await self.db.execute(
-            select(User).filter(User.id == user_id)
-        )
-        user = user_result.scalar_one_or_none()
-        
-        if user and user.demo_mode:
-            # Demo mode - don't track
+        if await credit_metering.is_demo_user(self.db, user_id):
             return None
         
         # Calculate costs
@@ -216,51 +210,28 @@ class CreditService:
         # Round to reasonable precision (5 decimal places)
         total_credits = round(total_credits, 5)
         
-        # Create usage event
-        event = CreditUsageEvent(
-            user_id=user_id,
-            action_type=action_type,
-            description=description,
-            credits_charged=total_credits,
-            base_cost=base_cost,
-            api_cost=api_cost,
-            compute_cost=compute_cost,
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-            model_used=model_used,
-            resource_id=resource_id,
-            resource_type=resource_type,
-            metadata=metadata
-        )
-        self.db.add(event)
-        
-        # Update user balance
-        balance = await self.ensure_user_balance(user_id)
-        balance.current_balance -= total_credits
-        balance.total_consumed += total_credits
-        balance.current_month_consumed += total_credits
-        balance.updated_at = datetime.utcnow()
-        
-        # Check if balance reset is needed
-        if datetime.utcnow() >= balance.next_reset_at:
-            await self._reset_monthly_balance(balance)
-        
-        await self.db.commit()
-        await self.db.refresh(event)
+        event = {
+            # Lets a replayed flush batch skip events already written
+            "id": str(uuid.uuid4()),
+            "user_id": str(user_id),
+            "action_type": action_type.value,
+            "description": description,
+            "credits_charged": total_credits,
+            "base_cost": base_cost,
+            "api_cost": api_cost,
+            "compute_cost": compute_cost,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "model_used": model_used,
+            "resource_id": resource_id,
+            "resource_type": resource_type,
+            "event_metadata": metadata,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        await credit_metering.record_usage(self.db, event)
         
         return event
     
-    async def _reset_monthly_balance(self, balance: UserCreditBalance):
-        """Reset monthly credits for a user."""
-        balance.current_balance = balance.monthly_allowance
-        balance.month_start_balance = balance.monthly_allowance
-        balance.current_month_consumed = 0.0
-        balance.total_earned += balance.monthly_allowance
-        balance.last_reset_at = datetime.utcnow()
-        balance.next_reset_at = self._calculate_next_reset(balance.last_reset_at)
-        balance.low_balance_notified = False
-        balance.updated_at = datetime.utcnow()
-    
     async def get_user_balance(self, user_id: UUID) -> UserCreditBalance:
         """Get current user balance."""
         return await self.ensure_user_balance(user_id)
@@ -270,13 +241,27 @@ class CreditService:
         user_id: UUID,
         required_credits: float
     ) -> bool:
-        """Check if user has sufficient balance for an operation."""
-        balance = await self.ensure_user_balance(user_id)
+        """
+        Check if user has sufficient balance for an operation.
+        
+        Answers from the cached balance snapshot, less usage not yet
+        flushed; only a cold snapshot reads the database.
+        """
+        snapshot = await credit_metering.get_balance_snapshot(user_id)
+        if snapshot is None:
+            balance = await self.ensure_user_balance(user_id)
+            await credit_metering.store_balance_snapshots([balance])
+            snapshot = await credit_metering.get_balance_snapshot(user_id) or credit_metering.BalanceSnapshot(
+                current_balance=balance.current_balance,
+                is_unlimited=balance.is_unlimited,
+                monthly_allowance=balance.monthly_allowance,
+                next_reset_at=balance.next_reset_at,
+            )
         
-        if balance.is_unlimited:
+        if snapshot.is_unlimited:
             return True
         
-        return balance.current_balance >= required_credits
+        return snapshot.available >= required_credits
     
     async def get_usage_stats(
         self,
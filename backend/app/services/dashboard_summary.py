@@ -0,0 +1,543 @@
+"""
+Dashboard summary assembly.
+
+Everything the creator dashboard shows comes from one SQL statement: each
+section is a one-row CTE (platform connections, video engagement windows,
+interaction rollups, workflows, monetization project, agency) cross-joined
+into a single result row. Demo mode fetches the demo profile over HTTP
+concurrently with that query.
+
+Summaries are cached per user in Redis for DASHBOARD_SUMMARY_CACHE_TTL
+seconds and tagged CacheTags.INTERACTIONS, which the interaction rollups
+invalidate whenever the user's interactions change.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from sqlalchemy import Select, func, select, true, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import CacheKeys, CacheTags, get_cache, set_cache
+from app.core.config import settings
+from app.models.agency import Agency
+from app.models.agency_opportunity import AgencyOpportunity
+from app.models.analytics import InteractionAnalytics
+from app.models.instagram import InstagramConnection
+from app.models.monetization import ActiveProject, ProjectTaskCompletion
+from app.models.user import User
+from app.models.workflow import Workflow
+from app.models.youtube import YouTubeComment, YouTubeConnection, YouTubeVideo
+
+logger = logging.getLogger(__name__)
+
+# Standard monetization plan task count
+PROJECT_TASKS_TOTAL = 22
+
+
+async def get_demo_profile(user_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch demo profile from demo service."""
+    demo_service_url = getattr(settings, 'DEMO_SERVICE_URL', None)
+
+    if not demo_service_url:
+        logger.warning("DEMO_SERVICE_URL not configured")
+        return None
+
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            response = await client.get(f"{demo_service_url}/profiles/{user_id}")
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.warning(f"Demo profile not found for user {user_id}: {response.status_code}")
+                return None
+    except (httpx.RequestError, httpx.TimeoutException) as e:
+        logger.error(f"Failed to fetch demo profile: {e}")
+        return None
+
+
+def _first(column, order_by):
+    """First value of `column` in `order_by` order within the aggregate."""
+    return array_agg(aggregate_order_by(column, order_by))[1]
+
+
+def build_summary_statement(user: User, *, is_demo: bool, now: datetime) -> Select:
+    """The single statement behind the dashboard; returns exactly one row."""
+    if is_demo:
+        # Demo counts use calendar days
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        yesterday_start = today_start - timedelta(days=1)
+    else:
+        # Real counts use rolling 24 hour windows
+        today_start = now - timedelta(hours=24)
+        yesterday_start = now - timedelta(hours=48)
+
+    youtube = (
+        select(
+            func.count().label('yt_connections'),
+            func.coalesce(func.sum(YouTubeConnection.subscriber_count), 0).label('subscribers'),
+            _first(YouTubeConnection.channel_name, YouTubeConnection.created_at).label('channel_name'),
+            _first(YouTubeConnection.subscriber_growth_30d, YouTubeConnection.created_at).label('first_growth_30d'),
+            # ~25% of 30-day growth as a 7-day estimate, per connection
+            func.coalesce(func.sum(func.trunc(YouTubeConnection.subscriber_growth_30d * 0.25)), 0).label('new_followers'),
+        )
+        .where(
+            YouTubeConnection.user_id == user.id,
+            YouTubeConnection.connection_status == 'active',
+        )
+        .cte('youtube')
+    )
+
+    instagram = (
+        select(
+            func.count().label('ig_connections'),
+            func.coalesce(func.sum(InstagramConnection.follower_count), 0).label('ig_followers'),
+            _first(InstagramConnection.username, InstagramConnection.created_at).label('ig_username'),
+        )
+        .where(
+            InstagramConnection.user_id == user.id,
+            InstagramConnection.connection_status == 'active',
+        )
+        .cte('instagram')
+    )
+
+    published = YouTubeVideo.published_at
+    engagements = func.coalesce(YouTubeVideo.like_count, 0) + func.coalesce(YouTubeVideo.comment_count, 0)
+    last_30d = published >= now - timedelta(days=30)
+    prev_30d = published < now - timedelta(days=30)
+    last_7d = published >= now - timedelta(days=7)
+    prev_7d = (published >= now - timedelta(days=14)) & (published < now - timedelta(days=7))
+    videos = (
+        select(
+            func.coalesce(func.sum(YouTubeVideo.view_count).filter(last_30d), 0).label('views_30d'),
+            func.coalesce(func.sum(engagements).filter(last_30d), 0).label('engagements_30d'),
+            func.coalesce(func.sum(YouTubeVideo.view_count).filter(prev_30d), 0).label('prev_views_30d'),
+            func.coalesce(func.sum(engagements).filter(prev_30d), 0).label('prev_engagements_30d'),
+            func.coalesce(func.sum(YouTubeVideo.view_count).filter(last_7d), 0).label('views_7d'),
+            func.coalesce(func.sum(YouTubeVideo.view_count).filter(prev_7d), 0).label('prev_views_7d'),
+        )
+        .select_from(YouTubeVideo)
+        .join(YouTubeConnection, YouTubeVideo.channel_id == YouTubeConnection.id)
+        .where(
+            YouTubeConnection.user_id == user.id,
+            published >= now - timedelta(days=60),
+        )
+        .cte('videos')
+    )
+
+    # YouTube comments not yet mapped to interactions
+    yt_comments = (
+        select(func.count(YouTubeComment.id).label('yt_comments_24h'))
+        .select_from(YouTubeComment)
+        .join(YouTubeVideo, YouTubeComment.video_id == YouTubeVideo.id)
+        .join(YouTubeConnection, YouTubeVideo.channel_id == YouTubeConnection.id)
+        .where(
+            YouTubeConnection.user_id == user.id,
+            YouTubeComment.published_at >= now - timedelta(hours=24),
+        )
+        .cte('yt_comments')
+    )
+
+    # Hourly rows for the two windows, daily rows for current status totals
+    rollup = InteractionAnalytics
+    bucket = tuple_(rollup.date, rollup.hour)
+    hourly = rollup.hour.isnot(None)
+    interactions = (
+        select(
+            func.coalesce(func.sum(rollup.total_interactions).filter(
+                hourly, bucket >= tuple_(today_start.date(), today_start.hour)
+            ), 0).label('interactions_today'),
+            func.coalesce(func.sum(rollup.total_interactions).filter(
+                hourly,
+                bucket >= tuple_(yesterday_start.date(), yesterday_start.hour),
+                bucket < tuple_(today_start.date(), today_start.hour),
+            ), 0).label('interactions_yesterday'),
+            func.coalesce(func.sum(rollup.unread_count + rollup.read_count).filter(
+                rollup.hour.is_(None)
+            ), 0).label('unanswered'),
+            func.coalesce(func.sum(rollup.awaiting_approval_count).filter(
+                rollup.hour.is_(None)
+            ), 0).label('awaiting_approval'),
+        )
+        .where(
+            rollup.user_id == user.id,
+            rollup.view_id.is_(None),
+            rollup.is_demo == is_demo,
+            rollup.hour.is_(None) | (rollup.date >= yesterday_start.date()),
+        )
+        .cte('interactions')
+    )
+
+    workflows = (
+        select(func.count(Workflow.id).label('active_workflows'))
+        .where(Workflow.created_by_id == user.id, Workflow.status == 'active')
+        .cte('workflows')
+    )
+
+    tasks_completed = (
+        select(func.count(ProjectTaskCompletion.id))
+        .where(ProjectTaskCompletion.project_id == ActiveProject.id)
+        .scalar_subquery()
+    )
+    project = (
+        select(
+            ActiveProject.id.label('project_id'),
+            ActiveProject.opportunity_title.label('project_name'),
+            ActiveProject.overall_progress.label('project_progress'),
+            tasks_completed.label('tasks_completed'),
+        )
+        .where(ActiveProject.user_id == user.id, ActiveProject.status == 'active')
+        .order_by(ActiveProject.last_activity_at.desc())
+        .limit(1)
+        .cte('project')
+    )
+
+    new_opportunities = (
+        select(func.count(AgencyOpportunity.id))
+        .where(
+            AgencyOpportunity.creator_id == user.id,
+            AgencyOpportunity.status.in_(['sent', 'viewed']),
+        )
+        .scalar_subquery()
+    )
+    last_opportunity_at = (
+        select(func.max(AgencyOpportunity.sent_at))
+        .where(AgencyOpportunity.creator_id == user.id)
+        .scalar_subquery()
+    )
+    agency = (
+        select(
+            Agency.id.label('agency_id'),
+            Agency.name.label('agency_name'),
+            Agency.logo_url.label('agency_logo_url'),
+            new_opportunities.label('new_opportunities'),
+            last_opportunity_at.label('last_opportunity_at'),
+        )
+        .where(Agency.id == user.agency_id)
+        .cte('agency')
+    )
+
+    return (
+        select(youtube, instagram, videos, yt_comments, interactions, workflows, project, agency)
+        .select_from(youtube)
+        .join(instagram, true())
+        .join(videos, true())
+        .join(yt_comments, true())
+        .join(interactions, true())
+        .join(workflows, true())
+        .outerjoin(project, true())
+        .outerjoin(agency, true())
+    )
+
+
+async def fetch_summary_row(db: AsyncSession, user: User, *, is_demo: bool) -> Row:
+    result = await db.execute(build_summary_statement(user, is_demo=is_demo, now=datetime.utcnow()))
+    return result.one()
+
+
+def _percent_change(current: float, previous: float) -> float:
+    if previous > 0:
+        return (current - previous) / previous * 100
+    return 100.0 if current > 0 else 0.0
+
+
+def demo_metrics(row: Row, demo_profile: Optional[Dict[str, Any]], user_id: Any) -> Dict[str, Any]:
+    """Dashboard metrics in demo mode: demo profile plus demo interactions."""
+    interactions_today = int(row.interactions_today)
+    interactions_change = round(_percent_change(interactions_today, int(row.interactions_yesterday)), 1)
+
+    # Extract metrics from demo profile, or use sensible defaults if profile fetch failed
+    if demo_profile:
+        platforms = demo_profile.get('platforms', {})
+        yt = platforms.get('youtube', {})
+        ig = platforms.get('instagram', {})
+        tt = platforms.get('tiktok', {})
+
+        total_subscribers = yt.get('subscribers', 0)
+        total_followers = ig.get('followers', 0) + tt.get('followers', 0)
+
+        # Calculate weighted engagement rate from all platforms
+        yt_engagement = yt.get('engagement_rate', 0) or 0
+        tt_engagement = tt.get('engagement_rate', 0) or 0
+        # Instagram doesn't have engagement_rate in profile, estimate from avg_likes/followers
+        ig_followers = ig.get('followers', 1)
+        ig_avg_likes = ig.get('avg_likes', 0)
+        ig_engagement = (ig_avg_likes / ig_followers * 100) if ig_followers > 0 else 0
+
+        # Weighted average based on follower counts
+        total_audience = total_subscribers + total_followers
+        if total_audience > 0:
+            engagement_rate = (
+                (yt_engagement * total_subscribers) +
+                (ig_engagement * ig.get('followers', 0)) +
+                (tt_engagement * tt.get('followers', 0))
+            ) / total_audience
+        else:
+            engagement_rate = 0
+
+        # Demo mode simulates growth
+        follower_change = 5.0
+        engagement_change = 2.0
+
+        connected_platforms = {
+            'youtube': {'connected': True, 'subscribers': total_subscribers},
+            'instagram': {'connected': True, 'followers': ig.get('followers', 0)},
+            'tiktok': {'connected': True, 'followers': tt.get('followers', 0)},
+        }
+    else:
+        # Fallback if demo service is unavailable - return zeros with error flag
+        logger.error(f"Demo profile unavailable for user {user_id}")
+        total_subscribers = 0
+        total_followers = 0
+        engagement_rate = 0
+        follower_change = 0
+        engagement_change = 0
+        connected_platforms = {
+            'youtube': {'connected': False, 'error': 'Demo service unavailable'},
+            'instagram': {'connected': False, 'error': 'Demo service unavailable'},
+            'tiktok': {'connected': False, 'error': 'Demo service unavailable'},
+        }
+
+    return {
+        "total_followers": total_followers,
+        "total_subscribers": total_subscribers,
+        "engagement_rate": round(engagement_rate, 1),
+        "interactions_today": interactions_today,
+        "active_workflows": int(row.active_workflows),
+        "follower_change": round(follower_change, 1),
+        "engagement_change": round(engagement_change, 1),
+        "interactions_change": interactions_change,
+        "connected_platforms": connected_platforms,
+        "is_demo": True,
+    }
+
+
+def real_metrics(row: Row) -> Dict[str, Any]:
+    """Dashboard metrics from the user's real platform connections."""
+    connected_platforms: Dict[str, Dict[str, Any]] = {
+        'youtube': {'connected': False},
+        'instagram': {'connected': False},
+        # TikTok connection model doesn't exist yet - prepared for future
+        'tiktok': {
+            'connected': False,
+            'message': 'TikTok integration coming soon',
+        },
+    }
+
+    total_subscribers = int(row.subscribers)
+    if row.yt_connections:
+        connected_platforms['youtube'] = {
+            'connected': True,
+            'subscribers': total_subscribers,
+            'channel_name': row.channel_name,
+        }
+
+    ig_followers = int(row.ig_followers)
+    if row.ig_connections:
+        connected_platforms['instagram'] = {
+            'connected': True,
+            'followers': ig_followers,
+            'username': row.ig_username,
+        }
+
+    tt_followers = 0
+    total_followers = ig_followers + tt_followers
+
+    views = int(row.views_30d)
+    engagement_rate = (int(row.engagements_30d) / views * 100) if views > 0 else 0
+    prev_views = int(row.prev_views_30d)
+    prev_engagement_rate = (int(row.prev_engagements_30d) / prev_views * 100) if prev_views > 0 else 0
+    engagement_change = engagement_rate - prev_engagement_rate
+
+    # Use whichever is higher (in case data is in both places during migration)
+    interactions_today = max(int(row.interactions_today), int(row.yt_comments_24h))
+    interactions_change = _percent_change(interactions_today, int(row.interactions_yesterday))
+
+    # Follower change - growth field on the first YouTube connection
+    follower_change = 0.0
+    if row.first_growth_30d and total_subscribers > 0:
+        follower_change = (row.first_growth_30d / total_subscribers) * 100
+
+    return {
+        "total_followers": total_followers,
+        "total_subscribers": total_subscribers,
+        "engagement_rate": round(engagement_rate, 1),
+        "interactions_today": interactions_today,
+        "active_workflows": int(row.active_workflows),
+        "follower_change": round(follower_change, 1),
+        "engagement_change": round(engagement_change, 1),
+        "interactions_change": round(interactions_change, 1),
+        "connected_platforms": connected_platforms,
+        "is_demo": False,
+    }
+
+
+async def load_dashboard_metrics(db: AsyncSession, user: User) -> Tuple[Row, Dict[str, Any], bool]:
+    """(summary row, dashboard metrics, is_demo) for the user's current mode.
+
+    The one place that picks between demo and real data; the metrics
+    endpoint and build_dashboard_summary both go through it.
+    """
+    is_demo = user.demo_mode_status == 'enabled'
+    if is_demo:
+        demo_profile, row = await asyncio.gather(
+            get_demo_profile(str(user.id)),
+            fetch_summary_row(db, user, is_demo=True),
+        )
+        return row, demo_metrics(row, demo_profile, user.id), True
+    row = await fetch_summary_row(db, user, is_demo=False)
+    return row, real_metrics(row), False
+
+
+async def get_dashboard_metrics(db: AsyncSession, user: User) -> Dict[str, Any]:
+    _, metrics, _ = await load_dashboard_metrics(db, user)
+    return metrics
+
+
+def summarize(row: Row, base_metrics: Dict[str, Any], *, is_demo: bool) -> Dict[str, Any]:
+    """Assemble the widget sections of the dashboard summary."""
+    # === Platform Warning ===
+    connected_platforms = base_metrics.get('connected_platforms', {})
+    disconnected_platforms = []
+    for platform, status in connected_platforms.items():
+        if not status.get('connected', False) and not status.get('message'):  # Skip "coming soon" platforms
+            disconnected_platforms.append(platform)
+
+    platform_warning = {
+        "show": len(disconnected_platforms) > 0 and not all(
+            connected_platforms.get(p, {}).get('message') for p in disconnected_platforms
+        ),
+        "disconnected": disconnected_platforms,
+        "connected_count": sum(1 for p in connected_platforms.values() if p.get('connected', False)),
+        "total_platforms": 3,  # YouTube, Instagram, TikTok
+    }
+
+    # === Engagement Summary (7 days) ===
+    if is_demo:
+        # Demo mode - use simulated data
+        total_views_7d = 125000
+        total_views_prev_7d = 110000
+        new_followers = 1250
+        new_followers_change = 8.5
+    else:
+        total_views_7d = int(row.views_7d)
+        total_views_prev_7d = int(row.prev_views_7d)
+        new_followers = int(row.new_followers)
+        # Instagram doesn't have growth tracking yet
+        new_followers_change = 0.0
+
+    views_change = 0.0
+    if total_views_prev_7d > 0:
+        views_change = round(((total_views_7d - total_views_prev_7d) / total_views_prev_7d) * 100, 1)
+    elif total_views_7d > 0:
+        views_change = 100.0
+
+    engagement_summary = {
+        "views_7d": total_views_7d,
+        "views_change": views_change,
+        "engagement_rate": base_metrics.get('engagement_rate', 0),
+        "engagement_change": base_metrics.get('engagement_change', 0),
+        "new_followers": new_followers,
+        "new_followers_change": new_followers_change,
+        "has_data": base_metrics.get('total_followers', 0) + base_metrics.get('total_subscribers', 0) > 0,
+    }
+
+    # === Pending Actions ===
+    unanswered_count = int(row.unanswered)
+    awaiting_approval_count = int(row.awaiting_approval)
+    # Scheduled posts today (no scheduled posts table yet)
+    scheduled_today = 0
+    pending_total = unanswered_count + awaiting_approval_count + scheduled_today
+
+    pending_actions = {
+        "unanswered_messages": unanswered_count,
+        "awaiting_approval": awaiting_approval_count,
+        "scheduled_today": scheduled_today,
+        "total": pending_total,
+        "all_caught_up": pending_total == 0,
+    }
+
+    # === Monetization Status ===
+    if row.project_id:
+        monetization_status = {
+            "has_project": True,
+            "project_id": str(row.project_id),
+            "project_name": row.project_name,
+            "tasks_completed": int(row.tasks_completed or 0),
+            "tasks_total": PROJECT_TASKS_TOTAL,
+            "progress_percent": row.project_progress or 0,
+            "estimated_revenue": None,  # Can be calculated from opportunity template
+        }
+    else:
+        monetization_status = {
+            "has_project": False,
+            "project_id": None,
+            "project_name": None,
+            "tasks_completed": 0,
+            "tasks_total": PROJECT_TASKS_TOTAL,
+            "progress_percent": 0,
+            "estimated_revenue": None,
+        }
+
+    # === Agency Connection ===
+    if row.agency_id:
+        agency_connection = {
+            "is_connected": True,
+            "agency_id": str(row.agency_id),
+            "agency_name": row.agency_name,
+            "agency_logo_url": row.agency_logo_url,
+            "new_opportunities": int(row.new_opportunities or 0),
+            "last_message_date": row.last_opportunity_at.isoformat() if row.last_opportunity_at else None,
+        }
+    else:
+        agency_connection = {
+            "is_connected": False,
+            "agency_id": None,
+            "agency_name": None,
+            "agency_logo_url": None,
+            "new_opportunities": 0,
+            "last_message_date": None,
+        }
+
+    return {
+        "platform_warning": platform_warning,
+        "engagement": engagement_summary,
+        "pending_actions": pending_actions,
+        "monetization": monetization_status,
+        "agency": agency_connection,
+        "connected_platforms": connected_platforms,
+        "is_demo": is_demo,
+    }
+
+
+async def build_dashboard_summary(db: AsyncSession, user: User) -> Dict[str, Any]:
+    """Compute the dashboard summary without the cache."""
+    row, base_metrics, is_demo = await load_dashboard_metrics(db, user)
+    return summarize(row, base_metrics, is_demo=is_demo)
+
+
+async def get_dashboard_summary(db: AsyncSession, user: User) -> Dict[str, Any]:
+    """Dashboard summary, served from the per-user cache when fresh."""
+    mode = 'demo' if user.demo_mode_status == 'enabled' else 'real'
+    cache_key = CacheKeys.DASHBOARD_SUMMARY.format(user_id=user.id, mode=mode)
+
+    cached = await get_cache(cache_key)
+    if cached is not None:
+        return cached
+
+    summary = await build_dashboard_summary(db, user)
+    await set_cache(
+        cache_key,
+        summary,
+        ttl=settings.DASHBOARD_SUMMARY_CACHE_TTL,
+        tags=[
+            CacheTags.INTERACTIONS.format(user_id=user.id),
+            CacheTags.USER.format(user_id=user.id),
+        ],
+    )
+    return summary
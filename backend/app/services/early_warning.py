@@ -26,6 +26,13 @@ from app.services import system_state as sys_state
 from app.tasks.email import send_email
 from app.core.config import settings
 
+# Comment velocity comes from video_comment_minutes (maintained on ingest by
+# YouTubeCommentRepository) and channel_comment_baselines (folded here)
+OBSERVED_WINDOW_MINUTES = 30
+BASELINE_VIDEOS = 20
+# Comments keep syncing in after the first hour ends; wait before folding
+BASELINE_SETTLE_MINUTES = 180
+
 
 @dataclass
 class Alert:
@@ -184,25 +191,12 @@ class EarlyWarningService:
                 pass
 
     async def _channel_baseline_cpm(self, db: AsyncSession, channel_id: str) -> float:
-        # Average first-hour comment rate across last 20 videos
+        # Rolling first-hour comment rate, maintained by _fold_baselines
         try:
             row = (await db.execute(text(
-                """
-                WITH vids AS (
-                  SELECT id FROM youtube_videos WHERE channel_id = :cid ORDER BY published_at DESC NULLS LAST LIMIT 20
-                ), c_first_hour AS (
-                  SELECT v.id AS vid, COUNT(*)::float AS c
-                  FROM youtube_comments c
-                  JOIN vids v ON v.id = c.video_id
-                  WHERE c.published_at IS NOT NULL AND EXISTS (
-                    SELECT 1 FROM youtube_videos v2 WHERE v2.id = c.video_id AND v2.published_at IS NOT NULL AND c.published_at <= v2.published_at + interval '60 minutes'
-                  )
-                  GROUP BY v.id
-                )
-                SELECT COALESCE(AVG(c)/60.0, 0) FROM c_first_hour
-                """
+                "SELECT first_hour_comments / 60.0 FROM channel_comment_baselines WHERE channel_id = :cid"
             ), {"cid": channel_id})).first()
-            return float(row[0] or 0.0)
+            return float(row[0]) if row else 0.0
         except Exception:
             return 0.0
 
@@ -211,23 +205,87 @@ class EarlyWarningService:
         try:
             row = (await db.execute(text(
                 """
-                SELECT v.published_at, COUNT(c.*)::float AS cnt
+                SELECT v.published_at, COALESCE(SUM(m.comments), 0)::float
                 FROM youtube_videos v
-                LEFT JOIN youtube_comments c ON c.video_id = v.id AND c.published_at IS NOT NULL AND c.published_at <= v.published_at + interval '30 minutes'
+                LEFT JOIN video_comment_minutes m ON m.video_id = v.id AND m.minute_offset < :window
                 WHERE v.id = :vid
                 GROUP BY v.published_at
                 """
-            ), {"vid": video_id})).first()
+            ), {"vid": video_id, "window": OBSERVED_WINDOW_MINUTES})).first()
             if not row or not row[0]:
                 return 0.0
-            published_at: datetime = row[0]
-            cnt: float = float(row[1] or 0.0)
-            now = datetime.now(timezone.utc)
-            minutes = max(1.0, min(30.0, (now - published_at).total_seconds() / 60.0))
-            return cnt / minutes
+            return self._cpm(float(row[1]), row[0])
         except Exception:
             return 0.0
 
+    @staticmethod
+    def _cpm(comments: float, published_at: datetime) -> float:
+        now = datetime.now(timezone.utc)
+        minutes = max(1.0, min(float(OBSERVED_WINDOW_MINUTES), (now - published_at).total_seconds() / 60.0))
+        return comments / minutes
+
+    async def _fold_baselines(self, db: AsyncSession) -> None:
+        """Fold settled videos' first-hour totals into the channel baselines.
+
+        Each channel keeps a running mean over its last BASELINE_VIDEOS videos
+        (an exponential average once that many have been seen), so baselines
+        are a single row read instead of a scan of historical comments.
+        """
+        try:
+            rows = (await db.execute(text(
+                """
+                WITH settled AS (
+                  SELECT v.id, v.channel_id, v.published_at,
+                         row_number() OVER (PARTITION BY v.channel_id ORDER BY v.published_at DESC) AS rn
+                  FROM youtube_videos v
+                  LEFT JOIN channel_comment_baselines b ON b.channel_id = v.channel_id
+                  WHERE v.published_at IS NOT NULL
+                    AND v.published_at <= now() - make_interval(mins => :settle)
+                    AND (b.last_video_published_at IS NULL OR v.published_at > b.last_video_published_at)
+                )
+                SELECT s.channel_id, s.published_at, COALESCE(SUM(m.comments), 0)::float
+                FROM settled s
+                LEFT JOIN video_comment_minutes m ON m.video_id = s.id
+                WHERE s.rn <= :n
+                GROUP BY s.id, s.channel_id, s.published_at
+                ORDER BY s.channel_id, s.published_at
+                """
+            ), {"settle": BASELINE_SETTLE_MINUTES, "n": BASELINE_VIDEOS})).fetchall()
+            if not rows:
+                return
+            current = {
+                r[0]: (int(r[1]), float(r[2]))
+                for r in (await db.execute(text(
+                    "SELECT channel_id, videos, first_hour_comments FROM channel_comment_baselines WHERE channel_id = ANY(:ids)"
+                ), {"ids": list({r[0] for r in rows})})).fetchall()
+            }
+            updates: Dict[Any, Dict[str, Any]] = {}
+            for channel_id, published_at, comments in rows:
+                videos, mean = current.get(channel_id, (0, 0.0))
+                # Videos whose comments were never synced would drag the baseline to zero
+                if comments > 0:
+                    videos = min(videos + 1, BASELINE_VIDEOS)
+                    mean += (comments - mean) / videos
+                current[channel_id] = (videos, mean)
+                updates[channel_id] = {"c": channel_id, "n": videos, "mean": mean, "last": published_at}
+            await db.execute(text(
+                """
+                INSERT INTO channel_comment_baselines (channel_id, videos, first_hour_comments, last_video_published_at, updated_at)
+                VALUES (:c, :n, :mean, :last, now())
+                ON CONFLICT (channel_id) DO UPDATE SET videos = EXCLUDED.videos,
+                                                       first_hour_comments = EXCLUDED.first_hour_comments,
+                                                       last_video_published_at = EXCLUDED.last_video_published_at,
+                                                       updated_at = now()
+                """
+            ), list(updates.values()))
+            await db.commit()
+        except Exception:
+            logger.exception("Early warning baseline fold failed")
+            try:
+                await db.rollback()
+            except Exception:
+                pass
+
     async def _cost_impact(self, db: AsyncSession, delta_comments: float) -> Dict[str, Any]:
         # Estimate cost per generated response from last 7 days api_usage_log
         try:
@@ -246,38 +304,50 @@ class EarlyWarningService:
         return {"avg_cost_per_response": avg_cost, "range": [round(low, 2), round(high, 2)], "unit": "$"}
 
     async def monitor_recent_videos(self, db: AsyncSession) -> List[Alert]:
-        """Scan videos published in last 90 minutes and emit alerts within 30 minutes if spike detected."""
+        """Scan videos published in last 90 minutes and emit alerts within 30 minutes if spike detected.
+
+        Reads the per-minute buckets maintained at ingest and the rolling
+        channel baselines, so a pass costs O(buckets) rather than counting
+        comments. A video is alerted on at most once.
+        """
         await self._ensure_tables(db)
+        await self._fold_baselines(db)
         res = await db.execute(text(
             """
-            SELECT id, channel_id, video_id, title, published_at
-            FROM youtube_videos
-            WHERE published_at IS NOT NULL
-              AND published_at >= now() - interval '90 minutes'
-            ORDER BY published_at DESC
+            SELECT v.id, v.channel_id, v.published_at,
+                   COALESCE(SUM(m.comments), 0)::float AS observed,
+                   COALESCE(MAX(b.first_hour_comments), 0) / 60.0 AS baseline_cpm,
+                   MAX(s.multiplier) AS multiplier,
+                   EXISTS (SELECT 1 FROM early_warning_alerts a WHERE a.video_id = v.id::text) AS alerted
+            FROM youtube_videos v
+            LEFT JOIN video_comment_minutes m ON m.video_id = v.id AND m.minute_offset < :window
+            LEFT JOIN channel_comment_baselines b ON b.channel_id = v.channel_id
+            LEFT JOIN early_warning_sensitivity s ON s.channel_id = v.channel_id::text
+            WHERE v.published_at IS NOT NULL
+              AND v.published_at >= now() - interval '90 minutes'
+            GROUP BY v.id, v.channel_id, v.published_at
+            ORDER BY v.published_at DESC
             """
-        ))
+        ), {"window": OBSERVED_WINDOW_MINUTES})
         rows = res.fetchall() or []
         alerts: List[Alert] = []
         for r in rows:
             vid_db_id = str(r[0])
             chan = str(r[1])
+            published_at: datetime = r[2]
+            observed = self._cpm(float(r[3]), published_at)
+            baseline = float(r[4] or 0.0)
             # Only alert within first 30 minutes
-            published_at: datetime = r[4]
-            if not published_at:
-                continue
             age_min = (datetime.now(timezone.utc) - published_at).total_seconds() / 60.0
             if age_min > 30.0:
                 # maybe auto-disable if needed
-                obs = await self._observed_cpm(db, vid_db_id)
-                base = await self._channel_baseline_cpm(db, chan)
-                self._burst.maybe_auto_disable(channel_id=chan, video_id=vid_db_id, observed_cpm=obs, baseline_cpm=base)
+                self._burst.maybe_auto_disable(channel_id=chan, video_id=vid_db_id, observed_cpm=observed, baseline_cpm=baseline)
+                continue
+            if r[6]:
                 continue
 
-            observed = await self._observed_cpm(db, vid_db_id)
-            baseline = await self._channel_baseline_cpm(db, chan)
             # Adjust sensitivity from table if available
-            mult = await self._get_multiplier(db, chan)
+            mult = float(r[5]) if r[5] else self._sensitivity_multiplier
             threshold_mult = max(1.5, mult)
             if baseline <= 0:
                 continue
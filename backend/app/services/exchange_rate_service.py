@@ -3,19 +3,24 @@ Exchange Rate Service
 
 Fetches and caches exchange rates from external API.
 All rates are relative to USD as the base currency.
-Rates are refreshed hourly and cached in Redis.
+
+Rates live in process memory, so conversions make no network calls once
+the service is warm. After REFRESH_INTERVAL_SECONDS the held rates are still
+served while one background task reloads them, from the shared Redis tier
+(async client) if another worker already fetched them, otherwise from the
+external API.
 """
 
+import asyncio
 import logging
 import json
-from datetime import datetime, timedelta
-from typing import Dict, Optional, List
-from decimal import Decimal, ROUND_HALF_UP
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, List, Union
+from decimal import Decimal
 
 import httpx
-from redis import Redis
-
-from app.core.config import settings
+from redis.asyncio import Redis
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +53,12 @@ CACHE_KEY = "exchange_rates"
 CACHE_TTL_SECONDS = 3600  # 1 hour
 FALLBACK_RATES_KEY = "exchange_rates_fallback"
 
+# In-process refresh cadence; after a failed fetch, retry sooner
+REFRESH_INTERVAL_SECONDS = 3600
+RETRY_INTERVAL_SECONDS = 300
+
+Amount = Union[float, Decimal]
+
 
 class ExchangeRateService:
     """Service for fetching and caching exchange rates."""
@@ -55,6 +66,9 @@ class ExchangeRateService:
     def __init__(self, redis_client: Optional[Redis] = None):
         self.redis = redis_client
         self._fallback_rates = self._get_fallback_rates()
+        self._rates: Optional[Dict[str, Any]] = None
+        self._refresh_at = 0.0
+        self._loading: Optional[asyncio.Task] = None
     
     def _get_fallback_rates(self) -> Dict[str, float]:
         """Fallback rates if API is unavailable (approximate rates as of Dec 2024)."""
@@ -81,19 +95,50 @@ class ExchangeRateService:
             "AED": 3.67,
         }
     
-    async def get_rates(self) -> Dict[str, any]:
+    async def get_rates(self) -> Dict[str, Any]:
         """
-        Get current exchange rates (from cache or fetch fresh).
+        Get current exchange rates (from memory, cache, or fetch fresh).
         
         Returns:
             Dict with 'rates', 'base', 'last_updated', 'cached' keys
         """
-        # Try cache first
+        if self._rates is not None:
+            if time.monotonic() >= self._refresh_at:
+                self._start_refresh()
+            return self._rates
+        # Concurrent first callers share one load
+        return await asyncio.shield(self._start_refresh())
+    
+    def _start_refresh(self) -> asyncio.Task:
+        loop = asyncio.get_running_loop()
+        # Celery tasks run each job in a fresh event loop; ignore leftovers
+        if self._loading is None or self._loading.done() or self._loading.get_loop() is not loop:
+            self._loading = loop.create_task(self._refresh())
+        return self._loading
+    
+    async def _refresh(self) -> Dict[str, Any]:
+        try:
+            data = await self._load_rates()
+        except Exception as e:
+            logger.error(f"Exchange rate refresh failed: {e}")
+            data = None
+        if data is None:
+            if self._rates is not None:
+                # Keep serving what we have
+                self._refresh_at = time.monotonic() + RETRY_INTERVAL_SECONDS
+                return self._rates
+            data = await self._get_fallback_data()
+        self._rates = data
+        interval = RETRY_INTERVAL_SECONDS if data.get("fallback") else REFRESH_INTERVAL_SECONDS
+        self._refresh_at = time.monotonic() + interval
+        return data
+    
+    async def _load_rates(self) -> Optional[Dict[str, Any]]:
+        """Shared cache first, then the external API."""
         cached = await self._get_cached_rates()
         if cached:
             return cached
         
-        # Fetch fresh rates
         rates = await self._fetch_rates()
         if rates:
             await self._cache_rates(rates)
@@ -103,8 +148,20 @@ class ExchangeRateService:
                 "last_updated": datetime.utcnow().isoformat(),
                 "cached": False,
             }
+        return None
+    
+    async def _get_fallback_data(self) -> Dict[str, Any]:
+        """Last rates any worker fetched, else the built-in approximations."""
+        if self.redis:
+            try:
+                saved = await self.redis.get(FALLBACK_RATES_KEY)
+                if saved:
+                    data = json.loads(saved)
+                    logger.warning("Using last known exchange rates")
+                    return {**data, "cached": True, "fallback": True}
+            except Exception as e:
+                logger.error(f"Error reading fallback rates: {e}")
         
-        # Use fallback
         logger.warning("Using fallback exchange rates")
         return {
             "rates": self._fallback_rates,
@@ -120,7 +177,7 @@ class ExchangeRateService:
             return None
         
         try:
-            cached = self.redis.get(CACHE_KEY)
+            cached = await self.redis.get(CACHE_KEY)
             if cached:
                 data = json.loads(cached)
                 data["cached"] = True
@@ -136,14 +193,16 @@ class ExchangeRateService:
             return
         
         try:
-            data = {
+            data = json.dumps({
                 "rates": rates,
                 "base": "USD",
                 "last_updated": datetime.utcnow().isoformat(),
-            }
-            self.redis.setex(CACHE_KEY, CACHE_TTL_SECONDS, json.dumps(data))
-            # Also save as fallback in case of future API failures
-            self.redis.set(FALLBACK_RATES_KEY, json.dumps(data))
+            })
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.setex(CACHE_KEY, CACHE_TTL_SECONDS, data)
+                # Also save as fallback in case of future API failures
+                pipe.set(FALLBACK_RATES_KEY, data)
+                await pipe.execute()
             logger.info("Exchange rates cached successfully")
         except Exception as e:
             logger.error(f"Error caching rates: {e}")
@@ -218,31 +277,52 @@ class ExchangeRateService:
         Returns:
             Converted amount
         """
-        if from_currency == to_currency:
+        if from_currency.upper() == to_currency.upper():
             return amount
+        return amount * self.rate(from_currency, to_currency, rates)
+    
+    def rate(self, from_currency: str, to_currency: str, rates: Dict[str, float]) -> float:
+        """
+        Units of to_currency per unit of from_currency.
         
+        If from_currency rate is 0.92 (EUR), then 1 EUR = 1/0.92 USD;
+        if to_currency rate is 0.79 (GBP), then 1 USD = 0.79 GBP.
+        Unknown currencies are treated like USD.
+        """
         from_currency = from_currency.upper()
         to_currency = to_currency.upper()
+        if from_currency == to_currency:
+            return 1.0
         
-        # Get rates (default to 1 for USD or unknown)
-        from_rate = rates.get(from_currency, 1.0)
-        to_rate = rates.get(to_currency, 1.0)
-        
-        # Convert to USD first, then to target
-        # If from_currency rate is 0.92 (EUR), then 1 EUR = 1/0.92 USD
-        # If to_currency rate is 0.79 (GBP), then 1 USD = 0.79 GBP
+        from_rate = 1.0 if from_currency == "USD" else rates.get(from_currency, 1.0)
+        to_rate = 1.0 if to_currency == "USD" else rates.get(to_currency, 1.0)
+        return to_rate / from_rate
+    
+    async def convert_many(
+        self,
+        amounts: Iterable[Optional[Amount]],
+        from_currency: str,
+        to_currency: str,
+    ) -> List[Optional[Amount]]:
+        """
+        Convert many amounts with one rate lookup.
         
-        # Amount in USD
-        if from_currency == "USD":
-            usd_amount = amount
-        else:
-            usd_amount = amount / from_rate
+        Decimals stay Decimal and floats stay float; None passes through.
+        Uses the in-process rates, so a warm service makes no network calls.
+        """
+        amounts = list(amounts)
+        if from_currency.upper() == to_currency.upper():
+            return amounts
         
-        # Amount in target currency
-        if to_currency == "USD":
-            return usd_amount
-        else:
-            return usd_amount * to_rate
+        rates = (await self.get_rates())["rates"]
+        factor = self.rate(from_currency, to_currency, rates)
+        decimal_factor = Decimal(str(factor))
+        return [
+            None if amount is None
+            else amount * decimal_factor if isinstance(amount, Decimal)
+            else amount * factor
+            for amount in amounts
+        ]
     
     def format_currency(
         self,
@@ -303,10 +383,12 @@ _exchange_rate_service: Optional[ExchangeRateService] = None
 
 
 def get_exchange_rate_service(redis_client: Optional[Redis] = None) -> ExchangeRateService:
-    """Get or create exchange rate service singleton."""
+    """Get or create exchange rate service singleton (shared tier defaults to the cache Redis)."""
     global _exchange_rate_service
     
     if _exchange_rate_service is None:
+        if redis_client is None:
+            from app.core.cache import redis_client
         _exchange_rate_service = ExchangeRateService(redis_client)
     
     return _exchange_rate_service
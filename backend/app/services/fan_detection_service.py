@@ -1,14 +1,14 @@
 """Service for detecting and managing superfans based on interaction patterns."""
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 import logging
 
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.fan import Fan
-from app.models.interaction import Interaction
+from app.services.fan_identification_service import FAN_STATS_WINDOW_DAYS
 
 logger = logging.getLogger(__name__)
 
@@ -19,46 +19,47 @@ class FanDetectionService:
     # Superfan criteria
     MIN_INTERACTIONS = 10
     MIN_POSITIVE_SENTIMENT_RATIO = 0.7
-    LOOKBACK_DAYS = 90
+    LOOKBACK_DAYS = FAN_STATS_WINDOW_DAYS
     
     @staticmethod
-    async def evaluate_and_update_superfan_status(
+    async def _windowed_counters(
         session: AsyncSession,
-        fan_id: UUID,
-    ) -> tuple[bool, dict]:
+        fan_ids: List[UUID],
+    ) -> Dict[UUID, Tuple[int, int, int, int]]:
         """
-        Evaluate if a fan should be marked as superfan.
+        (total, positive, negative, priority_sum) per fan over the lookback window.
         
-        Returns: (is_superfan, metrics)
+        Sums the fans' fan_daily_stats buckets (at most LOOKBACK_DAYS rows
+        each, bumped at ingest) rather than scanning interactions; fans
+        without recent interactions are absent.
         """
-        
-        # Get fan
-        fan_stmt = select(Fan).where(Fan.id == fan_id)
-        result = await session.execute(fan_stmt)
-        fan = result.scalar_one_or_none()
-        
-        if not fan:
-            return False, {}
-        
-        # Get recent interactions
-        cutoff_date = datetime.utcnow() - timedelta(days=FanDetectionService.LOOKBACK_DAYS)
-        
-        interactions_stmt = select(Interaction).where(
-            and_(
-                Interaction.author_username == fan.username,
-                Interaction.created_at >= cutoff_date
-            )
+        if not fan_ids:
+            return {}
+        
+        window_start = datetime.utcnow().date() - timedelta(days=FanDetectionService.LOOKBACK_DAYS)
+        result = await session.execute(
+            text(
+                """
+                SELECT fan_id, SUM(total), SUM(positive), SUM(negative), SUM(priority_sum)
+                FROM fan_daily_stats
+                WHERE fan_id = ANY(:fan_ids) AND day >= :window_start
+                GROUP BY fan_id
+                """
+            ),
+            {"fan_ids": list(fan_ids), "window_start": window_start},
         )
-        interactions_result = await session.execute(interactions_stmt)
-        interactions = list(interactions_result.scalars().all())
-        
-        # Calculate metrics
-        total_interactions = len(interactions)
-        positive_count = len([i for i in interactions if i.sentiment == 'positive'])
-        negative_count = len([i for i in interactions if i.sentiment == 'negative'])
+        return {
+            fan_id: (int(total), int(positive), int(negative), int(priority_sum or 0))
+            for fan_id, total, positive, negative, priority_sum in result.all()
+        }
+    
+    @staticmethod
+    def _apply_superfan_status(fan: Fan, stats: Tuple[int, int, int, int]) -> tuple[bool, dict]:
+        """Score a fan from its windowed stats and update is_superfan."""
+        total_interactions, positive_count, negative_count, priority_sum = stats
         
         positive_ratio = positive_count / total_interactions if total_interactions > 0 else 0
-        avg_priority = sum([i.priority_score or 50 for i in interactions]) / total_interactions if total_interactions > 0 else 0
+        avg_priority = priority_sum / total_interactions if total_interactions > 0 else 0
         
         # Calculate lifetime value score (0-100)
         lifetime_value = min(100, (total_interactions * 2) + (positive_count * 5) + int(avg_priority))
@@ -88,16 +89,38 @@ class FanDetectionService:
         # Update fan record
         if is_superfan and not fan.is_superfan:
             fan.is_superfan = True
-            fan.superfan_since = datetime.utcnow()
+            fan.became_superfan_at = datetime.utcnow()
             logger.info(f"Fan {fan.username} promoted to superfan!")
         elif not is_superfan and fan.is_superfan:
             fan.is_superfan = False
-            fan.superfan_since = None
+            fan.became_superfan_at = None
             logger.info(f"Fan {fan.username} demoted from superfan")
         
-        fan.lifetime_value_score = lifetime_value
-        fan.sentiment_score = sentiment_score
-        fan.interaction_count = total_interactions
+        return is_superfan, metrics
+    
+    @staticmethod
+    async def evaluate_and_update_superfan_status(
+        session: AsyncSession,
+        fan_id: UUID,
+    ) -> tuple[bool, dict]:
+        """
+        Evaluate if a fan should be marked as superfan.
+        
+        Metrics cover the last LOOKBACK_DAYS of the fan's interactions.
+        
+        Returns: (is_superfan, metrics)
+        """
+        
+        # Get fan
+        fan = await session.get(Fan, fan_id)
+        
+        if not fan:
+            return False, {}
+        
+        stats = await FanDetectionService._windowed_counters(session, [fan.id])
+        is_superfan, metrics = FanDetectionService._apply_superfan_status(
+            fan, stats.get(fan.id, (0, 0, 0, 0))
+        )
         
         await session.commit()
         
@@ -116,19 +139,24 @@ class FanDetectionService:
         result = await session.execute(fans_stmt)
         fans = list(result.scalars().all())
         
+        stats = await FanDetectionService._windowed_counters(session, [fan.id for fan in fans])
+        
         promoted = 0
         demoted = 0
         
         for fan in fans:
-            is_superfan, _ = await FanDetectionService.evaluate_and_update_superfan_status(
-                session, fan.id
+            was_superfan = bool(fan.is_superfan)
+            is_superfan, _ = FanDetectionService._apply_superfan_status(
+                fan, stats.get(fan.id, (0, 0, 0, 0))
             )
             
-            if is_superfan and not fan.is_superfan:
+            if is_superfan and not was_superfan:
                 promoted += 1
-            elif not is_superfan and fan.is_superfan:
+            elif not is_superfan and was_superfan:
                 demoted += 1
         
+        await session.commit()
+        
         logger.info(f"Batch evaluated {len(fans)} fans: {promoted} promoted, {demoted} demoted")
         
         return {
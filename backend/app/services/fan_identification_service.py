@@ -6,9 +6,9 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 from uuid import UUID
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, and_, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
@@ -16,6 +16,172 @@ from app.models.fan import Fan
 from app.models.interaction import Interaction
 
 
+# Sentiment value -> Fan counter column
+SENTIMENT_COUNTERS = {
+    'positive': 'positive_count',
+    'neutral': 'neutral_count',
+    'negative': 'negative_count',
+}
+
+# Days of fan_daily_stats buckets kept for windowed (superfan) metrics
+FAN_STATS_WINDOW_DAYS = 90
+
+# Fan columns bumped by update_fan_from_interaction; expired on the cached
+# Fan afterwards since the UPDATE bypasses the ORM
+FAN_COUNTER_COLUMNS = (
+    'total_interactions', 'positive_count', 'neutral_count', 'negative_count',
+    'priority_sum', 'platform_counts', 'first_interaction_at',
+    'last_interaction_at', 'avg_sentiment', 'updated_at',
+)
+
+# One atomic increment per interaction, so concurrent mappers for the same
+# fan can't lose updates. SET expressions see the pre-update row.
+# Overall sentiment uses the same thresholds as sentiment_label().
+BUMP_FAN_STATS_SQL = """
+    UPDATE fans SET
+        total_interactions = COALESCE(total_interactions, 0) + 1,
+        positive_count = positive_count + :positive,
+        neutral_count = neutral_count + :neutral,
+        negative_count = negative_count + :negative,
+        priority_sum = priority_sum + :priority,
+        platform_counts = CASE
+            WHEN CAST(:platform AS text) IS NULL THEN platform_counts
+            ELSE COALESCE(platform_counts, '{}'::jsonb) || jsonb_build_object(
+                CAST(:platform AS text),
+                COALESCE((platform_counts ->> CAST(:platform AS text))::int, 0) + 1
+            )
+        END,
+        first_interaction_at = LEAST(first_interaction_at, :at),
+        last_interaction_at = GREATEST(last_interaction_at, :at),
+        avg_sentiment = CASE
+            WHEN (positive_count + :positive - negative_count - :negative)::float
+                 / (COALESCE(total_interactions, 0) + 1) > 0.3 THEN 'positive'
+            WHEN (positive_count + :positive - negative_count - :negative)::float
+                 / (COALESCE(total_interactions, 0) + 1) < -0.3 THEN 'negative'
+            ELSE 'neutral'
+        END,
+        updated_at = :now
+    WHERE id = :fan_id
+"""
+
+BUMP_FAN_DAY_SQL = """
+    INSERT INTO fan_daily_stats (fan_id, day, total, positive, negative, priority_sum)
+    VALUES (:fan_id, :day, 1, :positive, :negative, :priority)
+    ON CONFLICT (fan_id, day) DO UPDATE SET
+        total = fan_daily_stats.total + 1,
+        positive = fan_daily_stats.positive + EXCLUDED.positive,
+        negative = fan_daily_stats.negative + EXCLUDED.negative,
+        priority_sum = fan_daily_stats.priority_sum + EXCLUDED.priority_sum
+"""
+
+# Rebuilds every counter on Fan from interactions in one pass.
+# Overall sentiment uses the same thresholds as sentiment_label().
+RECONCILE_FAN_STATS_SQL = """
+    WITH agg AS (
+        SELECT
+            fan_id,
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE sentiment = 'positive') AS positive,
+            COUNT(*) FILTER (WHERE sentiment = 'neutral') AS neutral,
+            COUNT(*) FILTER (WHERE sentiment = 'negative') AS negative,
+            SUM(COALESCE(priority_score, 50)) AS priority_sum,
+            MIN(COALESCE(platform_created_at, created_at)) AS first_seen,
+            MAX(COALESCE(platform_created_at, created_at)) AS last_seen
+        FROM interactions
+        WHERE fan_id IS NOT NULL {user_filter}
+        GROUP BY fan_id
+    ),
+    per_platform AS (
+        SELECT fan_id, jsonb_object_agg(platform, n) AS counts
+        FROM (
+            SELECT fan_id, platform, COUNT(*) AS n
+            FROM interactions
+            WHERE fan_id IS NOT NULL {user_filter}
+            GROUP BY fan_id, platform
+        ) p
+        GROUP BY fan_id
+    )
+    UPDATE fans f SET
+        total_interactions = agg.total,
+        positive_count = agg.positive,
+        neutral_count = agg.neutral,
+        negative_count = agg.negative,
+        priority_sum = agg.priority_sum,
+        platform_counts = per_platform.counts,
+        first_interaction_at = agg.first_seen,
+        last_interaction_at = agg.last_seen,
+        avg_sentiment = CASE
+            WHEN (agg.positive - agg.negative)::float / agg.total > 0.3 THEN 'positive'
+            WHEN (agg.positive - agg.negative)::float / agg.total < -0.3 THEN 'negative'
+            ELSE 'neutral'
+        END,
+        stats_reconciled_at = NOW() AT TIME ZONE 'utc'
+    FROM agg
+    JOIN per_platform ON per_platform.fan_id = agg.fan_id
+    WHERE f.id = agg.fan_id
+"""
+
+# Fans whose interactions were all deleted drop out of the aggregate above
+ZERO_STALE_FAN_STATS_SQL = """
+    UPDATE fans SET
+        total_interactions = 0,
+        positive_count = 0,
+        neutral_count = 0,
+        negative_count = 0,
+        priority_sum = 0,
+        platform_counts = '{{}}'::jsonb,
+        avg_sentiment = NULL,
+        stats_reconciled_at = NOW() AT TIME ZONE 'utc'
+    WHERE (
+        COALESCE(total_interactions, 0) <> 0
+        OR positive_count + neutral_count + negative_count <> 0
+        OR priority_sum <> 0
+    ) {user_filter}
+      AND NOT EXISTS (SELECT 1 FROM interactions i WHERE i.fan_id = fans.id)
+"""
+
+# Rebuilds the in-window daily buckets and drops the expired ones
+CLEAR_FAN_DAILY_STATS_SQL = """
+    DELETE FROM fan_daily_stats
+    WHERE day < :window_start OR ({fan_scope})
+"""
+
+REBUILD_FAN_DAILY_STATS_SQL = """
+    INSERT INTO fan_daily_stats (fan_id, day, total, positive, negative, priority_sum)
+    SELECT fan_id,
+           COALESCE(platform_created_at, created_at AT TIME ZONE 'utc')::date,
+           COUNT(*),
+           COUNT(*) FILTER (WHERE sentiment = 'positive'),
+           COUNT(*) FILTER (WHERE sentiment = 'negative'),
+           SUM(COALESCE(priority_score, 50))
+    FROM interactions
+    WHERE fan_id IS NOT NULL {user_filter}
+      AND COALESCE(platform_created_at, created_at AT TIME ZONE 'utc') >= :window_start
+    GROUP BY 1, 2
+"""
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Naive UTC datetime, matching the fans table's timestamp columns."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def sentiment_label(fan: Fan) -> Optional[str]:
+    """Overall sentiment for a fan derived from its sentiment counters."""
+    total = fan.total_interactions or 0
+    if not total:
+        return None
+    
+    score = ((fan.positive_count or 0) - (fan.negative_count or 0)) / total
+    if score > 0.3:
+        return 'positive'
+    if score < -0.3:
+        return 'negative'
+    return 'neutral'
+
+
 class FanIdentificationService:
     """Service for identifying and scoring fans across platforms."""
     
@@ -73,6 +239,11 @@ class FanIdentificationService:
             profile_url=author_profile_url,
             avatar_url=author_avatar_url,
             total_interactions=0,
+            positive_count=0,
+            neutral_count=0,
+            negative_count=0,
+            priority_sum=0,
+            platform_counts={},
             engagement_score=50,  # Start at neutral
             is_demo=is_demo,
             first_interaction_at=datetime.utcnow(),
@@ -87,48 +258,94 @@ class FanIdentificationService:
         self,
         fan_id: UUID,
         sentiment: str,
-        interaction_date: datetime
+        interaction_date: datetime,
+        priority_score: Optional[int] = None,
+        platform: Optional[str] = None
     ) -> None:
         """
-        Update fan record after new interaction.
+        Update fan aggregates after new interaction.
+        
+        Lifetime counters on the fan and its fan_daily_stats bucket are bumped
+        with atomic UPDATEs, so superfan evaluation and fan stats never need
+        to rescan the fan's interaction history and concurrent interactions
+        for one fan don't overwrite each other.
         
         Args:
             fan_id: Fan ID
             sentiment: Interaction sentiment
             interaction_date: When interaction occurred
+            priority_score: Interaction priority (1-100), defaults to 50
+            platform: Platform the interaction came from
         """
-        stmt = select(Fan).where(Fan.id == fan_id)
-        result = await self.session.execute(stmt)
-        fan = result.scalars().first()
-        
-        if not fan:
+        # Platform timestamps are tz-aware; the fan columns are naive UTC
+        interaction_date = to_naive_utc(interaction_date)
+        
+        params = {
+            "fan_id": fan_id,
+            "positive": int(sentiment == 'positive'),
+            "neutral": int(sentiment == 'neutral'),
+            "negative": int(sentiment == 'negative'),
+            "priority": priority_score or 50,
+            "platform": platform,
+            "at": interaction_date,
+            "now": datetime.utcnow(),
+        }
+        result = await self.session.execute(text(BUMP_FAN_STATS_SQL), params)
+        if not result.rowcount:
             return
         
-        # Update counts
-        fan.total_interactions = (fan.total_interactions or 0) + 1
-        fan.last_interaction_at = interaction_date
+        # Syncs can deliver old comments late; those fall outside the window
+        day = interaction_date.date()
+        if day >= datetime.utcnow().date() - timedelta(days=FAN_STATS_WINDOW_DAYS):
+            await self.session.execute(text(BUMP_FAN_DAY_SQL), {**params, "day": day})
         
-        # Update average sentiment (simple running average)
-        if fan.avg_sentiment:
-            # Convert to numeric for calculation
-            sentiment_values = {'positive': 1, 'neutral': 0, 'negative': -1}
-            current_val = sentiment_values.get(fan.avg_sentiment, 0)
-            new_val = sentiment_values.get(sentiment, 0)
-            
-            # Weighted average (give more weight to recent)
-            avg_val = (current_val * 0.7) + (new_val * 0.3)
+        # The Fan from find_or_create_fan is usually in the identity map
+        fan = self.session.identity_map.get(self.session.identity_key(Fan, fan_id))
+        if fan is not None:
+            self.session.expire(fan, FAN_COUNTER_COLUMNS)
+    
+    async def reconcile_fan_stats(self, user_id: Optional[UUID] = None) -> int:
+        """
+        Recompute fan aggregates from the interactions table.
+        
+        Incremental counters can drift (deleted interactions, failed flushes,
+        re-enrichment changing sentiment), so this runs periodically as a
+        single set-based UPDATE. Fans left with no interactions are zeroed,
+        and the fan_daily_stats buckets in the window are rebuilt while
+        expired ones are dropped.
+        
+        Args:
+            user_id: Limit reconciliation to one creator's fans
             
-            # Convert back to sentiment
-            if avg_val > 0.3:
-                fan.avg_sentiment = 'positive'
-            elif avg_val < -0.3:
-                fan.avg_sentiment = 'negative'
-            else:
-                fan.avg_sentiment = 'neutral'
-        else:
-            fan.avg_sentiment = sentiment
+        Returns:
+            Number of fans reconciled
+        """
+        user_filter = "AND user_id = :user_id" if user_id else ""
+        params = {"user_id": user_id} if user_id else {}
         
-        fan.updated_at = datetime.utcnow()
+        result = await self.session.execute(
+            text(RECONCILE_FAN_STATS_SQL.format(user_filter=user_filter)),
+            params,
+        )
+        zeroed = await self.session.execute(
+            text(ZERO_STALE_FAN_STATS_SQL.format(user_filter=user_filter)),
+            params,
+        )
+        
+        window_params = {
+            **params,
+            "window_start": datetime.utcnow().date() - timedelta(days=FAN_STATS_WINDOW_DAYS),
+        }
+        fan_scope = "fan_id IN (SELECT id FROM fans WHERE user_id = :user_id)" if user_id else "TRUE"
+        await self.session.execute(
+            text(CLEAR_FAN_DAILY_STATS_SQL.format(fan_scope=fan_scope)),
+            window_params,
+        )
+        await self.session.execute(
+            text(REBUILD_FAN_DAILY_STATS_SQL.format(user_filter=user_filter)),
+            window_params,
+        )
+        return (result.rowcount or 0) + (zeroed.rowcount or 0)
     
     async def calculate_engagement_score(self, fan_id: UUID) -> int:
         """
@@ -332,23 +549,17 @@ class FanIdentificationService:
         Returns:
             Dict with stats: total_interactions, avg_sentiment, platforms, etc.
         """
-        stmt = select(Fan).where(Fan.id == fan_id)
-        result = await self.session.execute(stmt)
-        fan = result.scalars().first()
+        fan = await self.session.get(Fan, fan_id)
         
         if not fan:
             return {}
         
-        # Get interaction breakdown
-        interaction_stmt = select(
-            Interaction.sentiment,
-            func.count(Interaction.id).label('count')
-        ).where(
-            Interaction.fan_id == fan_id
-        ).group_by(Interaction.sentiment)
-        
-        result = await self.session.execute(interaction_stmt)
-        sentiment_breakdown = {row.sentiment: row.count for row in result}
+        # Breakdown comes from the maintained counters, no GROUP BY needed
+        sentiment_breakdown = {
+            sentiment: getattr(fan, counter) or 0
+            for sentiment, counter in SENTIMENT_COUNTERS.items()
+        }
+        total = fan.total_interactions or 0
         
         return {
             'fan_id': str(fan.id),
@@ -361,7 +572,9 @@ class FanIdentificationService:
             'platforms': fan.platforms,
             'first_interaction': fan.first_interaction_at.isoformat() if fan.first_interaction_at else None,
             'last_interaction': fan.last_interaction_at.isoformat() if fan.last_interaction_at else None,
-            'sentiment_breakdown': sentiment_breakdown
+            'sentiment_breakdown': sentiment_breakdown,
+            'platform_counts': fan.platform_counts or {},
+            'avg_priority': (fan.priority_sum or 0) / total if total else 0
         }
 
 
@@ -136,7 +136,9 @@ class InstagramInteractionMapper:
             await self.fan_service.update_fan_from_interaction(
                 fan_id=fan.id,
                 sentiment=enrichment['sentiment'],
-                interaction_date=comment.timestamp or datetime.utcnow()
+                interaction_date=comment.timestamp or datetime.utcnow(),
+                priority_score=enrichment['priority_score'],
+                platform='instagram'
             )
         
         logger.info(f"Mapped Instagram comment {comment.comment_id} to interaction {interaction.id}")
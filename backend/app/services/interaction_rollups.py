@@ -0,0 +1,635 @@
+"""Interaction analytics rollups.
+
+Keeps hourly and daily rows in interaction_analytics in step with the
+interactions table so dashboards read O(days) rows instead of counting
+interactions on every request. Interactions are bucketed by when they
+arrived (created_at, UTC); status counters reflect their current status.
+
+- ORM inserts, updates and deletes are turned into counter deltas by a
+  Session after_flush listener and applied with one upsert per flush.
+- Bulk UPDATE/DELETE statements bypass the ORM, so those callers pass the
+  rows they touched (via RETURNING) to record_bulk_change.
+- rebuild_rollups recomputes a window from the interactions table; the
+  nightly task and scripts/backfill_interaction_rollups.py use it to
+  correct drift.
+- After a commit that changed a user's rollups, cache entries tagged
+  CacheTags.INTERACTIONS for that user are invalidated.
+"""
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import Numeric, case, cast, event, func, inspect, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.core.cache import CacheTags, invalidate_tags_on_commit
+from app.models.analytics import InteractionAnalytics
+from app.models.interaction import Interaction
+
+
+# Same threshold the approval queue uses for urgent items
+URGENT_PRIORITY = 90
+IMPORTANT_PRIORITY = 70
+
+# Interaction columns a rollup contribution is computed from
+ROLLUP_COLUMNS = (
+    'user_id',
+    'created_at',
+    'platform',
+    'is_demo',
+    'type',
+    'status',
+    'sentiment',
+    'priority_score',
+    'categories',
+    'archived_at',
+    'responded_at',
+)
+
+# Additive counters on InteractionAnalytics
+COUNTERS = (
+    'total_interactions',
+    'total_replied',
+    'total_archived',
+    'total_spam',
+    'comments_count',
+    'dms_count',
+    'mentions_count',
+    'urgent_count',
+    'important_count',
+    'positive_count',
+    'negative_count',
+    'neutral_count',
+    'unread_count',
+    'read_count',
+    'awaiting_approval_count',
+    'ignored_count',
+    'sales_count',
+    'collab_opportunities',
+    'response_minutes_total',
+    'responses_timed',
+)
+
+TYPE_COUNTERS = {
+    'comment': 'comments_count',
+    'dm': 'dms_count',
+    'mention': 'mentions_count',
+}
+
+SENTIMENT_COUNTERS = {
+    'positive': 'positive_count',
+    'negative': 'negative_count',
+    'neutral': 'neutral_count',
+}
+
+# 'answered' is what the dashboards call replied
+STATUS_COUNTERS = {
+    'answered': 'total_replied',
+    'unread': 'unread_count',
+    'read': 'read_count',
+    'awaiting_approval': 'awaiting_approval_count',
+    'ignored': 'ignored_count',
+}
+
+CATEGORY_COUNTERS = {
+    'spam': 'total_spam',
+    'sales': 'sales_count',
+    'collab': 'collab_opportunities',
+}
+
+# (user_id, date, hour or None for the daily row, platform, is_demo)
+BucketKey = Tuple[UUID, date, Optional[int], str, bool]
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def contribution(state: Mapping[str, Any]) -> Counter:
+    """Counters one interaction adds to its buckets."""
+    counts: Counter = Counter(total_interactions=1)
+
+    type_counter = TYPE_COUNTERS.get(state.get('type'))
+    if type_counter:
+        counts[type_counter] += 1
+
+    sentiment_counter = SENTIMENT_COUNTERS.get(state.get('sentiment'))
+    if sentiment_counter:
+        counts[sentiment_counter] += 1
+
+    status_counter = STATUS_COUNTERS.get(state.get('status'))
+    if status_counter:
+        counts[status_counter] += 1
+
+    priority = state.get('priority_score')
+    if priority is not None:
+        if priority >= URGENT_PRIORITY:
+            counts['urgent_count'] += 1
+        elif priority >= IMPORTANT_PRIORITY:
+            counts['important_count'] += 1
+
+    for category in set(state.get('categories') or ()):
+        category_counter = CATEGORY_COUNTERS.get(category)
+        if category_counter:
+            counts[category_counter] += 1
+
+    if state.get('archived_at') is not None:
+        counts['total_archived'] += 1
+
+    responded_at = _naive_utc(state.get('responded_at'))
+    created_at = _naive_utc(state.get('created_at'))
+    if responded_at is not None and created_at is not None:
+        minutes = int((responded_at - created_at).total_seconds() // 60)
+        counts['response_minutes_total'] += max(0, minutes)
+        counts['responses_timed'] += 1
+
+    return counts
+
+
+def _bucket_keys(state: Mapping[str, Any]) -> Tuple[BucketKey, BucketKey]:
+    created_at = _naive_utc(state.get('created_at')) or datetime.utcnow()
+    base = (state['user_id'], created_at.date())
+    tail = (state.get('platform') or '', bool(state.get('is_demo')))
+    return base + (created_at.hour,) + tail, base + (None,) + tail
+
+
+def _add(deltas: Dict[BucketKey, Counter], state: Mapping[str, Any], sign: int) -> None:
+    counts = contribution(state)
+    for key in _bucket_keys(state):
+        bucket = deltas[key]
+        for name, value in counts.items():
+            bucket[name] += sign * value
+
+
+def _prune(deltas: Dict[BucketKey, Counter]) -> Dict[BucketKey, Counter]:
+    pruned = {}
+    for key, counts in deltas.items():
+        nonzero = Counter({name: value for name, value in counts.items() if value})
+        if nonzero:
+            pruned[key] = nonzero
+    return pruned
+
+
+def _derived(minutes_total, timed, replied, total) -> Dict[str, Any]:
+    """SQL expressions for the non-additive columns."""
+    return {
+        'avg_response_time_minutes': case(
+            (timed > 0, minutes_total // timed),
+            else_=None,
+        ),
+        'response_rate': case(
+            (total > 0, func.round(cast(replied, Numeric) * 100 / total, 2)),
+            else_=None,
+        ),
+    }
+
+
+def upsert_statement(deltas: Mapping[BucketKey, Counter]):
+    """Build one INSERT .. ON CONFLICT that adds `deltas` to their buckets.
+
+    Returns None when there is nothing to apply. Rows are sorted so
+    concurrent writers lock buckets in the same order.
+    """
+    deltas = _prune(dict(deltas))
+    if not deltas:
+        return None
+
+    table = InteractionAnalytics.__table__
+    now = datetime.utcnow()
+    rows = []
+    for key in sorted(deltas, key=lambda k: (str(k[0]), k[1], -1 if k[2] is None else k[2], k[3], k[4])):
+        user_id, day, hour, platform, is_demo = key
+        counts = deltas[key]
+        row = {
+            'id': uuid4(),
+            'user_id': user_id,
+            'date': day,
+            'hour': hour,
+            'platform': platform,
+            'is_demo': is_demo,
+            'created_at': now,
+            'updated_at': now,
+        }
+        row.update({name: counts.get(name, 0) for name in COUNTERS})
+        timed = row['responses_timed']
+        total = row['total_interactions']
+        row['avg_response_time_minutes'] = row['response_minutes_total'] // timed if timed > 0 else None
+        row['response_rate'] = round(row['total_replied'] * 100 / total, 2) if total > 0 else None
+        rows.append(row)
+
+    stmt = pg_insert(table).values(rows)
+    excluded = stmt.excluded
+    summed = {name: func.coalesce(table.c[name], 0) + excluded[name] for name in COUNTERS}
+    set_ = dict(summed)
+    set_.update(_derived(
+        summed['response_minutes_total'],
+        summed['responses_timed'],
+        summed['total_replied'],
+        summed['total_interactions'],
+    ))
+    set_['updated_at'] = excluded.updated_at
+
+    return stmt.on_conflict_do_update(
+        index_elements=[
+            table.c.user_id,
+            table.c.date,
+            func.coalesce(table.c.hour, -1),
+            table.c.platform,
+            table.c.is_demo,
+        ],
+        index_where=table.c.view_id.is_(None),
+        set_=set_,
+    )
+
+
+# ==================== ORM changes ====================
+
+# session.info key for rows read in before_flush
+_PREVIOUS_KEY = 'interaction_rollups.previous'
+
+
+def _touch(session: Any, deltas: Mapping[BucketKey, Counter]) -> None:
+    user_ids = {key[0] for key in deltas}
+    invalidate_tags_on_commit(
+        session, *(CacheTags.INTERACTIONS.format(user_id=user_id) for user_id in user_ids)
+    )
+
+
+def _has_tracked_change(obj: Interaction) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in ROLLUP_COLUMNS)
+
+
+def _previous_known(obj: Interaction) -> bool:
+    """Whether the pre-flush value of every rollup column is in memory."""
+    insp = inspect(obj)
+    for name in ROLLUP_COLUMNS:
+        if name not in insp.dict:
+            return False
+        history = insp.attrs[name].history
+        if history.has_changes() and not history.deleted:
+            return False
+    return True
+
+
+def _current_state(obj: Interaction, previous: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    # Read the instance dict directly; touching an unloaded attribute would
+    # emit a lazy load, and a deleted row can't be refreshed.
+    values = inspect(obj).dict
+    state = dict(previous or {})
+    for name in ROLLUP_COLUMNS:
+        if name in values or previous is None:
+            state[name] = values.get(name)
+    return state
+
+
+def _previous_state(obj: Interaction) -> Dict[str, Any]:
+    insp = inspect(obj)
+    state = _current_state(obj)
+    for name in ROLLUP_COLUMNS:
+        history = insp.attrs[name].history
+        if history.deleted:
+            state[name] = history.deleted[0]
+    return state
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    """Read the stored row for interactions whose old values aren't loaded.
+
+    Typical case: an interaction created earlier in the session, then
+    changed; columns it was inserted without are expired after the insert.
+    """
+    ids = [
+        obj.id for obj in session.dirty
+        if isinstance(obj, Interaction) and _has_tracked_change(obj) and not _previous_known(obj)
+    ]
+    ids += [
+        obj.id for obj in session.deleted
+        if isinstance(obj, Interaction) and not _previous_known(obj)
+    ]
+    if not ids:
+        return
+
+    result = session.connection().execute(
+        select(Interaction.id, *rollup_returning()).where(Interaction.id.in_(ids))
+    )
+    session.info[_PREVIOUS_KEY] = {
+        row.id: {name: row._mapping[name] for name in ROLLUP_COLUMNS}
+        for row in result.all()
+    }
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    fetched = session.info.pop(_PREVIOUS_KEY, {})
+    deltas: Dict[BucketKey, Counter] = defaultdict(Counter)
+
+    for obj in session.new:
+        if isinstance(obj, Interaction) and obj.user_id is not None:
+            _add(deltas, _current_state(obj), 1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Interaction) or obj in session.deleted or not _has_tracked_change(obj):
+            continue
+        previous = fetched.get(obj.id) or _previous_state(obj)
+        if previous['user_id'] is None:
+            continue
+        _add(deltas, previous, -1)
+        _add(deltas, _current_state(obj, previous), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Interaction):
+            previous = fetched.get(obj.id) or _previous_state(obj)
+            if previous['user_id'] is not None:
+                _add(deltas, previous, -1)
+
+    stmt = upsert_statement(deltas)
+    if stmt is not None:
+        session.connection().execute(stmt)
+        _touch(session, deltas)
+
+
+event.listen(Session, 'before_flush', _before_flush)
+event.listen(Session, 'after_flush', _after_flush)
+
+
+# ==================== Bulk statements ====================
+
+def rollup_returning():
+    """Columns to RETURN from bulk UPDATE/DELETE on interactions."""
+    return [getattr(Interaction, name) for name in ROLLUP_COLUMNS]
+
+
+def _bulk_deltas(
+    rows: Iterable[Any],
+    previous: Optional[Mapping[str, Any]],
+    deleted: bool,
+) -> Dict[BucketKey, Counter]:
+    deltas: Dict[BucketKey, Counter] = defaultdict(Counter)
+    for row in rows:
+        state = dict(row._mapping)
+        if deleted:
+            _add(deltas, state, -1)
+            continue
+        _add(deltas, {**state, **(previous or {})}, -1)
+        _add(deltas, state, 1)
+    return _prune(deltas)
+
+
+def bulk_change_statement(
+    rows: Iterable[Any],
+    *,
+    previous: Optional[Mapping[str, Any]] = None,
+    deleted: bool = False,
+):
+    """Upsert for rows returned by a bulk UPDATE or DELETE.
+
+    For an UPDATE, `rows` hold the new values and `previous` the columns the
+    statement changed, as they were before it ran. For a DELETE, pass
+    deleted=True and the removed rows are subtracted.
+    """
+    return upsert_statement(_bulk_deltas(rows, previous, deleted))
+
+
+async def record_bulk_change(
+    session: AsyncSession,
+    rows: Iterable[Any],
+    *,
+    previous: Optional[Mapping[str, Any]] = None,
+    deleted: bool = False,
+) -> None:
+    """Apply bulk_change_statement() and invalidate caches on commit."""
+    deltas = _bulk_deltas(rows, previous, deleted)
+    stmt = upsert_statement(deltas)
+    if stmt is not None:
+        await session.execute(stmt)
+        _touch(session, deltas)
+
+
+# ==================== Rebuild ====================
+
+# Hourly rows straight from interactions; must agree with contribution()
+REBUILD_HOURLY_SQL = """
+    INSERT INTO interaction_analytics (
+        id, user_id, date, hour, platform, is_demo,
+        total_interactions, total_replied, total_archived, total_spam,
+        comments_count, dms_count, mentions_count,
+        urgent_count, important_count,
+        positive_count, negative_count, neutral_count,
+        unread_count, read_count, awaiting_approval_count, ignored_count,
+        sales_count, collab_opportunities,
+        response_minutes_total, responses_timed,
+        created_at, updated_at
+    )
+    SELECT
+        gen_random_uuid(), user_id, created_at::date, EXTRACT(HOUR FROM created_at)::int, platform, is_demo,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE status = 'answered'),
+        COUNT(*) FILTER (WHERE archived_at IS NOT NULL),
+        COUNT(*) FILTER (WHERE 'spam' = ANY(categories)),
+        COUNT(*) FILTER (WHERE type = 'comment'),
+        COUNT(*) FILTER (WHERE type = 'dm'),
+        COUNT(*) FILTER (WHERE type = 'mention'),
+        COUNT(*) FILTER (WHERE priority_score >= :urgent),
+        COUNT(*) FILTER (WHERE priority_score >= :important AND priority_score < :urgent),
+        COUNT(*) FILTER (WHERE sentiment = 'positive'),
+        COUNT(*) FILTER (WHERE sentiment = 'negative'),
+        COUNT(*) FILTER (WHERE sentiment = 'neutral'),
+        COUNT(*) FILTER (WHERE status = 'unread'),
+        COUNT(*) FILTER (WHERE status = 'read'),
+        COUNT(*) FILTER (WHERE status = 'awaiting_approval'),
+        COUNT(*) FILTER (WHERE status = 'ignored'),
+        COUNT(*) FILTER (WHERE 'sales' = ANY(categories)),
+        COUNT(*) FILTER (WHERE 'collab' = ANY(categories)),
+        COALESCE(SUM(GREATEST(0, FLOOR(EXTRACT(EPOCH FROM responded_at - created_at) / 60)))
+            FILTER (WHERE responded_at IS NOT NULL), 0)::bigint,
+        COUNT(*) FILTER (WHERE responded_at IS NOT NULL),
+        now(), now()
+    FROM interactions
+    WHERE created_at >= :since {user_filter}
+    GROUP BY user_id, created_at::date, EXTRACT(HOUR FROM created_at), platform, is_demo
+    {on_conflict}
+"""
+
+# Daily rows are the sum of their hourly rows
+REBUILD_DAILY_SQL = """
+    INSERT INTO interaction_analytics (
+        id, user_id, date, hour, platform, is_demo, {counters}, created_at, updated_at
+    )
+    SELECT gen_random_uuid(), user_id, date, NULL, platform, is_demo, {sums}, now(), now()
+    FROM interaction_analytics
+    WHERE view_id IS NULL AND hour IS NOT NULL AND date >= :since_date {user_filter}
+    GROUP BY user_id, date, platform, is_demo
+    {on_conflict}
+"""
+
+# A flush can insert a bucket between the DELETE and the INSERT; the rebuilt
+# counts already include its interaction, so they overwrite it
+REBUILD_ON_CONFLICT_SQL = """
+    ON CONFLICT (user_id, date, (COALESCE(hour, -1)), platform, is_demo) WHERE view_id IS NULL
+    DO UPDATE SET {assignments}, updated_at = EXCLUDED.updated_at
+""".format(assignments=', '.join(f'{name} = EXCLUDED.{name}' for name in COUNTERS))
+
+REBUILD_DERIVED_SQL = """
+    UPDATE interaction_analytics SET
+        avg_response_time_minutes = CASE WHEN responses_timed > 0
+            THEN response_minutes_total / responses_timed END,
+        response_rate = CASE WHEN total_interactions > 0
+            THEN ROUND(total_replied::numeric * 100 / total_interactions, 2) END
+    WHERE view_id IS NULL AND date >= :since_date {user_filter}
+"""
+
+
+async def rebuild_rollups(
+    session: AsyncSession,
+    user_id: Optional[UUID] = None,
+    since: Optional[date] = None,
+) -> int:
+    """Recompute rollup rows from `since` (all history if None).
+
+    Runs in the caller's transaction and does not commit. Returns the number
+    of hourly rows written.
+    """
+    since_date = since or date(1970, 1, 1)
+    params: Dict[str, Any] = {
+        'since': datetime.combine(since_date, datetime.min.time()),
+        'since_date': since_date,
+        'urgent': URGENT_PRIORITY,
+        'important': IMPORTANT_PRIORITY,
+    }
+    user_filter = ''
+    if user_id:
+        user_filter = 'AND user_id = :user_id'
+        params['user_id'] = user_id
+
+    await session.execute(
+        text(f"DELETE FROM interaction_analytics WHERE view_id IS NULL AND date >= :since_date {user_filter}"),
+        params,
+    )
+    result = await session.execute(
+        text(REBUILD_HOURLY_SQL.format(user_filter=user_filter, on_conflict=REBUILD_ON_CONFLICT_SQL)),
+        params,
+    )
+    await session.execute(
+        text(REBUILD_DAILY_SQL.format(
+            counters=', '.join(COUNTERS),
+            sums=', '.join(f'SUM({name})' for name in COUNTERS),
+            user_filter=user_filter,
+            on_conflict=REBUILD_ON_CONFLICT_SQL,
+        )),
+        params,
+    )
+    await session.execute(text(REBUILD_DERIVED_SQL.format(user_filter=user_filter)), params)
+
+    hourly_rows = result.rowcount or 0
+    logger.info(f"Rebuilt {hourly_rows} hourly interaction rollups since {since_date}")
+    return hourly_rows
+
+
+# ==================== Reads ====================
+
+def _scope(user_id: UUID, is_demo: bool):
+    return [
+        InteractionAnalytics.user_id == user_id,
+        InteractionAnalytics.view_id.is_(None),
+        InteractionAnalytics.is_demo == is_demo,
+    ]
+
+
+async def get_totals_by_platform(
+    session: AsyncSession,
+    user_id: UUID,
+    *,
+    is_demo: bool,
+    since: Optional[date] = None,
+) -> Dict[str, Dict[str, int]]:
+    """Counters summed over daily rows from `since`, keyed by platform."""
+    table = InteractionAnalytics
+    stmt = (
+        select(
+            table.platform,
+            *[func.coalesce(func.sum(getattr(table, name)), 0).label(name) for name in COUNTERS],
+        )
+        .where(*_scope(user_id, is_demo), table.hour.is_(None))
+        .group_by(table.platform)
+    )
+    if since is not None:
+        stmt = stmt.where(table.date >= since)
+
+    result = await session.execute(stmt)
+    return {
+        row.platform: {name: int(row._mapping[name]) for name in COUNTERS}
+        for row in result.all()
+    }
+
+
+def sum_totals(totals_by_platform: Mapping[str, Mapping[str, int]]) -> Dict[str, int]:
+    summed = dict.fromkeys(COUNTERS, 0)
+    for totals in totals_by_platform.values():
+        for name in COUNTERS:
+            summed[name] += totals.get(name, 0)
+    return summed
+
+
+async def get_totals(
+    session: AsyncSession,
+    user_id: UUID,
+    *,
+    is_demo: bool,
+    since: Optional[date] = None,
+) -> Dict[str, int]:
+    """Counters summed over daily rows from `since` across platforms."""
+    return sum_totals(await get_totals_by_platform(session, user_id, is_demo=is_demo, since=since))
+
+
+async def count_interactions(
+    session: AsyncSession,
+    user_id: UUID,
+    *,
+    is_demo: bool,
+    start: datetime,
+    end: Optional[datetime] = None,
+) -> int:
+    """Interactions that arrived in [start, end), from hourly rows.
+
+    Rollups are hour-granular, so both bounds are truncated to the hour.
+    """
+    table = InteractionAnalytics
+    start = _naive_utc(start)
+    stmt = select(func.coalesce(func.sum(table.total_interactions), 0)).where(
+        *_scope(user_id, is_demo),
+        table.hour.isnot(None),
+        tuple_(table.date, table.hour) >= tuple_(start.date(), start.hour),
+    )
+    if end is not None:
+        end = _naive_utc(end)
+        stmt = stmt.where(tuple_(table.date, table.hour) < tuple_(end.date(), end.hour))
+    result = await session.execute(stmt)
+    return int(result.scalar() or 0)
+
+
+async def get_daily_counts(
+    session: AsyncSession,
+    user_id: UUID,
+    *,
+    is_demo: bool,
+    since: date,
+) -> List[Tuple[date, int]]:
+    """(date, interactions) for each day from `since` that had any."""
+    table = InteractionAnalytics
+    stmt = (
+        select(table.date, func.sum(table.total_interactions))
+        .where(*_scope(user_id, is_demo), table.hour.is_(None), table.date >= since)
+        .group_by(table.date)
+        .having(func.sum(table.total_interactions) > 0)
+        .order_by(table.date)
+    )
+    result = await session.execute(stmt)
+    return [(day, int(count)) for day, count in result.all()]
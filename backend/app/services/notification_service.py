@@ -5,12 +5,15 @@ Handles creation, delivery, and management of notifications for both
 creators and agency users.
 """
 
+import hashlib
 import logging
-from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any, Literal
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from sqlalchemy import select, and_, or_, func, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.notification import (
@@ -29,6 +32,57 @@ logger = logging.getLogger(__name__)
 NOTIFICATION_RETENTION_DAYS = 90
 
 
+@dataclass
+class CreatorNotificationCandidate:
+    """A creator notification proposed by a batch detector (see create_many)."""
+
+    user_id: UUID
+    notification_type: str
+    title: str
+    message: Optional[str] = None
+    priority: str = "normal"
+    action_url: Optional[str] = None
+    action_label: Optional[str] = None
+    entity_type: Optional[str] = None
+    entity_id: Optional[UUID] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    dedup_key: Optional[str] = None
+    dedup_hours: int = 24
+    send_email: bool = True
+
+
+def notification_dedup_hash(
+    candidate: CreatorNotificationCandidate, now: Optional[datetime] = None
+) -> Optional[str]:
+    """
+    Stable key for the delivery-log unique index.
+    
+    Dedup windows are fixed buckets of dedup_hours, so two identical
+    notifications in the same bucket collide on insert. The index only
+    settles concurrent inserts; create_many checks the rolling window first,
+    which also covers repeats either side of a bucket boundary and logs
+    written before the hash existed. Returns None (never deduplicated) when
+    dedup_hours is 0. A naive `now` is taken to be UTC.
+    """
+    if candidate.dedup_hours <= 0:
+        return None
+    
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        # Naive values are UTC here; .timestamp() would read them as local time
+        now = now.replace(tzinfo=timezone.utc)
+    window = int(now.timestamp() // (candidate.dedup_hours * 3600))
+    raw = "|".join(str(part) for part in (
+        candidate.notification_type,
+        candidate.entity_type or "",
+        candidate.entity_id or "",
+        candidate.dedup_key or "",
+        candidate.dedup_hours,
+        window,
+    ))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
 class NotificationService:
     """Service for managing notifications."""
 
@@ -76,67 +130,151 @@ class NotificationService:
         Returns:
             Created notification or None if deduplicated/preferences disabled
         """
-        # Check user preferences
-        prefs = await self.get_or_create_preferences(user_id)
-        
-        if not prefs.is_type_enabled(notification_type, 'in_app'):
-            logger.debug(f"Notification {notification_type} disabled for user {user_id}")
-            return None
-        
-        # Check entity muting
-        if entity_type and entity_id and prefs.is_entity_muted(entity_type, str(entity_id)):
-            logger.debug(f"Entity {entity_type}:{entity_id} muted for user {user_id}")
+        created = await self.create_many([
+            CreatorNotificationCandidate(
+                user_id=user_id,
+                notification_type=notification_type,
+                title=title,
+                message=message,
+                priority=priority,
+                action_url=action_url,
+                action_label=action_label,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                data=data or {},
+                dedup_key=dedup_key,
+                dedup_hours=dedup_hours,
+                send_email=send_email,
+            )
+        ])
+        if not created:
+            logger.debug(f"Notification {notification_type} for user {user_id} skipped (preferences or duplicate)")
             return None
         
-        # Check deduplication
-        if dedup_hours > 0:
-            is_duplicate = await self._check_duplicate(
-                user_id, notification_type, entity_type, entity_id, dedup_key, dedup_hours
-            )
-            if is_duplicate:
-                logger.debug(f"Duplicate notification {notification_type} for user {user_id}")
-                return None
+        return created[0]
+
+    async def create_many(
+        self, candidates: List[CreatorNotificationCandidate]
+    ) -> List[CreatorNotification]:
+        """
+        Create creator notifications in bulk.
         
-        # Create notification
-        notification = CreatorNotification(
-            user_id=user_id,
-            type=notification_type,
-            title=title,
-            message=message,
-            priority=priority,
-            action_url=action_url,
-            action_label=action_label,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            data=data or {},
-            expires_at=datetime.utcnow() + timedelta(days=NOTIFICATION_RETENTION_DAYS),
-        )
+        Preferences and mutes for every recipient are resolved with one query.
+        Candidates with a matching delivery in their rolling dedup_hours window
+        are dropped after one lookup of recent logs. The rest are claimed with a
+        single INSERT ... ON CONFLICT DO NOTHING into the delivery log on
+        (user_id, dedup_hash), so concurrent creators can't both win; only rows
+        that win the insert get a notification. Instant emails are handed to
+        one batch Celery task.
         
-        self.session.add(notification)
+        Returns:
+            Notifications that were created (deduplicated/disabled ones are skipped)
+        """
+        if not candidates:
+            return []
+        
+        prefs_by_user = await self._get_preferences_map({c.user_id for c in candidates})
+        
+        # Preferences and entity mutes
+        eligible = []
+        for candidate in candidates:
+            prefs = prefs_by_user[candidate.user_id]
+            if not prefs.is_type_enabled(candidate.notification_type, 'in_app'):
+                continue
+            if (
+                candidate.entity_type and candidate.entity_id
+                and prefs.is_entity_muted(candidate.entity_type, str(candidate.entity_id))
+            ):
+                continue
+            eligible.append(candidate)
+        
+        if not eligible:
+            return []
+        
+        # Rolling-window check, which also sees logs without a dedup_hash
+        now = datetime.utcnow()
+        recent_logs = await self._get_recent_deliveries(eligible, now)
+        eligible = [
+            candidate for candidate in eligible
+            if candidate.dedup_hours <= 0
+            or not any(
+                self._log_matches(log, candidate, now - timedelta(hours=candidate.dedup_hours))
+                for log in recent_logs.get((candidate.user_id, candidate.notification_type), [])
+            )
+        ]
+        if not eligible:
+            return []
+        
+        # Claim delivery log rows; conflicts on the dedup hash are duplicates
+        log_rows = {}
+        for candidate in eligible:
+            log_id = uuid4()
+            log_rows[log_id] = (candidate, {
+                "id": log_id,
+                "user_id": candidate.user_id,
+                "notification_type": candidate.notification_type,
+                "entity_type": candidate.entity_type,
+                "entity_id": candidate.entity_id,
+                "dedup_key": candidate.dedup_key,
+                "dedup_hash": notification_dedup_hash(candidate, now),
+                "channel": 'in_app',
+                "delivered_at": now,
+                "created_at": now,
+                "updated_at": now,
+            })
         
-        # Log delivery for deduplication
-        delivery_log = NotificationDeliveryLog(
-            user_id=user_id,
-            notification_type=notification_type,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            dedup_key=dedup_key,
-            channel='in_app',
+        stmt = (
+            pg_insert(NotificationDeliveryLog.__table__)
+            .values([row for _, row in log_rows.values()])
+            .on_conflict_do_nothing(
+                index_elements=["user_id", "dedup_hash"],
+                index_where=NotificationDeliveryLog.__table__.c.dedup_hash.isnot(None),
+            )
+            .returning(NotificationDeliveryLog.__table__.c.id)
         )
-        self.session.add(delivery_log)
-        
+        result = await self.session.execute(stmt)
+        claimed = {row[0] for row in result}
+        
+        created = [
+            (CreatorNotification(
+                user_id=candidate.user_id,
+                type=candidate.notification_type,
+                title=candidate.title,
+                message=candidate.message,
+                priority=candidate.priority,
+                action_url=candidate.action_url,
+                action_label=candidate.action_label,
+                entity_type=candidate.entity_type,
+                entity_id=candidate.entity_id,
+                data=candidate.data or {},
+                expires_at=now + timedelta(days=NOTIFICATION_RETENTION_DAYS),
+            ), candidate)
+            for log_id, (candidate, _) in log_rows.items()
+            if log_id in claimed
+        ]
+        self.session.add_all([notification for notification, _ in created])
         await self.session.commit()
-        await self.session.refresh(notification)
         
-        logger.info(f"Created notification {notification.id} type={notification_type} for user {user_id}")
+        if created:
+            logger.info(f"Created {len(created)} notifications from {len(candidates)} candidates")
         
-        # Handle email notification
-        if send_email and prefs.is_type_enabled(notification_type, 'email'):
-            if prefs.email_frequency == 'instant':
-                await self._send_instant_email(notification, prefs)
-            # For daily_digest, the notification will be picked up by the digest job
+        # Instant emails go out as one batch task instead of inline per notification
+        instant_email_ids = [
+            str(notification.id)
+            for notification, candidate in created
+            if candidate.send_email
+            and prefs_by_user[candidate.user_id].is_type_enabled(candidate.notification_type, 'email')
+            and prefs_by_user[candidate.user_id].email_frequency == 'instant'
+        ]
+        if instant_email_ids:
+            from app.tasks.notifications import send_instant_notification_emails
+            
+            try:
+                send_instant_notification_emails.delay(instant_email_ids)
+            except Exception as e:
+                logger.error(f"Failed to enqueue {len(instant_email_ids)} instant notification emails: {e}")
         
-        return notification
+        return [notification for notification, _ in created]
 
     async def get_creator_notifications(
         self,
@@ -497,37 +635,67 @@ class NotificationService:
         result = await self.session.execute(query)
         return result.scalar_one_or_none() is not None
 
-    async def _send_instant_email(
-        self, notification: CreatorNotification, prefs: NotificationPreference
-    ) -> bool:
-        """Send instant email notification."""
-        from app.tasks.email import send_email
-        from app.services.notification_email_service import render_creator_notification_email
+    async def _get_recent_deliveries(
+        self, candidates: List[CreatorNotificationCandidate], now: datetime
+    ) -> Dict[tuple, List[NotificationDeliveryLog]]:
+        """Fetch delivery logs that could dedupe any candidate, keyed by (user_id, type)."""
+        deduped = [c for c in candidates if c.dedup_hours > 0]
+        if not deduped:
+            return {}
         
-        try:
-            # Get user email
-            user_query = select(User).where(User.id == notification.user_id)
-            result = await self.session.execute(user_query)
-            user = result.scalar_one_or_none()
-            
-            if not user or not user.email:
-                return False
-            
-            # Render email
-            subject, html = render_creator_notification_email(notification, user)
-            
-            # Send via Celery task
-            send_email.delay(user.email, subject, html)
-            
-            # Update notification
-            notification.email_sent = True
-            notification.email_sent_at = datetime.utcnow()
-            await self.session.commit()
-            
-            return True
-        except Exception as e:
-            logger.error(f"Failed to send instant email for notification {notification.id}: {e}")
+        cutoff = now - timedelta(hours=max(c.dedup_hours for c in deduped))
+        query = select(NotificationDeliveryLog).where(
+            NotificationDeliveryLog.user_id.in_({c.user_id for c in deduped}),
+            NotificationDeliveryLog.notification_type.in_({c.notification_type for c in deduped}),
+            NotificationDeliveryLog.delivered_at > cutoff,
+        )
+        result = await self.session.execute(query)
+        
+        logs: Dict[tuple, List[NotificationDeliveryLog]] = {}
+        for log in result.scalars().all():
+            logs.setdefault((log.user_id, log.notification_type), []).append(log)
+        return logs
+
+    @staticmethod
+    def _log_matches(
+        log: NotificationDeliveryLog,
+        candidate: CreatorNotificationCandidate,
+        cutoff: datetime,
+    ) -> bool:
+        """In-memory equivalent of the _check_duplicate filter."""
+        delivered_at = log.delivered_at.replace(tzinfo=None) if log.delivered_at else None
+        if delivered_at is None or delivered_at <= cutoff:
+            return False
+        if candidate.entity_type and log.entity_type != candidate.entity_type:
+            return False
+        if candidate.entity_id and log.entity_id != candidate.entity_id:
+            return False
+        if candidate.dedup_key and log.dedup_key != candidate.dedup_key:
             return False
+        return True
+
+    async def _get_preferences_map(
+        self, user_ids: set
+    ) -> Dict[UUID, NotificationPreference]:
+        """Load preferences for many users at once, creating defaults where missing."""
+        result = await self.session.execute(
+            select(NotificationPreference).where(
+                NotificationPreference.user_id.in_(user_ids)
+            )
+        )
+        prefs_by_user = {p.user_id: p for p in result.scalars().all()}
+        
+        missing = [
+            NotificationPreference(user_id=user_id)
+            for user_id in user_ids
+            if user_id not in prefs_by_user
+        ]
+        if missing:
+            self.session.add_all(missing)
+            await self.session.flush()
+            prefs_by_user.update({p.user_id: p for p in missing})
+        
+        return prefs_by_user
 
     async def _send_agency_instant_email(
         self, notification: AgencyNotification, prefs: NotificationPreference
@@ -13,6 +13,7 @@ from datetime import datetime, timezone, timedelta
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
+from loguru import logger
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -20,7 +21,6 @@ from app.services.youtube_service import YouTubeService  # existing high-level s
 from app.services.sync_service import SyncService  # used to sync comments
 from app.services.comment_classifier import classify_comment
 from app.services.template_responses import get_template_response
-from loguru import logger
 
 
 class PollingService:
@@ -28,6 +28,8 @@ class PollingService:
 
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
+        # YouTube quota units used by this service's API calls so far
+        self.quota_used = 0
 
     async def get_active_channels(self) -> List[Dict[str, Any]]:
         """Return polling-enabled channels with interval and last_polled_at.
@@ -70,12 +72,20 @@ class PollingService:
 
         Notes:
         - `video_id` is the YouTube video_id (external). SyncService will upsert new comments.
-        - `last_checked` is currently advisory; the sync avoids duplicates via ON CONFLICT DO NOTHING.
-        Returns number of comments upserted as reported by SyncService.
+        - `last_checked` is advisory; incremental sync stops at the video's stored watermark.
+        Returns number of new comments inserted as reported by SyncService.
         """
         service = SyncService(self.session, channel_id)
-        # SyncService.sync_video_comments returns count of comments inserted for the given video
-        count = await service.sync_video_comments(video_id)
+        try:
+            count = await service.sync_video_comments(video_id, incremental=True)
+        finally:
+            self.quota_used += service.api.quota_snapshot()["total"]
+        logger.debug(
+            "Polled video {vid}: {count} new comments, quota {quota}",
+            vid=video_id,
+            count=count,
+            quota=service.api.quota_snapshot()["total"],
+        )
         return int(count or 0)
 
     async def should_poll(self, *, channel_id: UUID) -> bool:
@@ -148,8 +158,8 @@ class PollingService:
             logger.info("Polling comments for channel {cid}; last_checked={ts}", cid=str(channel_id), ts=str(last_checked))
 
             # 2) Ensure recent videos are present via YouTube integration, then get recent videos
+            sync = SyncService(self.session, channel_id)
             try:
-                sync = SyncService(self.session, channel_id)
                 synced_videos = await sync.sync_new_videos(last_checked)
                 logger.debug(
                     "Synced {n} new videos for channel {cid} before polling comments",
@@ -158,6 +168,7 @@ class PollingService:
                 )
             except Exception:
                 logger.exception("Failed syncing recent videos for channel {cid}", cid=str(channel_id))
+            self.quota_used += sync.api.quota_snapshot()["total"]
 
             # Now read from DB (limit to latest 50 by published date)
             vids_res = await self.session.execute(
@@ -14,6 +14,8 @@ from loguru import logger
 
 from app.models.interaction import Interaction
 from app.models.user import User
+from app.services import response_reuse
+from app.services.claude_service import ClaudeService
 
 
 class ResponseGenerator:
@@ -103,6 +105,22 @@ class ResponseGenerator:
             previous_response: If regenerating, the previous response to avoid
             ai_instructions: Custom instructions from workflow on how to respond
         """
+        # A reply the creator already approved for the same comment costs no call
+        channel_key = response_reuse.interaction_channel_key(interaction)
+        recent = ClaudeService._recent[response_reuse.recent_key(channel_key)]
+        reused = await response_reuse.find_reply(
+            self.session,
+            channel_key=channel_key,
+            comment_text=interaction.content,
+            style=response_reuse.style_key(tone, ai_instructions),
+            variables=response_reuse.interaction_variables(interaction),
+            recent=recent,
+            exclude=[previous_response] if previous_response else [],
+        )
+        if reused:
+            logger.info(f"Reused {reused.match} approved reply for {interaction.id}")
+            return reused.text
+
         # Get creator context
         user = await self.session.get(User, user_id)
         creator_context = await self._build_creator_context(user)
@@ -149,6 +167,7 @@ class ResponseGenerator:
             if self._has_ai_tells(generated_text, interaction):
                 logger.warning(f"Response may have AI tells: {generated_text[:100]}...")
             
+            recent.append(generated_text)
             logger.info(
                 f"Generated response for {interaction.id}: "
                 f"{len(generated_text)} chars, {len(generated_text.split())} words"
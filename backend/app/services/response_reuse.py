@@ -0,0 +1,400 @@
+"""
+Reuse of approved replies for repeated comments.
+
+Channels get the same few comments over and over ("Great video!", "first"),
+and each one used to cost a model call. Replies the creator approved are kept
+per channel in approved_responses, keyed by the comment's fingerprint
+(comment_classifier.create_fingerprint). A new comment first looks for an
+approved reply with the same fingerprint. Failing that, it looks for one
+whose comment is a near duplicate: a MinHash signature over the fingerprint
+tokens, with its LSH band hashes in a GIN index, so both checks are one
+indexed query.
+
+Reuse keeps some variety:
+- Replies are stored as templates, with the video title, channel name and
+  commenter replaced by {video_title}/{channel_name}/{username}, and are
+  rendered for the new comment.
+- A candidate whose text is in the channel's recent buffer
+  (ClaudeService._recent) is skipped, so the channel doesn't post the same
+  words twice in a row.
+
+Lookups are counted per channel and day in response_reuse_stats. Every hit
+is a model call saved. The lookup itself only reads in the caller's
+session. Counts and usage marks are written by record_lookups in a
+separate short transaction. The stats row is hot, and holding its lock
+for the length of a model call would serialize every request on the
+channel.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy import Integer, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_session_maker
+from app.monitoring.metrics import record_response_reuse
+from app.services.comment_classifier import create_fingerprint, fingerprint_tokens
+
+REUSE_ENABLED = os.getenv("RESPONSE_REUSE_ENABLED", "true").lower() == "true"
+NEAR_DUPLICATES = os.getenv("RESPONSE_REUSE_NEAR_DUPLICATES", "true").lower() == "true"
+# Estimated Jaccard similarity of fingerprint tokens for a near-duplicate hit
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("RESPONSE_REUSE_SIMILARITY", "0.8"))
+CANDIDATE_LIMIT = 20
+
+# 8 bands of 4 rows: comments at 0.8 similarity share a band ~98% of the time
+MINHASH_BANDS = 8
+MINHASH_ROWS = 4
+MINHASH_SIZE = MINHASH_BANDS * MINHASH_ROWS
+
+TEMPLATE_VARIABLES = ("video_title", "channel_name", "username")
+_VAR_RE = re.compile(r"\{(" + "|".join(TEMPLATE_VARIABLES) + r")\}")
+# Shorter values ("hi", "me") would be swapped out of unrelated words
+_MIN_VARIABLE_LENGTH = 4
+
+_PRIME = (1 << 61) - 1
+_INT4 = 0x7FFFFFFF
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+# Fixed permutations so signatures match across processes and restarts
+_PERMUTATIONS = [
+    (_hash64(f"minhash:a:{i}") % (_PRIME - 1) + 1, _hash64(f"minhash:b:{i}") % _PRIME)
+    for i in range(MINHASH_SIZE)
+]
+
+
+def minhash(tokens: Iterable[str]) -> Optional[List[int]]:
+    """MinHash signature of the token set, or None when there are no tokens."""
+    hashes = {_hash64(t) for t in tokens}
+    if not hashes:
+        return None
+    return [min((a * h + b) % _PRIME for h in hashes) & _INT4 for a, b in _PERMUTATIONS]
+
+
+def lsh_bands(signature: Optional[Sequence[int]]) -> List[int]:
+    if not signature:
+        return []
+    bands = []
+    for i in range(MINHASH_BANDS):
+        rows = ",".join(str(v) for v in signature[i * MINHASH_ROWS:(i + 1) * MINHASH_ROWS])
+        bands.append(_hash64(f"{i}:{rows}") & _INT4)
+    return bands
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of the token sets behind two signatures."""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+# ---------------- Keys ----------------
+
+def interaction_channel_key(interaction: Any) -> str:
+    """Reuse scope for an Interaction: the owner's account on its platform."""
+    prefix = "demo:" if getattr(interaction, "is_demo", False) else ""
+    return f"{prefix}{interaction.platform}:{interaction.user_id}"
+
+
+def interaction_variables(interaction: Any) -> Dict[str, str]:
+    return {
+        "video_title": interaction.parent_content_title or "",
+        "username": interaction.author_username or "",
+    }
+
+
+def style_key(*parts: Any) -> str:
+    """Separates replies written under different tones/instructions; "" for none."""
+    if not any(parts):
+        return ""
+    raw = "\x1f".join(str(p or "") for p in parts).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+def recent_key(channel_key: str) -> str:
+    return f"reuse:{channel_key}"
+
+
+# ---------------- Templates ----------------
+
+def to_template(reply: str, variables: Optional[Mapping[str, str]] = None) -> str:
+    out = reply.strip()
+    for name in TEMPLATE_VARIABLES:
+        value = ((variables or {}).get(name) or "").strip()
+        if len(value) >= _MIN_VARIABLE_LENGTH:
+            out = re.sub(rf"(?i)(?<!\w){re.escape(value)}(?!\w)", "{" + name + "}", out)
+    return out
+
+
+def render(template: str, variables: Optional[Mapping[str, str]] = None) -> Optional[str]:
+    """Fill the template; None when it needs a variable this comment doesn't have."""
+    missing = False
+
+    def repl(m: re.Match[str]) -> str:
+        nonlocal missing
+        value = ((variables or {}).get(m.group(1)) or "").strip()
+        missing = missing or not value
+        return value
+
+    out = _VAR_RE.sub(repl, template)
+    return None if missing else out
+
+
+def _norm(reply: str) -> str:
+    return " ".join(reply.lower().split())
+
+
+# ---------------- Lookup ----------------
+
+@dataclass
+class ReusedReply:
+    response_id: str
+    text: str
+    match: str  # "exact" or "near"
+    similarity: float
+
+
+_CANDIDATES = text(
+    """
+    SELECT id, fingerprint, minhash, response_template
+    FROM approved_responses
+    WHERE channel_key = :channel_key
+      AND style_key = :style_key
+      AND (fingerprint = :fingerprint OR bands && :bands)
+    ORDER BY fingerprint = :fingerprint DESC, last_used_at ASC NULLS FIRST
+    LIMIT :limit
+    """
+).bindparams(bindparam("bands", type_=ARRAY(Integer)))
+
+_MARK_USED = text(
+    """
+    UPDATE approved_responses a
+    SET usage_count = a.usage_count + u.n, last_used_at = now()
+    FROM (SELECT id, COUNT(*) AS n FROM unnest(CAST(:ids AS uuid[])) AS id GROUP BY id) u
+    WHERE a.id = u.id
+    """
+)
+
+_COUNT_LOOKUP = text(
+    """
+    INSERT INTO response_reuse_stats (channel_key, stats_date, lookups, exact_hits, near_hits)
+    VALUES (:channel_key, CURRENT_DATE, :lookups, :exact, :near)
+    ON CONFLICT (channel_key, stats_date)
+    DO UPDATE SET lookups = response_reuse_stats.lookups + EXCLUDED.lookups,
+                  exact_hits = response_reuse_stats.exact_hits + EXCLUDED.exact_hits,
+                  near_hits = response_reuse_stats.near_hits + EXCLUDED.near_hits
+    """
+)
+
+_REMEMBER = text(
+    """
+    INSERT INTO approved_responses (
+        channel_key, style_key, fingerprint, minhash, bands,
+        comment_text, response_template, response_hash
+    )
+    VALUES (:channel_key, :style_key, :fingerprint, :minhash, :bands, :comment_text, :template, :response_hash)
+    ON CONFLICT (channel_key, style_key, fingerprint, response_hash)
+    DO UPDATE SET approvals = approved_responses.approvals + 1, approved_at = now()
+    """
+).bindparams(
+    bindparam("minhash", type_=ARRAY(Integer)),
+    bindparam("bands", type_=ARRAY(Integer)),
+)
+
+
+def _choose(
+    rows: Sequence[Any],
+    fingerprint: str,
+    signature: Optional[List[int]],
+    variables: Mapping[str, str],
+    skip: set,
+) -> Optional[ReusedReply]:
+    """Least recently used exact match, else the most similar near duplicate."""
+    best: Optional[ReusedReply] = None
+    for row in rows:
+        if row.fingerprint == fingerprint:
+            match, score = "exact", 1.0
+        elif signature and row.minhash:
+            match, score = "near", similarity(signature, row.minhash)
+            if score < NEAR_DUPLICATE_THRESHOLD:
+                continue
+        else:
+            continue
+        reply = render(row.response_template, variables)
+        if not reply or _norm(reply) in skip:
+            continue
+        if match == "exact":
+            return ReusedReply(str(row.id), reply, match, score)
+        if best is None or score > best.similarity:
+            best = ReusedReply(str(row.id), reply, match, score)
+    return best
+
+
+async def find_reply(
+    db: AsyncSession,
+    *,
+    channel_key: str,
+    comment_text: str,
+    style: str = "",
+    variables: Optional[Mapping[str, str]] = None,
+    recent: Optional[Any] = None,
+    exclude: Iterable[str] = (),
+    record: bool = True,
+) -> Optional[ReusedReply]:
+    """
+    An approved reply on this channel for a repeat of the comment, or None.
+
+    `recent` is the channel's recent-replies deque; candidates in it or in
+    `exclude` are skipped and the chosen reply is appended. Only reads in
+    the caller's session (in a SAVEPOINT) and never commits; on any error
+    the caller just generates. The lookup is counted through record_lookups
+    unless record=False, for callers that count a batch of lookups at once.
+    """
+    tokens = fingerprint_tokens(comment_text)
+    # Emoji-only and stopword-only comments all share one fingerprint
+    if not REUSE_ENABLED or not channel_key or not tokens:
+        return None
+
+    fingerprint = create_fingerprint(comment_text)
+    signature = minhash(tokens) if NEAR_DUPLICATES else None
+    skip = {_norm(r) for r in (*(recent or ()), *exclude) if r}
+    try:
+        async with db.begin_nested():
+            rows = (await db.execute(_CANDIDATES, {
+                "channel_key": channel_key,
+                "style_key": style,
+                "fingerprint": fingerprint,
+                "bands": lsh_bands(signature),
+                "limit": CANDIDATE_LIMIT,
+            })).all()
+            chosen = _choose(rows, fingerprint, signature, variables or {}, skip)
+    except Exception as e:
+        logger.warning(f"Approved reply lookup failed for {channel_key}: {e}")
+        return None
+
+    if record:
+        await record_lookups([(channel_key, chosen)])
+    if chosen and recent is not None:
+        recent.append(chosen.text)
+    return chosen
+
+
+async def record_lookups(lookups: Sequence[Tuple[str, Optional[ReusedReply]]]) -> None:
+    """
+    Count (channel_key, reply or None) lookups and mark the reused replies.
+
+    Writes in its own session and commits at once, so the per-channel stats
+    row is locked only for this short transaction. Best effort: failures
+    are logged.
+    """
+    if not lookups:
+        return
+    stats: Dict[str, Counter] = {}
+    used: List[str] = []
+    for channel_key, chosen in lookups:
+        record_response_reuse(chosen.match if chosen else "miss")
+        counts = stats.setdefault(channel_key, Counter())
+        counts["lookups"] += 1
+        if chosen:
+            counts[chosen.match] += 1
+            used.append(chosen.response_id)
+    try:
+        async with async_session_maker() as session:
+            if used:
+                await session.execute(_MARK_USED, {"ids": used})
+            await session.execute(_COUNT_LOOKUP, [
+                {
+                    "channel_key": channel_key,
+                    "lookups": counts["lookups"],
+                    "exact": counts["exact"],
+                    "near": counts["near"],
+                }
+                # Fixed order so concurrent batches lock stats rows alike
+                for channel_key, counts in sorted(stats.items())
+            ])
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"Failed to record approved reply lookups: {e}")
+
+
+async def remember_approved(
+    db: AsyncSession,
+    *,
+    channel_key: str,
+    comment_text: str,
+    response_text: str,
+    style: str = "",
+    variables: Optional[Mapping[str, str]] = None,
+) -> None:
+    """Keep an approved reply for reuse on this channel; the caller commits."""
+    tokens = fingerprint_tokens(comment_text)
+    if not REUSE_ENABLED or not channel_key or not tokens or not (response_text or "").strip():
+        return
+    template = to_template(response_text, variables)
+    signature = minhash(tokens)
+    try:
+        async with db.begin_nested():
+            await db.execute(_REMEMBER, {
+                "channel_key": channel_key,
+                "style_key": style,
+                "fingerprint": create_fingerprint(comment_text),
+                "minhash": signature,
+                "bands": lsh_bands(signature),
+                "comment_text": comment_text,
+                "template": template,
+                "response_hash": hashlib.blake2b(template.encode("utf-8"), digest_size=16).hexdigest(),
+            })
+    except Exception as e:
+        logger.warning(f"Failed to keep approved reply for {channel_key}: {e}")
+
+
+async def get_reuse_stats(
+    db: AsyncSession,
+    *,
+    channel_keys: Sequence[str],
+    key_suffix: Optional[str] = None,
+    days: int = 30,
+) -> List[Dict[str, Any]]:
+    """Per-channel hit rate and model calls saved over the last `days` days."""
+    result = await db.execute(
+        text(
+            """
+            SELECT channel_key, SUM(lookups), SUM(exact_hits), SUM(near_hits)
+            FROM response_reuse_stats
+            WHERE (channel_key = ANY(:keys) OR channel_key LIKE :suffix)
+              AND stats_date > CURRENT_DATE - :days
+            GROUP BY channel_key
+            ORDER BY channel_key
+            """
+        ),
+        {
+            "keys": list(channel_keys),
+            # Matches nothing when no suffix is given
+            "suffix": f"%:{key_suffix}" if key_suffix else "",
+            "days": int(days),
+        },
+    )
+    stats = []
+    for channel_key, lookups, exact, near in result.all():
+        lookups, hits = int(lookups or 0), int(exact or 0) + int(near or 0)
+        stats.append({
+            "channel_key": channel_key,
+            "lookups": lookups,
+            "exact_hits": int(exact or 0),
+            "near_hits": int(near or 0),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "llm_calls_saved": hits,
+        })
+    return stats
+
@@ -0,0 +1,383 @@
+"""
+Rule compiler for RuleEvaluator.
+
+A rule's `conditions` and `logic` are turned once per rule version into
+condition checks with their parameters already normalized, plus a parsed
+logic tree. The tree is evaluated with three-valued logic, so AI conditions
+are only sent to the model while the outcome still depends on them.
+
+Compiled rules are grouped into a CompiledRuleSet. All keyword conditions in
+the set, and the sentiment heuristic's word lists, share one KeywordMatcher.
+Each comment's text is therefore scanned once for every rule in the set.
+"""
+from __future__ import annotations
+
+import json
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+
+NEGATIVE_WORDS = ("hate", "terrible", "awful", "bad")
+POSITIVE_WORDS = ("love", "great", "awesome", "good", "thanks", "thank you")
+
+# Logic tree nodes: ("ref", index) | ("not", node) | ("and", nodes) | ("or", nodes)
+Node = Tuple[str, Any]
+Check = Callable[[Dict[str, Any], FrozenSet[str]], Tuple[bool, float]]
+
+_COMPARE: Dict[str, Callable[[int, int], bool]] = {
+    ">=": lambda a, b: a >= b,
+    ">": lambda a, b: a > b,
+    "<=": lambda a, b: a <= b,
+    "<": lambda a, b: a < b,
+    "==": lambda a, b: a == b,
+}
+
+
+# ---------- Keyword matching ----------
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation shaped like a trie so each position is tried in O(depth)."""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, Any]) -> str:
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        # Greedy optional suffix: the longest keyword at a position wins
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """Finds every keyword occurring as a substring of a text in a single pass.
+
+    The lookahead pattern reports the longest keyword starting at each
+    position; shorter keywords starting there are necessarily its prefixes,
+    so they are recovered from a precomputed prefix table.
+    """
+
+    def __init__(self, words: Iterable[str], *, memo_size: int = 1024) -> None:
+        vocab = {w for w in words if w}
+        self._pattern = re.compile(f"(?=({_trie_pattern(vocab)}))") if vocab else None
+        self._prefixes: Dict[str, FrozenSet[str]] = {
+            w: frozenset(p for p in vocab if w.startswith(p)) for w in vocab
+        }
+        self._memo: "OrderedDict[str, FrozenSet[str]]" = OrderedDict()
+        self._memo_size = memo_size
+
+    def find(self, text_lower: str) -> FrozenSet[str]:
+        """Keywords present in already lowercased text. The empty string always is."""
+        hit = self._memo.get(text_lower)
+        if hit is not None:
+            self._memo.move_to_end(text_lower)
+            return hit
+        found = {""}
+        if self._pattern is not None:
+            for m in self._pattern.finditer(text_lower):
+                if m.group(1):
+                    found |= self._prefixes[m.group(1)]
+        result = frozenset(found)
+        self._memo[text_lower] = result
+        if len(self._memo) > self._memo_size:
+            self._memo.popitem(last=False)
+        return result
+
+
+# ---------- Logic ----------
+_TOKEN_RE = re.compile(r"\s*(?:(\d+)|([()])|([A-Za-z]+))")
+
+
+@lru_cache(maxsize=4096)
+def parse_logic(logic: str) -> Optional[Node]:
+    """Parse "(1 AND 2) OR NOT 3" (1-based refs, NOT > AND > OR). None if invalid."""
+    tokens: List[Union[int, str]] = []
+    pos = 0
+    logic = logic.rstrip()
+    while pos < len(logic):
+        m = _TOKEN_RE.match(logic, pos)
+        if not m:
+            return None
+        num, paren, word = m.groups()
+        if num is not None:
+            tokens.append(int(num))
+        elif paren is not None:
+            tokens.append(paren)
+        elif word.upper() in ("AND", "OR", "NOT"):
+            tokens.append(word.upper())
+        else:
+            return None
+        pos = m.end()
+
+    i = 0
+
+    def peek() -> Optional[Union[int, str]]:
+        return tokens[i] if i < len(tokens) else None
+
+    def parse_binary(op: str, operand: Callable[[], Optional[Node]]) -> Optional[Node]:
+        nonlocal i
+        first = operand()
+        if first is None:
+            return None
+        items = [first]
+        while peek() == op:
+            i += 1
+            nxt = operand()
+            if nxt is None:
+                return None
+            items.append(nxt)
+        return first if len(items) == 1 else (op.lower(), tuple(items))
+
+    def parse_or() -> Optional[Node]:
+        return parse_binary("OR", parse_and)
+
+    def parse_and() -> Optional[Node]:
+        return parse_binary("AND", parse_not)
+
+    def parse_not() -> Optional[Node]:
+        nonlocal i
+        if peek() == "NOT":
+            i += 1
+            inner = parse_not()
+            return ("not", inner) if inner is not None else None
+        return parse_atom()
+
+    def parse_atom() -> Optional[Node]:
+        nonlocal i
+        tok = peek()
+        if isinstance(tok, int):
+            i += 1
+            return ("ref", tok)
+        if tok == "(":
+            i += 1
+            inner = parse_or()
+            if inner is None or peek() != ")":
+                return None
+            i += 1
+            return inner
+        return None
+
+    tree = parse_or()
+    return tree if tree is not None and i == len(tokens) else None
+
+
+def evaluate_logic(node: Node, values: Sequence[Optional[bool]]) -> Optional[bool]:
+    """Kleene evaluation: None marks a condition not evaluated yet."""
+    kind, arg = node
+    if kind == "ref":
+        return values[arg - 1] if 1 <= arg <= len(values) else False
+    if kind == "not":
+        inner = evaluate_logic(arg, values)
+        return None if inner is None else not inner
+    decisive = kind == "or"  # True decides OR, False decides AND
+    undecided = False
+    for child in arg:
+        v = evaluate_logic(child, values)
+        if v is None:
+            undecided = True
+        elif v == decisive:
+            return decisive
+    return None if undecided else not decisive
+
+
+# ---------- Conditions ----------
+def _check_sentiment(cond: Dict[str, Any]) -> Check:
+    want = (cond.get("value") or "").lower()  # expected: positive|neutral|negative
+
+    def check(comment: Dict[str, Any], found: FrozenSet[str]) -> Tuple[bool, float]:
+        cm_sent = (comment.get("sentiment") or "").lower()
+        if cm_sent:
+            match = cm_sent == want
+            return match, 0.9 if match else 0.2
+        negative = any(w in found for w in NEGATIVE_WORDS)
+        positive = any(w in found for w in POSITIVE_WORDS)
+        if want == "negative" and negative:
+            return True, 0.6
+        if want == "positive" and positive:
+            return True, 0.6
+        if want == "neutral" and not (negative or positive):
+            return True, 0.5
+        return False, 0.4
+
+    return check
+
+
+def _check_subscriber_status(cond: Dict[str, Any]) -> Check:
+    required = bool(cond.get("value"))  # True means must be subscriber
+
+    def check(comment: Dict[str, Any], found: FrozenSet[str]) -> Tuple[bool, float]:
+        ok = bool(comment.get("author_subscribed")) == required
+        return ok, 0.8 if ok else 0.2
+
+    return check
+
+
+def _keyword_lists(cond: Dict[str, Any]) -> Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]:
+    # cond: { any: [words], all: [words], none: [words] }
+    return tuple(frozenset(str(w).lower() for w in (cond.get(k) or [])) for k in ("any", "all", "none"))  # type: ignore[return-value]
+
+
+def _check_keywords(cond: Dict[str, Any]) -> Check:
+    any_words, all_words, none_words = _keyword_lists(cond)
+
+    def check(comment: Dict[str, Any], found: FrozenSet[str]) -> Tuple[bool, float]:
+        ok = True
+        conf = 0.5
+        if any_words:
+            ok_any = not any_words.isdisjoint(found)
+            ok = ok and ok_any
+            conf += 0.2 if ok_any else -0.2
+        if all_words:
+            ok_all = all_words <= found
+            ok = ok and ok_all
+            conf += 0.2 if ok_all else -0.2
+        if none_words:
+            ok_none = none_words.isdisjoint(found)
+            ok = ok and ok_none
+            conf += 0.2 if ok_none else -0.2
+        return ok, max(0.0, min(1.0, conf))
+
+    return check
+
+
+def _check_comment_length(cond: Dict[str, Any]) -> Check:
+    # cond: { op: '>=|>|<=|<|==', value: int }
+    compare = _COMPARE.get(cond.get("op", ">="))
+    val = int(cond.get("value", 0))
+
+    def check(comment: Dict[str, Any], found: FrozenSet[str]) -> Tuple[bool, float]:
+        ok = bool(compare and compare(len(comment.get("text") or ""), val))
+        return ok, 0.7 if ok else 0.3
+
+    return check
+
+
+def _as_datetime(value: Any) -> datetime:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value
+
+
+def _check_video_age(cond: Dict[str, Any]) -> Check:
+    # cond: { op, days: int } comparing comment.created_at vs video_published_at
+    compare = _COMPARE.get(cond.get("op", ">="))
+    val = int(cond.get("days", 0))
+
+    def check(comment: Dict[str, Any], found: FrozenSet[str]) -> Tuple[bool, float]:
+        created = comment.get("created_at")
+        video_pub = comment.get("video_published_at")
+        if not created or not video_pub:
+            return False, 0.4
+        age_days = (_as_datetime(created) - _as_datetime(video_pub)).days
+        ok = bool(compare and compare(age_days, val))
+        return ok, 0.7 if ok else 0.3
+
+    return check
+
+
+def _check_unknown(comment: Dict[str, Any], found: FrozenSet[str]) -> Tuple[bool, float]:
+    # unknown condition type -> treat as non-match with low confidence
+    return False, 0.3
+
+
+_CHECK_BUILDERS: Dict[str, Callable[[Dict[str, Any]], Check]] = {
+    "sentiment": _check_sentiment,
+    "subscriber_status": _check_subscriber_status,
+    "keywords": _check_keywords,
+    "comment_length": _check_comment_length,
+    "video_age": _check_video_age,
+}
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    check: Optional[Check]  # None for AI conditions
+    prompt: str = ""
+
+    @property
+    def is_ai(self) -> bool:
+        return self.check is None
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    fingerprint: str
+    conditions: Tuple[CompiledCondition, ...]
+    logic: Node
+    keywords: FrozenSet[str] = field(default_factory=frozenset)
+
+    @property
+    def has_ai(self) -> bool:
+        return any(c.is_ai for c in self.conditions)
+
+
+def _compile_condition(cond: Dict[str, Any]) -> CompiledCondition:
+    ctype = (cond.get("type") or "").lower()
+    if ctype == "ai":
+        return CompiledCondition(check=None, prompt=cond.get("prompt") or "")
+    builder = _CHECK_BUILDERS.get(ctype)
+    if builder is None:
+        return CompiledCondition(check=_check_unknown)
+    try:
+        return CompiledCondition(check=builder(cond))
+    except (TypeError, ValueError) as e:
+        # Malformed parameters fail at evaluation time, as they always have
+        def fail(comment: Dict[str, Any], found: FrozenSet[str], _e: Exception = e) -> Tuple[bool, float]:
+            raise _e
+
+        return CompiledCondition(check=fail)
+
+
+def rule_fingerprint(rule: Dict[str, Any]) -> str:
+    """Stable identity of a rule version: its conditions and logic."""
+    conditions = json.dumps(rule.get("conditions") or [], sort_keys=True, default=str)
+    logic = str(rule.get("logic") or rule.get("custom_logic") or "")
+    return f"{logic}\x00{conditions}"
+
+
+@lru_cache(maxsize=4096)
+def _compile_fingerprint(fingerprint: str) -> CompiledRule:
+    logic, _, conditions_json = fingerprint.partition("\x00")
+    conditions = json.loads(conditions_json)
+    compiled = tuple(_compile_condition(c) for c in conditions)
+    keywords: set[str] = set()
+    for cond in conditions:
+        if (cond.get("type") or "").lower() == "keywords":
+            for words in _keyword_lists(cond):
+                keywords |= words
+    all_refs: Node = ("and", tuple(("ref", i) for i in range(1, len(compiled) + 1)))
+    # Empty or invalid logic means AND of all conditions
+    tree = (parse_logic(logic) if logic else None) or all_refs
+    return CompiledRule(fingerprint=fingerprint, conditions=compiled, logic=tree, keywords=frozenset(keywords))
+
+
+def compile_rule(rule: Dict[str, Any]) -> CompiledRule:
+    return _compile_fingerprint(rule_fingerprint(rule))
+
+
+@dataclass(frozen=True)
+class CompiledRuleSet:
+    rules: Tuple[CompiledRule, ...]
+    matcher: KeywordMatcher
+
+
+@lru_cache(maxsize=256)
+def _compile_set(fingerprints: Tuple[str, ...]) -> CompiledRuleSet:
+    rules = tuple(_compile_fingerprint(fp) for fp in fingerprints)
+    words = set(NEGATIVE_WORDS) | set(POSITIVE_WORDS)
+    for r in rules:
+        words |= r.keywords
+    return CompiledRuleSet(rules=rules, matcher=KeywordMatcher(words))
+
+
+def compile_rule_set(rules: Sequence[Dict[str, Any]]) -> CompiledRuleSet:
+    """Compile rules (in order) into one set; unchanged rule lists reuse the cached set."""
+    return _compile_set(tuple(rule_fingerprint(r) for r in rules))
@@ -4,16 +4,31 @@ from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 import os
 import re
-import time
 from datetime import datetime, timezone, timedelta
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
+from app.services.ai_judgment_cache import (
+    RULE_CONDITION,
+    RULE_RESULT,
+    JudgmentCache,
+    current_model,
+    get_judgment_cache,
+    judgment_key,
+    text_signature,
+)
 from app.services.claude_service import ClaudeService
 from app.utils.cache import async_ttl_cache
 from app.services.user_context import UserContextService
-from app.services.template_engine import TemplateEngine, ALLOWED_VARS, RenderResult
+from app.services.template_engine import TemplateEngine, RenderResult, is_compiled
+from app.services.rule_compiler import (
+    CompiledRule,
+    CompiledRuleSet,
+    KeywordMatcher,
+    compile_rule_set,
+    evaluate_logic,
+)
 
 
 @dataclass
@@ -29,8 +44,10 @@ class RuleEvaluator:
     - Built-in conditions: sentiment, subscriber_status, keywords, comment_length, video_age
     - AI condition via Claude (evaluate_ai_condition)
     - Custom boolean logic strings like "(1 AND 2) OR 3" to combine conditions
+    - Rules compiled once per version (app.services.rule_compiler); keyword
+      conditions across a rule set share a single scan of the comment text
     - Returns (matches: bool, confidence: float, matched_conditions: list[int])
-    - Caches AI evaluations to reduce API calls
+    - Caches AI evaluations in the shared judgment cache (app.services.ai_judgment_cache)
 
     Expected `rule` shape (minimal contract):
       rule.conditions: list[dict]  # each has {type, id/index, ...}
@@ -41,12 +58,14 @@ class RuleEvaluator:
 
     def __init__(self, *, ai_ttl_seconds: float | None = None) -> None:
         self._claude = ClaudeService()
-        # 10 minutes default TTL for AI eval caching
-        self._ai_ttl = float(ai_ttl_seconds if ai_ttl_seconds is not None else float(os.getenv("AI_EVAL_TTL_SECONDS", "600")))
-        # Local TTL caches for advanced control and metrics
-        self._cache_ai: Dict[str, Tuple[float, Tuple[bool, float]]] = {}
-        self._cache_rule: Dict[str, Tuple[float, "EvaluationResult"]] = {}
-        self._cache_template: Dict[str, Tuple[float, RenderResult]] = {}
+        # AI judgments and AI-dependent rule results live in the shared
+        # judgment cache (in-process LRU + Redis), so every worker reuses them
+        self._ai_cache = (
+            get_judgment_cache(RULE_CONDITION)
+            if ai_ttl_seconds is None
+            else JudgmentCache(RULE_CONDITION, ttl=ai_ttl_seconds)
+        )
+        self._rule_cache = get_judgment_cache(RULE_RESULT)
         # metrics
         self._metrics: Dict[str, int] = {
             "ai_eval_hits": 0,
@@ -60,119 +79,25 @@ class RuleEvaluator:
         self._user_ctx = UserContextService()
         self._templ = TemplateEngine()
 
-    # ---------- Built-in condition evaluators ----------
-    @staticmethod
-    def _eval_sentiment(comment: Dict[str, Any], cond: Dict[str, Any]) -> Tuple[bool, float]:
-        # naive heuristic using provided sentiment tag on comment or simple keywords
-        want = (cond.get("value") or "").lower()  # expected: positive|neutral|negative
-        cm_sent = (comment.get("sentiment") or "").lower()
-        if cm_sent:
-            match = cm_sent == want
-            return match, 0.9 if match else 0.2
-        text = (comment.get("text") or "").lower()
-        negative_words = ["hate", "terrible", "awful", "bad"]
-        positive_words = ["love", "great", "awesome", "good", "thanks", "thank you"]
-        if want == "negative" and any(w in text for w in negative_words):
-            return True, 0.6
-        if want == "positive" and any(w in text for w in positive_words):
-            return True, 0.6
-        if want == "neutral" and not any(w in text for w in negative_words + positive_words):
-            return True, 0.5
-        return False, 0.4
-
-    @staticmethod
-    def _eval_subscriber_status(comment: Dict[str, Any], cond: Dict[str, Any]) -> Tuple[bool, float]:
-        required = bool(cond.get("value"))  # True means must be subscriber
-        is_sub = bool(comment.get("author_subscribed"))
-        return (is_sub == required), 0.8 if is_sub == required else 0.2
-
-    @staticmethod
-    def _eval_keywords(comment: Dict[str, Any], cond: Dict[str, Any]) -> Tuple[bool, float]:
-        # cond: { any: [words], all: [words], none: [words] }
-        text = (comment.get("text") or "").lower()
-        any_words = [w.lower() for w in (cond.get("any") or [])]
-        all_words = [w.lower() for w in (cond.get("all") or [])]
-        none_words = [w.lower() for w in (cond.get("none") or [])]
-        ok = True
-        conf = 0.5
-        if any_words:
-            ok_any = any(w in text for w in any_words)
-            ok = ok and ok_any
-            conf += 0.2 if ok_any else -0.2
-        if all_words:
-            ok_all = all(w in text for w in all_words)
-            ok = ok and ok_all
-            conf += 0.2 if ok_all else -0.2
-        if none_words:
-            ok_none = not any(w in text for w in none_words)
-            ok = ok and ok_none
-            conf += 0.2 if ok_none else -0.2
-        return ok, max(0.0, min(1.0, conf))
-
-    @staticmethod
-    def _eval_comment_length(comment: Dict[str, Any], cond: Dict[str, Any]) -> Tuple[bool, float]:
-        # cond: { op: '>=|>|<=|<|==', value: int }
-        text = comment.get("text") or ""
-        length = len(text)
-        op = cond.get("op", ">=")
-        val = int(cond.get("value", 0))
-        ops = {
-            ">=": length >= val,
-            ">": length > val,
-            "<=": length <= val,
-            "<": length < val,
-            "==": length == val,
-        }
-        ok = bool(ops.get(op, False))
-        return ok, 0.7 if ok else 0.3
-
-    @staticmethod
-    def _eval_video_age(comment: Dict[str, Any], cond: Dict[str, Any]) -> Tuple[bool, float]:
-        # cond: { op, days: int } comparing comment.created_at vs video_published_at
-        from datetime import datetime, timezone
-        created = comment.get("created_at")
-        video_pub = comment.get("video_published_at")
-        if not created or not video_pub:
-            return False, 0.4
-        if isinstance(created, str):
-            created = datetime.fromisoformat(created.replace("Z", "+00:00"))
-        if isinstance(video_pub, str):
-            video_pub = datetime.fromisoformat(video_pub.replace("Z", "+00:00"))
-        age_days = (created - video_pub).days
-        op = cond.get("op", ">=")
-        val = int(cond.get("days", 0))
-        ops = {
-            ">=": age_days >= val,
-            ">": age_days > val,
-            "<=": age_days <= val,
-            "<": age_days < val,
-            "==": age_days == val,
-        }
-        ok = bool(ops.get(op, False))
-        return ok, 0.7 if ok else 0.3
-
     # ---------- AI condition (cached) ----------
     async def evaluate_ai_condition(self, db: AsyncSession, comment: Dict[str, Any], prompt: str, *, channel_id: str, channel_name: str = "", video_title: str = "") -> Tuple[bool, float]:
         """
         Uses Claude to judge if the comment satisfies a complex condition.
-        Returns (match: bool, confidence: float [0..1]). Cached by args.
+        Returns (match: bool, confidence: float [0..1]). Cached across processes
+        by channel, prompt, model and a similarity signature of the comment.
         """
-        # Build a similarity fingerprint for the comment to cache "similar" comments
-        key = self._ai_cache_key(comment.get("text") or "", prompt or "", channel_id or "")
-        # Check local cache first for metrics and control
-        now = time.time()
-        hit = False
-        item = self._cache_ai.get(key)
-        if item and item[0] > now:
-            self._metrics["ai_eval_hits"] += 1
-            hit = True
-            return item[1]
-        self._metrics["ai_eval_misses"] += 1
-        # Compose a constrained prompt with yes/no and confidence.
-        guidance = (
-            "You are a classifier. Answer in strict JSON with keys: match (true/false) and confidence (0..1). "
-            "Use the provided criteria to judge the comment."
+        key = judgment_key(
+            RULE_CONDITION, current_model(), channel_id or "", (prompt or "").strip(),
+            text_signature(comment.get("text") or ""),
+        )
+        res, hit = await self._ai_cache.get_or_judge(
+            key,
+            lambda: self._judge_ai_condition(db, comment, prompt, channel_id=channel_id, channel_name=channel_name, video_title=video_title),
         )
+        self._metrics["ai_eval_hits" if hit else "ai_eval_misses"] += 1
+        return tuple(res)  # type: ignore[return-value]
+
+    async def _judge_ai_condition(self, db: AsyncSession, comment: Dict[str, Any], prompt: str, *, channel_id: str, channel_name: str, video_title: str) -> Tuple[bool, float]:
         full_prompt = (
             f"Criteria: {prompt}\n\n"
             f"Comment: {comment.get('text','')}\n"
@@ -207,149 +132,109 @@ class RuleEvaluator:
                 low = text.lower()
                 match = "yes" in low or "true" in low
                 conf = 0.6 if match else 0.4
-        res = (match, max(0.0, min(1.0, conf)))
-        # store in local cache
-        self._cache_ai[key] = (now + self._ai_ttl, res)
-        return res
+        return (match, max(0.0, min(1.0, conf)))
 
-    # Helper to normalize and fingerprint comment text for similarity
+    # ---------- Rule evaluation ----------
     @staticmethod
-    def _normalize_text(text_in: str) -> str:
-        t = text_in.lower()
-        # strip urls, mentions, digits
-        t = re.sub(r"https?://\S+|www\.\S+", " ", t)
-        t = re.sub(r"[@#]\w+", " ", t)
-        t = re.sub(r"\d+", " ", t)
-        # collapse punctuation and whitespace
-        t = re.sub(r"[^a-z\s]", " ", t)
-        t = re.sub(r"\s+", " ", t).strip()
-        return t
-
-    @classmethod
-    def _ai_cache_key(cls, comment_text: str, prompt: str, channel_id: str) -> str:
-        norm = cls._normalize_text(comment_text)
-        tokens = norm.split()
-        # keep up to first 12 informative tokens for similarity banding
-        sig = " ".join(tokens[:12])
-        return f"ai:{channel_id}:{hash((sig, prompt.strip()[:120]))}"
+    def compile_rules(rules: List[Dict[str, Any]]) -> CompiledRuleSet:
+        """Compile rules into a reusable set (cached per rule version, see rule_compiler)."""
+        return compile_rule_set(rules)
 
-    # ---------- Rule evaluation ----------
     async def evaluate_rule(self, db: AsyncSession, rule: Dict[str, Any], comment: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> EvaluationResult:
         """
         Evaluate all conditions and combine via AND/OR/custom logic.
         rule: expects keys 'conditions' (list of dicts) and optional 'logic' (string like "(1 AND 2) OR 3").
         condition dict: { id/index (implicit order), type, ...type-specific keys... }
         """
-        # Cached wrapper on top of core evaluation
-        key = self._rule_eval_key(rule, comment, context)
-        now = time.time()
-        item = self._cache_rule.get(key)
-        if item and item[0] > now:
-            self._metrics["rule_eval_hits"] += 1
-            return item[1]
-        self._metrics["rule_eval_misses"] += 1
-        result = await self._evaluate_rule_core(db, rule, comment, context)
-        ttl = float(os.getenv("RULE_EVAL_TTL_SECONDS", "300"))
-        self._cache_rule[key] = (now + ttl, result)
+        return await self.evaluate_compiled(db, compile_rule_set([rule]), 0, comment, context)
+
+    async def evaluate_rules(self, db: AsyncSession, rules: List[Dict[str, Any]] | CompiledRuleSet, comment: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> List[EvaluationResult]:
+        """Evaluate every rule against one comment, scanning its text once for all of them."""
+        rule_set = rules if isinstance(rules, CompiledRuleSet) else compile_rule_set(rules)
+        sig = self.comment_signature(comment, context)
+        return [
+            await self.evaluate_compiled(db, rule_set, i, comment, context, comment_sig=sig)
+            for i in range(len(rule_set.rules))
+        ]
+
+    async def evaluate_compiled(
+        self,
+        db: AsyncSession,
+        rule_set: CompiledRuleSet,
+        index: int,
+        comment: Dict[str, Any],
+        context: Optional[Dict[str, Any]] = None,
+        *,
+        comment_sig: Optional[str] = None,
+    ) -> EvaluationResult:
+        """Cached evaluation of rule_set.rules[index]; pass comment_sig when evaluating many rules."""
+        compiled = rule_set.rules[index]
+        if not compiled.has_ai:
+            # Built-in conditions are cheaper to evaluate than a cache round trip
+            return await self._evaluate_rule_core(db, compiled, rule_set.matcher, comment, context)
+        sig = comment_sig or self.comment_signature(comment, context)
+        key = judgment_key(RULE_RESULT, current_model(), compiled.fingerprint, sig)
+        result, hit = await self._rule_cache.get_or_judge(
+            key, lambda: self._evaluate_rule_core(db, compiled, rule_set.matcher, comment, context)
+        )
+        self._metrics["rule_eval_hits" if hit else "rule_eval_misses"] += 1
         return result
 
-    @classmethod
-    def _rule_eval_key(cls, rule: Dict[str, Any], comment: Dict[str, Any], context: Optional[Dict[str, Any]]) -> str:
-        # rule fingerprint: id or name+logic+condition count
-        rid = str(rule.get("id") or rule.get("rule_id") or "")
-        logic = str(rule.get("logic") or "")
-        csum = hash(str(rule.get("conditions") or []))
+    @staticmethod
+    def comment_signature(comment: Dict[str, Any], context: Optional[Dict[str, Any]]) -> str:
         # comment fingerprint: normalized text + basic flags
-        text_norm = cls._normalize_text(str(comment.get("text") or ""))
-        sig = " ".join(text_norm.split()[:12])
+        sig = text_signature(str(comment.get("text") or ""))
         sent = str(comment.get("sentiment") or "")
         sub = "1" if comment.get("author_subscribed") else "0"
         ch = str((context or {}).get("channel_id") or "")
-        return f"re:{rid}:{hash((logic, csum))}:{ch}:{hash((sig, sent, sub))}"
-
-    async def _evaluate_rule_core(self, db: AsyncSession, rule: Dict[str, Any], comment: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> EvaluationResult:
-        """The original evaluate_rule logic (uncached)."""
-        conditions: List[Dict[str, Any]] = rule.get("conditions") or []
-        logic_str: str = rule.get("logic") or ""
-
-        # Evaluate conditions sequentially and gather results
-        bools: List[bool] = []
-        confidences: List[float] = []
-        for idx, cond in enumerate(conditions, start=1):
-            ctype = (cond.get("type") or "").lower()
-            ok, conf = False, 0.5
-            if ctype == "sentiment":
-                ok, conf = self._eval_sentiment(comment, cond)
-            elif ctype == "subscriber_status":
-                ok, conf = self._eval_subscriber_status(comment, cond)
-            elif ctype == "keywords":
-                ok, conf = self._eval_keywords(comment, cond)
-            elif ctype == "comment_length":
-                ok, conf = self._eval_comment_length(comment, cond)
-            elif ctype == "video_age":
-                ok, conf = self._eval_video_age(comment, cond)
-            elif ctype == "ai":
-                prompt = cond.get("prompt") or ""
-                ch_id = (context or {}).get("channel_id") or ""
-                ch_name = (context or {}).get("channel_name") or ""
-                v_title = (context or {}).get("video_title") or ""
-                ok, conf = await self.evaluate_ai_condition(db, comment, prompt, channel_id=ch_id, channel_name=ch_name, video_title=v_title)
-            else:
-                # unknown condition type -> treat as non-match with low confidence
-                ok, conf = False, 0.3
-            bools.append(ok)
-            confidences.append(conf)
+        return judgment_key(ch, sig, sent, sub)
 
-        # Combine via logic
-        matched_ids: List[int] = [i + 1 for i, b in enumerate(bools) if b]
-        if not conditions:
+    async def _evaluate_rule_core(self, db: AsyncSession, compiled: CompiledRule, matcher: KeywordMatcher, comment: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> EvaluationResult:
+        """Evaluate one compiled rule (uncached).
+
+        Built-in conditions are checked first; AI conditions are then called in
+        order only while the logic is still undecided without them.
+        """
+        if not compiled.conditions:
             return EvaluationResult(matches=False, confidence=0.5, matched_conditions=[])
 
-        result_bool = self._combine_logic(logic_str, bools)
-        # Confidence: weighted average of matched confidences, else min of all
+        found = matcher.find((comment.get("text") or "").lower())
+        values: List[Optional[bool]] = []
+        confidences: List[Optional[float]] = []
+        for cond in compiled.conditions:
+            ok, conf = cond.check(comment, found) if cond.check else (None, None)
+            values.append(ok)
+            confidences.append(conf)
+
+        outcome = evaluate_logic(compiled.logic, values)
+        ctx = context or {}
+        for idx, cond in enumerate(compiled.conditions):
+            if outcome is not None:
+                break
+            if not cond.is_ai:
+                continue
+            values[idx], confidences[idx] = await self.evaluate_ai_condition(
+                db,
+                comment,
+                cond.prompt,
+                channel_id=ctx.get("channel_id") or "",
+                channel_name=ctx.get("channel_name") or "",
+                video_title=ctx.get("video_title") or "",
+            )
+            outcome = evaluate_logic(compiled.logic, values)
+
+        matched_ids: List[int] = [i + 1 for i, b in enumerate(values) if b]
+        # Confidence: weighted average of matched confidences, else min of those evaluated
+        evaluated = [c for c in confidences if c is not None]
         conf_final = (
-            sum(confidences[i - 1] for i in matched_ids) / max(1, len(matched_ids))
+            sum(confidences[i - 1] for i in matched_ids) / len(matched_ids)
             if matched_ids
-            else (min(confidences) if confidences else 0.5)
+            else (min(evaluated) if evaluated else 0.5)
         )
-        return EvaluationResult(matches=result_bool, confidence=round(conf_final, 3), matched_conditions=matched_ids)
-
-    @staticmethod
-    def _combine_logic(logic: str, bools: List[bool]) -> bool:
-        """
-        Supports logic strings like:
-        - "" or None: default to AND of all
-        - "AND"/"OR" words between numeric condition references
-        - Parentheses for grouping
-        Example: "(1 AND 2) OR 3". Indexes are 1-based.
-        """
-        if not logic:
-            return all(bools)
-        # Replace numbers with booleans
-        expr = logic
-        # Safety: allow only digits, spaces, parentheses, AND/OR/NOT
-        if not re.fullmatch(r"[\d\s()ANDORNOTandornot]+", expr):
-            # Fallback to AND
-            return all(bools)
-        # normalize spacing and case
-        expr = expr.replace("and", "AND").replace("or", "OR").replace("not", "NOT")
-        # Replace indexes with True/False
-        def repl_num(m: re.Match[str]) -> str:
-            i = int(m.group(0))
-            return "True" if 1 <= i <= len(bools) and bools[i - 1] else "False"
-        expr = re.sub(r"\d+", repl_num, expr)
-        # Replace logical operators with python equivalents
-        expr = re.sub(r"\bAND\b", " and ", expr)
-        expr = re.sub(r"\bOR\b", " or ", expr)
-        expr = re.sub(r"\bNOT\b", " not ", expr)
-        # Evaluate safely with limited builtins
-        try:
-            return bool(eval(expr, {"__builtins__": {}}, {}))
-        except Exception:
-            return all(bools)
+        return EvaluationResult(matches=bool(outcome), confidence=round(conf_final, 3), matched_conditions=matched_ids)
 
     # ---------- Segments (cached) ----------
-    @async_ttl_cache(ttl_seconds=float(os.getenv("USER_SEGMENT_TTL_SECONDS", "3600")), key_builder=lambda self, db, user_channel_id: ("seg", user_channel_id))
+    @async_ttl_cache(ttl_seconds=float(os.getenv("USER_SEGMENT_TTL_SECONDS", "3600")), key_builder=lambda self, db, user_channel_id: ("seg", user_channel_id), maxsize=10000, negative_ttl=60.0, shared=True)
     async def get_user_segment_cached(self, db: AsyncSession, user_channel_id: str) -> Optional[str]:
         """Cache user segment lookups for 1 hour."""
         try:
@@ -358,47 +243,19 @@ class RuleEvaluator:
         except Exception:
             return None
 
-    # ---------- Template rendering cache ----------
+    # ---------- Template rendering ----------
     def render_template_cached(self, template: str, context: Dict[str, Any]) -> RenderResult:
-        ttl = float(os.getenv("TEMPLATE_RENDER_TTL_SECONDS", "3600"))
-        key = self._template_key(template, context)
-        now = time.time()
-        item = self._cache_template.get(key)
-        if item and item[0] > now:
-            self._metrics["template_hits"] += 1
-            return item[1]
-        self._metrics["template_misses"] += 1
-        res = self._templ.parse_template(template, context)
-        self._cache_template[key] = (now + ttl, res)
-        return res
+        """Render through the shared compiled-template cache; hits count reused compilations."""
+        self._metrics["template_hits" if is_compiled(template) else "template_misses"] += 1
+        return self._templ.parse_template(template, context)
 
-    @staticmethod
-    def _template_key(template: str, context: Dict[str, Any]) -> str:
-        # Only include allowed variables to form cache key, keep it stable
-        key_vars: Dict[str, Any] = {}
-        for v in ALLOWED_VARS:
-            if v in context:
-                key_vars[v] = context[v]
-        # Limit size
-        js = str(sorted(key_vars.items()))[:512]
-        return f"tpl:{hash((template, js))}"
-
-    # ---------- Precompute & warming ----------
-    async def precompute_rule_matches(self, db: AsyncSession, rules: List[Dict[str, Any]], comments: List[Dict[str, Any]], *, channel_id: Optional[str] = None) -> int:
-        """Evaluate a grid of (rule, comment) to populate caches. Returns count warmed."""
-        count = 0
-        for r in rules:
-            ctx = {"channel_id": channel_id or ""}
-            for c in comments:
-                try:
-                    _ = await self.evaluate_rule(db, r, c, ctx)
-                    count += 1
-                except Exception:
-                    continue
-        return count
+    # ---------- Warming ----------
+    async def warm_judgment_cache(self, db: AsyncSession, *, hours: int = 24, top_n: int = 5, comments_limit: int = 100) -> Dict[str, Any]:
+        """Evaluate popular rules against recent comments to fill the shared judgment cache.
 
-    async def warm_cache_for_popular_rules(self, db: AsyncSession, *, hours: int = 24, top_n: int = 5, comments_limit: int = 100) -> Dict[str, Any]:
-        """Warm caches by selecting popular rules and recent comments."""
+        Results land in Redis, so one warm-up serves every worker; judgments
+        another process already made are not asked again.
+        """
         # Pick top rules by activity in rule_response_metrics
         try:
             rows = (await db.execute(
@@ -416,36 +273,54 @@ class RuleEvaluator:
             )).all()
             rule_ids = [str(r[0]) for r in rows if r and r[0]]
         except Exception:
+            await db.rollback()
             rule_ids = []
-        # Load rules
-        rules: List[Dict[str, Any]] = []
+        # Load rules (only the list-of-conditions shape this evaluator understands)
         if rule_ids:
-            res = await db.execute(text("SELECT id, name, conditions, action, priority FROM automation_rules WHERE id = ANY(:rids)"), {"rids": rule_ids})
-            for row in res:
-                rid, name, conditions, action, prio = row
-                rules.append({"id": str(rid), "name": name, "conditions": conditions or [], "action": action or {}, "priority": prio})
+            res = await db.execute(text("SELECT id, name, conditions, action, priority, channel_id FROM automation_rules WHERE id = ANY(:rids)"), {"rids": rule_ids})
         else:
-            res = await db.execute(text("SELECT id, name, conditions, action, priority FROM automation_rules ORDER BY priority DESC, updated_at DESC NULLS LAST LIMIT 5"))
-            for row in res:
-                rid, name, conditions, action, prio = row
-                rules.append({"id": str(rid), "name": name, "conditions": conditions or [], "action": action or {}, "priority": prio})
-        # Fetch recent comments to test against
-        comments: List[Dict[str, Any]] = []
-        try:
-            rows = (await db.execute(text("SELECT id, author_channel_id, text_display, like_count, published_at FROM youtube_comments ORDER BY published_at DESC NULLS LAST LIMIT :lim"), {"lim": int(max(1, comments_limit))})).mappings().all()
+            res = await db.execute(text("SELECT id, name, conditions, action, priority, channel_id FROM automation_rules ORDER BY priority DESC, updated_at DESC NULLS LAST LIMIT :lim"), {"lim": int(max(1, top_n))})
+        by_channel: Dict[str, List[Dict[str, Any]]] = {}
+        for rid, name, conditions, action, prio, channel_id in res:
+            if isinstance(conditions, list) and conditions:
+                by_channel.setdefault(str(channel_id or ""), []).append(
+                    {"id": str(rid), "name": name, "conditions": conditions, "action": action or {}, "priority": prio}
+                )
+        # Recent comments per rule channel, or overall for unscoped rules
+        evaluations = 0
+        comments_seen = 0
+        for channel_id, rules in by_channel.items():
+            params: Dict[str, Any] = {"lim": int(max(1, comments_limit))}
+            where = ""
+            if channel_id:
+                where = "WHERE v.channel_id::text = :cid"
+                params["cid"] = channel_id
+            rows = (await db.execute(text(
+                f"""
+                SELECT c.id, c.content, c.published_at, v.published_at AS video_published_at
+                FROM youtube_comments c
+                JOIN youtube_videos v ON v.id = c.video_id
+                {where}
+                ORDER BY c.published_at DESC NULLS LAST
+                LIMIT :lim
+                """
+            ), params)).mappings().all()
+            rule_set = self.compile_rules(rules)
+            ctx = {"channel_id": channel_id}
             for r in rows:
-                comments.append({
-                    "id": r.get("id"),
-                    "text": r.get("text_display") or "",
+                comment = {
+                    "id": str(r["id"]),
+                    "text": r["content"] or "",
                     "author_subscribed": None,
-                    "created_at": r.get("published_at"),
-                    "video_published_at": None,
-                })
-        except Exception:
-            # If table missing, no-op
-            pass
-        warmed = await self.precompute_rule_matches(db, rules, comments)
-        return {"rules": len(rules), "comments": len(comments), "evaluations": warmed}
+                    "created_at": r["published_at"],
+                    "video_published_at": r["video_published_at"],
+                }
+                try:
+                    evaluations += len(await self.evaluate_rules(db, rule_set, comment, ctx))
+                except Exception:
+                    continue
+            comments_seen += len(rows)
+        return {"rules": sum(len(r) for r in by_channel.values()), "comments": comments_seen, "evaluations": evaluations}
 
     # ---------- Cache metrics ----------
     def get_cache_stats(self) -> Dict[str, Any]:
@@ -3,10 +3,10 @@
 - quick_safety_check(text): fast local heuristics for unsafe content
 - ai_safety_check(response_text, original_comment): Claude-based validation
 - schedule_safety_check(db, queue_id, response_text, original_comment):
-    buffered, batched safety validation using Claude with env-driven thresholds
+    batched safety validation using Claude through a durable MicroBatcher
 
 Both checks return a tuple: (is_safe: bool, reason: str)
-The scheduler enqueues and flushes to a batch based on SAFETY_CHECK_BATCH_MIN or a 2-minute timeout.
+Batches flush at SAFETY_CHECK_BATCH_MAX items or after SAFETY_CHECK_MAX_WAIT_SECONDS.
 In TESTING_MODE, single items are processed immediately.
 """
 from __future__ import annotations
@@ -14,15 +14,18 @@ from __future__ import annotations
 import re
 from typing import Tuple, Optional, Dict, Any, List
 import os
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
+from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from loguru import logger
 
+from app.core.database import async_session_maker
 from app.services.claude_service import ClaudeService
 from app.utils import debug_log
+from app.utils.micro_batch import BatchItem, MicroBatcher
 
 # Basic profanity list (non-exhaustive, adjustable)
 _PROFANITY = {
@@ -166,195 +169,158 @@ def ai_safety_check(response_text: str, original_comment: str) -> Tuple[bool, st
 
 # --------- Batched safety processing (env-driven) ---------
 
-_SAFETY_BUFFER: List[Dict[str, Any]] = []
-_FIRST_ENQUEUED_AT: Optional[datetime] = None
-
-
-def _get_min_batch() -> int:
-    try:
-        return max(1, int(os.getenv("SAFETY_CHECK_BATCH_MIN", "2")))
-    except Exception:
-        return 2
+SAFETY_SYSTEM_PROMPT = (
+    "You are a strict safety validator for YouTube replies. For each item, decide if the AI response is appropriate, "
+    "on-topic with the original comment, and safe. Consider harassment, hate, sexual content, self-harm, PII, scams, "
+    "external links, and dangerous instructions. Return ONLY JSON: {\"items\": [{\"queue_id\": str, \"is_safe\": bool, \"reason\": str}]}"
+)
 
 
 def _is_testing() -> bool:
     return os.getenv("TESTING_MODE", "false").lower() == "true"
 
 
-async def schedule_safety_check(
-    db: AsyncSession,
-    *,
-    queue_id: str,
-    response_text: str,
-    original_comment: str,
-) -> None:
-    """Enqueue an item for batched safety check and flush if threshold met.
-
-    Flush conditions:
-    - testing mode: process even a single item immediately
-    - size: when buffer length >= SAFETY_CHECK_BATCH_MIN
-    - time: when first enqueued item has waited >= 120 seconds
-    """
-    global _FIRST_ENQUEUED_AT
+async def _validate_safety_batch(batch: List[BatchItem]) -> List[str]:
+    """Validate buffered replies in one Claude call; returns item ids to retry.
 
-    _SAFETY_BUFFER.append(
-        {
-            "queue_id": str(queue_id),
-            "response_text": response_text,
-            "original_comment": original_comment,
-        }
-    )
-    if os.getenv("TESTING_MODE", "false").lower() == "true":
-        debug_log.add("safety.enqueue", {"queue_id": str(queue_id), "size": len(_SAFETY_BUFFER)})
-    if _FIRST_ENQUEUED_AT is None:
-        _FIRST_ENQUEUED_AT = datetime.now(timezone.utc)
-
-    # Decide whether to flush now
-    min_batch = _get_min_batch()
-    testing = _is_testing()
-    now = datetime.now(timezone.utc)
-    age = (now - _FIRST_ENQUEUED_AT).total_seconds() if _FIRST_ENQUEUED_AT else 0
-
-    reason = None
-    if testing and len(_SAFETY_BUFFER) >= 1:
-        reason = "testing_single"
-    elif len(_SAFETY_BUFFER) >= min_batch:
-        reason = "size"
-    elif age >= 120:
-        reason = "timeout"
-
-    if reason:
-        if os.getenv("TESTING_MODE", "false").lower() == "true":
-            debug_log.add("safety.flush", {"size": len(_SAFETY_BUFFER), "reason": reason})
-        await _run_ai_safety_batch(db, trigger_reason=reason)
-
-
-async def _run_ai_safety_batch(db: AsyncSession, *, trigger_reason: str) -> None:
-    """Run AI safety validation for buffered items in one Claude call.
-
-    Updates ai_responses: passed_safety, safety_checked_at, safety_notes.
+    Updates ai_responses: passed_safety, safety_checked_at, safety_notes. Only
+    rows still unchecked are updated, so redelivered items are no-ops and a
+    user's rejection is never overwritten.
     """
-    global _FIRST_ENQUEUED_AT
-    if not _SAFETY_BUFFER:
-        return
-
     started = datetime.now(timezone.utc)
-    batch = list(_SAFETY_BUFFER)
-    _SAFETY_BUFFER.clear()
-    _FIRST_ENQUEUED_AT = None
+    by_queue: Dict[str, List[BatchItem]] = {}
+    for item in batch:
+        qid = str(item.data.get("queue_id") or "")
+        try:
+            UUID(qid)
+        except ValueError:
+            # ai_responses rows are keyed by comments_queue ids
+            logger.warning("Safety check dropped; {} is not a queue id", qid)
+            continue
+        # Redelivered duplicates share one verdict
+        by_queue.setdefault(qid, []).append(item)
+    if not by_queue:
+        return []
 
-    # Build prompt for Claude to validate all
-    system_prompt = (
-        "You are a strict safety validator for YouTube replies. For each item, decide if the AI response is appropriate, "
-        "on-topic with the original comment, and safe. Consider harassment, hate, sexual content, self-harm, PII, scams, "
-        "external links, and dangerous instructions. Return ONLY JSON: {\"items\": [{\"queue_id\": str, \"is_safe\": bool, \"reason\": str}]}"
-    )
     numbered: List[str] = []
-    for i, it in enumerate(batch, start=1):
-        qid = it.get("queue_id")
-        oc = (it.get("original_comment") or "").replace("\n", " ")
-        rt = (it.get("response_text") or "").replace("\n", " ")
+    for i, (qid, items) in enumerate(by_queue.items(), start=1):
+        oc = (items[0].data.get("original_comment") or "").replace("\n", " ")
+        rt = (items[0].data.get("response_text") or "").replace("\n", " ")
         numbered.append(f"{i}. queue_id={qid}\nOriginal: {oc}\nResponse: {rt}")
     user_prompt = (
         "Validate the following items and return JSON with an items array as specified.\n\n"
         + "\n\n".join(numbered)
     )
 
-    claude = ClaudeService()
-    if not getattr(claude, "client", None):
-        # Can't run AI validation; leave pending for next cycle
-        logger.warning("Safety batch skipped; AI client unavailable (size={}, reason={})", len(batch), trigger_reason)
-        return
-
-    try:
-        model = os.getenv("CLAUDE_MODEL") or "claude-sonnet-4-5-20250929"
-        max_tokens = int(os.getenv("CLAUDE_MAX_TOKENS", "300"))
-        resp = claude.client.messages.create(
-            model=model,
-            max_tokens=max_tokens,
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_prompt}],
-            temperature=0.0,
-        )
-        content = getattr(resp, "content", None)
-        if isinstance(content, list) and content:
-            first = content[0]
-            text_out = getattr(first, "text", None) or (first.get("text") if isinstance(first, dict) else None)
-        else:
-            text_out = getattr(resp, "output_text", None)
-    except Exception as e:
-        logger.exception("Claude safety batch error: {}", e)
-        return
-
-    data = _extract_json(text_out or "")
-    if not isinstance(data, dict):
-        logger.warning("Safety batch returned non-JSON (size={}, reason={})", len(batch), trigger_reason)
-        return
-    items = data.get("items")
-    if not isinstance(items, list):
-        logger.warning("Safety batch missing items array (size={}, reason={})", len(batch), trigger_reason)
-        return
-
-    # Build VALUES mapping for updates
-    updates: List[Dict[str, Any]] = []
-    for it in items:
+    retry_all = [item.id for items in by_queue.values() for item in items]
+    text_out = await ClaudeService().complete(
+        system=SAFETY_SYSTEM_PROMPT,
+        prompt=user_prompt,
+        max_tokens=int(os.getenv("CLAUDE_MAX_TOKENS", "300")),
+    )
+    if text_out is None:
+        logger.warning("Safety batch deferred; AI client unavailable (size={})", len(by_queue))
+        return retry_all
+
+    data = _extract_json(text_out)
+    items_out = data.get("items") if isinstance(data, dict) else None
+    if not isinstance(items_out, list):
+        logger.warning("Safety batch returned no items array (size={})", len(by_queue))
+        return retry_all
+
+    updates: Dict[str, Dict[str, Any]] = {}
+    for it in items_out:
         try:
             qid = str(it.get("queue_id"))
-            is_safe = bool(it.get("is_safe", False))
-            reason = str(it.get("reason", ""))
-            if qid:
-                updates.append({"qid": qid, "safe": is_safe, "notes": reason})
+            if qid in by_queue:
+                updates[qid] = {"safe": bool(it.get("is_safe", False)), "notes": str(it.get("reason", ""))}
         except Exception:
             continue
 
-    if not updates:
-        logger.warning("Safety batch produced no updates (size={}, reason={})", len(batch), trigger_reason)
-        return
-
-    # Construct dynamic SQL to update ai_responses joined by queue_id
-    # Explicitly CAST to avoid ambiguous parameter typing in Postgres
-    values_clause = ",".join([
-        f"(CAST(:qid{i} AS text), CAST(:safe{i} AS boolean), CAST(:notes{i} AS text))"
-        for i in range(len(updates))
-    ])
-    params: Dict[str, Any] = {}
-    for i, u in enumerate(updates):
-        params[f"qid{i}"] = u["qid"]
-        params[f"safe{i}"] = u["safe"]
-        params[f"notes{i}"] = u["notes"]
-
-    await db.execute(
-        text(
-            f"""
-            UPDATE ai_responses ar
-            SET passed_safety = v.safe,
-                safety_checked_at = now(),
-                safety_notes = v.notes
-            FROM (
-                VALUES {values_clause}
-            ) AS v(queue_id, safe, notes)
-            WHERE ar.queue_id::text = v.queue_id
-            """
-        ),
-        params,
-    )
-    await db.commit()
+    if updates:
+        # Explicitly CAST to avoid ambiguous parameter typing in Postgres
+        values_clause = ",".join([
+            f"(CAST(:qid{i} AS uuid), CAST(:safe{i} AS boolean), CAST(:notes{i} AS text))"
+            for i in range(len(updates))
+        ])
+        params: Dict[str, Any] = {}
+        for i, (qid, u) in enumerate(updates.items()):
+            params[f"qid{i}"] = qid
+            params[f"safe{i}"] = u["safe"]
+            params[f"notes{i}"] = u["notes"]
+        async with async_session_maker() as db:
+            await db.execute(
+                text(
+                    f"""
+                    UPDATE ai_responses ar
+                    SET passed_safety = v.safe,
+                        safety_checked_at = now(),
+                        safety_notes = v.notes
+                    FROM (
+                        VALUES {values_clause}
+                    ) AS v(queue_id, safe, notes)
+                    WHERE ar.queue_id = v.queue_id
+                      AND ar.safety_checked_at IS NULL
+                    """
+                ),
+                params,
+            )
+            await db.commit()
 
+    # Items the model skipped go around again
+    retry = [item.id for qid, items in by_queue.items() if qid not in updates for item in items]
     duration = (datetime.now(timezone.utc) - started).total_seconds()
     logger.info(
-        "Safety batch processed size={} in {}s (reason={})",
-        len(batch),
+        "Safety batch processed size={} updated={} retry={} in {}s",
+        len(by_queue),
+        len(updates),
+        len(retry),
         round(duration, 3),
-        trigger_reason,
     )
-    if os.getenv("TESTING_MODE", "false").lower() == "true":
+    if _is_testing():
         try:
             debug_log.add(
                 "safety.batch.done",
-                {"size": len(batch), "duration_s": round(duration, 3), "reason": trigger_reason, "updates": len(updates)},
+                {"size": len(by_queue), "duration_s": round(duration, 3), "updates": len(updates)},
             )
         except Exception:
             pass
+    return retry
+
+
+SAFETY_BATCHER = MicroBatcher(
+    "safety_check",
+    _validate_safety_batch,
+    max_batch=int(os.getenv("SAFETY_CHECK_BATCH_MAX", "10")),
+    max_wait=float(os.getenv("SAFETY_CHECK_MAX_WAIT_SECONDS", "10")),
+)
+
+
+async def schedule_safety_check(
+    db: AsyncSession,
+    *,
+    queue_id: str,
+    response_text: str,
+    original_comment: str,
+) -> None:
+    """Queue a reply for batched AI safety validation.
+
+    The batch is flushed by SAFETY_BATCHER's background consumer when it
+    holds SAFETY_CHECK_BATCH_MAX items or its oldest item has waited
+    SAFETY_CHECK_MAX_WAIT_SECONDS. In testing mode the item is validated
+    immediately. `db` is unused; the batch writes with its own session.
+    """
+    item = {
+        "queue_id": str(queue_id),
+        "response_text": response_text,
+        "original_comment": original_comment,
+    }
+    if _is_testing():
+        debug_log.add("safety.enqueue", {"queue_id": str(queue_id)})
+        debug_log.add("safety.flush", {"size": 1, "reason": "testing_single"})
+        await SAFETY_BATCHER.process_now([item])
+        return
+    await SAFETY_BATCHER.submit(item)
 
 
 # --------- Deletion criteria evaluation (AI + safeguards) ---------
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from loguru import logger
 
 from app.core.config import settings
@@ -11,17 +11,37 @@ except Exception:  # pragma: no cover
     SendGridAPIClient = None  # type: ignore
 
 
+# SendGrid accepts up to 30k contacts / 6MB per PUT; stay well under the size cap
+CONTACTS_BATCH_SIZE = 1000
+
+
+def contact_payload(email: str, custom_fields: Optional[Dict[str, Any]] = None, **fields: Any) -> Dict[str, Any]:
+    """One entry of a contacts PUT: email, optional top-level fields (first_name, ...)
+    and custom fields nested under "custom_fields" as SendGrid expects.
+
+    Both upsert_contact and upsert_contacts callers build contacts with this,
+    so a contact is sent the same way whichever path syncs it.
+    """
+    contact: Dict[str, Any] = {"email": email, **fields}
+    if custom_fields:
+        contact["custom_fields"] = custom_fields
+    return contact
+
+
 class SendGridMarketing:
     """Lightweight wrapper around SendGrid Marketing Contacts API.
 
     Docs: https://docs.sendgrid.com/api-reference/contacts/add-or-update-a-contact
     """
 
-    def __init__(self, api_key: Optional[str] = None) -> None:
+    def __init__(self, api_key: Optional[str] = None, host: Optional[str] = None) -> None:
         self.api_key = api_key or getattr(settings, "SENDGRID_API_KEY", None)
         if not self.api_key:
             logger.warning("SENDGRID_API_KEY missing; marketing sync will be a no-op")
-        self._client = SendGridAPIClient(self.api_key) if self.api_key and SendGridAPIClient else None
+        # SENDGRID_API_HOST points the client at a local stub (scripts/sendgrid_stub_server.py)
+        host = host or getattr(settings, "SENDGRID_API_HOST", None)
+        client_kwargs: Dict[str, Any] = {"host": host} if host else {}
+        self._client = SendGridAPIClient(self.api_key, **client_kwargs) if self.api_key and SendGridAPIClient else None
 
     def upsert_contact(self, email: str, custom_fields: Optional[Dict[str, Any]] = None, list_id: Optional[str] = None) -> bool:
         """
@@ -32,16 +52,7 @@ class SendGridMarketing:
             logger.warning("SendGrid client unavailable; skipping contact upsert for {}", email)
             return False
 
-        body: Dict[str, Any] = {
-            "contacts": [
-                {
-                    "email": email,
-                    # Add other top-level fields here if desired (first_name, last_name)
-                }
-            ]
-        }
-        if custom_fields:
-            body["contacts"][0].update(custom_fields)
+        body: Dict[str, Any] = {"contacts": [contact_payload(email, custom_fields)]}
         if list_id:
             body["list_ids"] = [list_id]
 
@@ -58,4 +69,38 @@ class SendGridMarketing:
             return False
 
 
+    def upsert_contacts(
+        self,
+        contacts: List[Dict[str, Any]],
+        list_id: Optional[str] = None,
+        batch_size: int = CONTACTS_BATCH_SIZE,
+    ) -> int:
+        """
+        Upsert many contacts using SendGrid's multi-contact PUT.
+        Each contact is a dict built by contact_payload().
+        list_id applies to every contact in the call.
+        Returns the number of contacts in batches SendGrid accepted.
+        """
+        if not self._client:
+            logger.warning("SendGrid client unavailable; skipping upsert of {} contacts", len(contacts))
+            return 0
+
+        accepted = 0
+        for start in range(0, len(contacts), batch_size):
+            batch = contacts[start:start + batch_size]
+            body: Dict[str, Any] = {"contacts": batch}
+            if list_id:
+                body["list_ids"] = [list_id]
+            try:
+                resp = self._client.client.marketing.contacts.put(request_body=body)
+                if 200 <= int(resp.status_code) < 300:
+                    accepted += len(batch)
+                    logger.info("SendGrid batch upserted: {} contacts (status={})", len(batch), resp.status_code)
+                else:
+                    logger.error("SendGrid batch upsert failed status={} body={}", resp.status_code, getattr(resp, "body", b"").decode("utf-8", "ignore") if getattr(resp, "body", None) else "<empty>")
+            except Exception as e:  # noqa: BLE001
+                logger.error("SendGrid batch upsert exception for {} contacts: {}", len(batch), e)
+        return accepted
+
+
 marketing_client = SendGridMarketing()
@@ -9,6 +9,7 @@ from loguru import logger
 
 from app.models.sent_response import SentResponse
 from app.models.interaction import Interaction
+from app.services import response_reuse
 
 
 class SentResponseService:
@@ -79,8 +80,26 @@ class SentResponseService:
         
         logger.info(f"Recorded {response_type} response for interaction {interaction_id}")
         
+        # The creator approved this reply; offer it for repeats of the comment
+        if response_type == 'semi_automated':
+            await self._remember_approved(interaction_id, response_text)
+        
         return sent_response
     
+    async def _remember_approved(self, interaction_id: UUID, response_text: str) -> None:
+        interaction = await self.session.get(Interaction, interaction_id)
+        if not interaction:
+            return
+        pending = interaction.pending_response or {}
+        await response_reuse.remember_approved(
+            self.session,
+            channel_key=response_reuse.interaction_channel_key(interaction),
+            comment_text=interaction.content,
+            response_text=response_text,
+            style=response_reuse.style_key(pending.get('tone') or 'friendly', pending.get('ai_instructions')),
+            variables=response_reuse.interaction_variables(interaction),
+        )
+    
     async def get_sent_responses(
         self,
         user_id: UUID,
@@ -0,0 +1,462 @@
+"""Quota-aware adaptive scheduling of YouTube connection syncs.
+
+Every connection gets a sync interval from its recent comment velocity and
+video recency (the same comments-per-minute signals EarlyWarningService uses),
+and due connections are handed out in priority order while a token bucket
+keeps estimated YouTube quota within a global budget and a per-connection
+fair share. Policies can be replayed against historical activity with
+`simulate()` to compare them offline.
+
+The buckets are per process. The scheduled syncs and the polling loop share
+them because both run in the API process, but every process that runs those
+jobs keeps its own budget. When more than one does, set
+YOUTUBE_DAILY_QUOTA_UNITS to the project quota divided by their number.
+"""
+from __future__ import annotations
+
+import math
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.utils.cache import async_ttl_cache
+
+# Fixed per-sync cost: playlistItems.list + videos.list for the uploads playlist
+BASE_SYNC_COST = 2
+COMMENTS_PER_PAGE = 100
+# Comment counts behind the velocity signals are recounted every few ticks
+COMMENT_ACTIVITY_TTL_SECONDS = 3 * settings.YOUTUBE_SYNC_TICK_MINUTES * 60
+
+
+class TokenBucket:
+    """Continuously refilling token bucket. Not thread-safe; one per process."""
+
+    def __init__(self, capacity: float, refill_per_second: float, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def try_consume(self, amount: float) -> bool:
+        self._refill()
+        if amount > self._tokens:
+            return False
+        self._tokens -= amount
+        return True
+
+    def adjust(self, delta: float) -> None:
+        """Return (positive) or charge (negative) tokens after the real cost is known."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + delta)
+
+
+class QuotaBudget:
+    """Two-level YouTube quota budget.
+
+    The global bucket models the Google Cloud project's daily quota; each
+    connection also draws from its own bucket sized to a share of that, so a
+    few large channels cannot drain the project budget for everyone else.
+    Both levels live in this process only (see the module docstring).
+    """
+
+    def __init__(
+        self,
+        daily_units: int,
+        connection_share: float,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        per_second = daily_units / 86400.0
+        share = min(1.0, max(0.0, connection_share))
+        self._clock = clock
+        self._connection_capacity = daily_units * share
+        self._connection_refill = per_second * share
+        self.project = TokenBucket(daily_units, per_second, clock=clock)
+        self._connections: Dict[UUID, TokenBucket] = {}
+
+    def _connection_bucket(self, connection_id: UUID) -> TokenBucket:
+        bucket = self._connections.get(connection_id)
+        if bucket is None:
+            bucket = TokenBucket(self._connection_capacity, self._connection_refill, clock=self._clock)
+            self._connections[connection_id] = bucket
+        return bucket
+
+    def try_reserve(self, connection_id: UUID, units: float) -> bool:
+        conn_bucket = self._connection_bucket(connection_id)
+        if conn_bucket.available < units or self.project.available < units:
+            return False
+        conn_bucket.try_consume(units)
+        self.project.try_consume(units)
+        return True
+
+    def settle(self, connection_id: UUID, reserved: float, actual: float) -> None:
+        delta = reserved - actual
+        if delta:
+            self._connection_bucket(connection_id).adjust(delta)
+            self.project.adjust(delta)
+
+
+@dataclass
+class ConnectionActivity:
+    connection_id: UUID
+    last_synced_at: Optional[datetime]
+    latest_video_at: Optional[datetime]
+    recent_videos: int  # videos published in the last 7 days (one commentThreads page each)
+    comments_last_hour: int
+    comments_last_week: int
+
+    @property
+    def recent_cpm(self) -> float:
+        return self.comments_last_hour / 60.0
+
+    @property
+    def baseline_cpm(self) -> float:
+        return self.comments_last_week / (7 * 1440.0)
+
+    @property
+    def velocity_ratio(self) -> float:
+        """Recent vs baseline comments per minute (EarlyWarning's multiplier)."""
+        if self.baseline_cpm <= 0:
+            return 1.0 if self.recent_cpm > 0 else 0.0
+        return self.recent_cpm / self.baseline_cpm
+
+
+def estimate_sync_cost(activity: ConnectionActivity, now: datetime) -> int:
+    """Estimated quota units for one incremental video + comment sync."""
+    since = activity.last_synced_at or (now - timedelta(hours=1))
+    minutes = max(1.0, (now - since).total_seconds() / 60.0)
+    expected_comments = activity.recent_cpm * minutes
+    return BASE_SYNC_COST + activity.recent_videos + math.ceil(expected_comments / COMMENTS_PER_PAGE)
+
+
+class SyncPolicy(Protocol):
+    def interval_for(self, activity: ConnectionActivity, now: datetime) -> timedelta: ...
+
+    def priority(self, activity: ConnectionActivity, now: datetime) -> float: ...
+
+
+def _overdue_ratio(policy: SyncPolicy, activity: ConnectionActivity, now: datetime) -> float:
+    if activity.last_synced_at is None:
+        return float("inf")
+    interval = policy.interval_for(activity, now).total_seconds()
+    return (now - activity.last_synced_at).total_seconds() / max(1.0, interval)
+
+
+@dataclass(frozen=True)
+class FixedIntervalPolicy:
+    """The previous behaviour: every connection every `interval`."""
+
+    interval: timedelta = timedelta(minutes=30)
+
+    def interval_for(self, activity: ConnectionActivity, now: datetime) -> timedelta:
+        return self.interval
+
+    def priority(self, activity: ConnectionActivity, now: datetime) -> float:
+        return _overdue_ratio(self, activity, now)
+
+
+@dataclass(frozen=True)
+class AdaptivePolicy:
+    """Poll hot channels often and idle ones rarely.
+
+    Fresh uploads and comment spikes (recent CPM >= spike_multiplier x the
+    weekly baseline) get min_interval; otherwise the base interval is scaled
+    down by the velocity ratio, and channels with no comments all week fall
+    back to max_interval.
+    """
+
+    min_interval: timedelta = timedelta(minutes=5)
+    base_interval: timedelta = timedelta(minutes=30)
+    max_interval: timedelta = timedelta(hours=6)
+    spike_multiplier: float = 3.0
+    fresh_video_window: timedelta = timedelta(hours=2)
+
+    def _is_fresh(self, activity: ConnectionActivity, now: datetime) -> bool:
+        return activity.latest_video_at is not None and now - activity.latest_video_at <= self.fresh_video_window
+
+    def interval_for(self, activity: ConnectionActivity, now: datetime) -> timedelta:
+        ratio = activity.velocity_ratio
+        if self._is_fresh(activity, now) or ratio >= self.spike_multiplier:
+            return self.min_interval
+        if activity.comments_last_week == 0:
+            return self.max_interval
+        scaled = self.base_interval / max(ratio, 0.25)
+        return min(self.max_interval, max(self.min_interval, scaled))
+
+    def priority(self, activity: ConnectionActivity, now: datetime) -> float:
+        boost = 2.0 if self._is_fresh(activity, now) else 1.0
+        return _overdue_ratio(self, activity, now) * (1.0 + activity.velocity_ratio) * boost
+
+
+@dataclass
+class SyncAssignment:
+    connection_id: UUID
+    last_synced_at: Optional[datetime]
+    priority: float
+    reserved_units: int
+
+
+class AdaptiveSyncScheduler:
+    """Hands out due connection syncs in priority order within the quota budget."""
+
+    def __init__(
+        self,
+        policy: Optional[SyncPolicy] = None,
+        *,
+        daily_units: Optional[int] = None,
+        connection_share: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.policy: SyncPolicy = policy or AdaptivePolicy()
+        self.budget = QuotaBudget(
+            daily_units if daily_units is not None else settings.YOUTUBE_DAILY_QUOTA_UNITS,
+            connection_share if connection_share is not None else settings.YOUTUBE_CONNECTION_QUOTA_SHARE,
+            clock=clock,
+        )
+        self.deferred = 0
+
+    def plan(self, activities: Sequence[ConnectionActivity], now: datetime) -> List[SyncAssignment]:
+        due = [
+            a for a in activities
+            if a.last_synced_at is None or now - a.last_synced_at >= self.policy.interval_for(a, now)
+        ]
+        due.sort(key=lambda a: self.policy.priority(a, now), reverse=True)
+
+        assignments: List[SyncAssignment] = []
+        for a in due:
+            cost = estimate_sync_cost(a, now)
+            if not self.budget.try_reserve(a.connection_id, cost):
+                # Lower-priority work waits for the buckets to refill
+                self.deferred += 1
+                continue
+            assignments.append(
+                SyncAssignment(
+                    connection_id=a.connection_id,
+                    last_synced_at=a.last_synced_at,
+                    priority=self.policy.priority(a, now),
+                    reserved_units=cost,
+                )
+            )
+        return assignments
+
+    def settle(self, assignment: SyncAssignment, actual_units: int) -> None:
+        self.budget.settle(assignment.connection_id, assignment.reserved_units, actual_units)
+
+
+@async_ttl_cache(COMMENT_ACTIVITY_TTL_SECONDS, key_builder=lambda session: "comment_activity", maxsize=1)
+async def _comment_activity(session: AsyncSession) -> Dict[UUID, Tuple[int, int]]:
+    """(comments in the last hour, comments in the last 7 days) per connection.
+
+    The only part of the activity that scans comments, so it is cached for a
+    few scheduler ticks instead of being recounted on every tick.
+    """
+    res = await session.execute(
+        text(
+            """
+            SELECT v.channel_id,
+                   COUNT(*) FILTER (WHERE yc.published_at >= now() - interval '60 minutes'),
+                   COUNT(*)
+            FROM youtube_comments yc
+            JOIN youtube_videos v ON v.id = yc.video_id
+            WHERE yc.published_at >= now() - interval '7 days'
+            GROUP BY v.channel_id
+            """
+        )
+    )
+    return {row[0]: (int(row[1] or 0), int(row[2] or 0)) for row in res.all()}
+
+
+async def load_connection_activity(session: AsyncSession) -> List[ConnectionActivity]:
+    """Comment velocity and video recency for every active connection.
+
+    last_synced_at and video recency are read fresh on every tick; comment
+    counts come from _comment_activity and may be up to
+    COMMENT_ACTIVITY_TTL_SECONDS old.
+    """
+    res = await session.execute(
+        text(
+            """
+            SELECT c.id,
+                   c.last_synced_at,
+                   MAX(v.published_at) AS latest_video_at,
+                   COUNT(v.id) FILTER (WHERE v.published_at >= now() - interval '7 days') AS recent_videos
+            FROM youtube_connections c
+            LEFT JOIN youtube_videos v ON v.channel_id = c.id
+            WHERE c.connection_status = 'active'
+            GROUP BY c.id, c.last_synced_at
+            """
+        )
+    )
+    rows = res.all()
+    comments = await _comment_activity(session)
+    return [
+        ConnectionActivity(
+            connection_id=row[0],
+            last_synced_at=row[1],
+            latest_video_at=row[2],
+            recent_videos=int(row[3] or 0),
+            comments_last_hour=comments.get(row[0], (0, 0))[0],
+            comments_last_week=comments.get(row[0], (0, 0))[1],
+        )
+        for row in rows
+    ]
+
+
+# ---- Offline simulation ----
+@dataclass
+class ChannelHistory:
+    video_times: List[datetime] = field(default_factory=list)
+    comment_times: List[datetime] = field(default_factory=list)
+
+
+@dataclass
+class SimulationResult:
+    policy: str
+    syncs: int
+    deferred: int
+    quota_units: int
+    comments: int
+    mean_latency_minutes: float
+    p95_latency_minutes: float
+
+
+async def load_history(session: AsyncSession, since: datetime) -> Dict[UUID, ChannelHistory]:
+    """Video publish and comment timestamps per connection since `since`."""
+    history: Dict[UUID, ChannelHistory] = {}
+    vids = await session.execute(
+        text(
+            """
+            SELECT channel_id, published_at FROM youtube_videos
+            WHERE published_at >= :since - interval '7 days'
+            ORDER BY published_at
+            """
+        ),
+        {"since": since},
+    )
+    for cid, ts in vids.all():
+        history.setdefault(cid, ChannelHistory()).video_times.append(ts)
+    comments = await session.execute(
+        text(
+            """
+            SELECT v.channel_id, yc.published_at
+            FROM youtube_comments yc
+            JOIN youtube_videos v ON v.id = yc.video_id
+            WHERE yc.published_at >= :since - interval '7 days'
+            ORDER BY yc.published_at
+            """
+        ),
+        {"since": since},
+    )
+    for cid, ts in comments.all():
+        history.setdefault(cid, ChannelHistory()).comment_times.append(ts)
+    return history
+
+
+def _count_between(times: List[datetime], start: datetime, end: datetime) -> int:
+    return bisect_right(times, end) - bisect_left(times, start)
+
+
+def simulate(
+    policy: SyncPolicy,
+    history: Dict[UUID, ChannelHistory],
+    start: datetime,
+    end: datetime,
+    *,
+    tick: timedelta = timedelta(minutes=5),
+    daily_units: int = 10000,
+    connection_share: float = 0.25,
+) -> SimulationResult:
+    """Replay historical activity under `policy` and measure quota vs freshness.
+
+    Latency is how long each comment waited between being posted and the
+    next sync of its channel. The scheduler only sees activity up to each
+    channel's last sync, like the live job does.
+    """
+    sim_now = start
+    scheduler = AdaptiveSyncScheduler(
+        policy,
+        daily_units=daily_units,
+        connection_share=connection_share,
+        clock=lambda: sim_now.timestamp(),
+    )
+    last_sync: Dict[UUID, Optional[datetime]] = {cid: None for cid in history}
+    latencies: List[float] = []
+    syncs = 0
+    quota = 0
+
+    while sim_now <= end:
+        activities: List[ConnectionActivity] = []
+        for cid, h in history.items():
+            seen_until = last_sync[cid] or start
+            published = bisect_right(h.video_times, sim_now)
+            activities.append(
+                ConnectionActivity(
+                    connection_id=cid,
+                    last_synced_at=last_sync[cid],
+                    latest_video_at=h.video_times[published - 1] if published else None,
+                    recent_videos=_count_between(h.video_times, sim_now - timedelta(days=7), sim_now),
+                    comments_last_hour=_count_between(h.comment_times, seen_until - timedelta(hours=1), seen_until),
+                    comments_last_week=_count_between(h.comment_times, seen_until - timedelta(days=7), seen_until),
+                )
+            )
+
+        for assignment in scheduler.plan(activities, sim_now):
+            cid = assignment.connection_id
+            h = history[cid]
+            prev = last_sync[cid] or start
+            lo = bisect_right(h.comment_times, prev)
+            hi = bisect_right(h.comment_times, sim_now)
+            new_comments = h.comment_times[lo:hi]
+            latencies.extend((sim_now - ts).total_seconds() / 60.0 for ts in new_comments)
+            actual = (
+                BASE_SYNC_COST
+                + _count_between(h.video_times, sim_now - timedelta(days=7), sim_now)
+                + math.ceil(len(new_comments) / COMMENTS_PER_PAGE)
+            )
+            scheduler.settle(assignment, actual)
+            quota += actual
+            syncs += 1
+            last_sync[cid] = sim_now
+
+        sim_now += tick
+
+    latencies.sort()
+    return SimulationResult(
+        policy=type(policy).__name__,
+        syncs=syncs,
+        deferred=scheduler.deferred,
+        quota_units=quota,
+        comments=len(latencies),
+        mean_latency_minutes=(sum(latencies) / len(latencies)) if latencies else 0.0,
+        p95_latency_minutes=latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+    )
+
+
+_scheduler: Optional[AdaptiveSyncScheduler] = None
+
+
+def get_sync_scheduler() -> AdaptiveSyncScheduler:
+    """Process-wide scheduler; its buckets must be shared by every sync path."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = AdaptiveSyncScheduler()
+    return _scheduler
@@ -330,133 +330,176 @@ class SyncService:
         return total
 
     # ---- Comment Sync ----
-    async def sync_video_comments(self, youtube_video_id: str) -> int:
-        """Fetch all comments (top-level and replies) for a video and upsert them."""
+    @staticmethod
+    def _thread_row(th: Dict[str, Any], owner_channel_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        top = (th.get("snippet") or {}).get("topLevelComment") or {}
+        cid = top.get("id")
+        if not cid:
+            return None
+        sn = top.get("snippet", {})
+        author_channel = sn.get("authorChannelId", {}).get("value")
+        return {
+            "comment_id": cid,
+            "author_name": sn.get("authorDisplayName"),
+            "author_channel_id": author_channel,
+            "content": sn.get("textDisplay"),
+            "published_at": parse_youtube_timestamp(sn.get("publishedAt")),
+            "like_count": sn.get("likeCount"),
+            "reply_count": th.get("snippet", {}).get("totalReplyCount"),
+            "parent_comment_id": None,
+            "is_channel_owner_comment": bool(owner_channel_id and author_channel == owner_channel_id),
+        }
+
+    async def _save_comments(
+        self,
+        video: YouTubeVideo,
+        rows: List[Dict[str, Any]],
+        conn: Optional[YouTubeConnection],
+        *,
+        only_inserted: bool,
+    ) -> int:
+        """Insert comment rows and map the saved comments to Interaction + Fan."""
+        if not rows:
+            return 0
+        saved = await self.comment_repo.bulk_create_comments(
+            video_id=video.id, comments=rows, only_inserted=only_inserted
+        )
+        if saved and conn:
+            try:
+                mapper = get_youtube_interaction_mapper(self.session)
+                for comment in saved:
+                    try:
+                        await mapper.map_comment_to_interaction(
+                            comment=comment,
+                            user_id=conn.user_id,
+                            is_demo=False
+                        )
+                    except Exception as e:
+                        logger.error(f"Failed to map comment {comment.comment_id}: {e}")
+                await self.session.commit()
+            except Exception as e:
+                logger.error(f"Failed to initialize comment mapper: {e}")
+        return len(saved)
+
+    async def _sync_thread_replies(
+        self,
+        video: YouTubeVideo,
+        parent_id: str,
+        conn: Optional[YouTubeConnection],
+        *,
+        only_inserted: bool,
+    ) -> int:
+        count = 0
+        reply_token: Optional[str] = None
+        while True:
+            rresp = await self.api.list_comment_replies(
+                parent_comment_id=parent_id, page_token=reply_token, max_results=100
+            )
+            replies = rresp.get("items", [])
+            if not replies:
+                break
+            to_save_replies: List[Dict[str, Any]] = []
+            for r in replies:
+                rsn = r.get("snippet", {})
+                rid = r.get("id")
+                if not rid:
+                    continue
+                to_save_replies.append(
+                    {
+                        "comment_id": rid,
+                        "author_name": rsn.get("authorDisplayName"),
+                        "author_channel_id": rsn.get("authorChannelId", {}).get("value"),
+                        "content": rsn.get("textDisplay"),
+                        "published_at": parse_youtube_timestamp(rsn.get("publishedAt")),
+                        "like_count": rsn.get("likeCount"),
+                        "reply_count": 0,
+                        "parent_comment_id": parent_id,
+                        "is_channel_owner_comment": False,
+                    }
+                )
+            count += await self._save_comments(video, to_save_replies, conn, only_inserted=only_inserted)
+
+            reply_token = rresp.get("nextPageToken")
+            if not reply_token:
+                break
+        return count
+
+    async def sync_video_comments(self, youtube_video_id: str, *, incremental: bool = False) -> int:
+        """Fetch comments (top-level and replies) for a video and upsert them.
+
+        incremental=True pages threads newest-first and stops at the video's
+        watermark (newest top-level comment already stored), and only re-fetches
+        replies for threads whose totalReplyCount differs from the stored
+        reply_count. It returns the number of newly inserted comments. The
+        default walks the full history and is kept for first loads and repairs.
+        """
         video: Optional[YouTubeVideo] = await self.video_repo.get_video_by_youtube_id(youtube_video_id)
         if not video:
-            logger.warning("Video %s not found in DB; cannot sync comments.", youtube_video_id)
+            logger.warning("Video {vid} not found in DB; cannot sync comments.", vid=youtube_video_id)
             return 0
 
+        conn = await self._get_connection()
+        owner_channel_id = conn.channel_id if conn else None
+        watermark_at = video.comments_watermark_at if incremental else None
+        watermark_id = video.comments_watermark_id if incremental else None
+        newest: Optional[Dict[str, Any]] = None
+
         count = 0
         page_token: Optional[str] = None
         while True:
             resp = await self.api.list_video_comments(
-                video_id=youtube_video_id, page_token=page_token, max_results=100, fetch_replies=False
+                video_id=youtube_video_id, page_token=page_token, max_results=100,
+                order="time", fetch_replies=False,
             )
             threads = resp.get("items", [])
             if not threads:
                 break
 
+            rows = [r for r in (self._thread_row(th, owner_channel_id) for th in threads) if r]
+            reached_watermark = False
             to_save: List[Dict[str, Any]] = []
-            parent_ids: List[str] = []
-
-            for th in threads:
-                top = (th.get("snippet") or {}).get("topLevelComment") or {}
-                cid = top.get("id")
-                sn = top.get("snippet", {})
-                if not cid:
-                    continue
-                to_save.append(
-                    {
-                        "comment_id": cid,
-                        "author_name": sn.get("authorDisplayName"),
-                        "author_channel_id": sn.get("authorChannelId", {}).get("value"),
-                        "content": sn.get("textDisplay"),
-                        "published_at": parse_youtube_timestamp(sn.get("publishedAt")),
-                        "like_count": sn.get("likeCount"),
-                        "reply_count": th.get("snippet", {}).get("totalReplyCount"),
-                        "parent_comment_id": None,
-                        "is_channel_owner_comment": bool(sn.get("authorChannelId", {}).get("value") == (await self._get_connection()).channel_id),
-                    }
+            for row in rows:
+                if newest is None and row["published_at"]:
+                    newest = row
+                seen = watermark_at is not None and row["published_at"] is not None and (
+                    row["published_at"] < watermark_at
+                    or (row["published_at"] == watermark_at and row["comment_id"] == watermark_id)
                 )
-                if (th.get("snippet", {}).get("totalReplyCount") or 0) > 0:
-                    parent_ids.append(cid)
+                if seen:
+                    reached_watermark = True
+                else:
+                    to_save.append(row)
 
-            if to_save:
-                saved = await self.comment_repo.bulk_create_comments(video_id=video.id, comments=to_save)
-                count += len(saved)
+            # Only threads whose reply total moved need their replies re-fetched.
+            # Read stored totals before inserting so new threads count as changed.
+            reply_totals = {r["comment_id"]: int(r["reply_count"] or 0) for r in rows}
+            if incremental:
+                stored = await self.comment_repo.get_reply_counts(reply_totals.keys())
 
-                # Map comments to Interaction + Fan
-                if saved:
-                    try:
-                        mapper = get_youtube_interaction_mapper(self.session)
-                        conn = await self._get_connection()
-                        if conn:
-                            for comment in saved:
-                                try:
-                                    await mapper.map_comment_to_interaction(
-                                        comment=comment,
-                                        user_id=conn.user_id,
-                                        is_demo=False
-                                    )
-                                except Exception as e:
-                                    logger.error(f"Failed to map comment {comment.comment_id}: {e}")
-                            await self.session.commit()
-                    except Exception as e:
-                        logger.error(f"Failed to initialize comment mapper: {e}")
-
-            # Fetch replies per parent, paginating each
-            for parent_id in parent_ids:
-                reply_token: Optional[str] = None
-                while True:
-                    rresp = await self.api.list_comment_replies(
-                        parent_comment_id=parent_id, page_token=reply_token, max_results=100
-                    )
-                    replies = rresp.get("items", [])
-                    if not replies:
-                        break
-                    to_save_replies: List[Dict[str, Any]] = []
-                    for r in replies:
-                        rsn = r.get("snippet", {})
-                        rid = r.get("id")
-                        if not rid:
-                            continue
-                        to_save_replies.append(
-                            {
-                                "comment_id": rid,
-                                "author_name": rsn.get("authorDisplayName"),
-                                "author_channel_id": rsn.get("authorChannelId", {}).get("value"),
-                                "content": rsn.get("textDisplay"),
-                                "published_at": parse_youtube_timestamp(rsn.get("publishedAt")),
-                                "like_count": rsn.get("likeCount"),
-                                "reply_count": 0,
-                                "parent_comment_id": parent_id,
-                                "is_channel_owner_comment": False,
-                            }
-                        )
-                    if to_save_replies:
-                        saved = await self.comment_repo.bulk_create_comments(
-                            video_id=video.id, comments=to_save_replies
-                        )
-                        count += len(saved)
-
-                        # Map reply comments to Interaction + Fan
-                        if saved:
-                            try:
-                                mapper = get_youtube_interaction_mapper(self.session)
-                                conn = await self._get_connection()
-                                if conn:
-                                    for comment in saved:
-                                        try:
-                                            await mapper.map_comment_to_interaction(
-                                                comment=comment,
-                                                user_id=conn.user_id,
-                                                is_demo=False
-                                            )
-                                        except Exception as e:
-                                            logger.error(f"Failed to map reply comment {comment.comment_id}: {e}")
-                                    await self.session.commit()
-                            except Exception as e:
-                                logger.error(f"Failed to initialize reply comment mapper: {e}")
-
-                    reply_token = rresp.get("nextPageToken")
-                    if not reply_token:
-                        break
+            count += await self._save_comments(video, to_save, conn, only_inserted=incremental)
+
+            if incremental:
+                changed = {cid: n for cid, n in reply_totals.items() if n and stored.get(cid) != n}
+            else:
+                changed = {cid: n for cid, n in reply_totals.items() if n}
+
+            for parent_id in changed:
+                count += await self._sync_thread_replies(video, parent_id, conn, only_inserted=incremental)
+            if incremental and changed:
+                # Inserts skip existing threads, so refresh their stored totals here
+                await self.comment_repo.update_reply_counts(changed)
 
             page_token = resp.get("nextPageToken")
-            if not page_token:
+            if reached_watermark or not page_token:
                 break
 
+        if newest and (
+            video.comments_watermark_at is None or newest["published_at"] >= video.comments_watermark_at
+        ):
+            video.comments_watermark_at = newest["published_at"]
+            video.comments_watermark_id = newest["comment_id"]
+            await self.session.flush()
+
         return count
 
     # ---- Batch Processing ----
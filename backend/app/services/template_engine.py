@@ -3,9 +3,10 @@ from __future__ import annotations
 import json
 import os
 import re
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
@@ -35,9 +36,121 @@ class RenderResult:
     variables_used: List[str]
 
 
+# ---------------- Compiled templates ----------------
+# A template is compiled once into segments: literal text, a variable, or a
+# conditional holding its own segments. Rendering walks the segments instead
+# of running two regex substitutions with fresh closures per call.
+
+Segment = Union[str, "_Var", "_If"]
+
+
+@dataclass(frozen=True)
+class _Var:
+    name: str
+    path: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class _If:
+    name: str
+    path: Tuple[str, ...]
+    body: Tuple[Segment, ...]
+
+
+def _split_vars(src: str) -> List[Segment]:
+    out: List[Segment] = []
+    pos = 0
+    for m in VAR_RE.finditer(src):
+        if m.start() > pos:
+            out.append(src[pos:m.start()])
+        out.append(_Var(m.group(1), tuple(m.group(1).split("."))))
+        pos = m.end()
+    if pos < len(src):
+        out.append(src[pos:])
+    return out
+
+
+def _resolve(context: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    # Support nested e.g. user.name
+    cur: Any = context
+    for part in path:
+        if isinstance(cur, dict) and part in cur:
+            cur = cur[part]
+        else:
+            return None
+    return cur
+
+
+def _render_segments(segments: Tuple[Segment, ...], context: Dict[str, Any], parts: List[str], used: List[str]) -> None:
+    for seg in segments:
+        if type(seg) is str:
+            parts.append(seg)
+        elif type(seg) is _Var:
+            used.append(seg.name)
+            val = _resolve(context, seg.path)
+            if val is not None:
+                parts.append(str(val))
+        elif _resolve(context, seg.path):
+            _render_segments(seg.body, context, parts, used)
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """A parsed template; `valid`/`invalid` are validate_template's verdict."""
+
+    segments: Tuple[Segment, ...]
+    valid: bool
+    invalid: Tuple[str, ...]
+
+    def render(self, context: Dict[str, Any]) -> RenderResult:
+        parts: List[str] = []
+        used: List[str] = []
+        _render_segments(self.segments, context, parts, used)
+        return RenderResult(text="".join(parts).strip(), variables_used=used)
+
+
+TEMPLATE_COMPILE_CACHE_SIZE = int(os.getenv("TEMPLATE_COMPILE_CACHE_SIZE", "2000"))
+# Keyed by the template string: the dict hashes it once (str caches its hash)
+# and equality rules out collisions
+_compiled: "OrderedDict[str, CompiledTemplate]" = OrderedDict()
+
+
+def compile_template(template: str) -> CompiledTemplate:
+    """Compile (or fetch the cached compilation of) a template.
+
+    Same semantics as the regex rendering it replaces: conditionals don't
+    nest, and variables inside a false conditional are neither rendered nor
+    reported as used.
+    """
+    compiled = _compiled.get(template)
+    if compiled is not None:
+        _compiled.move_to_end(template)
+        return compiled
+    segments: List[Segment] = []
+    pos = 0
+    for m in COND_IF_RE.finditer(template):
+        segments.extend(_split_vars(template[pos:m.start()]))
+        name = m.group(1)
+        segments.append(_If(name, tuple(name.split(".")), tuple(_split_vars(m.group(2)))))
+        pos = m.end()
+    segments.extend(_split_vars(template[pos:]))
+    vars_found = set(VAR_RE.findall(template))
+    invalid = tuple(sorted(v for v in vars_found if v.split(".")[0] not in ALLOWED_VARS))
+    compiled = CompiledTemplate(segments=tuple(segments), valid=not invalid, invalid=invalid)
+    _compiled[template] = compiled
+    while len(_compiled) > TEMPLATE_COMPILE_CACHE_SIZE:
+        _compiled.popitem(last=False)
+    return compiled
+
+
+def is_compiled(template: str) -> bool:
+    return template in _compiled
+
+
 class TemplateEngine:
     """
     - parse_template(template, context): variable replacement, nested keys, and conditionals
+    - render_many(template, contexts): render one template for many contexts
     - get_contextual_suggestion(comment, video): AI suggestion to enrich reply
     - select_template(rule, comment_classification): DB + defaults selection policy
     - validate_template(template): ensure only allowed variables are used
@@ -47,41 +160,13 @@ class TemplateEngine:
     def __init__(self) -> None:
         self._ai = ClaudeService()
 
-    # 1) Parse with variables and simple conditionals
+    # 1) Parse with variables and simple conditionals (compiled once, cached)
     def parse_template(self, template: str, context: Dict[str, Any]) -> RenderResult:
-        def resolve(path: str) -> Any:
-            # Support nested e.g. user.name
-            cur: Any = context
-            for part in path.split("."):
-                if isinstance(cur, dict) and part in cur:
-                    cur = cur[part]
-                else:
-                    return None
-            return cur
-
-        # First handle conditionals
-        def repl_cond(m: re.Match[str]) -> str:
-            var = m.group(1)
-            body = m.group(2)
-            val = resolve(var)
-            return body if val else ""
-
-        out = COND_IF_RE.sub(repl_cond, template)
-        used: List[str] = []
-
-        # Then handle variables
-        def repl_var(m: re.Match[str]) -> str:
-            var = m.group(1)
-            used.append(var)
-            val = resolve(var)
-            if val is None:
-                return ""
-            if isinstance(val, (int, float)):
-                return str(val)
-            return str(val)
+        return compile_template(template).render(context)
 
-        out = VAR_RE.sub(repl_var, out)
-        return RenderResult(text=out.strip(), variables_used=used)
+    def render_many(self, template: str, contexts: Iterable[Dict[str, Any]]) -> List[RenderResult]:
+        compiled = compile_template(template)
+        return [compiled.render(ctx) for ctx in contexts]
 
     # 2) AI suggestion to add to or influence the template
     async def get_contextual_suggestion(
@@ -155,9 +240,8 @@ class TemplateEngine:
 
     # 4) Validate template variables
     def validate_template(self, template: str) -> Tuple[bool, List[str]]:
-        vars_found = set(VAR_RE.findall(template))
-        invalid = [v for v in vars_found if v.split(".")[0] not in ALLOWED_VARS]
-        return (len(invalid) == 0), invalid
+        compiled = compile_template(template)
+        return compiled.valid, list(compiled.invalid)
 
     # 6) Track performance and usage
     async def track_template_usage(
@@ -46,7 +46,11 @@ class UserContextService:
         return [dict(r) for r in rows]
 
     # 2) Build context from history (cached)
-    @async_ttl_cache(ttl_seconds=float(os.getenv("USER_CONTEXT_TTL_SECONDS", "3600")))
+    @async_ttl_cache(
+        ttl_seconds=float(os.getenv("USER_CONTEXT_TTL_SECONDS", "3600")),
+        key_builder=lambda self, db, user_channel_id: ("ctx", user_channel_id),
+        maxsize=10000,
+    )
     async def build_context(self, db: AsyncSession, user_channel_id: str) -> UserContext:
         history = await self.get_user_history(db, user_channel_id, limit=500)
         previous_comments: List[Dict[str, Any]] = [
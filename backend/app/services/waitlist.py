@@ -0,0 +1,44 @@
+"""Waitlist ranking shared by marketing sync and waitlist email campaigns."""
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+
+WAITING_STATUSES = ("waiting", "waiting_list")
+
+
+async def get_waitlist_ranks(
+    session: AsyncSession,
+    user_ids: Optional[Iterable[UUID]] = None,
+) -> Dict[UUID, int]:
+    """Return {user_id: 1-based rank} for waiting users in one ROW_NUMBER() pass.
+
+    Users rank by join time (joined_waiting_list_at, falling back to
+    created_at). Users who are not on the waitlist are absent from the map.
+    Pass user_ids to only return ranks for those users; ranking is still
+    computed over the whole waitlist.
+    """
+    anchor = func.coalesce(User.joined_waiting_list_at, User.created_at)
+    ranked = (
+        select(
+            User.id.label("user_id"),
+            func.row_number().over(order_by=(anchor.asc(), User.id.asc())).label("rank"),
+        )
+        .where(User.access_status.in_(WAITING_STATUSES))
+        .subquery()
+    )
+
+    q = select(ranked.c.user_id, ranked.c.rank)
+    if user_ids is not None:
+        ids = list(user_ids)
+        if not ids:
+            return {}
+        q = q.where(ranked.c.user_id.in_(ids))
+
+    res = await session.execute(q)
+    return {user_id: int(rank) for user_id, rank in res.all()}
@@ -7,7 +7,6 @@ from __future__ import annotations
 
 import re
 import json
-import time
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 from datetime import datetime
@@ -17,6 +16,15 @@ from sqlalchemy import select, and_
 
 from app.models.workflow import Workflow, WorkflowExecution, WorkflowApproval
 from app.models.interaction import Interaction
+from app.services.ai_judgment_cache import (
+    JUDGMENT_TTLS,
+    WORKFLOW_CONDITION,
+    JudgmentCache,
+    current_model,
+    get_judgment_cache,
+    judgment_key,
+    text_signature,
+)
 from app.services.claude_service import ClaudeService
 from app.services.workflow_service import WorkflowService
 
@@ -41,8 +49,12 @@ class WorkflowEngine:
         """
         self._claude = ClaudeService()
         self._workflow_service = WorkflowService()
-        self._ai_cache_ttl = ai_cache_ttl_seconds
-        self._ai_cache: Dict[str, Tuple[float, Tuple[bool, float]]] = {}
+        # Shared across instances and workers (in-process LRU + Redis)
+        self._ai_cache = (
+            get_judgment_cache(WORKFLOW_CONDITION)
+            if ai_cache_ttl_seconds == JUDGMENT_TTLS[WORKFLOW_CONDITION]
+            else JudgmentCache(WORKFLOW_CONDITION, ttl=ai_cache_ttl_seconds)
+        )
         self._metrics = {
             "ai_eval_hits": 0,
             "ai_eval_misses": 0,
@@ -315,17 +327,25 @@ class WorkflowEngine:
         if not prompt:
             return True, 0.5
 
-        # Check cache first
         cache_key = self._build_cache_key(interaction.content, prompt, str(user_id))
-        now = time.time()
-
-        cached = self._ai_cache.get(cache_key)
-        if cached and cached[0] > now:
-            self._metrics["ai_eval_hits"] += 1
-            return cached[1]
-
-        self._metrics["ai_eval_misses"] += 1
+        try:
+            result, hit = await self._ai_cache.get_or_judge(
+                cache_key, lambda: self._judge_ai_condition(db, prompt, interaction, user_id)
+            )
+        except Exception:
+            # On error, return conservative result
+            return False, 0.4
+        self._metrics["ai_eval_hits" if hit else "ai_eval_misses"] += 1
+        return tuple(result)
 
+    async def _judge_ai_condition(
+        self,
+        db: AsyncSession,
+        prompt: str,
+        interaction: Interaction,
+        user_id: UUID,
+    ) -> Tuple[bool, float]:
+        """Ask Claude whether the interaction matches the criteria (uncached)."""
         # Build evaluation prompt
         eval_prompt = f"""You are a classifier evaluating whether an interaction matches specific criteria.
 
@@ -347,28 +367,15 @@ The 'confidence' field indicates your confidence level (0.0 = no confidence, 1.0
 """
 
         # Call Claude API
-        try:
-            response_text = await self._claude.generate_response(
-                db=db,
-                channel_id=str(user_id),  # Use user_id as context
-                comment_text=eval_prompt,
-                channel_name="Workflow Evaluation",
-                video_title="Condition Matching",
-                from_cache=False,
-            )
-
-            # Parse response
-            matches, confidence = self._parse_ai_response(response_text)
-            result = (matches, confidence)
-
-            # Cache the result
-            self._ai_cache[cache_key] = (now + self._ai_cache_ttl, result)
-
-            return result
-
-        except Exception as e:
-            # On error, return conservative result
-            return False, 0.4
+        response_text = await self._claude.generate_response(
+            db=db,
+            channel_id=str(user_id),  # Use user_id as context
+            comment_text=eval_prompt,
+            channel_name="Workflow Evaluation",
+            video_title="Condition Matching",
+            from_cache=False,
+        )
+        return self._parse_ai_response(response_text)
 
     def _parse_ai_response(self, response_text: str) -> Tuple[bool, float]:
         """Parse AI response for match and confidence.
@@ -409,26 +416,11 @@ The 'confidence' field indicates your confidence level (0.0 = no confidence, 1.0
             user_id: User ID for scoping
 
         Returns:
-            Cache key string
+            Stable cache key, identical across processes
         """
-        # Normalize content (similar to rule_evaluator.py)
-        normalized = self._normalize_text(content)
-        tokens = normalized.split()[:12]  # First 12 tokens
-        sig = " ".join(tokens)
-        return f"wf_ai:{user_id}:{hash((sig, prompt[:120]))}"
-
-    @staticmethod
-    def _normalize_text(text: str) -> str:
-        """Normalize text for cache key generation."""
-        t = text.lower()
-        # Remove URLs, mentions, digits
-        t = re.sub(r"https?://\S+|www\.\S+", " ", t)
-        t = re.sub(r"[@#]\w+", " ", t)
-        t = re.sub(r"\d+", " ", t)
-        # Remove punctuation and collapse whitespace
-        t = re.sub(r"[^a-z\s]", " ", t)
-        t = re.sub(r"\s+", " ", t).strip()
-        return t
+        return judgment_key(
+            WORKFLOW_CONDITION, current_model(), user_id, prompt.strip(), text_signature(content or "")
+        )
 
     # ---------- Action Execution ----------
 
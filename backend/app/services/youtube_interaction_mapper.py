@@ -137,7 +137,9 @@ class YouTubeInteractionMapper:
             await self.fan_service.update_fan_from_interaction(
                 fan_id=fan.id,
                 sentiment=enrichment['sentiment'],
-                interaction_date=comment.published_at or datetime.utcnow()
+                interaction_date=comment.published_at or datetime.utcnow(),
+                priority_score=enrichment['priority_score'],
+                platform='youtube'
             )
         
         logger.info(f"Mapped YouTube comment {comment.comment_id} to interaction {interaction.id}")
@@ -5,8 +5,12 @@ get_video_comments, reply_to_comment, trigger_manual_sync.
 """
 from __future__ import annotations
 
+import csv
+import io
+import json
+import zlib
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 from uuid import UUID
 
 from sqlalchemy import and_, desc, select, func, exists
@@ -27,6 +31,54 @@ from app.utils.cache import async_ttl_cache
 READONLY_SCOPES = ["https://www.googleapis.com/auth/youtube.readonly"]
 WRITE_SCOPES = ["https://www.googleapis.com/auth/youtube.force-ssl"]
 
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    "video_id",
+    "video_title",
+    "comment_id",
+    "parent_comment_id",
+    "author_name",
+    "author_channel_id",
+    "content",
+    "published_at",
+    "like_count",
+    "reply_count",
+]
+
+
+def _export_row(r: Any) -> list[Any]:
+    (
+        comment_id,
+        parent_comment_id,
+        author_name,
+        author_channel_id,
+        content,
+        published_at,
+        like_count,
+        reply_count,
+        video_id,
+        video_title,
+    ) = r
+    return [
+        video_id,
+        video_title,
+        comment_id,
+        parent_comment_id or "",
+        author_name or "",
+        author_channel_id or "",
+        (content or "").replace("\r\n", " ").replace("\n", " "),
+        published_at.isoformat() if published_at else "",
+        like_count or 0,
+        reply_count or 0,
+    ]
+
+
+def _csv_chunk(rows: Any) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue()
+
 
 class YouTubeService:
     def __init__(self, session: AsyncSession):
@@ -101,8 +153,9 @@ class YouTubeService:
         return bool(deleted)
 
     # ---- Reads ----
-    @async_ttl_cache(15.0, key_builder=lambda self, **kwargs: (
+    @async_ttl_cache(15.0, shared=True, key_builder=lambda self, **kwargs: (
         'get_user_videos',
+        str(kwargs.get('user_id')),
         str(kwargs.get('connection_id')),
         int(kwargs.get('limit', 50)),
         int(kwargs.get('offset', 0)),
@@ -222,8 +275,9 @@ class YouTubeService:
             for c in comments
         ]
 
-    @async_ttl_cache(10.0, key_builder=lambda self, **kwargs: (
+    @async_ttl_cache(10.0, shared=True, key_builder=lambda self, **kwargs: (
         'get_channel_comments',
+        str(kwargs.get('user_id')),
         str(kwargs.get('connection_id')),
         int(kwargs.get('limit', 50)),
         int(kwargs.get('offset', 0)),
@@ -602,26 +656,41 @@ class YouTubeService:
         )
         return int((await self.session.execute(q)).scalar_one())
 
-    async def export_comments_to_csv(
+    # ---- Comment export ----
+    async def user_owns_connection(self, *, user_id: UUID, connection_id: UUID) -> bool:
+        conns = await self.conn_repo.get_user_connections(user_id)
+        return any(c.id == connection_id for c in conns)
+
+    @staticmethod
+    def export_filename(connection_id: UUID, fmt: str = "csv", gzip: bool = False) -> str:
+        ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        ext = "ndjson" if fmt == "ndjson" else "csv"
+        return f"comments-{connection_id}-{ts}.{ext}" + (".gz" if gzip else "")
+
+    @staticmethod
+    def export_media_type(fmt: str = "csv", gzip: bool = False) -> str:
+        # A gzipped export is a .gz file, not a compressed transfer of the CSV,
+        # so it is typed as such rather than sent with Content-Encoding
+        if gzip:
+            return "application/gzip"
+        return "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+
+    async def iter_comment_export(
         self,
         *,
-        user_id: UUID,
         connection_id: UUID,
         include_replies: bool = True,
         since: Optional[datetime] = None,
         until: Optional[datetime] = None,
-    ) -> tuple[str, bytes]:
-        """Export comments to CSV and return (filename, content_bytes)."""
-        # Ownership check
-        conns = await self.conn_repo.get_user_connections(user_id)
-        if not any(c.id == connection_id for c in conns):
-            return ("comments.csv", b"")
-
-        from app.models.youtube import YouTubeVideo, YouTubeComment
-        from io import StringIO
-        import csv
-        import datetime as dt
-
+        fmt: str = "csv",
+        gzip: bool = False,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """Stream a channel's comments as CSV or NDJSON chunks.
+
+        Rows come from a server-side cursor (yield_per), so memory stays at
+        one batch regardless of channel size. Callers must check ownership.
+        """
         q = select(
             YouTubeComment.comment_id,
             YouTubeComment.parent_comment_id,
@@ -642,54 +711,57 @@ class YouTubeService:
             q = q.where(YouTubeComment.published_at.isnot(None), YouTubeComment.published_at >= since)
         if until is not None:
             q = q.where(YouTubeComment.published_at.isnot(None), YouTubeComment.published_at <= until)
-        q = q.order_by(YouTubeComment.published_at)
-
-        rows = (await self.session.execute(q)).all()
-
-        buf = StringIO()
-        writer = csv.writer(buf)
-        writer.writerow([
-            "video_id",
-            "video_title",
-            "comment_id",
-            "parent_comment_id",
-            "author_name",
-            "author_channel_id",
-            "content",
-            "published_at",
-            "like_count",
-            "reply_count",
-        ])
-        for r in rows:
-            (
-                comment_id,
-                parent_comment_id,
-                author_name,
-                author_channel_id,
-                content,
-                published_at,
-                like_count,
-                reply_count,
-                video_id,
-                video_title,
-            ) = r
-            writer.writerow(
-                [
-                    video_id,
-                    video_title,
-                    comment_id,
-                    parent_comment_id or "",
-                    author_name or "",
-                    author_channel_id or "",
-                    (content or "").replace("\r\n", " ").replace("\n", " "),
-                    published_at.isoformat() if published_at else "",
-                    like_count or 0,
-                    reply_count or 0,
-                ]
+        q = q.order_by(YouTubeComment.published_at).execution_options(yield_per=batch_size)
+
+        compressor = zlib.compressobj(wbits=31) if gzip else None  # wbits=31 -> gzip container
+
+        def emit(data: bytes) -> bytes:
+            return compressor.compress(data) if compressor else data
+
+        if fmt != "ndjson":
+            yield emit(_csv_chunk([EXPORT_COLUMNS]).encode("utf-8"))
+
+        result = await self.session.stream(q)
+        async for rows in result.partitions():
+            if fmt == "ndjson":
+                chunk = "".join(
+                    json.dumps(dict(zip(EXPORT_COLUMNS, _export_row(r))), ensure_ascii=False) + "\n"
+                    for r in rows
+                )
+            else:
+                chunk = _csv_chunk(_export_row(r) for r in rows)
+            data = emit(chunk.encode("utf-8"))
+            if data:
+                yield data
+
+        if compressor:
+            yield compressor.flush()
+
+    async def export_comments_to_csv(
+        self,
+        *,
+        user_id: UUID,
+        connection_id: UUID,
+        include_replies: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> tuple[str, bytes]:
+        """Export comments to CSV and return (filename, content_bytes).
+
+        Kept for small in-memory exports; prefer iter_comment_export for
+        anything user-facing.
+        """
+        if not await self.user_owns_connection(user_id=user_id, connection_id=connection_id):
+            return ("comments.csv", b"")
+
+        chunks = [
+            chunk
+            async for chunk in self.iter_comment_export(
+                connection_id=connection_id,
+                include_replies=include_replies,
+                since=since,
+                until=until,
             )
+        ]
+        return self.export_filename(connection_id), b"".join(chunks)
 
-        content = buf.getvalue().encode("utf-8")
-        buf.close()
-        ts = dt.datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-        filename = f"comments-{connection_id}-{ts}.csv"
-        return filename, content
@@ -0,0 +1,44 @@
+"""
+Analytics Tasks
+
+Celery tasks for the interaction analytics rollups. Importing this module in
+the worker also registers the rollup flush listeners there.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from app.core.celery import celery_app
+from app.core.database import async_session_maker
+from app.services.interaction_rollups import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="analytics.rebuild_interaction_rollups")
+def rebuild_interaction_rollups(days: int = 2, user_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Recompute the last `days` days of interaction rollups.
+    
+    Rollups are maintained incrementally on write; this pass corrects drift
+    from writes that bypassed the ORM or lacked their previous values.
+    """
+    return asyncio.run(_rebuild_interaction_rollups_async(days, user_id))
+
+
+async def _rebuild_interaction_rollups_async(days: int, user_id: Optional[str]) -> Dict[str, Any]:
+    """Async implementation of the rollup rebuild."""
+    since = (datetime.utcnow() - timedelta(days=max(1, days) - 1)).date()
+    async with async_session_maker() as session:
+        hourly_rows = await rebuild_rollups(
+            session,
+            UUID(user_id) if user_id else None,
+            since=since,
+        )
+        await session.commit()
+    
+    logger.info(f"Rebuilt {hourly_rows} hourly interaction rollups since {since}")
+    return {"since": since.isoformat(), "hourly_rows": hourly_rows}
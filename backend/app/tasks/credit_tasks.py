@@ -1,17 +1,22 @@
 """
 Celery tasks for async credit tracking.
 """
+import asyncio
+import logging
 from typing import Optional, Dict, Any
 from uuid import UUID
 
 from app.core.celery import celery_app
-from app.core.database import get_async_session
+from app.core.database import async_session_maker
+from app.services.credit_metering import dedicated_redis, flush_usage_buffer
 from app.services.credit_service import CreditService
 from app.models.credit_usage import ActionType
 
+logger = logging.getLogger(__name__)
+
 
 @celery_app.task(name="track_credit_usage", ignore_result=True)
-async def track_credit_usage_async(
+def track_credit_usage_async(
     user_id: str,
     action_type: str,
     description: Optional[str] = None,
@@ -29,21 +34,38 @@ async def track_credit_usage_async(
     This runs in the background to avoid slowing down API requests.
     """
     try:
-        async with get_async_session() as db:
-            service = CreditService(db)
-            
-            await service.track_usage(
-                user_id=UUID(user_id),
-                action_type=ActionType(action_type),
-                description=description,
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                model_used=model_used,
-                resource_id=resource_id,
-                resource_type=resource_type,
-                metadata=metadata,
-                manual_credits=manual_credits
-            )
+        asyncio.run(_track_credit_usage(
+            user_id=UUID(user_id),
+            action_type=ActionType(action_type),
+            description=description,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            model_used=model_used,
+            resource_id=resource_id,
+            resource_type=resource_type,
+            metadata=metadata,
+            manual_credits=manual_credits
+        ))
     except Exception as e:
         # Log error but don't fail - credit tracking shouldn't break the app
-        celery_app.logger.error(f"Failed to track credit usage: {e}", exc_info=True)
+        logger.error(f"Failed to track credit usage: {e}", exc_info=True)
+
+
+async def _track_credit_usage(**kwargs: Any) -> None:
+    # Each task runs its own event loop; the shared Redis client can't follow it
+    async with dedicated_redis(), async_session_maker() as db:
+        await CreditService(db).track_usage(**kwargs)
+
+
+@celery_app.task(name="credits.flush_usage", ignore_result=True)
+def flush_credit_usage() -> int:
+    """Write buffered usage events and charge balances in batches."""
+    return asyncio.run(_flush_credit_usage())
+
+
+async def _flush_credit_usage() -> int:
+    async with dedicated_redis(), async_session_maker() as db:
+        written = await flush_usage_buffer(db)
+    if written:
+        logger.info(f"Flushed {written} credit usage events")
+    return written
@@ -15,6 +15,7 @@ from app.core.database import get_async_session_context
 from app.models.user import User
 from app.models.background_job import BackgroundJob
 from app.models.interaction import Interaction
+from app.models.analytics import InteractionAnalytics
 from app.models.content import ContentPiece, ContentTheme
 from app.services.background_jobs import BackgroundJobService
 from app.services.demo_content_seeder import seed_demo_content
@@ -256,6 +257,15 @@ async def _disable_demo_mode_async(user_id: str, job_id: str):
             )
             await db.execute(delete_interactions_stmt)
             
+            # Drop the demo interaction rollups with them
+            await db.execute(
+                delete(InteractionAnalytics).where(
+                    InteractionAnalytics.user_id == user.id,
+                    InteractionAnalytics.is_demo == True,
+                    InteractionAnalytics.view_id.is_(None)
+                )
+            )
+            
             # Delete content pieces (cascade will handle performance & insights)
             delete_content_stmt = delete(ContentPiece).where(
                 ContentPiece.user_id == user.id,
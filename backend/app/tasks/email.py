@@ -13,6 +13,7 @@ from app.core.database import async_session_maker
 from app.models.user import User
 from app.core.celery import celery_app
 from app.core.config import settings
+from app.services.waitlist import get_waitlist_ranks
 
 
 @celery_app.task(name="app.tasks.email.send_email")
@@ -298,19 +299,10 @@ def _launch_email_html(waitlist_position: int | None) -> tuple[str, str]:
     return subject, body
 
 
-async def _get_user_waitlist_position(session, user: User, offset: int = 55) -> int | None:
-    waiting_status = ("waiting", "waiting_list")
-    anchor = user.joined_waiting_list_at or user.created_at
-    if not anchor:
-        return None
-    res = await session.execute(
-        select(func.count()).where(
-            User.access_status.in_(waiting_status),
-            func.coalesce(User.joined_waiting_list_at, User.created_at) <= anchor,
-        )
-    )
-    count_before_or_equal = int(res.scalar() or 0)
-    return 55 + max(count_before_or_equal - 1, 0)
+def _email_waitlist_position(ranks: dict, user: User, offset: int = 55) -> int | None:
+    """Displayed position for waitlist emails: first user gets exactly `offset`."""
+    rank = ranks.get(user.id)
+    return offset + rank - 1 if rank is not None else None
 
 
 def _parse_launch_at() -> datetime:
@@ -389,6 +381,7 @@ async def _send_join_plus_24h_batch(ignore_join_delay: bool, now_utc: datetime,
 
         res = await session.execute(q)
         users = list(res.scalars())
+        ranks = await get_waitlist_ranks(session)
         for u in users:
             try:
                 join_ts = u.joined_waiting_list_at or u.created_at
@@ -396,7 +389,7 @@ async def _send_join_plus_24h_batch(ignore_join_delay: bool, now_utc: datetime,
                     if now_utc < (join_ts + timedelta(hours=24)):
                         continue
                 # Compose and send
-                pos = await _get_user_waitlist_position(session, u)
+                pos = _email_waitlist_position(ranks, u)
                 subject, html = _first_countdown_email_html(launch_at_utc.date().isoformat(), pos)
                 ok = send_email(u.email, subject, html, asm_group_id=getattr(settings, "SENDGRID_ASM_GROUP_ID_WAITLIST", None))
                 if ok:
@@ -426,9 +419,10 @@ async def _send_prelaunch_24h_batch(now_utc: datetime, launch_at_utc: datetime)
         ).order_by(User.joined_waiting_list_at.asc(), User.created_at.asc())
         res = await session.execute(q)
         users = list(res.scalars())
+        ranks = await get_waitlist_ranks(session)
         for u in users:
             try:
-                pos = await _get_user_waitlist_position(session, u)
+                pos = _email_waitlist_position(ranks, u)
                 subject, html = _countdown_email_html(1, pos)
                 ok = send_email(u.email, subject, html, asm_group_id=getattr(settings, "SENDGRID_ASM_GROUP_ID_WAITLIST", None))
                 if ok:
@@ -458,9 +452,10 @@ async def _send_launch_batch(now_utc: datetime, launch_at_utc: datetime) -> dict
         ).order_by(User.joined_waiting_list_at.asc(), User.created_at.asc())
         res = await session.execute(q)
         users = list(res.scalars())
+        ranks = await get_waitlist_ranks(session)
         for u in users:
             try:
-                pos = await _get_user_waitlist_position(session, u)
+                pos = _email_waitlist_position(ranks, u)
                 subject, html = _launch_email_html(pos)
                 ok = send_email(u.email, subject, html, asm_group_id=getattr(settings, "SENDGRID_ASM_GROUP_ID_WAITLIST", None))
                 if ok:
@@ -507,10 +502,11 @@ async def _send_waitlist_batch(kind: str) -> dict:
 
         res = await session.execute(q.order_by(User.joined_waiting_list_at.asc(), User.created_at.asc()))
         users = list(res.scalars())
+        ranks = await get_waitlist_ranks(session)
 
         for u in users:
             try:
-                pos = await _get_user_waitlist_position(session, u)
+                pos = _email_waitlist_position(ranks, u)
                 if kind == "launch":
                     subject, html = _launch_email_html(pos)
                 else:
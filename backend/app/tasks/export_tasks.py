@@ -0,0 +1,102 @@
+"""Celery tasks for large data exports written to object storage."""
+
+import asyncio
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from loguru import logger
+
+from app.core.celery import celery_app
+from app.core.database import get_async_session_context
+from app.models.background_job import BackgroundJob
+from app.services.youtube_service import YouTubeService
+from app.utils.object_storage import presigned_download_url, upload_stream
+
+EXPORT_URL_TTL_SECONDS = 24 * 3600
+
+
+@celery_app.task(
+    name="exports.youtube_comments",
+    time_limit=3600,
+    soft_time_limit=3300,
+)
+def export_youtube_comments_task(
+    job_id: str,
+    user_id: str,
+    connection_id: str,
+    fmt: str = "csv",
+    gzip: bool = True,
+    include_replies: bool = True,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+):
+    """
+    Stream a channel's comments into object storage.
+    
+    Used for exports too large to hold open as an HTTP response. Progress and
+    the download URL are reported through the background job record.
+    """
+    asyncio.run(_export_youtube_comments_async(
+        job_id, user_id, connection_id, fmt, gzip, include_replies, since, until
+    ))
+
+
+async def _export_youtube_comments_async(
+    job_id: str,
+    user_id: str,
+    connection_id: str,
+    fmt: str,
+    gzip: bool,
+    include_replies: bool,
+    since: Optional[str],
+    until: Optional[str],
+):
+    """Async implementation of the comment export job."""
+    async with get_async_session_context() as db:
+        job = await db.get(BackgroundJob, UUID(job_id))
+        if not job:
+            raise ValueError(f"Job {job_id} not found")
+        
+        job.mark_running()
+        await db.commit()
+        
+        try:
+            service = YouTubeService(db)
+            if not await service.user_owns_connection(
+                user_id=UUID(user_id), connection_id=UUID(connection_id)
+            ):
+                raise ValueError("Connection not found")
+            
+            filename = service.export_filename(UUID(connection_id), fmt, gzip)
+            key = f"exports/{user_id}/{filename}"
+            chunks = service.iter_comment_export(
+                connection_id=UUID(connection_id),
+                include_replies=include_replies,
+                since=datetime.fromisoformat(since) if since else None,
+                until=datetime.fromisoformat(until) if until else None,
+                fmt=fmt,
+                gzip=gzip,
+            )
+            size = await upload_stream(
+                key,
+                chunks,
+                content_type=service.export_media_type(fmt, gzip),
+            )
+            url = await presigned_download_url(key, expires_in=EXPORT_URL_TTL_SECONDS)
+            
+            job.mark_completed({
+                "key": key,
+                "filename": filename,
+                "bytes": size,
+                "download_url": url,
+            })
+            await db.commit()
+            logger.info(f"Comment export {job_id} wrote {size} bytes to {key}")
+        
+        except Exception as e:
+            logger.exception(f"Comment export {job_id} failed: {e}")
+            await db.rollback()
+            job.mark_failed(str(e))
+            await db.commit()
+            raise
@@ -0,0 +1,40 @@
+"""
+Fan Tasks
+
+Celery tasks for keeping incrementally maintained fan aggregates honest.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from app.core.celery import celery_app
+from app.core.database import async_session_maker
+from app.services.fan_identification_service import FanIdentificationService
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="fans.reconcile_stats")
+def reconcile_fan_stats(user_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Rebuild fan counters from the interactions table.
+    
+    Counters are bumped at ingest; this periodic pass corrects any drift
+    from deleted interactions or re-enriched sentiment.
+    """
+    return asyncio.run(_reconcile_fan_stats_async(user_id))
+
+
+async def _reconcile_fan_stats_async(user_id: Optional[str] = None) -> Dict[str, Any]:
+    """Async implementation of fan stats reconciliation."""
+    async with async_session_maker() as session:
+        service = FanIdentificationService(session)
+        fans_reconciled = await service.reconcile_fan_stats(
+            UUID(user_id) if user_id else None
+        )
+        await session.commit()
+    
+    logger.info(f"Reconciled stats for {fans_reconciled} fans")
+    return {"fans_reconciled": fans_reconciled}
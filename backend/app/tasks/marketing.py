@@ -2,34 +2,15 @@ from __future__ import annotations
 
 from typing import Dict, Optional
 from loguru import logger
-from sqlalchemy import select, func
+from sqlalchemy import select
 from datetime import datetime
 
 from app.core.celery import celery_app
 from app.core.config import settings
 from app.core.database import async_session_maker
 from app.models.user import User
-from app.services.sendgrid_marketing import marketing_client
-
-
-async def _compute_waitlist_position(session, user: User) -> Optional[int]:
-    """Compute 1-based waitlist rank for a user among waiting statuses by join/create time.
-
-    Returns None if anchor timestamp is missing (unlikely for waitlist users).
-    """
-    waiting_status = ("waiting", "waiting_list")
-    anchor = user.joined_waiting_list_at or user.created_at
-    if not anchor:
-        return None
-    res = await session.execute(
-        select(func.count()).where(
-            User.access_status.in_(waiting_status),
-            func.coalesce(User.joined_waiting_list_at, User.created_at) <= anchor,
-        )
-    )
-    count_before_or_equal = int(res.scalar() or 0)
-    # 1-based rank
-    return max(count_before_or_equal, 1)
+from app.services.sendgrid_marketing import contact_payload, marketing_client
+from app.services.waitlist import get_waitlist_ranks
 
 
 def _build_custom_fields_for_user(
@@ -79,7 +60,7 @@ def sync_contact(email: str) -> bool:
                     logger.warning("sync_contact: user not found for {}", email)
                     return False
                 # Compute waitlist position
-                pos = await _compute_waitlist_position(session, u)
+                pos = (await get_waitlist_ranks(session, [u.id])).get(u.id)
                 fields = _build_custom_fields_for_user(u, waitlist_position=pos)
                 # Attach to list only if user consented
                 list_id = list_id_cfg if bool(getattr(u, "marketing_opt_in", False)) else None
@@ -103,16 +84,25 @@ def sync_all_contacts(limit: int = 1000) -> Dict[str, int]:
             # You can filter here to only waiting list or active users
             res = await session.execute(select(User).order_by(User.created_at.asc()).limit(limit))
             users = list(res.scalars())
+            # One ROW_NUMBER() pass instead of a COUNT per user
+            ranks = await get_waitlist_ranks(session)
             list_id_cfg = getattr(settings, "SENDGRID_MARKETING_LIST_ID", None)
+
+            # list_ids applies to a whole request, so consenting and
+            # non-consenting users go in separate batches
+            opted_in: list[Dict] = []
+            opted_out: list[Dict] = []
             for u in users:
-                pos = await _compute_waitlist_position(session, u)
-                fields = _build_custom_fields_for_user(u, waitlist_position=pos)
-                list_id = list_id_cfg if bool(getattr(u, "marketing_opt_in", False)) else None
-                ok = marketing_client.upsert_contact(u.email, custom_fields=fields.get("custom_fields"), list_id=list_id)
-                if ok:
-                    added += 1
-                else:
-                    failed += 1
+                fields = _build_custom_fields_for_user(u, waitlist_position=ranks.get(u.id))
+                contact = contact_payload(u.email, **fields)
+                (opted_in if bool(getattr(u, "marketing_opt_in", False)) else opted_out).append(contact)
+
+            for contacts, list_id in ((opted_in, list_id_cfg), (opted_out, None)):
+                if not contacts:
+                    continue
+                ok_count = marketing_client.upsert_contacts(contacts, list_id=list_id)
+                added += ok_count
+                failed += len(contacts) - ok_count
 
     import asyncio
     try:
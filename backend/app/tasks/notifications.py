@@ -7,13 +7,15 @@ Celery tasks for detecting notification-worthy events and sending notifications.
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+from uuid import UUID
 
 from celery import shared_task
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, and_, or_, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.celery import celery_app
+from app.core.config import settings
 from app.core.database import async_session_maker
 from app.models.user import User
 from app.models.notification import (
@@ -23,118 +25,149 @@ from app.models.notification import (
 from app.models.creator_tools import NotificationPreference
 from app.models.agency_notification import AgencyNotification
 from app.models.content import ContentPiece, ContentPerformance
-from app.models.fan import Fan
-from app.models.interaction import Interaction
 from app.models.agency_campaign import AgencyCampaign, CampaignDeliverable, AgencyDeal
 from app.models.agency_notification import AgencyTask
-from app.services.notification_service import NotificationService
-from app.services.notification_email_service import render_daily_digest_email
+from app.services.notification_service import NotificationService, CreatorNotificationCandidate
+from app.services.notification_email_service import (
+    render_creator_notification_email,
+    render_daily_digest_email,
+)
 from app.tasks.email import send_email
 
 logger = logging.getLogger(__name__)
 
 
+# =============================================================================
+# Sharding
+# =============================================================================
+
+def _user_shard_filter(column: str, shard: int, shard_count: int) -> Tuple[str, Dict[str, Any]]:
+    """
+    SQL fragment restricting a detector to one contiguous range of user ids.
+    
+    The UUID space is split into shard_count equal ranges so detectors can run
+    in parallel across workers without overlapping.
+    """
+    if shard_count <= 1:
+        return "", {}
+    
+    space = 2 ** 128
+    params: Dict[str, Any] = {"shard_lo": UUID(int=shard * space // shard_count)}
+    fragment = f"AND {column} >= :shard_lo"
+    if shard < shard_count - 1:
+        params["shard_hi"] = UUID(int=(shard + 1) * space // shard_count)
+        fragment += f" AND {column} < :shard_hi"
+    return fragment, params
+
+
+def _fan_out(task) -> bool:
+    """Dispatch one sub-task per user-id shard. Returns False when unsharded."""
+    shard_count = settings.NOTIFICATION_DETECTOR_SHARDS
+    if shard_count <= 1:
+        return False
+    
+    for shard in range(shard_count):
+        task.delay(shard=shard, shard_count=shard_count)
+    return True
+
+
 # =============================================================================
 # Creator Notification Detection Tasks
 # =============================================================================
 
 @celery_app.task(name="notifications.check_engagement_spikes")
-def check_engagement_spikes() -> Dict[str, Any]:
+def check_engagement_spikes(
+    shard: Optional[int] = None, shard_count: Optional[int] = None
+) -> Dict[str, Any]:
     """
     Check for engagement spikes on creator content.
     
     Trigger: Content receives 2x+ average engagement within 24h of posting.
     """
-    return asyncio.run(_check_engagement_spikes_async())
+    if shard is None and _fan_out(check_engagement_spikes):
+        return {"shards_dispatched": settings.NOTIFICATION_DETECTOR_SHARDS}
+    return asyncio.run(_check_engagement_spikes_async(shard or 0, shard_count or 1))
+
+
+# Latest performance per content (DISTINCT ON) for each creator's last 30 days
+# of content, with the creator's average computed by a window over the same set.
+ENGAGEMENT_SPIKES_SQL = """
+    WITH latest_perf AS (
+        SELECT DISTINCT ON (cp.content_id)
+            cp.content_id,
+            c.user_id,
+            c.title,
+            c.published_at,
+            COALESCE(cp.likes, 0) + COALESCE(cp.comments_count, 0) AS engagement
+        FROM content_performance cp
+        JOIN content_pieces c ON c.id = cp.content_id
+        JOIN users u ON u.id = c.user_id
+        WHERE u.is_active = true
+          AND u.account_type = 'creator'
+          AND c.published_at >= :baseline_cutoff
+          {shard_filter}
+        ORDER BY cp.content_id, cp.last_updated DESC
+    ),
+    scored AS (
+        SELECT
+            *,
+            AVG(engagement) OVER (PARTITION BY user_id) AS average_engagement
+        FROM latest_perf
+    )
+    SELECT user_id, content_id, title, engagement, average_engagement
+    FROM scored
+    WHERE published_at >= :recent_cutoff
+      AND average_engagement > 0
+      AND engagement >= average_engagement * :multiplier
+"""
 
 
-async def _check_engagement_spikes_async() -> Dict[str, Any]:
+async def _check_engagement_spikes_async(shard: int = 0, shard_count: int = 1) -> Dict[str, Any]:
     """Async implementation of engagement spike detection."""
-    notifications_created = 0
-    users_checked = 0
+    now = datetime.utcnow()
+    shard_filter, params = _user_shard_filter("u.id", shard, shard_count)
     
     async with async_session_maker() as session:
         service = NotificationService(session)
         
-        # Get all active creators with connected platforms
-        users_query = select(User).where(
-            User.is_active == True,
-            User.account_type == 'creator',
+        result = await session.execute(
+            text(ENGAGEMENT_SPIKES_SQL.format(shard_filter=shard_filter)),
+            {
+                **params,
+                "baseline_cutoff": now - timedelta(days=30),
+                "recent_cutoff": now - timedelta(hours=24),
+                "multiplier": 2,
+            },
         )
-        result = await session.execute(users_query)
-        users = list(result.scalars().all())
         
-        for user in users:
-            users_checked += 1
-            try:
-                # Get content posted in last 24 hours
-                cutoff = datetime.utcnow() - timedelta(hours=24)
-                content_query = select(ContentPiece).where(
-                    ContentPiece.user_id == user.id,
-                    ContentPiece.published_at >= cutoff,
-                )
-                content_result = await session.execute(content_query)
-                recent_content = list(content_result.scalars().all())
-                
-                if not recent_content:
-                    continue
-                
-                # Calculate 30-day average engagement
-                avg_query = select(
-                    func.avg(ContentPerformance.likes + ContentPerformance.comments_count)
-                ).join(ContentPiece).where(
-                    ContentPiece.user_id == user.id,
-                    ContentPerformance.recorded_at >= datetime.utcnow() - timedelta(days=30),
-                )
-                avg_result = await session.execute(avg_query)
-                avg_engagement = avg_result.scalar() or 0
-                
-                if avg_engagement == 0:
-                    continue
-                
-                # Check each recent content for spikes
-                for content in recent_content:
-                    # Get latest performance
-                    perf_query = select(ContentPerformance).where(
-                        ContentPerformance.content_id == content.id
-                    ).order_by(ContentPerformance.recorded_at.desc()).limit(1)
-                    perf_result = await session.execute(perf_query)
-                    perf = perf_result.scalar_one_or_none()
-                    
-                    if not perf:
-                        continue
-                    
-                    current_engagement = (perf.likes or 0) + (perf.comments_count or 0)
-                    
-                    # Check if 2x+ average
-                    if current_engagement >= avg_engagement * 2:
-                        notification = await service.create_creator_notification(
-                            user_id=user.id,
-                            notification_type="engagement_spike",
-                            title="Engagement Spike Detected!",
-                            message=f"Your content is getting {current_engagement / avg_engagement:.1f}x more engagement than average!",
-                            priority="high",
-                            action_url=f"/analytics?content={content.id}",
-                            action_label="View Analytics",
-                            entity_type="content",
-                            entity_id=content.id,
-                            data={
-                                "content_title": content.title,
-                                "current_engagement": current_engagement,
-                                "average_engagement": avg_engagement,
-                                "multiplier": current_engagement / avg_engagement,
-                            },
-                            dedup_hours=24,
-                        )
-                        if notification:
-                            notifications_created += 1
-                            
-            except Exception as e:
-                logger.error(f"Error checking engagement for user {user.id}: {e}")
+        candidates = []
+        for row in result.mappings():
+            current_engagement = row["engagement"]
+            avg_engagement = float(row["average_engagement"])
+            candidates.append(CreatorNotificationCandidate(
+                user_id=row["user_id"],
+                notification_type="engagement_spike",
+                title="Engagement Spike Detected!",
+                message=f"Your content is getting {current_engagement / avg_engagement:.1f}x more engagement than average!",
+                priority="high",
+                action_url=f"/analytics?content={row['content_id']}",
+                action_label="View Analytics",
+                entity_type="content",
+                entity_id=row["content_id"],
+                data={
+                    "content_title": row["title"],
+                    "current_engagement": current_engagement,
+                    "average_engagement": avg_engagement,
+                    "multiplier": current_engagement / avg_engagement,
+                },
+                dedup_hours=24,
+            ))
+        
+        created = await service.create_many(candidates)
     
     return {
-        "users_checked": users_checked,
-        "notifications_created": notifications_created,
+        "candidates": len(candidates),
+        "notifications_created": len(created),
     }
 
 
@@ -209,161 +242,165 @@ async def _check_content_milestones_async() -> Dict[str, Any]:
 
 
 @celery_app.task(name="notifications.check_superfans")
-def check_superfans() -> Dict[str, Any]:
+def check_superfans(
+    shard: Optional[int] = None, shard_count: Optional[int] = None
+) -> Dict[str, Any]:
     """
     Check for new superfans (top 5% engagers).
     """
-    return asyncio.run(_check_superfans_async())
+    if shard is None and _fan_out(check_superfans):
+        return {"shards_dispatched": settings.NOTIFICATION_DETECTOR_SHARDS}
+    return asyncio.run(_check_superfans_async(shard or 0, shard_count or 1))
+
+
+# Ranks every creator's fans by engagement score, takes the top-5% cut-off per
+# creator (creators need 20+ fans for a meaningful threshold) and promotes
+# everyone at or above it in one statement.
+PROMOTE_SUPERFANS_SQL = """
+    WITH ranked AS (
+        SELECT
+            f.id,
+            f.user_id,
+            COALESCE(f.engagement_score, 0) AS score,
+            COALESCE(f.is_superfan, false) AS is_superfan,
+            COUNT(*) OVER (PARTITION BY f.user_id) AS fan_count,
+            ROW_NUMBER() OVER (
+                PARTITION BY f.user_id ORDER BY COALESCE(f.engagement_score, 0) DESC
+            ) AS rank
+        FROM fans f
+        JOIN users u ON u.id = f.user_id
+        WHERE u.is_active = true
+          AND u.account_type = 'creator'
+          AND f.is_demo = false
+          {shard_filter}
+    ),
+    thresholds AS (
+        SELECT user_id, score AS threshold
+        FROM ranked
+        WHERE fan_count >= 20
+          AND rank = GREATEST(1, fan_count / 20)
+    )
+    UPDATE fans f
+    SET is_superfan = true, became_superfan_at = :now
+    FROM ranked r
+    JOIN thresholds t ON t.user_id = r.user_id
+    WHERE f.id = r.id
+      AND r.score >= t.threshold
+      AND NOT r.is_superfan
+    RETURNING f.id, f.user_id, f.username, f.name, f.engagement_score
+"""
 
 
-async def _check_superfans_async() -> Dict[str, Any]:
+async def _check_superfans_async(shard: int = 0, shard_count: int = 1) -> Dict[str, Any]:
     """Async implementation of superfan detection."""
-    notifications_created = 0
-    fans_promoted = 0
+    shard_filter, params = _user_shard_filter("u.id", shard, shard_count)
     
     async with async_session_maker() as session:
         service = NotificationService(session)
         
-        # Get all users with fans
-        users_query = select(User.id).where(
-            User.is_active == True,
-            User.account_type == 'creator',
+        result = await session.execute(
+            text(PROMOTE_SUPERFANS_SQL.format(shard_filter=shard_filter)),
+            {**params, "now": datetime.utcnow()},
         )
-        result = await session.execute(users_query)
-        user_ids = [r[0] for r in result.all()]
+        promoted = list(result.mappings())
+        await session.commit()
         
-        for user_id in user_ids:
-            try:
-                # Get all fans for this user
-                fans_query = select(Fan).where(
-                    Fan.user_id == user_id,
-                    Fan.is_demo == False,
-                )
-                fans_result = await session.execute(fans_query)
-                fans = list(fans_result.scalars().all())
-                
-                if len(fans) < 20:  # Need minimum fans for meaningful threshold
-                    continue
-                
-                # Calculate 95th percentile engagement score
-                scores = sorted([f.engagement_score or 0 for f in fans], reverse=True)
-                threshold_idx = max(1, len(scores) // 20)  # Top 5%
-                threshold = scores[threshold_idx - 1]
-                
-                # Find fans that should be promoted to superfan
-                for fan in fans:
-                    if (fan.engagement_score or 0) >= threshold and not fan.is_superfan:
-                        # Promote to superfan
-                        fan.is_superfan = True
-                        fan.became_superfan_at = datetime.utcnow()
-                        fans_promoted += 1
-                        
-                        # Create notification
-                        notification = await service.create_creator_notification(
-                            user_id=user_id,
-                            notification_type="new_superfan",
-                            title="New Superfan Detected!",
-                            message=f"@{fan.username} is now one of your top fans!",
-                            priority="normal",
-                            action_url=f"/fans/{fan.id}",
-                            action_label="View Profile",
-                            entity_type="fan",
-                            entity_id=fan.id,
-                            data={
-                                "fan_username": fan.username,
-                                "fan_name": fan.name,
-                                "engagement_score": fan.engagement_score,
-                            },
-                            dedup_hours=0,  # One-time notification
-                        )
-                        if notification:
-                            notifications_created += 1
-                
-                await session.commit()
-                
-            except Exception as e:
-                logger.error(f"Error checking superfans for user {user_id}: {e}")
+        candidates = [
+            CreatorNotificationCandidate(
+                user_id=fan["user_id"],
+                notification_type="new_superfan",
+                title="New Superfan Detected!",
+                message=f"@{fan['username']} is now one of your top fans!",
+                priority="normal",
+                action_url=f"/fans/{fan['id']}",
+                action_label="View Profile",
+                entity_type="fan",
+                entity_id=fan["id"],
+                data={
+                    "fan_username": fan["username"],
+                    "fan_name": fan["name"],
+                    "engagement_score": fan["engagement_score"],
+                },
+                dedup_hours=0,  # One-time notification
+            )
+            for fan in promoted
+        ]
+        created = await service.create_many(candidates)
     
     return {
-        "fans_promoted": fans_promoted,
-        "notifications_created": notifications_created,
+        "fans_promoted": len(promoted),
+        "notifications_created": len(created),
     }
 
 
 @celery_app.task(name="notifications.check_negative_sentiment")
-def check_negative_sentiment() -> Dict[str, Any]:
+def check_negative_sentiment(
+    shard: Optional[int] = None, shard_count: Optional[int] = None
+) -> Dict[str, Any]:
     """
     Check for negative sentiment spikes (>20% negative in last 24h).
     """
-    return asyncio.run(_check_negative_sentiment_async())
+    if shard is None and _fan_out(check_negative_sentiment):
+        return {"shards_dispatched": settings.NOTIFICATION_DETECTOR_SHARDS}
+    return asyncio.run(_check_negative_sentiment_async(shard or 0, shard_count or 1))
+
+
+NEGATIVE_SENTIMENT_SQL = """
+    SELECT
+        i.user_id,
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE i.sentiment = 'negative') AS negative
+    FROM interactions i
+    JOIN users u ON u.id = i.user_id
+    WHERE u.is_active = true
+      AND u.account_type = 'creator'
+      AND i.created_at >= :cutoff
+      AND i.is_demo = false
+      {shard_filter}
+    GROUP BY i.user_id
+    HAVING COUNT(*) >= :min_total
+       AND COUNT(*) FILTER (WHERE i.sentiment = 'negative') > COUNT(*) * :ratio
+"""
 
 
-async def _check_negative_sentiment_async() -> Dict[str, Any]:
+async def _check_negative_sentiment_async(shard: int = 0, shard_count: int = 1) -> Dict[str, Any]:
     """Async implementation of sentiment spike detection."""
-    notifications_created = 0
+    shard_filter, params = _user_shard_filter("u.id", shard, shard_count)
     
     async with async_session_maker() as session:
         service = NotificationService(session)
-        cutoff = datetime.utcnow() - timedelta(hours=24)
         
-        # Get users with recent interactions
-        users_query = select(User.id).where(
-            User.is_active == True,
-            User.account_type == 'creator',
+        result = await session.execute(
+            text(NEGATIVE_SENTIMENT_SQL.format(shard_filter=shard_filter)),
+            {
+                **params,
+                "cutoff": datetime.utcnow() - timedelta(hours=24),
+                "min_total": 10,  # Minimum threshold
+                "ratio": 0.2,
+            },
         )
-        result = await session.execute(users_query)
-        user_ids = [r[0] for r in result.all()]
         
-        for user_id in user_ids:
-            try:
-                # Count total interactions in last 24h
-                total_query = select(func.count()).select_from(Interaction).where(
-                    Interaction.user_id == user_id,
-                    Interaction.created_at >= cutoff,
-                    Interaction.is_demo == False,
-                )
-                total_result = await session.execute(total_query)
-                total = total_result.scalar() or 0
-                
-                if total < 10:  # Minimum threshold
-                    continue
-                
-                # Count negative sentiment interactions
-                negative_query = select(func.count()).select_from(Interaction).where(
-                    Interaction.user_id == user_id,
-                    Interaction.created_at >= cutoff,
-                    Interaction.is_demo == False,
-                    Interaction.sentiment == 'negative',
-                )
-                negative_result = await session.execute(negative_query)
-                negative = negative_result.scalar() or 0
-                
-                # Check if >20% negative
-                if negative / total > 0.2:
-                    notification = await service.create_creator_notification(
-                        user_id=user_id,
-                        notification_type="negative_sentiment_spike",
-                        title="Negative Sentiment Alert",
-                        message=f"{int(negative/total*100)}% of recent comments have negative sentiment. You may want to review them.",
-                        priority="high",
-                        action_url="/interactions?sentiment=negative",
-                        action_label="Review Comments",
-                        entity_type=None,
-                        entity_id=None,
-                        data={
-                            "total_comments": total,
-                            "negative_comments": negative,
-                            "percentage": negative / total * 100,
-                        },
-                        dedup_hours=24,  # One per day max
-                    )
-                    if notification:
-                        notifications_created += 1
-                        
-            except Exception as e:
-                logger.error(f"Error checking sentiment for user {user_id}: {e}")
+        candidates = [
+            CreatorNotificationCandidate(
+                user_id=row["user_id"],
+                notification_type="negative_sentiment_spike",
+                title="Negative Sentiment Alert",
+                message=f"{int(row['negative'] / row['total'] * 100)}% of recent comments have negative sentiment. You may want to review them.",
+                priority="high",
+                action_url="/interactions?sentiment=negative",
+                action_label="Review Comments",
+                data={
+                    "total_comments": row["total"],
+                    "negative_comments": row["negative"],
+                    "percentage": row["negative"] / row["total"] * 100,
+                },
+                dedup_hours=24,  # One per day max
+            )
+            for row in result.mappings()
+        ]
+        created = await service.create_many(candidates)
     
-    return {"notifications_created": notifications_created}
+    return {"notifications_created": len(created)}
 
 
 # =============================================================================
@@ -621,6 +658,60 @@ async def _check_task_deadlines_async() -> Dict[str, Any]:
     }
 
 
+# =============================================================================
+# Instant Email Task
+# =============================================================================
+
+@celery_app.task(name="notifications.send_instant_emails")
+def send_instant_notification_emails(notification_ids: List[str]) -> Dict[str, Any]:
+    """
+    Send instant emails for a batch of creator notifications.
+    
+    Enqueued by NotificationService.create_many so notification creation
+    never waits on user lookups or email rendering.
+    """
+    return asyncio.run(_send_instant_notification_emails_async(notification_ids))
+
+
+async def _send_instant_notification_emails_async(notification_ids: List[str]) -> Dict[str, Any]:
+    """Async implementation of batched instant email sending."""
+    sent_ids = []
+    errors = 0
+    
+    async with async_session_maker() as session:
+        query = select(CreatorNotification, User).join(
+            User, User.id == CreatorNotification.user_id
+        ).where(
+            CreatorNotification.id.in_([UUID(i) for i in notification_ids]),
+            CreatorNotification.email_sent == False,
+        )
+        result = await session.execute(query)
+        
+        for notification, user in result.all():
+            if not user.email:
+                continue
+            try:
+                subject, html = render_creator_notification_email(notification, user)
+                send_email.delay(user.email, subject, html)
+                sent_ids.append(notification.id)
+            except Exception as e:
+                logger.error(f"Failed to send instant email for notification {notification.id}: {e}")
+                errors += 1
+        
+        if sent_ids:
+            await session.execute(
+                update(CreatorNotification)
+                .where(CreatorNotification.id.in_(sent_ids))
+                .values(email_sent=True, email_sent_at=datetime.utcnow())
+            )
+            await session.commit()
+    
+    return {
+        "emails_sent": len(sent_ids),
+        "errors": errors,
+    }
+
+
 # =============================================================================
 # Daily Digest Task
 # =============================================================================
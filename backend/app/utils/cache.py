@@ -1,55 +1,266 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import hashlib
+import pickle
 import time
-from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
 
+from loguru import logger
 
-class _TTLCache:
-    def __init__(self) -> None:
-        self._store: Dict[Hashable, Tuple[float, Any]] = {}
-        self._lock = asyncio.Lock()
+_MISSING = object()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale_hits: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    l2_hits: int = 0
+    l2_errors: int = 0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class _RedisTier:
+    """Optional shared L2 tier so every worker sees the same cached results.
+
+    Values are pickled; keys are namespaced per cache and hashed, so only this
+    module reads what it writes.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._prefix = f"atc:{name}:"
+        self._client = None
+
+    def _redis(self):
+        if self._client is None:
+            import redis.asyncio as redis
+
+            from app.core.config import settings
+
+            self._client = redis.from_url(settings.REDIS_CACHE_URL, decode_responses=False)
+        return self._client
+
+    def _key(self, key: Hashable) -> str:
+        return self._prefix + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
 
     async def get(self, key: Hashable) -> Any:
-        async with self._lock:
-            now = time.time()
-            item = self._store.get(key)
-            if not item:
-                return None
-            exp, val = item
-            if now >= exp:
-                self._store.pop(key, None)
-                return None
-            return val
+        raw = await self._redis().get(self._key(key))
+        return _MISSING if raw is None else pickle.loads(raw)
 
     async def set(self, key: Hashable, value: Any, ttl: float) -> None:
-        async with self._lock:
-            self._store[key] = (time.time() + max(0.0, ttl), value)
+        await self._redis().set(self._key(key), pickle.dumps(value), px=max(1, int(ttl * 1000)))
+
+    async def delete(self, key: Hashable) -> None:
+        await self._redis().delete(self._key(key))
+
+
+class AsyncLRUCache:
+    """Bounded in-process cache for async loaders.
+
+    - LRU eviction once `maxsize` entries are held; expired entries are swept
+      from the cold end on every write.
+    - Concurrent misses for one key share a single loader call.
+    - None results are cached for `negative_ttl` seconds.
+    - With `stale_ttl`, an expired entry is served for that long while one
+      background call refreshes it. Only use this when the loader does not
+      depend on request-scoped resources such as a DB session.
+    - With `shared=True`, misses consult a Redis L2 before calling the loader.
+
+    Mutations happen between awaits on the event loop, so no lock is needed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        ttl: float,
+        maxsize: int = 1024,
+        negative_ttl: Optional[float] = None,
+        stale_ttl: float = 0.0,
+        shared: bool = False,
+    ) -> None:
+        self.name = name
+        self.ttl = max(0.0, float(ttl))
+        self.maxsize = max(1, int(maxsize))
+        self.negative_ttl = self.ttl if negative_ttl is None else max(0.0, float(negative_ttl))
+        self.stale_ttl = max(0.0, float(stale_ttl))
+        self.stats = CacheStats()
+        self._store: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._refreshing: Set[asyncio.Task] = set()
+        self._l2 = _RedisTier(name) if shared else None
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def _put(self, key: Hashable, value: Any, now: float) -> None:
+        ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0:
+            return
+        self._store[key] = _Entry(value, now + ttl, now + ttl + self.stale_ttl)
+        self._store.move_to_end(key)
+        # Sweep expired entries from the least recently used end
+        while self._store:
+            oldest_key, oldest = next(iter(self._store.items()))
+            if oldest.stale_until > now:
+                break
+            del self._store[oldest_key]
+            self.stats.expirations += 1
+        while len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def invalidate(self, key: Hashable) -> None:
+        self._store.pop(key, None)
+        if self._l2 is not None:
+            try:
+                await self._l2.delete(key)
+            except Exception as e:  # noqa: BLE001
+                self.stats.l2_errors += 1
+                logger.debug("Cache {} L2 delete failed: {}", self.name, e)
+
+    def clear(self) -> None:
+        self._store.clear()
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Run the loader once per key, sharing the result with concurrent callers."""
+        loop = asyncio.get_running_loop()
+        pending = self._inflight.get(key)
+        # Celery tasks run each job in a fresh event loop; ignore leftovers from old loops
+        if pending is not None and pending.get_loop() is loop:
+            self.stats.coalesced += 1
+            return await asyncio.shield(pending)
+
+        fut: asyncio.Future = loop.create_future()
+        self._inflight[key] = fut
+        try:
+            value = _MISSING
+            if self._l2 is not None:
+                try:
+                    value = await self._l2.get(key)
+                    if value is not _MISSING:
+                        self.stats.l2_hits += 1
+                except Exception as e:  # noqa: BLE001
+                    self.stats.l2_errors += 1
+                    logger.debug("Cache {} L2 get failed: {}", self.name, e)
+            if value is _MISSING:
+                value = await loader()
+                if self._l2 is not None:
+                    ttl = self.negative_ttl if value is None else self.ttl
+                    try:
+                        if ttl > 0:
+                            await self._l2.set(key, value, ttl)
+                    except Exception as e:  # noqa: BLE001
+                        self.stats.l2_errors += 1
+                        logger.debug("Cache {} L2 set failed: {}", self.name, e)
+            self._put(key, value, time.monotonic())
+            fut.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            # Mark retrieved so a failure nobody waited on isn't logged as unhandled
+            fut.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        entry = self._store.get(key)
+        if entry is not None:
+            if now < entry.fresh_until:
+                self._store.move_to_end(key)
+                self.stats.hits += 1
+                return entry.value
+            if now < entry.stale_until:
+                self._store.move_to_end(key)
+                self.stats.stale_hits += 1
+                if key not in self._inflight:
+                    task = asyncio.create_task(self._load(key, loader))
+                    self._refreshing.add(task)
+                    task.add_done_callback(self._refresh_done)
+                return entry.value
+            del self._store[key]
+            self.stats.expirations += 1
 
+        self.stats.misses += 1
+        return await self._load(key, loader)
 
-_cache = _TTLCache()
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._refreshing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Cache {} background refresh failed: {}", self.name, task.exception())
 
 
-def async_ttl_cache(ttl_seconds: float, key_builder: Callable[..., Hashable] | None = None):
-    """Decorator for caching async function results in-process with TTL.
+_caches: Dict[str, AsyncLRUCache] = {}
 
-    Note: process-local only; for multi-worker deployments, prefer Redis.
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Counters for every cache created by async_ttl_cache, keyed by function."""
+    return {name: {**asdict(c.stats), "size": len(c)} for name, c in _caches.items()}
+
+
+def async_ttl_cache(
+    ttl_seconds: float,
+    key_builder: Callable[..., Hashable] | None = None,
+    *,
+    maxsize: int = 1024,
+    negative_ttl: Optional[float] = None,
+    stale_ttl: float = 0.0,
+    shared: bool = False,
+):
+    """Decorator for caching async function results with TTL.
+
+    Each decorated function gets its own bounded AsyncLRUCache; see that class
+    for the single-flight, negative caching, stale-while-revalidate and Redis
+    L2 options. The wrapper exposes `cache`, `await cache_invalidate(*args,
+    **kwargs)` and `cache_clear()` (local tier only).
     """
 
     def deco(fn: Callable[..., Awaitable[Any]]):
-        async def wrapper(*args, **kwargs):
-            key: Hashable
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        cache = AsyncLRUCache(
+            name,
+            ttl=ttl_seconds,
+            maxsize=maxsize,
+            negative_ttl=negative_ttl,
+            stale_ttl=stale_ttl,
+            shared=shared,
+        )
+        _caches[name] = cache
+
+        def build_key(*args, **kwargs) -> Hashable:
             if key_builder:
-                key = key_builder(*args, **kwargs)
-            else:
-                key = (fn.__module__, fn.__qualname__, args, frozenset(kwargs.items()))
-            cached = await _cache.get(key)
-            if cached is not None:
-                return cached
-            val = await fn(*args, **kwargs)
-            await _cache.set(key, val, ttl_seconds)
-            return val
+                return key_builder(*args, **kwargs)
+            return (fn.__module__, fn.__qualname__, args, frozenset(kwargs.items()))
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await cache.get_or_load(build_key(*args, **kwargs), lambda: fn(*args, **kwargs))
+
+        async def cache_invalidate(*args, **kwargs) -> None:
+            await cache.invalidate(build_key(*args, **kwargs))
 
+        wrapper.cache = cache  # type: ignore[attr-defined]
+        wrapper.cache_invalidate = cache_invalidate  # type: ignore[attr-defined]
+        wrapper.cache_clear = cache.clear  # type: ignore[attr-defined]
         return wrapper
 
     return deco
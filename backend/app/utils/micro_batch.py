@@ -0,0 +1,260 @@
+"""
+Durable micro-batching over Redis streams.
+
+Work that shares one model call across several items (safety validation,
+batch reply generation, AI classification) is submitted to a MicroBatcher.
+Items go onto a Redis stream, so they survive restarts and every worker
+shares one buffer. Each process runs a background consumer in the stream's
+consumer group. It flushes a batch once it holds `max_batch` items or its
+oldest item has waited `max_wait` seconds, so a lone item doesn't wait for
+another submission.
+
+Processing is at least once, so handlers must be idempotent:
+- Entries are acknowledged only after the handler returns.
+- An entry left unacknowledged (handler error, crashed worker, or an id the
+  handler asked to retry) is reclaimed after `visibility_timeout`.
+- After `max_deliveries` attempts it moves to the `<stream>:dead` stream.
+
+If Redis is unavailable, submit() runs the handler inline on the one item.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from app.core.cache import redis_client
+
+GROUP = "workers"
+
+
+@dataclass
+class BatchItem:
+    id: str
+    data: Dict[str, Any]
+    deliveries: int = 1
+
+
+# Returns the ids of items to retry; None or empty when all are done
+BatchHandler = Callable[[List[BatchItem]], Awaitable[Optional[Iterable[str]]]]
+
+_BATCHERS: Dict[str, "MicroBatcher"] = {}
+
+
+class MicroBatcher:
+    """One named batch stream and its handler; see the module docstring."""
+
+    def __init__(
+        self,
+        name: str,
+        handler: BatchHandler,
+        *,
+        max_batch: int = 10,
+        max_wait: float = 5.0,
+        visibility_timeout: float = 120.0,
+        max_deliveries: int = 5,
+        max_len: int = 100_000,
+    ) -> None:
+        self.name = name
+        self.handler = handler
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.05, float(max_wait))
+        self.visibility_timeout = max(self.max_wait, float(visibility_timeout))
+        self.max_deliveries = max(1, int(max_deliveries))
+        self.max_len = max_len
+        self.stream = f"microbatch:{name}"
+        self.dead_letter = f"{self.stream}:dead"
+        self._consumer = f"{socket.gethostname()}:{os.getpid()}"
+        self._group_ready = False
+        self._stopping: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        _BATCHERS[name] = self
+
+    # ---------------- Producing ----------------
+
+    async def submit(self, data: Dict[str, Any]) -> None:
+        """Queue one JSON-serializable item for the next batch."""
+        try:
+            await redis_client.xadd(
+                self.stream,
+                {"data": json.dumps(data, default=str)},
+                maxlen=self.max_len,
+                approximate=True,
+            )
+        except Exception as e:
+            logger.warning(f"Micro-batch stream {self.stream} unavailable, processing inline: {e}")
+            await self.process_now([data])
+
+    async def process_now(self, items: List[Dict[str, Any]]) -> None:
+        """Run the handler on these items directly, bypassing the stream."""
+        batch = [BatchItem(id=f"inline-{i}", data=d) for i, d in enumerate(items)]
+        try:
+            retry = set(await self.handler(batch) or ())
+        except Exception as e:
+            logger.error(f"Micro-batch {self.name} inline handler failed for {len(batch)} items: {e}")
+            return
+        if retry:
+            logger.warning(f"Micro-batch {self.name} inline handler left {len(retry)} items unprocessed")
+
+    # ---------------- Consuming ----------------
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name=f"microbatch:{self.name}")
+
+    async def stop(self) -> None:
+        """Stop consuming after flushing any batch in hand."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            # A blocked read returns within max_wait
+            await asyncio.wait_for(self._task, timeout=self.max_wait + 30)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+
+    def _remaining_wait(self, batch: List[BatchItem]) -> float:
+        """Seconds until the oldest held item is due; max_wait when idle."""
+        if not batch:
+            return self.max_wait
+        # Stream ids start with the append time in milliseconds
+        oldest = min(int(item.id.split("-", 1)[0]) for item in batch) / 1000.0
+        return max(0.0, min(self.max_wait, self.max_wait - (time.time() - oldest)))
+
+    async def _run(self) -> None:
+        batch: List[BatchItem] = []
+        next_reclaim = 0.0
+        while not self._stopping.is_set():
+            try:
+                if not self._group_ready:
+                    await self._ensure_group()
+                if time.monotonic() >= next_reclaim:
+                    batch.extend(await self._reclaim(self.max_batch - len(batch)))
+                    next_reclaim = time.monotonic() + self.visibility_timeout / 2
+                if len(batch) < self.max_batch:
+                    batch.extend(await self._read(self.max_batch - len(batch), self._remaining_wait(batch)))
+                if batch and (len(batch) >= self.max_batch or self._remaining_wait(batch) <= 0):
+                    ready, batch = batch, []
+                    await self._flush(ready)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Micro-batch {self.name} consumer error: {e}")
+                self._group_ready = False
+                await asyncio.sleep(min(self.max_wait, 5.0))
+        if batch:
+            await self._flush(batch)
+
+    async def _ensure_group(self) -> None:
+        try:
+            await redis_client.xgroup_create(self.stream, GROUP, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def _read(self, count: int, wait: float) -> List[BatchItem]:
+        resp = await redis_client.xreadgroup(
+            GROUP,
+            self._consumer,
+            {self.stream: ">"},
+            count=count,
+            block=max(1, int(wait * 1000)),
+        )
+        items: List[BatchItem] = []
+        for _stream, entries in resp or []:
+            items.extend(await self._decode(entries))
+        return items
+
+    async def _reclaim(self, count: int) -> List[BatchItem]:
+        """Take over entries left unacknowledged past the visibility timeout."""
+        if count <= 0:
+            return []
+        claimed = await redis_client.xautoclaim(
+            self.stream,
+            GROUP,
+            self._consumer,
+            min_idle_time=int(self.visibility_timeout * 1000),
+            start_id="0-0",
+            count=count,
+        )
+        entries = claimed[1] if claimed and len(claimed) > 1 else []
+        if not entries:
+            return []
+        # Claimed entries now belong to this consumer, next to the few it holds
+        pending = await redis_client.xpending_range(
+            self.stream,
+            GROUP,
+            min=entries[0][0],
+            max=entries[-1][0],
+            count=len(entries) + self.max_batch,
+            consumername=self._consumer,
+        )
+        deliveries = {p["message_id"]: int(p["times_delivered"]) for p in pending}
+        items = await self._decode(entries, deliveries)
+
+        dead = [item for item in items if item.deliveries > self.max_deliveries]
+        if dead:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for item in dead:
+                    pipe.xadd(
+                        self.dead_letter,
+                        {"data": json.dumps(item.data, default=str), "deliveries": item.deliveries},
+                        maxlen=self.max_len,
+                        approximate=True,
+                    )
+                await pipe.execute()
+            await self._ack([item.id for item in dead])
+            logger.error(f"Micro-batch {self.name} dead-lettered {len(dead)} items after {self.max_deliveries} deliveries")
+        return [item for item in items if item.deliveries <= self.max_deliveries]
+
+    async def _decode(self, entries, deliveries: Optional[Dict[str, int]] = None) -> List[BatchItem]:
+        items: List[BatchItem] = []
+        broken: List[str] = []
+        for entry_id, fields in entries:
+            try:
+                data = json.loads((fields or {})["data"])
+            except Exception:
+                # Trimmed from the stream or not ours; nothing to process
+                broken.append(entry_id)
+                continue
+            items.append(BatchItem(id=entry_id, data=data, deliveries=(deliveries or {}).get(entry_id, 1)))
+        if broken:
+            await self._ack(broken)
+        return items
+
+    async def _flush(self, batch: List[BatchItem]) -> None:
+        try:
+            retry = set(await self.handler(batch) or ())
+        except Exception as e:
+            # Left pending; reclaimed after the visibility timeout
+            logger.warning(f"Micro-batch {self.name} handler failed for {len(batch)} items: {e}")
+            return
+        await self._ack([item.id for item in batch if item.id not in retry])
+
+    async def _ack(self, ids: List[str]) -> None:
+        if not ids:
+            return
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.xack(self.stream, GROUP, *ids)
+            pipe.xdel(self.stream, *ids)
+            await pipe.execute()
+
+
+def start_batchers() -> None:
+    """Start a consumer for every registered batcher in this process."""
+    for batcher in _BATCHERS.values():
+        batcher.start()
+
+
+async def stop_batchers() -> None:
+    for batcher in _BATCHERS.values():
+        await batcher.stop()
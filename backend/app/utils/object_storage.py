@@ -0,0 +1,99 @@
+"""S3-compatible object storage helpers (R2/S3 via boto3).
+
+boto3 is synchronous, so every call is pushed to a worker thread to keep the
+event loop free.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterable, Optional
+
+from app.core.config import settings
+
+# S3 rejects multipart parts smaller than 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+def get_s3_client() -> Any:
+    import boto3
+
+    return boto3.client(
+        "s3",
+        endpoint_url=settings.S3_ENDPOINT_URL,
+        region_name=settings.S3_REGION,
+        aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+    )
+
+
+async def upload_stream(
+    key: str,
+    chunks: AsyncIterable[bytes],
+    *,
+    content_type: str = "application/octet-stream",
+    content_encoding: Optional[str] = None,
+    bucket: Optional[str] = None,
+) -> int:
+    """Upload an async byte stream with a multipart upload.
+
+    Only one part (~5 MiB) is buffered at a time. Returns total bytes written.
+    The upload is aborted if the stream raises.
+    """
+    bucket = bucket or settings.S3_BUCKET_NAME
+    client = get_s3_client()
+
+    create_kwargs: dict[str, Any] = {"Bucket": bucket, "Key": key, "ContentType": content_type}
+    if content_encoding:
+        create_kwargs["ContentEncoding"] = content_encoding
+    upload = await asyncio.to_thread(client.create_multipart_upload, **create_kwargs)
+    upload_id = upload["UploadId"]
+
+    parts: list[dict[str, Any]] = []
+    buffer = bytearray()
+    total = 0
+
+    async def flush_part() -> None:
+        part_number = len(parts) + 1
+        resp = await asyncio.to_thread(
+            client.upload_part,
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=bytes(buffer),
+        )
+        parts.append({"ETag": resp["ETag"], "PartNumber": part_number})
+        buffer.clear()
+
+    try:
+        async for chunk in chunks:
+            buffer.extend(chunk)
+            total += len(chunk)
+            if len(buffer) >= MIN_PART_SIZE:
+                await flush_part()
+        if buffer or not parts:
+            await flush_part()
+        await asyncio.to_thread(
+            client.complete_multipart_upload,
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+    except BaseException:
+        await asyncio.to_thread(
+            client.abort_multipart_upload, Bucket=bucket, Key=key, UploadId=upload_id
+        )
+        raise
+
+    return total
+
+
+async def presigned_download_url(key: str, *, expires_in: int = 3600, bucket: Optional[str] = None) -> str:
+    client = get_s3_client()
+    return await asyncio.to_thread(
+        client.generate_presigned_url,
+        "get_object",
+        Params={"Bucket": bucket or settings.S3_BUCKET_NAME, "Key": key},
+        ExpiresIn=expires_in,
+    )
@@ -6,7 +6,7 @@ They manage their own AsyncSession lifecycle and delegate logic to SyncService.
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Dict, Optional
 from uuid import UUID
 
 from loguru import logger
@@ -72,9 +72,10 @@ async def process_incremental_sync(connection_id: UUID, last_sync: Optional[date
 
 
 async def sync_recent_comments(connection_id: UUID) -> int:
-    """Fetch comments for videos from the last 7 days.
+    """Fetch new comments for videos from the last 7 days.
 
-    Returns total comments upserted.
+    Uses incremental comment sync, so each video is only paged back to its
+    stored watermark. Returns total comments inserted in this run.
     """
     logger.info("Starting recent comments sync: {conn}", conn=str(connection_id))
 
@@ -100,13 +101,61 @@ async def sync_recent_comments(connection_id: UUID) -> int:
             videos = res.scalars().all()
 
             for v in videos:
-                total += await service.sync_video_comments(v.video_id)
+                total += await service.sync_video_comments(v.video_id, incremental=True)
 
             await session.commit()
-            logger.info("Recent comments sync complete: {count} comments", count=total)
+            quota = service.api.quota_snapshot()
+            logger.info(
+                "Recent comments sync complete: {count} comments across {videos} videos, quota used {quota} ({ops})",
+                count=total,
+                videos=len(videos),
+                quota=quota["total"],
+                ops=quota["by_operation"],
+            )
             return total
         except Exception as e:  # noqa: BLE001
             logger.exception("Recent comments sync failed for {conn}", conn=str(connection_id))
             raise e
 
     return await _with_session(run)
+
+
+async def sync_connection(connection_id: UUID, last_sync: Optional[datetime]) -> Dict[str, Any]:
+    """Scheduled sync for one connection: new videos, then new comments on recent videos.
+
+    Both steps share one API wrapper so the returned quota is the real cost
+    of the run: {"videos": int, "comments": int, "quota": quota_snapshot()}.
+    """
+
+    async def run(session: AsyncSession) -> Dict[str, Any]:
+        from sqlalchemy import select, desc
+        from app.models.youtube import YouTubeVideo
+
+        service = SyncService(session, connection_id)
+        try:
+            if last_sync:
+                videos = await service.sync_new_videos(last_sync)
+            else:
+                videos = await service.sync_channel_videos()
+
+            seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
+            res = await session.execute(
+                select(YouTubeVideo.video_id)
+                .where(
+                    (YouTubeVideo.channel_id == connection_id)
+                    & (YouTubeVideo.published_at.isnot(None))
+                    & (YouTubeVideo.published_at >= seven_days_ago)
+                )
+                .order_by(desc(YouTubeVideo.published_at))
+            )
+            comments = 0
+            for video_id in res.scalars().all():
+                comments += await service.sync_video_comments(video_id, incremental=True)
+
+            await session.commit()
+            return {"videos": videos, "comments": comments, "quota": service.api.quota_snapshot()}
+        except Exception as e:  # noqa: BLE001
+            logger.exception("Scheduled sync failed for {conn}", conn=str(connection_id))
+            raise e
+
+    return await _with_session(run)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Backfill interaction_analytics rollups from the interactions table.
+
+Rebuilds hourly and daily rollup rows one user at a time so each
+transaction stays small. Safe to re-run; rows in the window are replaced.
+
+Usage: python scripts/backfill_interaction_rollups.py [--days 90] [--user-id UUID]
+       (omit --days to rebuild all history)
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from uuid import UUID
+
+# Add the app directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import select
+
+from app.core.database import async_session_maker
+from app.models.interaction import Interaction
+from app.services.interaction_rollups import rebuild_rollups
+
+
+async def main(days, user_id) -> None:
+    since = (datetime.utcnow() - timedelta(days=days)).date() if days else None
+
+    if user_id:
+        user_ids = [user_id]
+    else:
+        async with async_session_maker() as session:
+            result = await session.execute(select(Interaction.user_id).distinct())
+            user_ids = list(result.scalars().all())
+
+    print(f"Rebuilding rollups for {len(user_ids)} users since {since or 'the beginning'}")
+    started = time.perf_counter()
+    total_rows = 0
+    for i, uid in enumerate(user_ids, 1):
+        async with async_session_maker() as session:
+            rows = await rebuild_rollups(session, uid, since=since)
+            await session.commit()
+        total_rows += rows
+        print(f"[{i}/{len(user_ids)}] {uid}: {rows} hourly rows")
+
+    print(f"Done: {total_rows} hourly rows in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill interaction analytics rollups")
+    parser.add_argument("--days", type=int, default=None, help="only rebuild the last N days")
+    parser.add_argument("--user-id", type=UUID, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.days, args.user_id))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark BatchRuleProcessor throughput against a fake Claude.
+
+Every rule carries an AI condition, and each comment has distinct words so
+the AI cache never hits. The judgment caches are process-wide (and shared
+through Redis when it is configured), so every concurrency level gets its
+own freshly generated comments; otherwise later levels would be served
+from the cache. Each evaluation therefore waits on the fake model's
+injected latency, and throughput should scale with the concurrency limit
+until the work runs out. The AI calls column shows the model calls made
+at each level; it should equal rules x comments. No database or API key
+is used.
+
+Usage: python scripts/benchmark_batch_rule_processor.py [--rules 10] [--comments 40] [--latency-ms 50] [--levels 1,2,4,8,16]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import string
+import sys
+import time
+
+# Add the app directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.batch_rule_processor import BatchRuleProcessor, BatchRuleProcessorConfig
+
+
+class FakeClaude:
+    """Stands in for ClaudeService.generate_response with a fixed delay."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.calls = 0
+
+    async def generate_response(self, **kwargs) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return '{"match": true, "confidence": 0.8}'
+
+
+@contextlib.asynccontextmanager
+async def no_session():
+    yield None
+
+
+def make_rules(n: int):
+    return [
+        {
+            "id": f"rule-{i}",
+            "name": f"Rule {i}",
+            "priority": i % 3,
+            "conditions": [
+                {"type": "comment_length", "op": ">", "value": 5},
+                {"type": "ai", "prompt": f"Is this comment relevant to topic {i}?"},
+            ],
+            "logic": "1 AND 2",
+        }
+        for i in range(n)
+    ]
+
+
+def make_comments(n: int, rng: random.Random):
+    def word() -> str:
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(7))
+
+    return [{"id": f"c{i}", "text": " ".join(word() for _ in range(8))} for i in range(n)]
+
+
+async def run_level(level: int, rules, comments, latency: float):
+    config = BatchRuleProcessorConfig(
+        max_global_concurrency=level,
+        per_rule_concurrency=level,
+        circuit_failure_threshold=10**6,
+    )
+    processor = BatchRuleProcessor(config, session_factory=no_session)
+    fake = FakeClaude(latency)
+    processor._evaluator._claude = fake
+
+    started = time.perf_counter()
+    first = None
+    count = 0
+    async for _ in processor.stream(None, rules=rules, comments=comments):
+        count += 1
+        if first is None:
+            first = time.perf_counter() - started
+    elapsed = time.perf_counter() - started
+    return count, fake.calls, elapsed, first or 0.0
+
+
+async def main(n_rules: int, n_comments: int, latency_ms: float, levels) -> None:
+    rng = random.Random(7)
+    rules = make_rules(n_rules)
+    latency = latency_ms / 1000.0
+
+    print(f"{n_rules} rules x {n_comments} comments, fake model latency {latency_ms:.0f} ms\n")
+    print(f"{'concurrency':<13}{'results':>9}{'AI calls':>10}{'seconds':>10}{'evals/s':>10}{'first ms':>10}{'speedup':>9}")
+    baseline = None
+    for level in levels:
+        # Fresh comments per level so nothing cached by the previous level hits
+        comments = make_comments(n_comments, rng)
+        count, calls, elapsed, first = await run_level(level, rules, comments, latency)
+        rate = count / elapsed if elapsed else 0.0
+        baseline = baseline or rate
+        print(
+            f"{level:<13}{count:>9}{calls:>10}{elapsed:>10.2f}{rate:>10.1f}"
+            f"{first * 1000:>10.1f}{rate / baseline:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure BatchRuleProcessor throughput with a fake model")
+    parser.add_argument("--rules", type=int, default=10)
+    parser.add_argument("--comments", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--levels", default="1,2,4,8,16")
+    args = parser.parse_args()
+    asyncio.run(main(args.rules, args.comments, args.latency_ms, [int(x) for x in args.levels.split(",")]))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark the dashboard summary for one user.
+
+Times two ways of producing the summary and prints p50/p95 latency:
+
+  consolidated  the single CTE statement, bypassing the cache
+  cached        get_dashboard_summary, i.e. the Redis-cached path
+
+It measures the current code only; it is not a before/after comparison
+with the old per-section endpoint.
+
+Usage: python scripts/benchmark_dashboard_summary.py --user-id <uuid> [--iterations 50]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from uuid import UUID
+
+# Add the app directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import app.models  # noqa: F401  (configure all mappers)
+import app.models.monetization_v2  # noqa: F401
+from app.core.cache import CacheKeys, delete_cache
+from app.core.database import async_session_maker
+from app.models.user import User
+from app.services.dashboard_summary import (
+    build_dashboard_summary,
+    get_dashboard_summary,
+)
+
+
+async def consolidated(db, user) -> None:
+    await build_dashboard_summary(db, user)
+
+
+async def cached(db, user) -> None:
+    await get_dashboard_summary(db, user)
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def main(user_id: UUID, iterations: int, warmup: int) -> None:
+    async with async_session_maker() as db:
+        user = await db.get(User, user_id)
+        if user is None:
+            print(f"User {user_id} not found")
+            return
+
+        mode = 'demo' if user.demo_mode_status == 'enabled' else 'real'
+        await delete_cache(CacheKeys.DASHBOARD_SUMMARY.format(user_id=user.id, mode=mode))
+
+        print(f"Dashboard summary for {user.email} ({mode} mode), {iterations} iterations\n")
+        print(f"{'variant':<16}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+
+        for name, run in (('consolidated', consolidated), ('cached', cached)):
+            for _ in range(warmup):
+                await run(db, user)
+            samples = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                await run(db, user)
+                samples.append((time.perf_counter() - started) * 1000)
+            print(
+                f"{name:<16}{percentile(samples, 50):>10.2f}{percentile(samples, 95):>10.2f}"
+                f"{statistics.mean(samples):>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure dashboard summary latency")
+    parser.add_argument("--user-id", type=UUID, required=True)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id, args.iterations, args.warmup))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark compiled template rendering against the old regex path.
+
+The regex path is the former TemplateEngine.parse_template, kept here as
+legacy_parse. It runs COND_IF_RE.sub and VAR_RE.sub with new closures on
+every render. Each template is rendered for many per-comment contexts, three
+ways: legacy, parse_template (a compile cache lookup per call) and
+render_many. Outputs are checked to be identical first. No database or API
+key is used.
+
+Usage: python scripts/benchmark_template_engine.py [--contexts 2000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+# Add the app directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.template_engine import COND_IF_RE, VAR_RE, RenderResult, TemplateEngine
+
+TEMPLATES = [
+    "Thanks {username}!",
+    "Hey {username}, glad you enjoyed {video_title}! {% if channel_name %}- {channel_name}{% endif %}",
+    (
+        "Hi {username}! Thanks for watching {video_title}. "
+        "{% if video_type %}More {video_type} videos are coming soon. {% endif %}"
+        "{% if user.segment %}As a {user.segment} viewer you get early access. {% endif %}"
+        "You said: \"{comment_text}\" - we read every comment. See you on {date}!"
+    ),
+]
+
+
+def legacy_parse(template: str, context) -> RenderResult:
+    def resolve(path: str):
+        cur = context
+        for part in path.split("."):
+            if isinstance(cur, dict) and part in cur:
+                cur = cur[part]
+            else:
+                return None
+        return cur
+
+    def repl_cond(m: re.Match) -> str:
+        return m.group(2) if resolve(m.group(1)) else ""
+
+    out = COND_IF_RE.sub(repl_cond, template)
+    used = []
+
+    def repl_var(m: re.Match) -> str:
+        var = m.group(1)
+        used.append(var)
+        val = resolve(var)
+        return "" if val is None else str(val)
+
+    out = VAR_RE.sub(repl_var, out)
+    return RenderResult(text=out.strip(), variables_used=used)
+
+
+def make_contexts(n: int, rng: random.Random):
+    def word(k: int = 6) -> str:
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(k))
+
+    contexts = []
+    for _ in range(n):
+        ctx = {
+            "username": word(),
+            "video_title": f"{word()} {word()}",
+            "comment_text": " ".join(word() for _ in range(8)),
+            "date": "2026-10-18",
+        }
+        if rng.random() < 0.5:
+            ctx["channel_name"] = word(8)
+        if rng.random() < 0.5:
+            ctx["video_type"] = rng.choice(["tutorial", "vlog", "review"])
+        if rng.random() < 0.3:
+            ctx["user"] = {"segment": rng.choice(["superfan", "new"])}
+        contexts.append(ctx)
+    return contexts
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(n_contexts: int, repeat: int) -> None:
+    engine = TemplateEngine()
+    contexts = make_contexts(n_contexts, random.Random(7))
+
+    for tpl in TEMPLATES:
+        for ctx in contexts:
+            assert engine.parse_template(tpl, ctx) == legacy_parse(tpl, ctx), (tpl, ctx)
+    print(f"outputs identical for {len(TEMPLATES)} templates x {n_contexts} contexts\n")
+
+    print(f"{'template':<10}{'legacy us':>11}{'parse us':>10}{'many us':>9}{'speedup':>9}")
+    for i, tpl in enumerate(TEMPLATES):
+        legacy = timed(lambda: [legacy_parse(tpl, ctx) for ctx in contexts], repeat)
+        parsed = timed(lambda: [engine.parse_template(tpl, ctx) for ctx in contexts], repeat)
+        many = timed(lambda: engine.render_many(tpl, contexts), repeat)
+        per = lambda t: t / n_contexts * 1e6  # noqa: E731
+        print(f"{i:<10}{per(legacy):>11.2f}{per(parsed):>10.2f}{per(many):>9.2f}{legacy / many:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare compiled template rendering with the regex path")
+    parser.add_argument("--contexts", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.contexts, args.repeat)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Check the incremental fan aggregates against an existing fan.
+
+Runs FanIdentificationService.update_fan_from_interaction against a
+stand-in session that records the statements it executes, feeding it
+tz-aware platform timestamps as the interaction mappers do. Checks that the
+fan counters and daily bucket are bumped with naive UTC values in one
+atomic UPDATE each, and that the cached Fan is expired afterwards. No
+database is used.
+
+Usage: python scripts/check_fan_aggregates.py
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+# Add the app directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.fan_identification_service import (
+    BUMP_FAN_DAY_SQL,
+    BUMP_FAN_STATS_SQL,
+    FAN_COUNTER_COLUMNS,
+    FanIdentificationService,
+)
+
+
+class _Session:
+    """Just enough of AsyncSession for update_fan_from_interaction."""
+
+    def __init__(self, fan):
+        self.fan = fan
+        self.statements = []
+        self.expired = []
+        self.identity_map = {("fan", fan.id): fan}
+
+    @staticmethod
+    def identity_key(model, ident):
+        return ("fan", ident)
+
+    async def execute(self, statement, params):
+        self.statements.append((statement.text, params))
+        return SimpleNamespace(rowcount=1 if params["fan_id"] == self.fan.id else 0)
+
+    def expire(self, instance, attribute_names=None):
+        self.expired.append((instance, tuple(attribute_names or ())))
+
+
+async def main() -> None:
+    fan = SimpleNamespace(id=uuid4(), username="viewer")
+    session = _Session(fan)
+    service = FanIdentificationService(session)
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    # Recent comment, tz-aware in a non-UTC offset
+    local = timezone(timedelta(hours=2))
+    newer = (today - timedelta(days=1)).replace(tzinfo=timezone.utc).astimezone(local)
+    await service.update_fan_from_interaction(fan.id, "positive", newer, 80, "youtube")
+    (fan_sql, fan_params), (day_sql, day_params) = session.statements
+    assert fan_sql == BUMP_FAN_STATS_SQL and day_sql == BUMP_FAN_DAY_SQL
+    assert fan_params["at"] == today - timedelta(days=1), fan_params["at"]
+    assert fan_params["at"].tzinfo is None
+    assert (fan_params["positive"], fan_params["neutral"], fan_params["negative"]) == (1, 0, 0)
+    assert fan_params["priority"] == 80 and fan_params["platform"] == "youtube"
+    assert day_params["day"] == (today - timedelta(days=1)).date()
+    assert session.expired == [(fan, FAN_COUNTER_COLUMNS)]
+
+    # Comment older than the window, delivered late: lifetime counters only
+    session.statements.clear()
+    older = (today - timedelta(days=200)).replace(tzinfo=timezone.utc)
+    await service.update_fan_from_interaction(fan.id, "negative", older, None, "instagram")
+    assert len(session.statements) == 1
+    assert session.statements[0][1]["priority"] == 50
+    assert session.statements[0][1]["at"] == today - timedelta(days=200)
+
+    # Naive input still works
+    session.statements.clear()
+    await service.update_fan_from_interaction(fan.id, "neutral", today, 50, None)
+    assert session.statements[0][1]["at"] == today
+    assert session.statements[1][1]["day"] == today.date()
+
+    # Unknown fan: nothing beyond the no-op UPDATE
+    session.statements.clear()
+    await service.update_fan_from_interaction(uuid4(), "positive", today, 50, "youtube")
+    assert len(session.statements) == 1
+
+    print("fan aggregates OK for an existing fan with naive and tz-aware timestamps")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
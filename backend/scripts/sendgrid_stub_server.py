@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the SendGrid Marketing Contacts API.
+
+Accepts PUT /v3/marketing/contacts, logs the batch size and list ids, and
+answers 202 with a fake job_id like SendGrid does. Point the app at it with:
+
+    SENDGRID_API_KEY=dummy SENDGRID_API_HOST=http://127.0.0.1:8025 \
+        python -c "from app.tasks.marketing import sync_all_contacts; print(sync_all_contacts(5000))"
+
+Usage: python scripts/sendgrid_stub_server.py [--port 8025]
+"""
+
+import argparse
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests_seen = 0
+    contacts_seen = 0
+
+    def do_PUT(self):
+        if self.path.rstrip("/") != "/v3/marketing/contacts":
+            self._reply(404, {"errors": [{"message": f"unknown path {self.path}"}]})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._reply(400, {"errors": [{"message": "invalid JSON"}]})
+            return
+
+        contacts = body.get("contacts") or []
+        type(self).requests_seen += 1
+        type(self).contacts_seen += len(contacts)
+        print(
+            f"{time.strftime('%H:%M:%S')} PUT contacts={len(contacts)} "
+            f"list_ids={body.get('list_ids') or []} "
+            f"(total requests={self.requests_seen}, contacts={self.contacts_seen})"
+        )
+        self._reply(202, {"job_id": str(uuid.uuid4())})
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Per-request summary is printed in do_PUT
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), _Handler)
+    print(f"SendGrid stub listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,9 @@ class Settings(BaseSettings):
     # Main App Integration
     MAIN_APP_URL: str
     MAIN_APP_WEBHOOK_SECRET: str
+    WEBHOOK_TIMEOUT: float = 30.0
+    WEBHOOK_MAX_CONCURRENCY: int = 10  # In-flight webhook requests (and pooled connections)
+    WEBHOOK_BATCH_SIZE: int = 50  # Interactions per interactions.batch event
     
     # Database
     DATABASE_URL: str
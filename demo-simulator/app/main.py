@@ -287,18 +287,21 @@ async def generate_initial_content(user_id: str, profile_id: str):
         sent_ids = []
         failed_ids = []
         
-        for idx, interaction in enumerate(interactions):
+        to_send = []
+        payloads = []
+        for interaction in interactions:
             try:
-                payload = interaction.to_webhook_payload()
-                success = await webhook.send_interaction_created(payload)
-                if success:
-                    sent_ids.append(str(interaction.id))
-                else:
-                    failed_ids.append(str(interaction.id))
+                payloads.append(interaction.to_webhook_payload())
+                to_send.append(interaction)
             except Exception as e:
                 logger.error(f"Error sending interaction: {e}")
                 failed_ids.append(str(interaction.id))
         
+        # Batched, concurrent delivery over the pooled client
+        results = await webhook.send_interactions(payloads) if payloads else []
+        for interaction, success in zip(to_send, results):
+            (sent_ids if success else failed_ids).append(str(interaction.id))
+        
         # Now update statuses in database in smaller batches with fresh sessions
         logger.info(f"Updating interaction statuses in database...")
         from sqlalchemy import update as sql_update
@@ -372,6 +375,13 @@ async def startup_event():
     logger.info("Database initialized")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled webhook connections."""
+    from app.services.webhook_sender import WebhookSender
+    await WebhookSender.aclose()
+
+
 @app.get("/")
 async def root():
     """Health check."""
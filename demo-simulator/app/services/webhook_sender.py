@@ -1,17 +1,60 @@
 """Service to send webhook events to main Repruv app."""
+import asyncio
 import logging
+import weakref
 import httpx
 import hmac
 import hashlib
-from typing import Dict
+from typing import Dict, List, Optional
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# One keep-alive client and concurrency limit per event loop. Celery tasks
+# run each job under its own asyncio.run(), and a client cannot be shared
+# across loops, so these are keyed by the running loop.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
 
 class WebhookSender:
-    """Send webhook events to main app."""
+    """Send webhook events to main app.
+
+    Requests go through a pooled keep-alive client, at most
+    WEBHOOK_MAX_CONCURRENCY at a time. Interactions are delivered in
+    interactions.batch events of up to WEBHOOK_BATCH_SIZE.
+    """
+    
+    @staticmethod
+    def _client() -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = _clients.get(loop)
+        if client is None or client.is_closed:
+            limit = max(1, settings.WEBHOOK_MAX_CONCURRENCY)
+            client = httpx.AsyncClient(
+                timeout=settings.WEBHOOK_TIMEOUT,
+                limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit),
+                headers={'User-Agent': 'Repruv-Demo-Simulator/1.0'},
+            )
+            _clients[loop] = client
+        return client
+    
+    @staticmethod
+    def _semaphore() -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = _semaphores.get(loop)
+        if sem is None:
+            sem = asyncio.Semaphore(max(1, settings.WEBHOOK_MAX_CONCURRENCY))
+            _semaphores[loop] = sem
+        return sem
+    
+    @staticmethod
+    async def aclose() -> None:
+        """Close the current event loop's client (call before the loop ends)."""
+        client = _clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
     
     @staticmethod
     async def send_interaction_created(interaction_data: Dict) -> bool:
@@ -33,6 +76,50 @@ class WebhookSender:
         
         return await WebhookSender._send_webhook(webhook_url, payload)
     
+    @staticmethod
+    async def send_interactions(interactions: List[Dict]) -> List[bool]:
+        """
+        Deliver many interactions as interactions.batch webhooks.
+        
+        Batches of WEBHOOK_BATCH_SIZE are sent concurrently. If the main app
+        does not know the batch event, that batch falls back to one
+        interaction.created webhook per interaction.
+        
+        Args:
+            interactions: Interaction payloads
+            
+        Returns:
+            Delivery result for each interaction, in input order
+        """
+        size = max(1, settings.WEBHOOK_BATCH_SIZE)
+        chunks = [interactions[i:i + size] for i in range(0, len(interactions), size)]
+        results = await asyncio.gather(*(WebhookSender._send_interaction_batch(chunk) for chunk in chunks))
+        return [ok for chunk_results in results for ok in chunk_results]
+    
+    @staticmethod
+    async def _send_interaction_batch(interactions: List[Dict]) -> List[bool]:
+        webhook_url = f"{settings.MAIN_APP_URL}/api/v1/webhooks/demo"
+        
+        payload = {
+            'event': 'interactions.batch',
+            'data': {'interactions': interactions},
+        }
+        
+        body = await WebhookSender._post(webhook_url, payload)
+        if body is None:
+            return [False] * len(interactions)
+        
+        results = body.get('results')
+        if isinstance(results, list) and len(results) == len(interactions):
+            # Duplicates count as delivered; rejected items carry an error
+            return [isinstance(r, dict) and not r.get('error') for r in results]
+        
+        # Main app without batch support: send individually over the same pool
+        logger.warning("Main app did not accept interactions.batch - sending individually")
+        return list(await asyncio.gather(
+            *(WebhookSender.send_interaction_created(data) for data in interactions)
+        ))
+    
     @staticmethod
     async def send_content_published(content_data: Dict) -> bool:
         """
@@ -96,6 +183,11 @@ class WebhookSender:
     @staticmethod
     async def _send_webhook(url: str, payload: Dict) -> bool:
         """Send webhook with HMAC signature."""
+        return await WebhookSender._post(url, payload) is not None
+    
+    @staticmethod
+    async def _post(url: str, payload: Dict) -> Optional[Dict]:
+        """Send webhook with HMAC signature; returns the JSON response, or None on failure."""
         try:
             # Create HMAC signature
             signature = WebhookSender._create_signature(payload)
@@ -103,26 +195,29 @@ class WebhookSender:
             headers = {
                 'Content-Type': 'application/json',
                 'X-Demo-Signature': signature,
-                'User-Agent': 'Repruv-Demo-Simulator/1.0',
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
+            async with WebhookSender._semaphore():
+                response = await WebhookSender._client().post(
                     url,
                     json=payload,
                     headers=headers,
                 )
-                
-                if response.status_code == 200:
-                    logger.info(f"Webhook sent successfully: {payload['event']}")
-                    return True
-                else:
-                    logger.error(f"Webhook failed: {response.status_code} - {response.text}")
-                    return False
+            
+            if response.status_code == 200:
+                logger.info(f"Webhook sent successfully: {payload['event']}")
+                try:
+                    body = response.json()
+                except ValueError:
+                    body = None
+                return body if isinstance(body, dict) else {}
+            else:
+                logger.error(f"Webhook failed: {response.status_code} - {response.text}")
+                return None
                     
         except Exception as e:
             logger.error(f"Error sending webhook: {str(e)}")
-            return False
+            return None
     
     @staticmethod
     def _create_signature(payload: Dict) -> str:
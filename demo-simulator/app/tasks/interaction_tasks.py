@@ -184,42 +184,42 @@ async def _send_interactions_async():
         if not interactions:
             return
         
-        webhook = WebhookSender()
         sent_count = 0
         failed_count = 0
         
+        # Build payloads first; one that cannot be built fails on its own
+        to_send = []
+        payloads = []
         for interaction in interactions:
-            interaction_id = None
             try:
-                # Access id within try block to avoid lazy loading issues
-                interaction_id = interaction.id
-                # Convert to webhook payload
-                payload = interaction.to_webhook_payload()
-                
-                # Send webhook
-                success = await webhook.send_interaction_created(payload)
-                
-                if success:
-                    interaction.status = 'sent'
-                    interaction.sent_at = datetime.utcnow()
-                    sent_count += 1
-                else:
-                    interaction.status = 'failed'
-                    interaction.error_message = "Webhook delivery failed"
-                    failed_count += 1
-                
-                await session.commit()
-                
+                payloads.append(interaction.to_webhook_payload())
+                to_send.append(interaction)
             except Exception as e:
-                logger.error(f"Error sending interaction {interaction_id or 'unknown'}: {str(e)}")
-                try:
-                    interaction.status = 'failed'
-                    interaction.error_message = str(e)
-                    await session.commit()
-                except Exception:
-                    pass  # If we can't update the status, just continue
+                logger.error(f"Error building payload for interaction {interaction.id}: {str(e)}")
+                interaction.status = 'failed'
+                interaction.error_message = str(e)
                 failed_count += 1
         
+        try:
+            # Batched, concurrent delivery over the pooled client
+            results = await WebhookSender.send_interactions(payloads) if payloads else []
+        finally:
+            await WebhookSender.aclose()
+        
+        now = datetime.utcnow()
+        for interaction, success in zip(to_send, results):
+            if success:
+                interaction.status = 'sent'
+                interaction.sent_at = now
+                sent_count += 1
+            else:
+                interaction.status = 'failed'
+                interaction.error_message = "Webhook delivery failed"
+                failed_count += 1
+        
+        # One commit for the whole round
+        await session.commit()
+        
         logger.info(f"Sent {sent_count} interactions, {failed_count} failed")
 
 